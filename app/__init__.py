@@ -1,9 +1,6 @@
 # app/__init__.py
 
 import locale
-import logging
-import os
-from logging.handlers import RotatingFileHandler
 
 from flask import Flask, app, flash, redirect, render_template, request, url_for
 from flask_login import LoginManager, current_user
@@ -13,9 +10,15 @@ from flask_wtf.csrf import CSRFError, CSRFProtect
 
 from config import Config
 
+from .agendador import init_agendador
+from .cache import init_cache
+from .commands import register_commands
+from .instrumentacao import init_instrumentacao
+from .registro import init_registro
+from .replica import SessaoRoteada, init_replica
 from .template_filters import format_number
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": SessaoRoteada})
 migrate = Migrate()
 login_manager = LoginManager()
 csrf = CSRFProtect()
@@ -47,6 +50,9 @@ def create_app(config_class=Config, config_overrides=None):
     migrate.init_app(app, db)
     login_manager.init_app(app)
     csrf.init_app(app)
+    init_cache(app)
+    init_instrumentacao(app, db)
+    init_replica(app)
     login_manager.login_view = "auth.login"
     login_manager.login_message_category = "info"
     login_manager.login_message = "Faça login para acessar."
@@ -56,8 +62,10 @@ def create_app(config_class=Config, config_overrides=None):
 
     from app.models.conta_model import Conta
     from app.models.conta_movimento_model import ContaMovimento
+    from app.models.conta_saldo_mensal_model import ContaSaldoMensal
     from app.models.conta_transacao_model import ContaTransacao
     from app.models.crediario_fatura_model import CrediarioFatura
+    from app.models.crediario_fatura_pendencia_model import CrediarioFaturaPendencia
     from app.models.crediario_grupo_model import CrediarioGrupo
     from app.models.crediario_model import Crediario
     from app.models.crediario_movimento_model import CrediarioMovimento
@@ -65,9 +73,11 @@ def create_app(config_class=Config, config_overrides=None):
     from app.models.crediario_subgrupo_model import CrediarioSubgrupo
     from app.models.desp_rec_model import DespRec
     from app.models.desp_rec_movimento_model import DespRecMovimento
+    from app.models.execucao_tarefa_model import ExecucaoTarefa
     from app.models.financiamento_model import Financiamento
     from app.models.financiamento_parcela_model import FinanciamentoParcela
     from app.models.fornecedor_model import Fornecedor
+    from app.models.resumo_mensal_model import ResumoMensal
     from app.models.salario_item_model import SalarioItem
     from app.models.salario_movimento_item_model import SalarioMovimentoItem
     from app.models.salario_movimento_model import SalarioMovimento
@@ -142,47 +152,16 @@ def create_app(config_class=Config, config_overrides=None):
     app.register_blueprint(crediario_subgrupo_bp)
     app.register_blueprint(fornecedor_bp)
 
+    register_commands(app)
+    init_agendador(app)
+
     @app.route("/")
     def index():
         return redirect(url_for("main.dashboard"))
 
-    if not os.path.exists("logs"):
-        os.mkdir("logs")
-
-    file_handler = RotatingFileHandler(
-        "logs/web_finance.log",
-        maxBytes=10240,
-        backupCount=10,
-        encoding="utf-8",
-    )
-    formatter = logging.Formatter(
-        "%(asctime)s - %(levelname)s - %(name)s - %(message)s [in %(pathname)s:%(lineno)d]"
-    )
-    file_handler.setFormatter(formatter)
-    file_handler.setLevel(logging.INFO)
-
-    app.logger.addHandler(file_handler)
-
-    if app.debug or os.environ.get("LOG_TO_STDOUT"):
-        stream_handler = logging.StreamHandler()
-        stream_handler.setFormatter(formatter)
-        stream_handler.setLevel(logging.DEBUG)
-        app.logger.addHandler(stream_handler)
-
-    app.logger.setLevel(logging.INFO)
+    init_registro(app)
     app.logger.info("Web Finance startup")
 
-    @app.after_request
-    def log_response(response):
-        if response.status_code >= 400:
-            user_info = (
-                current_user.login if current_user.is_authenticated else "Anônimo"
-            )
-            app.logger.error(
-                f"Erro na requisição: {response.status_code} {request.method} {request.path} por {user_info}"
-            )
-        return response
-
     @app.context_processor
     def inject_page_config():
         from .utils import PAGE_CONFIG
@@ -193,46 +172,28 @@ def create_app(config_class=Config, config_overrides=None):
 
         return dict(page_config=page_config)
 
+    # Status e usuário de cada resposta já vão para o log de acesso
+    # (app/registro.py), e o Flask registra o traceback das exceções não
+    # tratadas antes de chamar o handler de 500
     @app.errorhandler(404)
     def not_found_error(error):
-        user_info = current_user.login if current_user.is_authenticated else "Anônimo"
-        app.logger.warning(
-            f"Erro 404: Página não encontrada em {request.path} por {user_info}"
-        )
         return render_template("errors/404.html"), 404
 
     @app.errorhandler(500)
     def internal_error(error):
-        user_info = current_user.login if current_user.is_authenticated else "Anônimo"
-        app.logger.error(
-            f"Erro Interno do Servidor (500): {error} na requisição {request.method} {request.path} por {user_info}",
-            exc_info=True,
-        )
         db.session.rollback()
         return render_template("errors/500.html"), 500
 
     @app.errorhandler(CSRFError)
     def handle_csrf_error(e):
-        user_info = current_user.login if current_user.is_authenticated else "Anônimo"
-        app.logger.warning(
-            f"Erro CSRF: {e.description} em {request.path} por {user_info}"
-        )
         return render_template("errors/400.html", reason=e.description), 400
 
     @app.errorhandler(400)
     def bad_request_error(error):
-        user_info = current_user.login if current_user.is_authenticated else "Anônimo"
-        app.logger.warning(
-            f"Erro 400: Requisição inválida em {request.path} por {user_info}"
-        )
         return render_template("errors/400.html"), 400
 
     @app.errorhandler(405)
     def bad_request_error(error):
-        user_info = current_user.login if current_user.is_authenticated else "Anônimo"
-        app.logger.warning(
-            f"Erro 405: Método não permitido em {request.path} por {user_info}"
-        )
         return render_template("errors/405.html"), 405
 
     return app
@@ -0,0 +1,55 @@
+# app/agendador.py
+
+import threading
+from datetime import datetime, timedelta
+
+
+def _segundos_ate(hora, agora=None):
+    agora = agora or datetime.now()
+    proxima = agora.replace(hour=hora, minute=0, second=0, microsecond=0)
+    if proxima <= agora:
+        proxima += timedelta(days=1)
+    return (proxima - agora).total_seconds()
+
+
+def _executar_atrasos(app):
+    from app.services.atraso_service import envelhecer_status_se_pendente
+
+    with app.app_context():
+        try:
+            envelhecer_status_se_pendente()
+        except Exception as e:
+            # O erro já foi registrado pelo serviço; tenta de novo no próximo ciclo
+            app.logger.warning(f"Agendador de atrasos: execução falhou ({e}).")
+
+
+def _laco_atrasos(app, parar):
+    # Espera inicial evita rodar durante comandos curtos (ex.: flask db upgrade)
+    if parar.wait(app.config.get("AGENDADOR_ESPERA_INICIAL", 60)):
+        return
+    while True:
+        _executar_atrasos(app)
+        if parar.wait(_segundos_ate(app.config.get("AGENDADOR_ATRASOS_HORA", 0))):
+            return
+
+
+def init_agendador(app):
+    """
+    Agenda o envelhecimento de status uma vez por dia em uma thread do
+    próprio processo. Fica desligado por padrão (AGENDADOR_ATRASOS=0);
+    em produção prefira `flask obrigacao atualizar-atrasos` no cron. Com
+    vários workers cada um roda o laço, mas só um processa o dia: a
+    execução é reservada em execucao_tarefa antes de alterar os itens.
+    """
+    if not app.config.get("AGENDADOR_ATRASOS"):
+        return None
+    parar = threading.Event()
+    thread = threading.Thread(
+        target=_laco_atrasos,
+        args=(app, parar),
+        name="agendador-atrasos",
+        daemon=True,
+    )
+    thread.start()
+    app.extensions["agendador_atrasos"] = parar
+    return parar
@@ -0,0 +1,148 @@
+# app/cache.py
+
+import threading
+import time
+from collections import OrderedDict
+from importlib import import_module
+
+from flask import current_app
+from sqlalchemy import update
+
+
+class LRUCacheBackend:
+    """Cache em memória do processo, com expiração (TTL) e descarte LRU."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._dados = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, chave):
+        with self._lock:
+            item = self._dados.get(chave)
+            if item is None:
+                return None
+            expira_em, valor = item
+            if expira_em < time.monotonic():
+                del self._dados[chave]
+                return None
+            self._dados.move_to_end(chave)
+            return valor
+
+    def set(self, chave, valor, ttl):
+        with self._lock:
+            self._dados[chave] = (time.monotonic() + ttl, valor)
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.max_entries:
+                self._dados.popitem(last=False)
+
+    def delete(self, chave):
+        with self._lock:
+            self._dados.pop(chave, None)
+
+    def clear(self):
+        with self._lock:
+            self._dados.clear()
+
+
+class NullCacheBackend:
+    """Backend que não armazena nada (útil em testes ou para desativar o cache)."""
+
+    def __init__(self, max_entries=None):
+        pass
+
+    def get(self, chave):
+        return None
+
+    def set(self, chave, valor, ttl):
+        pass
+
+    def delete(self, chave):
+        pass
+
+    def clear(self):
+        pass
+
+
+def init_cache(app):
+    backend = app.config.get("DASHBOARD_CACHE_BACKEND", LRUCacheBackend)
+    if isinstance(backend, str):
+        modulo, _, classe = backend.rpartition(".")
+        backend = getattr(import_module(modulo), classe)
+    if isinstance(backend, type):
+        backend = backend(max_entries=app.config.get("DASHBOARD_CACHE_MAX_ENTRIES", 256))
+    app.extensions["dashboard_cache"] = backend
+
+
+def get_dashboard_cache():
+    return current_app.extensions["dashboard_cache"]
+
+
+def _chave_dashboard(user_id, versao):
+    return f"dashboard:{user_id}:{versao}"
+
+
+# O backend padrão (LRUCacheBackend) é por processo: cada worker do gunicorn
+# e o job de atrasos têm o seu. Por isso a invalidação não apaga entradas, e
+# sim avança Usuario.versao_dashboard no banco, que todos os processos leem;
+# snapshots de versões anteriores deixam de ser encontrados e expiram pelo
+# TTL ou pelo descarte LRU.
+
+
+def get_dashboard_snapshot(user_id, versao, mes_referencia):
+    snapshots = get_dashboard_cache().get(_chave_dashboard(user_id, versao)) or {}
+    return snapshots.get(mes_referencia)
+
+
+def set_dashboard_snapshot(user_id, versao, mes_referencia, snapshot):
+    """
+    `versao` deve ser lida antes de calcular o snapshot: se houver uma
+    invalidação no meio do cálculo, ele fica guardado sob a versão antiga e
+    nunca é servido.
+    """
+    cache = get_dashboard_cache()
+    chave = _chave_dashboard(user_id, versao)
+    snapshots = dict(cache.get(chave) or {})
+    snapshots[mes_referencia] = snapshot
+    cache.set(chave, snapshots, current_app.config.get("DASHBOARD_CACHE_TTL", 120))
+
+
+def _avancar_versao(*criterios):
+    """
+    Grava a nova versão em uma conexão própria, sem passar pela sessão de
+    quem chamou: o que ela tiver pendente não é gravado nem descartado aqui.
+    """
+    from app import db
+    from app.models.usuario_model import Usuario
+
+    with db.engine.begin() as conexao:
+        conexao.execute(
+            update(Usuario.__table__)
+            .where(*criterios)
+            .values(versao_dashboard=Usuario.versao_dashboard + 1)
+        )
+    # Usuários já carregados na sessão releem a versão no próximo acesso
+    for objeto in list(db.session.identity_map.values()):
+        if isinstance(objeto, Usuario):
+            db.session.expire(objeto, ["versao_dashboard"])
+
+
+def invalidar_dashboard(user_id):
+    """Chame depois do commit da alteração, pois grava a nova versão."""
+    from app.models.usuario_model import Usuario
+
+    try:
+        _avancar_versao(Usuario.id == user_id)
+    except Exception as e:
+        current_app.logger.warning(
+            f"Não foi possível invalidar o cache do dashboard do usuário {user_id}: {e}"
+        )
+
+
+def invalidar_todos_dashboards():
+    try:
+        _avancar_versao()
+    except Exception as e:
+        current_app.logger.warning(
+            f"Não foi possível invalidar o cache dos dashboards: {e}"
+        )
@@ -0,0 +1,254 @@
+# app/commands.py
+
+import click
+from flask.cli import AppGroup
+
+salario_cli = AppGroup("salario", help="Manutenção das folhas de pagamento.")
+diagnostico_cli = AppGroup("diagnostico", help="Verificações de desempenho.")
+conta_cli = AppGroup("conta", help="Manutenção das contas bancárias.")
+obrigacao_cli = AppGroup("obrigacao", help="Manutenção das contas a pagar e a receber.")
+resumo_cli = AppGroup("resumo", help="Manutenção do resumo mensal por categoria.")
+
+
+@salario_cli.command("verificar-totais")
+@click.option("--usuario", "user_id", type=int, help="Restringe a um usuário.")
+@click.option("--corrigir", is_flag=True, help="Grava os totais recalculados.")
+def verificar_totais(user_id, corrigir):
+    """Confere os totais gravados nas folhas com a soma das verbas."""
+    from app.services.salario_service import verificar_totais_folhas
+
+    divergencias = verificar_totais_folhas(user_id=user_id, corrigir=corrigir)
+    for movimento, diferencas in divergencias:
+        detalhes = ", ".join(
+            f"{coluna}: {gravado} -> {esperado}"
+            for coluna, (gravado, esperado) in diferencas.items()
+        )
+        click.echo(f"Folha {movimento.id} ({movimento.mes_referencia}): {detalhes}")
+
+    if not divergencias:
+        click.echo("Nenhuma divergência encontrada.")
+    elif corrigir:
+        click.echo(f"{len(divergencias)} folha(s) corrigida(s).")
+    else:
+        click.echo(f"{len(divergencias)} folha(s) com divergência.")
+
+
+@diagnostico_cli.command("planos-consulta")
+@click.option("--usuario", "user_id", type=int, required=True)
+@click.option("--verbose", is_flag=True, help="Mostra o SQL e o plano completo.")
+def planos_consulta(user_id, verbose):
+    """Falha se alguma consulta das telas principais fizer varredura completa."""
+    from app.services.plano_consulta_service import verificar_planos
+
+    problemas = verificar_planos(user_id)
+    for problema in problemas:
+        click.echo(
+            f"{problema['rota']}: varredura completa em {', '.join(problema['tabelas'])}"
+        )
+        if verbose:
+            click.echo(f"  {problema['sql']}")
+            for linha in problema["plano"]:
+                click.echo(f"    {linha}")
+
+    if problemas:
+        raise SystemExit(1)
+    click.echo("Nenhuma varredura completa nas tabelas monitoradas.")
+
+
+@diagnostico_cli.command("gerar-dados")
+@click.option("--semente", type=int, default=42, show_default=True)
+@click.option("--anos", type=int, default=5, show_default=True)
+@click.option("--movimentos-por-mes", type=int, default=60, show_default=True)
+@click.option(
+    "--compras", "compras_crediario", type=int, default=400, show_default=True
+)
+def gerar_dados(semente, anos, movimentos_por_mes, compras_crediario):
+    """Cria um usuário sintético com histórico completo no banco configurado."""
+    from app.services.dados_sinteticos_service import (
+        SENHA_SINTETICA,
+        gerar_usuario_sintetico,
+    )
+
+    try:
+        usuario, resumo = gerar_usuario_sintetico(
+            semente=semente,
+            anos=anos,
+            movimentos_por_mes=movimentos_por_mes,
+            compras_crediario=compras_crediario,
+        )
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    for tabela, quantidade in resumo.items():
+        click.echo(f"{tabela}: {quantidade}")
+    click.echo(
+        f"Usuário {usuario.login} (ID {usuario.id}) criado com a senha "
+        f"'{SENHA_SINTETICA}'."
+    )
+
+
+@diagnostico_cli.command("benchmark")
+@click.option("--semente", type=int, default=42, show_default=True)
+@click.option("--repeticoes", type=int, default=10, show_default=True)
+@click.option(
+    "--linha-base",
+    "caminho_linha_base",
+    type=click.Path(dir_okay=False),
+    default="instance/benchmarks/linha_base.json",
+    show_default=True,
+)
+@click.option(
+    "--salvar", is_flag=True, help="Grava o resultado como nova linha de base."
+)
+@click.option("--tolerancia", type=float, default=0.3, show_default=True)
+def benchmark(semente, repeticoes, caminho_linha_base, salvar, tolerancia):
+    """Mede latência, consultas e memória das páginas críticas em SQLite."""
+    import os
+
+    from app.services.benchmark_service import (
+        carregar_linha_base,
+        comparar_com_linha_base,
+        executar_suite,
+        salvar_linha_base,
+    )
+
+    resultado = executar_suite(semente=semente, repeticoes=repeticoes)
+    dados = ", ".join(f"{tabela}: {n}" for tabela, n in resultado["dados"].items())
+    click.echo(f"Dados gerados ({dados})")
+
+    linha_base = None
+    if os.path.exists(caminho_linha_base):
+        linha_base = carregar_linha_base(caminho_linha_base)
+        comparacao = comparar_com_linha_base(resultado, linha_base, tolerancia)
+    else:
+        comparacao = [
+            {
+                "pagina": nome,
+                "atual": atual,
+                "base": None,
+                "situacao": "nova",
+                "problemas": [],
+            }
+            for nome, atual in resultado["paginas"].items()
+        ]
+
+    for linha in comparacao:
+        atual, base = linha["atual"], linha["base"] or {}
+        click.echo(
+            f"{linha['pagina']:<20} {atual['mediana_ms']:>9.1f} ms "
+            f"(base {base.get('mediana_ms', '-')}) | "
+            f"{atual['consultas']:>4} consultas (base {base.get('consultas', '-')}) | "
+            f"{atual['pico_memoria_kb']:>9.1f} KiB (base {base.get('pico_memoria_kb', '-')}) "
+            f"| {linha['situacao']} {'; '.join(linha['problemas'])}"
+        )
+
+    if salvar:
+        salvar_linha_base(resultado, caminho_linha_base)
+        click.echo(f"Linha de base gravada em {caminho_linha_base}.")
+    elif linha_base and any(l["situacao"] == "regressão" for l in comparacao):
+        raise SystemExit(1)
+
+
+@conta_cli.command("conciliar-saldos")
+@click.option("--usuario", "user_id", type=int, help="Restringe a um usuário.")
+@click.option("--corrigir", is_flag=True, help="Grava os saldos recalculados.")
+def conciliar_saldos(user_id, corrigir):
+    """Confere o saldo atual das contas com o extrato de movimentações."""
+    from app.services.conciliacao_service import conciliar_saldos_contas
+
+    divergencias = conciliar_saldos_contas(user_id=user_id, corrigir=corrigir)
+    for linha in divergencias:
+        click.echo(
+            f"Conta {linha['conta_id']} ({linha['nome_banco']} - {linha['tipo']}, "
+            f"usuário {linha['usuario_id']}): {linha['gravado']} -> "
+            f"{linha['esperado']} (diferença {linha['diferenca']})"
+        )
+
+    if not divergencias:
+        click.echo("Nenhuma divergência encontrada.")
+    elif corrigir:
+        click.echo(f"{len(divergencias)} conta(s) corrigida(s).")
+    else:
+        click.echo(f"{len(divergencias)} conta(s) com divergência.")
+        raise SystemExit(1)
+
+
+@conta_cli.command("gerar-saldos-mensais")
+@click.option("--usuario", "user_id", type=int, help="Restringe a um usuário.")
+@click.option("--recalcular", is_flag=True, help="Regrava também os meses já gravados.")
+def gerar_saldos_mensais(user_id, recalcular):
+    """Grava o saldo final dos meses fechados usado pelo extrato (rodar mensalmente)."""
+    from app.services.conta_saldo_service import gerar_saldos_mensais
+
+    total = gerar_saldos_mensais(user_id=user_id, recalcular=recalcular)
+    click.echo(f"{total} saldo(s) mensal(is) gravado(s).")
+
+
+@obrigacao_cli.command("atualizar-atrasos")
+@click.option(
+    "--data",
+    "hoje",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    help="Data de referência (padrão: hoje).",
+)
+def atualizar_atrasos(hoje):
+    """Marca como Atrasado os itens pendentes já vencidos."""
+    from app.services.atraso_service import envelhecer_status, get_ultima_execucao
+
+    execucao = get_ultima_execucao()
+    if execucao:
+        click.echo(
+            f"Última execução: {execucao.ultima_execucao:%d/%m/%Y %H:%M} "
+            f"(referência {execucao.data_referencia:%d/%m/%Y}, "
+            f"{execucao.itens_atualizados} item(ns))."
+        )
+
+    alterados = envelhecer_status(hoje.date() if hoje else None)
+    for tabela, total in alterados.items():
+        click.echo(f"{tabela}: {total} item(ns) atualizado(s)")
+
+
+@resumo_cli.command("reconstruir")
+@click.option("--usuario", "user_id", type=int, help="Restringe a um usuário.")
+def reconstruir_resumo_mensal(user_id):
+    """Recalcula o resumo mensal a partir das tabelas de origem."""
+    from app.services.resumo_mensal_service import reconstruir_resumo
+
+    total = reconstruir_resumo(user_id=user_id)
+    click.echo(f"{total} linha(s) de resumo gravada(s).")
+
+
+@resumo_cli.command("verificar")
+@click.option("--usuario", "user_id", type=int, help="Restringe a um usuário.")
+@click.option("--corrigir", is_flag=True, help="Reconstrói o resumo se divergir.")
+def verificar_resumo_mensal(user_id, corrigir):
+    """Confere o resumo mensal gravado com o recalculado das tabelas de origem."""
+    from app.services.resumo_mensal_service import (
+        reconstruir_resumo,
+        verificar_resumo,
+    )
+
+    divergencias = verificar_resumo(user_id=user_id)
+    for linha in divergencias:
+        click.echo(
+            f"Usuário {linha['usuario_id']} {linha['mes']:02d}/{linha['ano']} "
+            f"{linha['categoria']} ({linha['tipo_valor']}): "
+            f"{linha['gravado']} -> {linha['esperado']}"
+        )
+
+    if not divergencias:
+        click.echo("Nenhuma divergência encontrada.")
+    elif corrigir:
+        reconstruir_resumo(user_id=user_id)
+        click.echo(f"{len(divergencias)} linha(s) corrigida(s).")
+    else:
+        click.echo(f"{len(divergencias)} linha(s) com divergência.")
+        raise SystemExit(1)
+
+
+def register_commands(app):
+    app.cli.add_command(salario_cli)
+    app.cli.add_command(diagnostico_cli)
+    app.cli.add_command(conta_cli)
+    app.cli.add_command(obrigacao_cli)
+    app.cli.add_command(resumo_cli)
@@ -5,6 +5,7 @@ from decimal import Decimal
 
 from flask_login import current_user
 from flask_wtf import FlaskForm
+from flask_wtf.file import FileAllowed, FileField, FileRequired
 from wtforms import (
     BooleanField,
     DateField,
@@ -30,6 +31,7 @@ from app.models.conta_model import Conta
 from app.models.conta_movimento_model import ContaMovimento
 from app.models.conta_transacao_model import ContaTransacao
 from app.utils import (
+    TIPO_CREDITO,
     TIPO_DEBITO,
     TIPO_MOVIMENTACAO_SIMPLES,
     TIPO_MOVIMENTACAO_TRANSFERENCIA,
@@ -210,3 +212,47 @@ class EditarContaMovimentoForm(FlaskForm):
             .order_by(ContaTransacao.transacao_tipo.asc())
             .all()
         ]
+
+
+class ImportarExtratoForm(FlaskForm):
+    conta_id = SelectField(
+        "Conta Bancária",
+        validators=[DataRequired("A conta é obrigatória.")],
+        coerce=lambda x: int(x) if x else None,
+    )
+    arquivo = FileField(
+        "Arquivo do Extrato (.csv ou .ofx)",
+        validators=[
+            FileRequired("Por favor, selecione um arquivo."),
+            FileAllowed(["csv", "ofx"], "Apenas arquivos .csv ou .ofx são permitidos!"),
+        ],
+    )
+    tipo_credito_id = SelectField(
+        "Tipo padrão para créditos",
+        validators=[DataRequired("O tipo padrão para créditos é obrigatório.")],
+        coerce=lambda x: int(x) if x else None,
+    )
+    tipo_debito_id = SelectField(
+        "Tipo padrão para débitos",
+        validators=[DataRequired("O tipo padrão para débitos é obrigatório.")],
+        coerce=lambda x: int(x) if x else None,
+    )
+    submit = SubmitField("Pré-visualizar")
+
+    def __init__(self, *args, **kwargs):
+        account_choices = kwargs.pop("account_choices", [])
+
+        super().__init__(*args, **kwargs)
+
+        self.conta_id.choices = account_choices
+        tipos = (
+            ContaTransacao.query.filter_by(usuario_id=current_user.id)
+            .order_by(ContaTransacao.transacao_tipo.asc())
+            .all()
+        )
+        self.tipo_credito_id.choices = [("", "Selecione...")] + [
+            (ct.id, ct.transacao_tipo) for ct in tipos if ct.tipo == TIPO_CREDITO
+        ]
+        self.tipo_debito_id.choices = [("", "Selecione...")] + [
+            (ct.id, ct.transacao_tipo) for ct in tipos if ct.tipo == TIPO_DEBITO
+        ]
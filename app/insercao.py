@@ -0,0 +1,34 @@
+# app/insercao.py
+
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app import db
+
+_INSERTS_ON_CONFLICT = {
+    "postgresql": postgresql_insert,
+    "sqlite": sqlite_insert,
+}
+
+
+def comando_inserir_ou_atualizar(modelo, chaves, atualizar):
+    """
+    INSERT que, se a linha com as mesmas `chaves` (restrição única) já
+    existir, aplica `atualizar` na própria linha, em um único comando
+    atômico: ON CONFLICT DO UPDATE (PostgreSQL/SQLite) ou ON DUPLICATE KEY
+    UPDATE (MySQL). `atualizar(tabela, novos)` devolve {coluna: expressão},
+    onde `novos` dá acesso aos valores que seriam inseridos.
+    """
+    tabela = modelo.__table__
+    dialeto = db.session.get_bind().dialect.name
+
+    if dialeto == "mysql":
+        comando = mysql_insert(tabela)
+        return comando.on_duplicate_key_update(**atualizar(tabela, comando.inserted))
+
+    comando = _INSERTS_ON_CONFLICT[dialeto](tabela)
+    return comando.on_conflict_do_update(
+        index_elements=[tabela.c[chave] for chave in chaves],
+        set_=atualizar(tabela, comando.excluded),
+    )
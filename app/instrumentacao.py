@@ -0,0 +1,175 @@
+# app/instrumentacao.py
+
+import re
+import threading
+import time
+from collections import Counter
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+_ESPACOS = re.compile(r"\s+")
+_PARAMETRO = r"\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*"
+_LISTA_PARAMETROS = re.compile(rf"\((?:{_PARAMETRO},)+{_PARAMETRO}\)")
+_LITERAIS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def impressao_digital(sql):
+    """Normaliza o SQL para agrupar execuções do mesmo comando."""
+    sql = _ESPACOS.sub(" ", sql).strip()
+    sql = _LISTA_PARAMETROS.sub("(?, ...)", sql)
+    return _LITERAIS.sub("?", sql)
+
+
+class EstatisticasSQL:
+    """Acumula, por endpoint, o trabalho de banco das requisições do processo."""
+
+    def __init__(self, max_repeticoes_por_endpoint=20):
+        self.max_repeticoes_por_endpoint = max_repeticoes_por_endpoint
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, endpoint, consultas, tempo_ms, repeticoes, alerta):
+        with self._lock:
+            dados = self._endpoints.setdefault(
+                endpoint,
+                {
+                    "requisicoes": 0,
+                    "consultas": 0,
+                    "tempo_ms": 0.0,
+                    "max_consultas": 0,
+                    "max_tempo_ms": 0.0,
+                    "alertas": 0,
+                    "repeticoes": {},
+                },
+            )
+            dados["requisicoes"] += 1
+            dados["consultas"] += consultas
+            dados["tempo_ms"] += tempo_ms
+            dados["max_consultas"] = max(dados["max_consultas"], consultas)
+            dados["max_tempo_ms"] = max(dados["max_tempo_ms"], tempo_ms)
+            dados["alertas"] += int(alerta)
+
+            for sql, quantidade in repeticoes.items():
+                maximo, ocorrencias = dados["repeticoes"].get(sql, (0, 0))
+                if (
+                    not ocorrencias
+                    and len(dados["repeticoes"]) >= self.max_repeticoes_por_endpoint
+                ):
+                    continue
+                dados["repeticoes"][sql] = (max(maximo, quantidade), ocorrencias + 1)
+
+    def resumo(self):
+        with self._lock:
+            linhas = []
+            for endpoint, dados in self._endpoints.items():
+                requisicoes = dados["requisicoes"]
+                linhas.append(
+                    {
+                        "endpoint": endpoint,
+                        "requisicoes": requisicoes,
+                        "consultas": dados["consultas"],
+                        "media_consultas": dados["consultas"] / requisicoes,
+                        "max_consultas": dados["max_consultas"],
+                        "tempo_ms": dados["tempo_ms"],
+                        "media_tempo_ms": dados["tempo_ms"] / requisicoes,
+                        "max_tempo_ms": dados["max_tempo_ms"],
+                        "alertas": dados["alertas"],
+                        "repeticoes": sorted(
+                            (
+                                {
+                                    "sql": sql,
+                                    "maximo": maximo,
+                                    "ocorrencias": ocorrencias,
+                                }
+                                for sql, (maximo, ocorrencias) in dados[
+                                    "repeticoes"
+                                ].items()
+                            ),
+                            key=lambda item: item["maximo"],
+                            reverse=True,
+                        ),
+                    }
+                )
+        return sorted(linhas, key=lambda linha: linha["tempo_ms"], reverse=True)
+
+    def limpar(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+def _antes_da_consulta(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        conn.info.setdefault("inicio_consultas", []).append(time.perf_counter())
+
+
+def _depois_da_consulta(conn, cursor, statement, parameters, context, executemany):
+    if not has_request_context():
+        return
+    inicios = conn.info.get("inicio_consultas")
+    if not inicios:
+        return
+    duracao = time.perf_counter() - inicios.pop()
+
+    dados = g.setdefault(
+        "sql_requisicao", {"consultas": 0, "tempo": 0.0, "sql": Counter()}
+    )
+    dados["consultas"] += 1
+    dados["tempo"] += duracao
+    dados["sql"][impressao_digital(statement)] += 1
+
+
+def _erro_na_consulta(contexto):
+    # Descarta o início da consulta que falhou para não desalinhar a pilha
+    if contexto.connection is not None:
+        inicios = contexto.connection.info.get("inicio_consultas")
+        if inicios:
+            inicios.pop()
+
+
+def _registrar_requisicao(response):
+    dados = g.pop("sql_requisicao", None)
+    if not dados or request.endpoint in (None, "static"):
+        return response
+
+    config = current_app.config
+    tempo_ms = dados["tempo"] * 1000
+    limite = config.get("SQL_LIMITE_REPETICOES", 10)
+    repeticoes = {sql: n for sql, n in dados["sql"].items() if n > limite}
+
+    motivos = []
+    if dados["consultas"] > config.get("SQL_ORCAMENTO_CONSULTAS", 50):
+        motivos.append(f"{dados['consultas']} consultas")
+    if tempo_ms > config.get("SQL_ORCAMENTO_MS", 500):
+        motivos.append(f"{tempo_ms:.0f} ms no banco")
+    if repeticoes:
+        sql, vezes = max(repeticoes.items(), key=lambda item: item[1])
+        motivos.append(f"comando repetido {vezes}x (possível N+1): {sql[:200]}")
+
+    if motivos:
+        current_app.logger.warning(
+            f"Orçamento de banco excedido em {request.method} {request.path} "
+            f"({request.endpoint}): {'; '.join(motivos)}"
+        )
+
+    current_app.extensions["estatisticas_sql"].registrar(
+        request.endpoint, dados["consultas"], tempo_ms, repeticoes, bool(motivos)
+    )
+    return response
+
+
+def init_instrumentacao(app, db):
+    app.extensions["estatisticas_sql"] = EstatisticasSQL()
+    if not app.config.get("SQL_INSTRUMENTACAO", True):
+        return
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, "before_cursor_execute", _antes_da_consulta)
+            event.listen(engine, "after_cursor_execute", _depois_da_consulta)
+            event.listen(engine, "handle_error", _erro_na_consulta)
+    app.after_request(_registrar_requisicao)
+
+
+def get_estatisticas_sql():
+    return current_app.extensions["estatisticas_sql"]
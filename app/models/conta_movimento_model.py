@@ -2,7 +2,7 @@
 
 from datetime import datetime, timezone
 
-from sqlalchemy import Numeric
+from sqlalchemy import Index, Numeric
 
 from app import db
 
@@ -41,5 +41,17 @@ class ContaMovimento(db.Model):
         backref=db.backref("movimentos_associados", lazy="dynamic"),
     )
 
+    __table_args__ = (
+        Index(
+            "ix_conta_movimento_conta_data_id", "conta_id", "data_movimento", "id"
+        ),
+        Index(
+            "ix_conta_movimento_usuario_data_id",
+            "usuario_id",
+            "data_movimento",
+            "id",
+        ),
+    )
+
     def __repr__(self):
         return f"<Movimento ID: {self.id} | Conta: {self.conta_id} | Valor: {self.valor} | Tipo: {self.tipo_transacao.transacao_tipo}>"
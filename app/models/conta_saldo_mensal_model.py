@@ -0,0 +1,34 @@
+# app/models/conta_saldo_mensal_model.py
+
+from datetime import datetime, timezone
+
+from sqlalchemy import Numeric, UniqueConstraint
+
+from app import db
+
+
+class ContaSaldoMensal(db.Model):
+    __tablename__ = "conta_saldo_mensal"
+
+    id = db.Column(db.Integer, primary_key=True)
+    conta_id = db.Column(db.Integer, db.ForeignKey("conta.id"), nullable=False)
+    mes_referencia = db.Column(db.String(7), nullable=False)
+    saldo_final = db.Column(Numeric(12, 2), nullable=False)
+
+    data_criacao = db.Column(
+        db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+
+    conta = db.relationship(
+        "Conta",
+        backref=db.backref(
+            "saldos_mensais", lazy=True, cascade="all, delete-orphan"
+        ),
+    )
+
+    __table_args__ = (
+        UniqueConstraint("conta_id", "mes_referencia", name="_conta_saldo_mensal_uc"),
+    )
+
+    def __repr__(self):
+        return f"<ContaSaldoMensal Conta: {self.conta_id} | Mês: {self.mes_referencia} | Saldo: {self.saldo_final}>"
@@ -2,7 +2,7 @@
 
 from datetime import date, datetime, timezone
 
-from sqlalchemy import Enum, Numeric, UniqueConstraint
+from sqlalchemy import Enum, Index, Numeric, UniqueConstraint
 
 from app import db
 from app.models.conta_movimento_model import ContaMovimento
@@ -52,6 +52,16 @@ class CrediarioFatura(db.Model):
             "mes_referencia",
             name="_usuario_crediario_fatura_uc",
         ),
+        Index(
+            "ix_crediario_fatura_usuario_vencimento",
+            "usuario_id",
+            "data_vencimento_fatura",
+        ),
+        Index(
+            "ix_crediario_fatura_status_vencimento",
+            "status",
+            "data_vencimento_fatura",
+        ),
     )
 
     def __repr__(self):
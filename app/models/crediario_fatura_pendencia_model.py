@@ -0,0 +1,39 @@
+# app/models/crediario_fatura_pendencia_model.py
+
+from datetime import datetime, timezone
+
+from sqlalchemy import UniqueConstraint
+
+from app import db
+
+
+class CrediarioFaturaPendencia(db.Model):
+    __tablename__ = "crediario_fatura_pendencia"
+
+    id = db.Column(db.Integer, primary_key=True)
+    usuario_id = db.Column(db.Integer, db.ForeignKey("usuario.id"), nullable=False)
+    crediario_id = db.Column(db.Integer, db.ForeignKey("crediario.id"), nullable=False)
+    mes_referencia = db.Column(db.String(7), nullable=False)
+
+    data_criacao = db.Column(
+        db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+
+    crediario = db.relationship(
+        "Crediario",
+        backref=db.backref(
+            "faturas_pendentes", lazy=True, cascade="all, delete-orphan"
+        ),
+    )
+
+    __table_args__ = (
+        UniqueConstraint(
+            "usuario_id",
+            "crediario_id",
+            "mes_referencia",
+            name="_usuario_crediario_pendencia_uc",
+        ),
+    )
+
+    def __repr__(self):
+        return f"<FaturaPendencia {self.mes_referencia} | Crediário: {self.crediario_id}>"
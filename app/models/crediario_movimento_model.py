@@ -2,7 +2,7 @@
 
 from datetime import date, datetime, timezone
 
-from sqlalchemy import Enum, Numeric
+from sqlalchemy import Enum, Index, Numeric
 
 from app import db
 from app.models.crediario_subgrupo_model import CrediarioSubgrupo
@@ -58,5 +58,9 @@ class CrediarioMovimento(db.Model):
         cascade="all, delete-orphan",
     )
 
+    __table_args__ = (
+        Index("ix_crediario_movimento_usuario_compra", "usuario_id", "data_compra"),
+    )
+
     def __repr__(self):
         return f"<CrediarioMovimento {self.descricao} | {self.valor_total_compra} | {self.numero_parcelas}x>"
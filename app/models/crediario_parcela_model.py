@@ -2,7 +2,7 @@
 
 from datetime import date, datetime, timezone
 
-from sqlalchemy import Numeric, UniqueConstraint
+from sqlalchemy import Index, Numeric, UniqueConstraint
 
 from app import db
 
@@ -30,6 +30,12 @@ class CrediarioParcela(db.Model):
         UniqueConstraint(
             "crediario_movimento_id", "numero_parcela", name="_crediario_parcela_uc"
         ),
+        Index(
+            "ix_crediario_parcela_movimento_pago_vencimento",
+            "crediario_movimento_id",
+            "pago",
+            "data_vencimento",
+        ),
     )
 
     def __repr__(self):
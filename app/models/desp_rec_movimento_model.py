@@ -2,7 +2,7 @@
 
 from datetime import datetime, timezone
 
-from sqlalchemy import Enum, Numeric, UniqueConstraint, event, text
+from sqlalchemy import Enum, Index, Numeric, UniqueConstraint, event, text
 
 from app import db
 from app.models.conta_movimento_model import ContaMovimento
@@ -48,7 +48,19 @@ class DespRecMovimento(db.Model):
         backref=db.backref("movimentos", lazy=True, cascade="all, delete-orphan"),
     )
 
-    __table_args__ = ()
+    __table_args__ = (
+        Index(
+            "ix_desp_rec_movimento_usuario_vencimento_status",
+            "usuario_id",
+            "data_vencimento",
+            "status",
+        ),
+        Index(
+            "ix_desp_rec_movimento_status_vencimento",
+            "status",
+            "data_vencimento",
+        ),
+    )
 
     def __repr__(self):
         return f"<DespRecMovimento ID: {self.id} | Venc: {self.data_vencimento} | Valor: {self.valor_previsto}>"
@@ -0,0 +1,20 @@
+# app/models/execucao_tarefa_model.py
+
+from datetime import datetime, timezone
+
+from app import db
+
+
+class ExecucaoTarefa(db.Model):
+    __tablename__ = "execucao_tarefa"
+
+    id = db.Column(db.Integer, primary_key=True)
+    nome = db.Column(db.String(50), nullable=False, unique=True)
+    data_referencia = db.Column(db.Date, nullable=False)
+    ultima_execucao = db.Column(
+        db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+    itens_atualizados = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<ExecucaoTarefa {self.nome} | Referência: {self.data_referencia} | Itens: {self.itens_atualizados}>"
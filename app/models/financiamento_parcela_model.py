@@ -2,7 +2,7 @@
 
 from datetime import datetime, timezone
 
-from sqlalchemy import Enum, Numeric, UniqueConstraint
+from sqlalchemy import Enum, Index, Numeric, UniqueConstraint
 
 from app import db
 from app.models.conta_movimento_model import ContaMovimento
@@ -57,6 +57,16 @@ class FinanciamentoParcela(db.Model):
         UniqueConstraint(
             "financiamento_id", "numero_parcela", name="_financiamento_parcela_uc"
         ),
+        Index(
+            "ix_financiamento_parcela_financiamento_vencimento",
+            "financiamento_id",
+            "data_vencimento",
+        ),
+        Index(
+            "ix_financiamento_parcela_status_vencimento",
+            "status",
+            "data_vencimento",
+        ),
     )
 
     def __repr__(self):
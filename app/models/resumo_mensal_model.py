@@ -0,0 +1,43 @@
+# app/models/resumo_mensal_model.py
+
+from decimal import Decimal
+
+from sqlalchemy import Numeric, UniqueConstraint
+
+from app import db
+
+
+class ResumoMensal(db.Model):
+    """Totais previstos e realizados por usuário, mês e categoria."""
+
+    __tablename__ = "resumo_mensal"
+
+    id = db.Column(db.Integer, primary_key=True)
+    usuario_id = db.Column(db.Integer, db.ForeignKey("usuario.id"), nullable=False)
+    ano = db.Column(db.Integer, nullable=False)
+    mes = db.Column(db.Integer, nullable=False)
+    categoria = db.Column(db.String(30), nullable=False)
+    natureza = db.Column(db.String(20), nullable=False)
+    tipo_valor = db.Column(db.String(10), nullable=False)
+    valor = db.Column(
+        Numeric(12, 2), nullable=False, default=Decimal("0.00"), server_default="0"
+    )
+
+    usuario = db.relationship(
+        "Usuario",
+        backref=db.backref("resumos_mensais", lazy=True, cascade="all, delete-orphan"),
+    )
+
+    __table_args__ = (
+        UniqueConstraint(
+            "usuario_id",
+            "ano",
+            "mes",
+            "categoria",
+            "tipo_valor",
+            name="_resumo_mensal_uc",
+        ),
+    )
+
+    def __repr__(self):
+        return f"<ResumoMensal {self.usuario_id} | {self.mes:02d}-{self.ano} | {self.categoria} {self.tipo_valor}: {self.valor}>"
@@ -3,7 +3,7 @@
 from datetime import datetime, timezone
 from decimal import Decimal
 
-from sqlalchemy import Enum, UniqueConstraint
+from sqlalchemy import Enum, Index, UniqueConstraint
 
 from app import db
 from app.utils import (
@@ -49,6 +49,21 @@ class SalarioMovimento(db.Model):
         server_default=FormChoices.SalarioMovimento.PENDENTE.value,
     )
 
+    # Totais desnormalizados, mantidos por salario_service a cada alteração
+    # nas verbas da folha
+    total_proventos = db.Column(
+        db.Numeric(12, 2), nullable=False, default=Decimal("0.00"), server_default="0"
+    )
+    salario_liquido = db.Column(
+        db.Numeric(12, 2), nullable=False, default=Decimal("0.00"), server_default="0"
+    )
+    total_beneficios = db.Column(
+        db.Numeric(12, 2), nullable=False, default=Decimal("0.00"), server_default="0"
+    )
+    total_fgts = db.Column(
+        db.Numeric(12, 2), nullable=False, default=Decimal("0.00"), server_default="0"
+    )
+
     data_criacao = db.Column(
         db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc)
     )
@@ -77,41 +92,10 @@ class SalarioMovimento(db.Model):
         UniqueConstraint(
             "usuario_id", "mes_referencia", "tipo", name="_usuario_mes_tipo_uc"
         ),
+        Index(
+            "ix_salario_movimento_status_recebimento", "status", "data_recebimento"
+        ),
     )
 
     def __repr__(self):
         return f"<SalarioMovimento Mês: {self.mes_referencia} | Tipo: {self.tipo} | Status: {self.status}>"
-
-    @property
-    def salario_liquido(self):
-        proventos = sum(
-            i.valor
-            for i in self.itens
-            if i.salario_item.tipo == FormChoices.TipoSalarioItem.PROVENTO.value
-        )
-        descontos_impostos = sum(
-            i.valor
-            for i in self.itens
-            if i.salario_item.tipo
-            in [
-                FormChoices.TipoSalarioItem.IMPOSTO.value,
-                FormChoices.TipoSalarioItem.DESCONTO.value,
-            ]
-        )
-        return proventos - descontos_impostos
-
-    @property
-    def total_beneficios(self):
-        return sum(
-            i.valor
-            for i in self.itens
-            if i.salario_item.tipo == FormChoices.TipoSalarioItem.BENEFICIO.value
-        )
-
-    @property
-    def total_fgts(self):
-        return sum(
-            i.valor
-            for i in self.itens
-            if i.salario_item.tipo == FormChoices.TipoSalarioItem.FGTS.value
-        )
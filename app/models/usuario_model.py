@@ -23,6 +23,10 @@ class Usuario(db.Model, UserMixin):
         db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc)
     )
     precisa_alterar_senha = db.Column(db.Boolean, nullable=False, default=True)
+    # Avança a cada alteração dos dados; ver app/cache.py
+    versao_dashboard = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
 
     def set_password(self, senha):
         self.senha_hash = generate_password_hash(senha)
@@ -0,0 +1,60 @@
+# app/periodo.py
+
+from calendar import monthrange
+from datetime import date, timedelta
+
+from sqlalchemy import and_, extract
+
+# Filtros por período usam sempre intervalos na própria coluna
+# (coluna >= início e < dia seguinte ao fim), que aproveitam os índices e
+# funcionam igual no MySQL, PostgreSQL e SQLite. extract() fica restrito
+# ao agrupamento de linhas já filtradas.
+
+
+def mes_referencia(data):
+    """Chave AAAA-MM usada em mes_referencia de faturas, folhas e saldos."""
+    return data.strftime("%Y-%m")
+
+
+def ler_mes_referencia(texto):
+    ano, mes = map(int, texto.split("-"))
+    return ano, mes
+
+
+def limites_mes(ano, mes):
+    """Primeiro e último dia do mês."""
+    return date(ano, mes, 1), date(ano, mes, monthrange(ano, mes)[1])
+
+
+def limites_ano(ano):
+    return date(ano, 1, 1), date(ano, 12, 31)
+
+
+def limites_meses_referencia(meses):
+    """Primeiro dia do menor e último dia do maior mês AAAA-MM de `meses`."""
+    inicio, _ = limites_mes(*ler_mes_referencia(min(meses)))
+    _, fim = limites_mes(*ler_mes_referencia(max(meses)))
+    return inicio, fim
+
+
+def vencimento_no_mes(ano, mes, dia):
+    """Data do `dia` no mês, limitada ao último dia (ex.: dia 31 em fevereiro)."""
+    return date(ano, mes, min(dia, monthrange(ano, mes)[1]))
+
+
+def no_intervalo(coluna, inicio, fim):
+    # Fim exclusivo no dia seguinte para valer também em colunas DateTime
+    return and_(coluna >= inicio, coluna < fim + timedelta(days=1))
+
+
+def no_mes(coluna, ano, mes):
+    return no_intervalo(coluna, *limites_mes(ano, mes))
+
+
+def no_ano(coluna, ano):
+    return no_intervalo(coluna, *limites_ano(ano))
+
+
+def ano_mes(coluna):
+    """Colunas (ano, mes) para agrupar por mês."""
+    return extract("year", coluna).label("ano"), extract("month", coluna).label("mes")
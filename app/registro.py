@@ -0,0 +1,271 @@
+# app/registro.py
+
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from flask import current_app, g, has_request_context, request, session
+from flask.logging import default_handler
+
+# Campos opcionais copiados do registro para o JSON quando presentes
+_CAMPOS_EXTRAS = (
+    "endpoint",
+    "metodo",
+    "caminho",
+    "usuario_id",
+    "status",
+    "duracao_ms",
+    "consultas_sql",
+    "suprimidos",
+    "descartados",
+)
+
+
+class FormatadorJSON(logging.Formatter):
+    """Uma linha JSON por registro, com o contexto da requisição."""
+
+    def format(self, record):
+        dados = {
+            "data_hora": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensagem": record.getMessage(),
+            "origem": f"{record.pathname}:{record.lineno}",
+        }
+        for campo in _CAMPOS_EXTRAS:
+            valor = getattr(record, campo, None)
+            if valor is not None:
+                dados[campo] = valor
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            dados["excecao"] = record.exc_text
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+class FiltroContexto(logging.Filter):
+    """
+    Anexa endpoint, usuário e consultas SQL da requisição atual. Roda na
+    thread da requisição, antes de o registro ir para a fila.
+    """
+
+    def filter(self, record):
+        if not has_request_context():
+            return True
+        record.endpoint = request.endpoint
+        record.metodo = request.method
+        record.caminho = request.path
+        # Lido do cookie de sessão: current_user poderia consultar o banco
+        record.usuario_id = session.get("_user_id")
+        dados_sql = g.get("sql_requisicao")
+        if dados_sql and getattr(record, "consultas_sql", None) is None:
+            record.consultas_sql = dados_sql["consultas"]
+        return True
+
+
+class FiltroAmostragem(logging.Filter):
+    """
+    Limita os avisos repetidos: cada ponto do código que gera WARNING
+    registra no máximo `limite` mensagens por `janela` segundos, contadas
+    por endpoint e, no log de acesso, por status. O total descartado vai no
+    campo `suprimidos` do primeiro registro da janela seguinte. Erros nunca
+    são descartados. Deve rodar depois do FiltroContexto.
+    """
+
+    def __init__(self, limite=10, janela=60):
+        super().__init__()
+        self.limite = limite
+        self.janela = janela
+        self._contagens = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno != logging.WARNING or not self.limite:
+            return True
+
+        # O log de acesso e o aviso de orçamento de SQL saem de uma única
+        # linha para todas as rotas: sem o endpoint, um 404 repetido
+        # esconderia os avisos das outras
+        chave = (
+            record.pathname,
+            record.lineno,
+            getattr(record, "endpoint", None),
+            getattr(record, "status", None),
+        )
+        agora = time.monotonic()
+        with self._lock:
+            inicio, total, suprimidos = self._contagens.get(chave, (agora, 0, 0))
+            if agora - inicio >= self.janela:
+                if suprimidos:
+                    record.suprimidos = suprimidos
+                inicio, total, suprimidos = agora, 0, 0
+
+            total += 1
+            if total > self.limite:
+                suprimidos += 1
+            self._contagens[chave] = (inicio, total, suprimidos)
+        return total <= self.limite
+
+
+class ManipuladorFila(QueueHandler):
+    """
+    Entrega os registros à thread de escrita sem bloquear. Com a fila
+    cheia o registro é descartado e contado, em vez de esperar o disco.
+    """
+
+    def __init__(self, fila):
+        super().__init__(fila)
+        self.listener = None
+        self.descartados = 0
+        self._lock_descartados = threading.Lock()
+
+    def prepare(self, record):
+        # Resolve mensagem e traceback aqui: args e exc_info podem
+        # referenciar objetos da requisição que não devem cruzar a thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        with self._lock_descartados:
+            if self.descartados:
+                record.descartados = self.descartados
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                self.descartados += 1
+            else:
+                self.descartados = 0
+
+
+def _arquivo_log(app):
+    caminho = app.config.get("LOG_FILE") or os.path.join(
+        app.instance_path, "logs", "web_finance.log"
+    )
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    return caminho
+
+
+def _inicio_requisicao():
+    g.inicio_requisicao = time.perf_counter()
+
+
+def _registrar_resposta(response):
+    if request.endpoint == "static":
+        return response
+
+    inicio = g.get("inicio_requisicao")
+    duracao_ms = (time.perf_counter() - inicio) * 1000 if inicio else None
+    if response.status_code >= 500:
+        nivel = logging.ERROR
+    elif response.status_code >= 400:
+        nivel = logging.WARNING
+    else:
+        nivel = logging.INFO
+
+    current_app.logger.log(
+        nivel,
+        "%s %s -> %s",
+        request.method,
+        request.path,
+        response.status_code,
+        extra={
+            "status": response.status_code,
+            "duracao_ms": round(duracao_ms, 1) if duracao_ms is not None else None,
+        },
+    )
+    return response
+
+
+def _parar(logger, handler):
+    # Os apps do processo dividem o logger "app": outro create_app pode já
+    # ter parado este handler
+    if handler not in logger.handlers:
+        return
+    logger.removeHandler(handler)
+    atexit.unregister(handler.listener.stop)
+    handler.listener.stop()
+
+
+def parar_registro(app):
+    """Grava os registros pendentes e encerra a thread de escrita."""
+    handler = app.extensions.pop("registro", None)
+    if handler is not None:
+        _parar(app.logger, handler)
+
+
+def init_registro(app):
+    """
+    Os registros do app passam por uma fila (QueueHandler) e são gravados
+    em JSON por uma thread própria (QueueListener); a requisição só monta o
+    registro e o enfileira. Chame depois de init_instrumentacao para que o
+    log da resposta ainda veja a contagem de SQL da requisição.
+    """
+    # create_app pode rodar mais de uma vez no processo (ex.: testes)
+    for handler in list(app.logger.handlers):
+        if isinstance(handler, ManipuladorFila):
+            _parar(app.logger, handler)
+    # O handler padrão do Flask escreve no stderr na thread da requisição
+    app.logger.removeHandler(default_handler)
+
+    nivel = app.config.get("LOG_LEVEL", logging.INFO)
+
+    file_handler = RotatingFileHandler(
+        _arquivo_log(app),
+        maxBytes=app.config.get("LOG_MAX_BYTES", 1024 * 1024 * 5),
+        backupCount=app.config.get("LOG_BACKUP_COUNT", 5),
+        encoding="utf-8",
+    )
+    file_handler.setFormatter(FormatadorJSON())
+    file_handler.setLevel(nivel)
+    handlers = [file_handler]
+
+    if app.debug or app.config.get("LOG_TO_STDOUT"):
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(
+            logging.Formatter(
+                "%(asctime)s - %(levelname)s - %(name)s - %(message)s [in %(pathname)s:%(lineno)d]"
+            )
+        )
+        stream_handler.setLevel(logging.DEBUG)
+        handlers.append(stream_handler)
+
+    fila_handler = ManipuladorFila(
+        queue.Queue(app.config.get("LOG_FILA_MAXIMO", 10000))
+    )
+    fila_handler.addFilter(FiltroContexto())
+    fila_handler.addFilter(
+        FiltroAmostragem(
+            limite=app.config.get("LOG_AMOSTRAGEM_LIMITE", 10),
+            janela=app.config.get("LOG_AMOSTRAGEM_JANELA", 60),
+        )
+    )
+
+    listener = QueueListener(fila_handler.queue, *handlers, respect_handler_level=True)
+    listener.start()
+    # Grava o que ainda estiver na fila ao encerrar o processo
+    atexit.register(listener.stop)
+    fila_handler.listener = listener
+
+    app.logger.addHandler(fila_handler)
+    app.logger.setLevel(nivel)
+    app.extensions["registro"] = fila_handler
+
+    # Primeiro before_request do app: a duração inclui os que vêm depois,
+    # mesmo quando um deles já responde (ex.: redirecionamento de senha)
+    app.before_request_funcs.setdefault(None, []).insert(0, _inicio_requisicao)
+    app.after_request(_registrar_resposta)
+    return listener
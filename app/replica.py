@@ -0,0 +1,190 @@
+# app/replica.py
+
+import functools
+import inspect
+import threading
+import time
+from contextvars import ContextVar
+
+from flask import current_app, has_app_context, has_request_context, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+BIND_REPLICA = "replica"
+_CHAVE_ULTIMA_ESCRITA = "_ultima_escrita"
+
+_usar_replica = ContextVar("usar_replica", default=False)
+
+
+def _atraso_postgresql(conn):
+    # Réplica sem WAL pendente está em dia, mesmo sem escritas recentes
+    return conn.exec_driver_sql(
+        "SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0 "
+        "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+    ).scalar()
+
+
+def _atraso_mysql(conn):
+    status = conn.exec_driver_sql("SHOW REPLICA STATUS").mappings().first()
+    if status is None:
+        return 0
+    return status.get("Seconds_Behind_Source", status.get("Seconds_Behind_Master"))
+
+
+_MEDIDORES_ATRASO = {
+    "postgresql": _atraso_postgresql,
+    "mysql": _atraso_mysql,
+}
+
+
+def medir_atraso(engine):
+    """
+    Atraso da réplica em segundos. None quando a replicação está parada.
+    Bancos sem replicação nativa (ex.: SQLite) são considerados em dia.
+    """
+    medidor = _MEDIDORES_ATRASO.get(engine.dialect.name)
+    if medidor is None:
+        return 0
+    with engine.connect() as conn:
+        atraso = medidor(conn)
+    return None if atraso is None else float(atraso)
+
+
+class EstadoReplica:
+    """Guarda por alguns segundos se a réplica está disponível e em dia."""
+
+    def __init__(self, atraso_maximo=10, intervalo=5):
+        self.atraso_maximo = atraso_maximo
+        self.intervalo = intervalo
+        self._verificado_em = None
+        self._disponivel = False
+        self._lock = threading.Lock()
+
+    def disponivel(self, engine):
+        with self._lock:
+            agora = time.monotonic()
+            if (
+                self._verificado_em is not None
+                and agora - self._verificado_em < self.intervalo
+            ):
+                return self._disponivel
+
+            try:
+                atraso = medir_atraso(engine)
+            except Exception as e:
+                atraso = None
+                current_app.logger.warning(
+                    f"Réplica de leitura indisponível, usando o primário: {e}"
+                )
+            else:
+                if atraso is None or atraso > self.atraso_maximo:
+                    current_app.logger.warning(
+                        f"Réplica de leitura atrasada ({atraso} s), usando o primário."
+                    )
+
+            self._disponivel = atraso is not None and atraso <= self.atraso_maximo
+            self._verificado_em = agora
+            return self._disponivel
+
+
+def _escreveu_recentemente():
+    # Quem acabou de gravar lê do primário até a réplica alcançar a escrita
+    if not has_request_context():
+        return False
+    ultima_escrita = session.get(_CHAVE_ULTIMA_ESCRITA)
+    if ultima_escrita is None:
+        return False
+    atraso_maximo = current_app.extensions["replica"].atraso_maximo
+    return time.time() - ultima_escrita < atraso_maximo
+
+
+def _e_leitura(clause):
+    return (
+        getattr(clause, "is_select", False)
+        and getattr(clause, "_for_update_arg", None) is None
+    )
+
+
+class SessaoRoteada(Session):
+    """
+    Sessão que envia os SELECTs feitos dentro de `usar_replica` para o bind
+    "replica". Escritas, flush, SELECT ... FOR UPDATE e tudo o que roda fora
+    do decorador continuam no primário.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is not None:
+            return bind
+
+        # Só flush e INSERT/UPDATE/DELETE contam como escrita: text(), FOR
+        # UPDATE e session.connection() vão ao primário sem prender o usuário
+        # nele
+        if self._flushing or getattr(clause, "is_dml", False):
+            self.info["escreveu"] = True
+        elif _e_leitura(clause) and _usar_replica.get() and has_app_context():
+            engine = self._db.engines.get(BIND_REPLICA)
+            if (
+                engine is not None
+                and not _escreveu_recentemente()
+                and current_app.extensions["replica"].disponivel(engine)
+            ):
+                return engine
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(SessaoRoteada, "after_commit")
+def _depois_do_commit(sessao):
+    if sessao.info.pop("escreveu", False) and has_request_context():
+        session[_CHAVE_ULTIMA_ESCRITA] = time.time()
+
+
+@event.listens_for(SessaoRoteada, "after_rollback")
+def _depois_do_rollback(sessao):
+    sessao.info.pop("escreveu", None)
+
+
+def _gerador_na_replica(gerador):
+    # Cada passo do gerador roda com a réplica ativa, inclusive quando ele é
+    # consumido depois (ex.: no streaming de uma exportação)
+    try:
+        while True:
+            token = _usar_replica.set(True)
+            try:
+                item = next(gerador)
+            except StopIteration:
+                return
+            finally:
+                _usar_replica.reset(token)
+            yield item
+    finally:
+        gerador.close()
+
+
+def usar_replica(funcao):
+    """Executa as consultas da função na réplica de leitura, se configurada."""
+    if inspect.isgeneratorfunction(funcao):
+
+        @functools.wraps(funcao)
+        def gerador(*args, **kwargs):
+            return _gerador_na_replica(funcao(*args, **kwargs))
+
+        return gerador
+
+    @functools.wraps(funcao)
+    def wrapper(*args, **kwargs):
+        token = _usar_replica.set(True)
+        try:
+            return funcao(*args, **kwargs)
+        finally:
+            _usar_replica.reset(token)
+
+    return wrapper
+
+
+def init_replica(app):
+    app.extensions["replica"] = EstadoReplica(
+        atraso_maximo=app.config.get("REPLICA_ATRASO_MAXIMO", 10),
+        intervalo=app.config.get("REPLICA_VERIFICACAO_INTERVALO", 5),
+    )
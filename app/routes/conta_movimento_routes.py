@@ -1,79 +1,139 @@
 # app/routes/conta_movimento_routes.py
 
-import calendar
-from datetime import date
-
 from flask import (
     Blueprint,
     flash,
+    jsonify,
     redirect,
     render_template,
     request,
+    session,
     url_for,
 )
 from flask_login import current_user, login_required
-from sqlalchemy import and_
-from sqlalchemy.orm import joinedload
+from sqlalchemy import and_, func, select
 
 from app import db
+from app.cache import invalidar_dashboard
 from app.forms.conta_movimento_forms import (
     CadastroContaMovimentoForm,
     EditarContaMovimentoForm,
+    ImportarExtratoForm,
 )
+from app.models.conta_model import Conta
 from app.models.conta_movimento_model import ContaMovimento
-from app.services import conta_service, conta_transacao_service
+from app.models.conta_transacao_model import ContaTransacao
+from app.services import (
+    conta_service,
+    conta_transacao_service,
+    importacao_extrato_service,
+    tabela_service,
+)
 from app.services.movimento_service import (
     excluir_movimento as excluir_movimento_service,
 )
 from app.services.movimento_service import registrar_movimento
+from app.services.tabela_service import coluna
 
 conta_movimento_bp = Blueprint("conta_movimento", __name__, url_prefix="/movimentacoes")
 
 
-@conta_movimento_bp.route("/")
-@login_required
-def listar_movimentacoes():
+COLUNAS_MOVIMENTACOES = [
+    coluna("id", ContaMovimento.id),
+    coluna("conta_nome", Conta.nome_banco, pesquisavel=True),
+    coluna("conta_tipo", Conta.tipo, ordenavel=False),
+    coluna("transacao_tipo", ContaTransacao.transacao_tipo, pesquisavel=True),
+    coluna("tipo_movimento", ContaTransacao.tipo),
+    coluna("data_movimento", ContaMovimento.data_movimento),
+    coluna("valor", ContaMovimento.valor),
+    coluna(
+        "descricao", func.coalesce(ContaMovimento.descricao, ""), pesquisavel=True
+    ),
+    coluna(
+        "id_movimento_relacionado",
+        ContaMovimento.id_movimento_relacionado,
+        ordenavel=False,
+    ),
+    coluna("data_criacao", ContaMovimento.data_criacao),
+]
+ORDEM_PADRAO_MOVIMENTACOES = ("data_movimento", "desc")
 
-    data_inicial_str = request.args.get("data_inicial")
-    data_final_str = request.args.get("data_final")
 
-    hoje = date.today()
+def _query_movimentacoes(periodo):
+    query = (
+        select(ContaMovimento.id)
+        .join(Conta, ContaMovimento.conta_id == Conta.id)
+        .join(ContaTransacao, ContaMovimento.conta_transacao_id == ContaTransacao.id)
+        .where(ContaMovimento.usuario_id == current_user.id)
+    )
+    if periodo["data_inicial"]:
+        query = query.where(ContaMovimento.data_movimento >= periodo["data_inicial"])
+    if periodo["data_final"]:
+        query = query.where(ContaMovimento.data_movimento <= periodo["data_final"])
+    return query
 
-    if not data_inicial_str and not data_final_str:
-        primeiro_dia = date(hoje.year, hoje.month, 1)
-        ultimo_dia = date(
-            hoje.year, hoje.month, calendar.monthrange(hoje.year, hoje.month)[1]
-        )
-        data_inicial_str = primeiro_dia.isoformat()
-        data_final_str = ultimo_dia.isoformat()
 
-    query = ContaMovimento.query.filter_by(usuario_id=current_user.id).options(
-        joinedload(ContaMovimento.conta),
-        joinedload(ContaMovimento.tipo_transacao),
+def _cartoes_movimentacoes(periodo, apos=None):
+    return tabela_service.pagina_de_cartoes(
+        _query_movimentacoes(periodo),
+        COLUNAS_MOVIMENTACOES,
+        ContaMovimento.id,
+        ORDEM_PADRAO_MOVIMENTACOES,
+        apos=apos,
     )
 
+
+@conta_movimento_bp.route("/")
+@login_required
+def listar_movimentacoes():
     try:
-        if data_inicial_str:
-            data_inicial = date.fromisoformat(data_inicial_str)
-            query = query.filter(ContaMovimento.data_movimento >= data_inicial)
-        if data_final_str:
-            data_final = date.fromisoformat(data_final_str)
-            query = query.filter(ContaMovimento.data_movimento <= data_final)
+        periodo = tabela_service.ler_periodo(request.args, mes_atual_por_padrao=True)
     except ValueError:
         flash("Formato de data inválido. Use DD-MM-AAAA.", "danger")
         return redirect(url_for("conta_movimento.listar_movimentacoes"))
 
-    movimentacoes = query.order_by(
-        ContaMovimento.data_movimento.desc(),
-        ContaMovimento.id.desc(),
-    ).all()
+    # Apenas a primeira página dos cartões é renderizada; a tabela é
+    # carregada sob demanda por dados_movimentacoes
+    pagina = _cartoes_movimentacoes(periodo)
 
     return render_template(
         "conta_movimentos/list.html",
-        movimentacoes=movimentacoes,
-        data_inicial=data_inicial_str,
-        data_final=data_final_str,
+        movimentacoes=pagina["linhas"],
+        cursor=pagina["cursor"],
+        data_inicial=periodo["data_inicial_str"],
+        data_final=periodo["data_final_str"],
+    )
+
+
+@conta_movimento_bp.route("/dados")
+@login_required
+def dados_movimentacoes():
+    try:
+        periodo = tabela_service.ler_periodo(request.args, mes_atual_por_padrao=True)
+    except ValueError:
+        return jsonify({"error": "Formato de data inválido."}), 400
+
+    if request.args.get("formato") == "cartoes":
+        pagina = _cartoes_movimentacoes(periodo, apos=request.args.get("apos"))
+        return jsonify(
+            {
+                "html": render_template(
+                    "conta_movimentos/_cartoes.html", movimentacoes=pagina["linhas"]
+                ),
+                "cursor": pagina["cursor"],
+            }
+        )
+
+    parametros = tabela_service.ler_parametros(
+        request.args, COLUNAS_MOVIMENTACOES, ORDEM_PADRAO_MOVIMENTACOES
     )
+    resultado = tabela_service.paginar(
+        _query_movimentacoes(periodo),
+        COLUNAS_MOVIMENTACOES,
+        ContaMovimento.id,
+        parametros,
+    )
+    return jsonify(tabela_service.resposta_datatables(parametros, resultado))
 
 
 @conta_movimento_bp.route("/adicionar", methods=["GET", "POST"])
@@ -117,6 +177,7 @@ def editar_movimentacao(id):
             form.descricao.data.strip() if form.descricao.data else None
         )
         db.session.commit()
+        invalidar_dashboard(current_user.id)
         flash("Movimentação atualizada com sucesso!", "success")
         return redirect(url_for("conta_movimento.listar_movimentacoes"))
 
@@ -133,3 +194,93 @@ def excluir_movimentacao(id):
         flash(message, "danger")
 
     return redirect(url_for("conta_movimento.listar_movimentacoes"))
+
+
+@conta_movimento_bp.route("/importar", methods=["GET", "POST"])
+@login_required
+def importar_extrato():
+    form = ImportarExtratoForm(
+        account_choices=conta_service.get_active_accounts_for_user_choices()
+    )
+    resumo = None
+    conta = None
+
+    if form.validate_on_submit():
+        conta = Conta.query.filter_by(
+            id=form.conta_id.data, usuario_id=current_user.id
+        ).first_or_404()
+        formato = importacao_extrato_service.formato_do_arquivo(
+            form.arquivo.data.filename
+        )
+
+        # A pré-visualização guarda o arquivo até a confirmação
+        anterior = session.pop("importacao_extrato", None)
+        if anterior:
+            importacao_extrato_service.remover_arquivo_temporario(anterior["token"])
+        token = importacao_extrato_service.salvar_arquivo_temporario(
+            form.arquivo.data
+        )
+        caminho = importacao_extrato_service.caminho_arquivo_temporario(token)
+
+        with open(caminho, "rb") as arquivo:
+            success, message, resumo = importacao_extrato_service.importar_extrato(
+                conta,
+                arquivo,
+                formato,
+                form.tipo_credito_id.data,
+                form.tipo_debito_id.data,
+                simular=True,
+            )
+
+        if success:
+            session["importacao_extrato"] = {
+                "token": token,
+                "formato": formato,
+                "conta_id": conta.id,
+                "tipo_credito_id": form.tipo_credito_id.data,
+                "tipo_debito_id": form.tipo_debito_id.data,
+            }
+        else:
+            importacao_extrato_service.remover_arquivo_temporario(token)
+            flash(message, "danger")
+
+    return render_template(
+        "conta_movimentos/importar.html", form=form, resumo=resumo, conta=conta
+    )
+
+
+@conta_movimento_bp.route("/importar/confirmar", methods=["POST"])
+@login_required
+def confirmar_importacao_extrato():
+    importacao = session.pop("importacao_extrato", None)
+    caminho = importacao_extrato_service.caminho_arquivo_temporario(
+        importacao["token"] if importacao else None
+    )
+    if not caminho:
+        flash(
+            "A pré-visualização expirou. Envie o arquivo novamente.",
+            "warning",
+        )
+        return redirect(url_for("conta_movimento.importar_extrato"))
+
+    conta = Conta.query.filter_by(
+        id=importacao["conta_id"], usuario_id=current_user.id
+    ).first_or_404()
+
+    with open(caminho, "rb") as arquivo:
+        success, message, _ = importacao_extrato_service.importar_extrato(
+            conta,
+            arquivo,
+            importacao["formato"],
+            importacao["tipo_credito_id"],
+            importacao["tipo_debito_id"],
+            simular=False,
+        )
+    importacao_extrato_service.remover_arquivo_temporario(importacao["token"])
+
+    if success:
+        flash(message, "success")
+        return redirect(url_for("conta_movimento.listar_movimentacoes"))
+
+    flash(message, "warning")
+    return redirect(url_for("conta_movimento.importar_extrato"))
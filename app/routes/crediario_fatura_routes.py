@@ -1,7 +1,7 @@
 # app/routes/crediario_fatura_routes.py
 
 import calendar
-from datetime import date, timedelta
+from datetime import date
 from decimal import Decimal
 
 from flask import (
@@ -19,10 +19,12 @@ from sqlalchemy import and_, func
 from sqlalchemy.orm import joinedload
 
 from app import db
+from app.cache import invalidar_dashboard
 from app.models.crediario_fatura_model import CrediarioFatura
 from app.models.crediario_movimento_model import CrediarioMovimento
 from app.models.crediario_parcela_model import CrediarioParcela
-from app.services import fatura_service
+from app.periodo import ler_mes_referencia, limites_mes
+from app.services import fatura_service, resumo_mensal_service
 from app.utils import STATUS_ATRASADO, STATUS_PAGO, STATUS_PARCIAL_PAGO, STATUS_PENDENTE
 
 crediario_fatura_bp = Blueprint(
@@ -57,35 +59,25 @@ def listar_faturas():
 
     faturas_com_status = []
 
+    somas_parcelas = fatura_service.get_somas_parcelas_das_faturas(
+        current_user.id, faturas
+    )
+
     for fatura in faturas:
-        ano_ref = int(fatura.mes_referencia.split("-")[0])
-        mes_ref = int(fatura.mes_referencia.split("-")[1])
-        data_inicio_mes = date(ano_ref, mes_ref, 1)
-        if mes_ref == 12:
-            data_fim_mes = date(ano_ref + 1, 1, 1) - timedelta(days=1)
-        else:
-            data_fim_mes = date(ano_ref, mes_ref + 1, 1) - timedelta(days=1)
-
-        soma_real_parcelas = (
-            db.session.query(
-                func.coalesce(func.sum(CrediarioParcela.valor_parcela), Decimal("0.00"))
-            )
-            .join(CrediarioMovimento)
-            .filter(
-                CrediarioMovimento.id == CrediarioParcela.crediario_movimento_id,
-                CrediarioMovimento.crediario_id == fatura.crediario_id,
-                CrediarioMovimento.usuario_id == current_user.id,
-                CrediarioParcela.data_vencimento >= data_inicio_mes,
-                CrediarioParcela.data_vencimento <= data_fim_mes,
-            )
-            .scalar()
+        soma_real_parcelas = somas_parcelas.get(
+            (fatura.crediario_id, fatura.mes_referencia), Decimal("0.00")
         )
 
         desatualizada = fatura.valor_total_fatura != soma_real_parcelas
 
+        # Pendente/Atrasado vêm do job de envelhecimento; só o pagamento
+        # parcial ainda depende da data
         destaque_status = ""
         if fatura.status in [STATUS_PENDENTE, STATUS_ATRASADO, STATUS_PARCIAL_PAGO]:
-            if fatura.data_vencimento_fatura < hoje:
+            if fatura.status == STATUS_ATRASADO or (
+                fatura.status == STATUS_PARCIAL_PAGO
+                and fatura.data_vencimento_fatura < hoje
+            ):
                 destaque_status = STATUS_ATRASADO
             elif (
                 fatura.data_vencimento_fatura.year == hoje.year
@@ -116,13 +108,9 @@ def visualizar_fatura(id):
         id=id, usuario_id=current_user.id
     ).first_or_404()
 
-    ano = int(fatura.mes_referencia.split("-")[0])
-    mes = int(fatura.mes_referencia.split("-")[1])
-    data_inicio_mes = date(ano, mes, 1)
-    if mes == 12:
-        data_fim_mes = date(ano + 1, 1, 1) - timedelta(days=1)
-    else:
-        data_fim_mes = date(ano, mes + 1, 1) - timedelta(days=1)
+    data_inicio_mes, data_fim_mes = limites_mes(
+        *ler_mes_referencia(fatura.mes_referencia)
+    )
 
     parcelas_da_fatura = (
         CrediarioParcela.query.filter(
@@ -164,8 +152,10 @@ def excluir_fatura(id):
         )
         return redirect(url_for("crediario_fatura.listar_faturas"))
 
+    resumo_mensal_service.remover_do_resumo([fatura])
     db.session.delete(fatura)
     db.session.commit()
+    invalidar_dashboard(current_user.id)
     flash("Fatura excluída com sucesso!", "success")
     current_app.logger.info(
         f"Fatura (ID: {fatura.id}) excluída por {current_user.login}."
@@ -177,7 +167,7 @@ def excluir_fatura(id):
 @login_required
 def automatizar_faturas():
     success, message = fatura_service.automatizar_geracao_e_atualizacao_faturas(
-        current_user.id
+        current_user.id, incremental=request.form.get("modo") == "incremental"
     )
     if success:
         flash(message, "success")
@@ -206,10 +196,12 @@ def excluir_em_massa():
         if fatura.status in [STATUS_PAGO, STATUS_PARCIAL_PAGO]:
             ignoradas += 1
         else:
+            resumo_mensal_service.remover_do_resumo([fatura])
             db.session.delete(fatura)
             count += 1
 
     db.session.commit()
+    invalidar_dashboard(current_user.id)
 
     msg = f"{count} fatura(s) excluída(s) com sucesso."
     category = "success"
@@ -1,32 +1,33 @@
 # app/routes/crediario_movimento_routes.py
 
-import calendar
-from datetime import date
-
 from flask import (
     Blueprint,
     flash,
+    jsonify,
     redirect,
     render_template,
     request,
     url_for,
 )
 from flask_login import current_user, login_required
-from sqlalchemy import and_
+from sqlalchemy import func, select
 from sqlalchemy.orm import joinedload
 
 from app.forms.crediario_movimento_forms import (
     CadastroCrediarioMovimentoForm,
     EditarCrediarioMovimentoForm,
 )
+from app.models.crediario_grupo_model import CrediarioGrupo
 from app.models.crediario_model import Crediario
 from app.models.crediario_movimento_model import CrediarioMovimento
 from app.models.crediario_subgrupo_model import CrediarioSubgrupo
+from app.models.fornecedor_model import Fornecedor
 from app.services import (
     crediario_grupo_service,
     crediario_service,
     crediario_subgrupo_service,
     fornecedor_service,
+    tabela_service,
 )
 from app.services.crediario_movimento_service import (
     adicionar_movimento,
@@ -37,45 +38,77 @@ from app.services.crediario_movimento_service import (
 from app.services.crediario_movimento_service import (
     excluir_movimento as excluir_movimento_service,
 )
+from app.services.tabela_service import coluna
 
 crediario_movimento_bp = Blueprint(
     "crediario_movimento", __name__, url_prefix="/movimentos_crediario"
 )
 
 
+COLUNAS_MOVIMENTOS = [
+    coluna("id", CrediarioMovimento.id),
+    coluna("crediario_nome", Crediario.nome_crediario, pesquisavel=True),
+    coluna("crediario_final", Crediario.identificador_final, ordenavel=False),
+    coluna("fornecedor_nome", func.coalesce(Fornecedor.nome, ""), pesquisavel=True),
+    coluna("grupo_nome", func.coalesce(CrediarioGrupo.grupo_crediario, "")),
+    coluna("subgrupo_nome", func.coalesce(CrediarioSubgrupo.nome, "")),
+    coluna("destino", CrediarioMovimento.destino),
+    coluna("data_compra", CrediarioMovimento.data_compra),
+    coluna("valor_total_compra", CrediarioMovimento.valor_total_compra),
+    coluna("numero_parcelas", CrediarioMovimento.numero_parcelas),
+    coluna("data_primeira_parcela", CrediarioMovimento.data_primeira_parcela),
+    coluna("data_criacao", CrediarioMovimento.data_criacao),
+    coluna("descricao", CrediarioMovimento.descricao, pesquisavel=True),
+]
+ORDEM_PADRAO_MOVIMENTOS = ("data_compra", "desc")
+
+
+def _query_movimentos(periodo, crediario_id=None):
+    query = (
+        select(CrediarioMovimento.id)
+        .join(Crediario, CrediarioMovimento.crediario_id == Crediario.id)
+        .outerjoin(Fornecedor, CrediarioMovimento.fornecedor_id == Fornecedor.id)
+        .outerjoin(
+            CrediarioGrupo, CrediarioMovimento.crediario_grupo_id == CrediarioGrupo.id
+        )
+        .outerjoin(
+            CrediarioSubgrupo,
+            CrediarioMovimento.crediario_subgrupo_id == CrediarioSubgrupo.id,
+        )
+        .where(CrediarioMovimento.usuario_id == current_user.id)
+    )
+    if periodo["data_inicial"]:
+        query = query.where(CrediarioMovimento.data_compra >= periodo["data_inicial"])
+    if periodo["data_final"]:
+        query = query.where(CrediarioMovimento.data_compra <= periodo["data_final"])
+    if crediario_id:
+        query = query.where(CrediarioMovimento.crediario_id == crediario_id)
+    return query
+
+
+def _cartoes_movimentos(periodo, crediario_id=None, apos=None):
+    return tabela_service.pagina_de_cartoes(
+        _query_movimentos(periodo, crediario_id),
+        COLUNAS_MOVIMENTOS,
+        CrediarioMovimento.id,
+        ORDEM_PADRAO_MOVIMENTOS,
+        apos=apos,
+    )
+
+
 @crediario_movimento_bp.route("/")
 @login_required
 def listar_movimentos_crediario():
-    data_inicial_str = request.args.get("data_inicial")
-    data_final_str = request.args.get("data_final")
     crediario_id = request.args.get("crediario_id", type=int)
-
-    query = CrediarioMovimento.query.filter_by(usuario_id=current_user.id).options(
-        joinedload(CrediarioMovimento.crediario),
-        joinedload(CrediarioMovimento.crediario_grupo),
-        joinedload(CrediarioMovimento.crediario_subgrupo),
-        joinedload(CrediarioMovimento.fornecedor),
-    )
-
     try:
-        if data_inicial_str:
-            data_inicial = date.fromisoformat(data_inicial_str)
-            query = query.filter(CrediarioMovimento.data_compra >= data_inicial)
-
-        if data_final_str:
-            data_final = date.fromisoformat(data_final_str)
-            query = query.filter(CrediarioMovimento.data_compra <= data_final)
+        periodo = tabela_service.ler_periodo(request.args)
     except ValueError:
         flash("Formato de data inválido. Use DD-MM-AAAA.", "danger")
         return redirect(url_for("crediario_movimento.listar_movimentos_crediario"))
 
-    if crediario_id:
-        query = query.filter(CrediarioMovimento.crediario_id == crediario_id)
-
-    movimentos_crediario = query.order_by(
-        CrediarioMovimento.data_compra.desc(),
-        CrediarioMovimento.data_criacao.desc(),
-    ).all()
+    # Apenas a primeira página dos cartões é renderizada; a tabela é
+    # carregada sob demanda por dados_movimentos_crediario
+    pagina = _cartoes_movimentos(periodo, crediario_id)
 
     crediarios = (
         Crediario.query.filter_by(usuario_id=current_user.id, ativa=True)
@@ -85,14 +118,50 @@ def listar_movimentos_crediario():
 
     return render_template(
         "crediario_movimentos/list.html",
-        movimentos_crediario=movimentos_crediario,
-        data_inicial=data_inicial_str,
-        data_final=data_final_str,
+        movimentos_crediario=pagina["linhas"],
+        cursor=pagina["cursor"],
+        data_inicial=periodo["data_inicial_str"],
+        data_final=periodo["data_final_str"],
         crediarios=crediarios,
         selected_crediario_id=crediario_id,
     )
 
 
+@crediario_movimento_bp.route("/dados")
+@login_required
+def dados_movimentos_crediario():
+    crediario_id = request.args.get("crediario_id", type=int)
+    try:
+        periodo = tabela_service.ler_periodo(request.args)
+    except ValueError:
+        return jsonify({"error": "Formato de data inválido."}), 400
+
+    if request.args.get("formato") == "cartoes":
+        pagina = _cartoes_movimentos(
+            periodo, crediario_id, apos=request.args.get("apos")
+        )
+        return jsonify(
+            {
+                "html": render_template(
+                    "crediario_movimentos/_cartoes.html",
+                    movimentos_crediario=pagina["linhas"],
+                ),
+                "cursor": pagina["cursor"],
+            }
+        )
+
+    parametros = tabela_service.ler_parametros(
+        request.args, COLUNAS_MOVIMENTOS, ORDEM_PADRAO_MOVIMENTOS
+    )
+    resultado = tabela_service.paginar(
+        _query_movimentos(periodo, crediario_id),
+        COLUNAS_MOVIMENTOS,
+        CrediarioMovimento.id,
+        parametros,
+    )
+    return jsonify(tabela_service.resposta_datatables(parametros, resultado))
+
+
 @crediario_movimento_bp.route("/adicionar", methods=["GET", "POST"])
 @login_required
 def adicionar_movimento_crediario():
@@ -1,8 +1,6 @@
 # app\routes\desp_rec_movimento_routes.py
 
-import calendar
 import json
-from datetime import date
 from decimal import Decimal
 
 from dateutil.relativedelta import relativedelta
@@ -10,17 +8,18 @@ from flask import (
     Blueprint,
     current_app,
     flash,
+    jsonify,
     redirect,
     render_template,
     request,
     url_for,
 )
 from flask_login import current_user, login_required
-from sqlalchemy import and_
+from sqlalchemy import func, select
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import joinedload
 
 from app import db
+from app.cache import invalidar_dashboard
 from app.forms.desp_rec_forms import (
     EditarMovimentoForm,
     GerarPrevisaoForm,
@@ -28,77 +27,110 @@ from app.forms.desp_rec_forms import (
 )
 from app.models.desp_rec_model import DespRec
 from app.models.desp_rec_movimento_model import DespRecMovimento
-from app.services import desp_rec_service
+from app.services import desp_rec_service, resumo_mensal_service, tabela_service
+from app.services.atraso_service import status_em_aberto
 from app.services.desp_rec_service import gerar_previsoes
-from app.utils import STATUS_PAGO, STATUS_PENDENTE, STATUS_RECEBIDO
+from app.services.tabela_service import coluna
+from app.utils import STATUS_PAGO, STATUS_RECEBIDO
 
 desp_rec_movimento_bp = Blueprint(
     "desp_rec_movimento", __name__, url_prefix="/despesas_receitas/movimentos"
 )
 
 
-@desp_rec_movimento_bp.route("/")
-@login_required
-def listar_movimentos():
-    data_inicial_str = request.args.get("data_inicial")
-    data_final_str = request.args.get("data_final")
-
-    hoje = date.today()
-
-    if not data_inicial_str and not data_final_str:
-        primeiro_dia = date(hoje.year, hoje.month, 1)
-        ultimo_dia = date(
-            hoje.year, hoje.month, calendar.monthrange(hoje.year, hoje.month)[1]
+COLUNAS_MOVIMENTOS = [
+    coluna("id", DespRecMovimento.id),
+    coluna("data_vencimento", DespRecMovimento.data_vencimento),
+    coluna("nome", DespRec.nome, pesquisavel=True),
+    coluna("natureza", DespRec.natureza),
+    coluna("valor_previsto", DespRecMovimento.valor_previsto),
+    coluna("valor_realizado", DespRecMovimento.valor_realizado, ordenavel=False),
+    coluna(
+        "descricao", func.coalesce(DespRecMovimento.descricao, ""), pesquisavel=True
+    ),
+    coluna("status", DespRecMovimento.status, pesquisavel=True),
+]
+ORDEM_PADRAO_MOVIMENTOS = ("data_vencimento", "asc")
+
+
+def _query_movimentos(periodo):
+    query = (
+        select(DespRecMovimento.id)
+        .join(DespRec, DespRecMovimento.desp_rec_id == DespRec.id)
+        .where(DespRecMovimento.usuario_id == current_user.id)
+    )
+    if periodo["data_inicial"]:
+        query = query.where(
+            DespRecMovimento.data_vencimento >= periodo["data_inicial"]
         )
-        data_inicial_str = primeiro_dia.isoformat()
-        data_final_str = ultimo_dia.isoformat()
+    if periodo["data_final"]:
+        query = query.where(
+            DespRecMovimento.data_vencimento <= periodo["data_final"]
+        )
+    return query
 
-    query = DespRecMovimento.query.filter_by(usuario_id=current_user.id).options(
-        joinedload(DespRecMovimento.despesa_receita)
-    )
 
-    if data_inicial_str and data_final_str:
-        try:
-            data_inicial = date.fromisoformat(data_inicial_str)
-            data_final = date.fromisoformat(data_final_str)
-
-            query = query.filter(
-                and_(
-                    DespRecMovimento.data_vencimento >= data_inicial,
-                    DespRecMovimento.data_vencimento <= data_final,
-                )
-            )
-        except ValueError:
-            flash("Formato de data inválido. Use DD-MM-AAAA.", "danger")
-            return redirect(url_for("desp_rec_movimento.listar_movimentos"))
+def _cartoes_movimentos(periodo, apos=None):
+    return tabela_service.pagina_de_cartoes(
+        _query_movimentos(periodo),
+        COLUNAS_MOVIMENTOS,
+        DespRecMovimento.id,
+        ORDEM_PADRAO_MOVIMENTOS,
+        apos=apos,
+    )
 
-    elif data_inicial_str:
-        try:
-            data_inicial = date.fromisoformat(data_inicial_str)
-            query = query.filter(DespRecMovimento.data_vencimento >= data_inicial)
-        except ValueError:
-            flash("Formato de data inicial inválido. Use DD-MM-AAAA.", "danger")
-            return redirect(url_for("desp_rec_movimento.listar_movimentos"))
 
-    elif data_final_str:
-        try:
-            data_final = date.fromisoformat(data_final_str)
-            query = query.filter(DespRecMovimento.data_vencimento <= data_final)
-        except ValueError:
-            flash("Formato de data final inválido. Use DD-MM-AAAA.", "danger")
-            return redirect(url_for("desp_rec_movimento.listar_movimentos"))
+@desp_rec_movimento_bp.route("/")
+@login_required
+def listar_movimentos():
+    try:
+        periodo = tabela_service.ler_periodo(request.args, mes_atual_por_padrao=True)
+    except ValueError:
+        flash("Formato de data inválido. Use DD-MM-AAAA.", "danger")
+        return redirect(url_for("desp_rec_movimento.listar_movimentos"))
 
-    movimentos = query.order_by(
-        DespRecMovimento.data_vencimento.asc(),
-        DespRecMovimento.id.desc(),
-    ).all()
+    # Apenas a primeira página dos cartões é renderizada; a tabela é
+    # carregada sob demanda por dados_movimentos
+    pagina = _cartoes_movimentos(periodo)
 
     return render_template(
         "desp_rec_movimento/list.html",
-        movimentos=movimentos,
-        data_inicial=data_inicial_str,
-        data_final=data_final_str,
+        movimentos=pagina["linhas"],
+        cursor=pagina["cursor"],
+        data_inicial=periodo["data_inicial_str"],
+        data_final=periodo["data_final_str"],
+    )
+
+
+@desp_rec_movimento_bp.route("/dados")
+@login_required
+def dados_movimentos():
+    try:
+        periodo = tabela_service.ler_periodo(request.args, mes_atual_por_padrao=True)
+    except ValueError:
+        return jsonify({"error": "Formato de data inválido."}), 400
+
+    if request.args.get("formato") == "cartoes":
+        pagina = _cartoes_movimentos(periodo, apos=request.args.get("apos"))
+        return jsonify(
+            {
+                "html": render_template(
+                    "desp_rec_movimento/_cartoes.html", movimentos=pagina["linhas"]
+                ),
+                "cursor": pagina["cursor"],
+            }
+        )
+
+    parametros = tabela_service.ler_parametros(
+        request.args, COLUNAS_MOVIMENTOS, ORDEM_PADRAO_MOVIMENTOS
+    )
+    resultado = tabela_service.paginar(
+        _query_movimentos(periodo),
+        COLUNAS_MOVIMENTOS,
+        DespRecMovimento.id,
+        parametros,
     )
+    return jsonify(tabela_service.resposta_datatables(parametros, resultado))
 
 
 @desp_rec_movimento_bp.route("/gerar-previsao", methods=["GET", "POST"])
@@ -161,10 +193,12 @@ def adicionar_lancamento_unico():
                 data_vencimento=form.data_vencimento.data,
                 valor_previsto=form.valor_previsto.data,
                 descricao=form.descricao.data.strip() if form.descricao.data else None,
-                status=STATUS_PENDENTE,
+                status=status_em_aberto(form.data_vencimento.data),
             )
             db.session.add(novo_movimento)
+            resumo_mensal_service.incluir_no_resumo([novo_movimento])
             db.session.commit()
+            invalidar_dashboard(current_user.id)
             flash("Lançamento adicionado com sucesso!", "success")
             return redirect(url_for("desp_rec_movimento.listar_movimentos"))
         except IntegrityError:
@@ -213,13 +247,15 @@ def editar_movimento(id):
             return redirect(url_for("desp_rec_movimento.listar_movimentos"))
 
         try:
-            movimento.data_vencimento = form.data_vencimento.data
-            movimento.valor_previsto = form.valor_previsto.data
+            with resumo_mensal_service.acompanhar(movimento):
+                movimento.data_vencimento = form.data_vencimento.data
+                movimento.valor_previsto = form.valor_previsto.data
             movimento.descricao = (
                 form.descricao.data.strip() if form.descricao.data else None
             )
 
             db.session.commit()
+            invalidar_dashboard(current_user.id)
             flash("Lançamento atualizado com sucesso!", "success")
             return redirect(url_for("desp_rec_movimento.listar_movimentos"))
 
@@ -257,8 +293,10 @@ def excluir_movimento(id):
         return redirect(url_for("desp_rec_movimento.listar_movimentos"))
 
     try:
+        resumo_mensal_service.remover_do_resumo([movimento])
         db.session.delete(movimento)
         db.session.commit()
+        invalidar_dashboard(current_user.id)
         flash("Lançamento excluído com sucesso!", "success")
     except Exception as e:
         db.session.rollback()
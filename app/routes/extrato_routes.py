@@ -1,16 +1,16 @@
 # app/routes/extrato_routes.py
 
-from datetime import date, datetime, timedelta
+from datetime import date
 from decimal import Decimal
 
-from flask import Blueprint, flash, render_template, request
+from flask import Blueprint, flash, redirect, render_template, request, url_for
 from flask_login import current_user, login_required
-from sqlalchemy.orm import joinedload
 
-from app import db
 from app.forms.extrato_forms import ExtratoBancarioForm
 from app.models.conta_model import Conta
-from app.models.conta_movimento_model import ContaMovimento
+from app.periodo import limites_mes
+from app.services import conta_saldo_service, exportacao_service, relatorios_service
+from app.utils import TIPO_CREDITO
 
 extrato_bp = Blueprint("extrato", __name__, url_prefix="/extratos")
 
@@ -43,70 +43,32 @@ def extrato_bancario():
             ).first()
 
             if conta_selecionada:
-                data_inicio_mes = datetime(ano, mes, 1)
-                data_fim_mes = (data_inicio_mes + timedelta(days=32)).replace(
-                    day=1
-                ) - timedelta(days=1)
+                data_inicio_mes, data_fim_mes = limites_mes(ano, mes)
 
                 limite_conta = conta_selecionada.limite
                 if conta_selecionada.tipo in ["Corrente", "Digital"]:
                     conta_elegivel_limite = True
 
-                saldo_anterior = Decimal(str(conta_selecionada.saldo_inicial))
-
-                movs_anteriores = (
-                    ContaMovimento.query.filter(
-                        ContaMovimento.conta_id == conta_selecionada.id,
-                        ContaMovimento.data_movimento < data_inicio_mes,
-                    )
-                    .options(joinedload(ContaMovimento.tipo_transacao))
-                    .all()
+                saldo_anterior = conta_saldo_service.get_saldo_anterior(
+                    conta_selecionada, ano, mes
                 )
 
-                for mov_ant in movs_anteriores:
-                    if mov_ant.tipo_transacao:
-                        if mov_ant.tipo_transacao.tipo == "Crédito":
-                            saldo_anterior += mov_ant.valor
-                        else:
-                            saldo_anterior -= mov_ant.valor
-
-                movimentacoes_do_mes = (
-                    ContaMovimento.query.filter(
-                        ContaMovimento.conta_id == conta_selecionada.id,
-                        ContaMovimento.data_movimento >= data_inicio_mes,
-                        ContaMovimento.data_movimento <= data_fim_mes,
-                    )
-                    .options(joinedload(ContaMovimento.tipo_transacao))
-                    .order_by(
-                        ContaMovimento.data_movimento.asc(), ContaMovimento.id.asc()
+                movimentacoes = list(
+                    relatorios_service.iterar_extrato_bancario(
+                        conta_selecionada,
+                        data_inicio_mes,
+                        data_fim_mes,
+                        saldo_anterior,
                     )
-                    .all()
                 )
 
-                saldo_acumulado_temp = saldo_anterior
-
-                for mov in movimentacoes_do_mes:
-                    if mov.tipo_transacao:
-                        if mov.tipo_transacao.tipo == "Crédito":
-                            saldo_acumulado_temp += mov.valor
-                            total_creditos += mov.valor
-                        else:
-                            saldo_acumulado_temp -= mov.valor
-                            total_debitos += mov.valor
-
-                        movimentacoes.append(
-                            {
-                                "id": mov.id,
-                                "data_movimento": mov.data_movimento,
-                                "tipo_transacao_nome": mov.tipo_transacao.transacao_tipo,
-                                "tipo_movimento": mov.tipo_transacao.tipo,
-                                "valor": mov.valor,
-                                "descricao": mov.descricao,
-                                "saldo_acumulado": saldo_acumulado_temp,
-                            }
-                        )
-
-                saldo_final_mes = saldo_acumulado_temp
+                saldo_final_mes = saldo_anterior
+                for mov in movimentacoes:
+                    if mov["tipo_movimento"] == TIPO_CREDITO:
+                        total_creditos += mov["valor"]
+                    else:
+                        total_debitos += mov["valor"]
+                    saldo_final_mes = mov["saldo_acumulado"]
 
         except (ValueError, TypeError):
             flash("Por favor, selecione uma conta válida.", "warning")
@@ -123,3 +85,47 @@ def extrato_bancario():
         limite_conta=limite_conta,
         conta_elegivel_limite=conta_elegivel_limite,
     )
+
+
+@extrato_bp.route("/extrato_bancario/exportar", methods=["GET"])
+@login_required
+def exportar_extrato_bancario():
+    conta = Conta.query.filter_by(
+        id=request.args.get("conta_id", type=int), usuario_id=current_user.id
+    ).first()
+    if not conta:
+        flash("Por favor, selecione uma conta válida.", "warning")
+        return redirect(url_for("extrato.extrato_bancario"))
+
+    try:
+        data_inicio, data_fim = exportacao_service.ler_intervalo_meses(
+            request.args, date.today().strftime("%m-%Y")
+        )
+    except (ValueError, TypeError):
+        flash("Período de exportação inválido.", "danger")
+        return redirect(url_for("extrato.extrato_bancario", conta_id=conta.id))
+
+    saldo_anterior = conta_saldo_service.get_saldo_anterior(
+        conta, data_inicio.year, data_inicio.month
+    )
+
+    def linhas():
+        yield [data_inicio, "Saldo anterior", None, None, None, saldo_anterior]
+        for mov in relatorios_service.iterar_extrato_bancario(
+            conta, data_inicio, data_fim, saldo_anterior
+        ):
+            yield [
+                mov["data_movimento"],
+                mov["tipo_transacao_nome"],
+                mov["tipo_movimento"],
+                mov["descricao"],
+                mov["valor"],
+                mov["saldo_acumulado"],
+            ]
+
+    return exportacao_service.resposta_exportacao(
+        exportacao_service.ler_formato(request.args),
+        f"extrato_{conta.nome_banco}_{data_inicio:%Y-%m}_{data_fim:%Y-%m}",
+        ["Data", "Transação", "Movimento", "Descrição", "Valor", "Saldo"],
+        linhas(),
+    )
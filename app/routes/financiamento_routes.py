@@ -2,7 +2,7 @@
 
 import functools
 import re
-from datetime import date, datetime
+from datetime import datetime
 from decimal import Decimal
 
 from flask import (
@@ -10,17 +10,19 @@ from flask import (
     abort,
     current_app,
     flash,
+    jsonify,
     redirect,
     render_template,
     request,
     url_for,
 )
 from flask_login import current_user, login_required
-from sqlalchemy import asc, desc
+from sqlalchemy import asc, desc, func
 from sqlalchemy.orm import joinedload
 from werkzeug.security import generate_password_hash
 
 from app import db
+from app.cache import invalidar_dashboard
 from app.forms.financiamento_forms import (
     AmortizacaoForm,
     CadastroFinanciamentoForm,
@@ -30,7 +32,11 @@ from app.forms.financiamento_forms import (
 from app.models.conta_movimento_model import ContaMovimento
 from app.models.financiamento_model import Financiamento
 from app.models.financiamento_parcela_model import FinanciamentoParcela
-from app.services import conta_service
+from app.services import (
+    conta_service,
+    resumo_mensal_service,
+    simulacao_financiamento_service,
+)
 from app.services.financiamento_service import (
     amortizar_parcelas,
     importar_e_processar_csv,
@@ -72,6 +78,7 @@ def adicionar_financiamento():
         )
         db.session.add(novo_financiamento)
         db.session.commit()
+        invalidar_dashboard(current_user.id)
         flash(
             "Financiamento principal criado com sucesso! Agora, importe o arquivo .csv com as parcelas.",
             "success",
@@ -111,6 +118,7 @@ def editar_financiamento(id):
             form.descricao.data.strip() if form.descricao.data else None
         )
         db.session.commit()
+        invalidar_dashboard(current_user.id)
         flash("Financiamento atualizado com sucesso!", "success")
         return redirect(url_for("financiamento.listar_financiamentos"))
 
@@ -134,8 +142,10 @@ def excluir_financiamento(id):
             "danger",
         )
         return redirect(url_for("financiamento.listar_financiamentos"))
+    resumo_mensal_service.remover_do_resumo(financiamento.parcelas)
     db.session.delete(financiamento)
     db.session.commit()
+    invalidar_dashboard(current_user.id)
     flash("Financiamento excluído com sucesso!", "success")
     return redirect(url_for("financiamento.listar_financiamentos"))
 
@@ -189,7 +199,6 @@ def visualizar_parcelas(id):
         "saldo_devedor": financiamento.saldo_devedor_atual,
     }
 
-    hoje = date.today()
     for p in parcelas:
         resumo_fluxo_caixa["total_previsto"] += p.valor_total_previsto
         if p.status == STATUS_PAGO:
@@ -203,9 +212,7 @@ def visualizar_parcelas(id):
             resumo_principal[STATUS_PAGO] += p.valor_principal
         elif p.status == STATUS_AMORTIZADO:
             resumo_principal[STATUS_AMORTIZADO] += p.valor_principal
-        elif p.status == STATUS_ATRASADO or (
-            p.status == STATUS_PENDENTE and p.data_vencimento < hoje
-        ):
+        elif p.status == STATUS_ATRASADO:
             resumo_principal[STATUS_PENDENTE] += p.valor_principal
             if "atrasado_valor" not in resumo_principal:
                 resumo_principal["atrasado_valor"] = Decimal("0.00")
@@ -309,3 +316,75 @@ def amortizar_financiamento(id):
         parcelas_json_prazo=parcelas_json_prazo,
         parcelas_json_parcela=parcelas_json_parcela,
     )
+
+
+@financiamento_bp.route("/<int:id>/simular", methods=["POST"])
+@login_required
+def simular_amortizacao(id):
+    financiamento = Financiamento.query.filter_by(
+        id=id, usuario_id=current_user.id
+    ).first_or_404()
+
+    # Simula a partir da posição atual: saldo devedor e parcelas em aberto
+    parcelas_abertas, proximo_vencimento = (
+        db.session.query(
+            func.count(FinanciamentoParcela.id),
+            func.min(FinanciamentoParcela.data_vencimento),
+        )
+        .filter(
+            FinanciamentoParcela.financiamento_id == id,
+            FinanciamentoParcela.status.in_([STATUS_PENDENTE, STATUS_ATRASADO]),
+        )
+        .one()
+    )
+    if parcelas_abertas:
+        saldo = financiamento.saldo_devedor_atual
+        prazo_meses = parcelas_abertas
+        data_primeira_parcela = proximo_vencimento
+    else:
+        saldo = financiamento.valor_total_financiado
+        prazo_meses = financiamento.prazo_meses
+        data_primeira_parcela = financiamento.data_inicio
+
+    if saldo <= 0 or not (
+        0 < prazo_meses <= simulacao_financiamento_service.MAXIMO_PRAZO_MESES
+    ):
+        return jsonify({"error": "Não há saldo devedor para simular."}), 400
+
+    dados = request.get_json(silent=True) or {}
+    try:
+        cenarios = simulacao_financiamento_service.ler_cenarios(
+            dados.get("cenarios"), prazo_meses, data_primeira_parcela
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    resultado = simulacao_financiamento_service.simular_cenarios(
+        saldo,
+        financiamento.taxa_juros_anual,
+        prazo_meses,
+        financiamento.tipo_amortizacao,
+        cenarios,
+        data_primeira_parcela,
+    )
+    resultado["parametros"] = {
+        "saldo_devedor": str(saldo),
+        "taxa_juros_anual": str(financiamento.taxa_juros_anual),
+        "prazo_meses": prazo_meses,
+        "tipo_amortizacao": financiamento.tipo_amortizacao,
+        "data_primeira_parcela": data_primeira_parcela.isoformat(),
+    }
+
+    if dados.get("cronograma"):
+        cronograma = simulacao_financiamento_service.gerar_cronograma(
+            saldo,
+            financiamento.taxa_juros_anual,
+            prazo_meses,
+            financiamento.tipo_amortizacao,
+        )
+        resultado["cronograma"] = {
+            chave: valores.round(2).tolist()
+            for chave, valores in cronograma.items()
+        }
+
+    return jsonify(resultado)
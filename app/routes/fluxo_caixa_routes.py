@@ -7,7 +7,7 @@ from flask import Blueprint, flash, redirect, render_template, request, url_for
 from flask_login import current_user, login_required
 
 from app.forms.fluxo_caixa_forms import FluxoCaixaForm
-from app.services import relatorios_service
+from app.services import exportacao_service, relatorios_service
 
 fluxo_caixa_bp = Blueprint("fluxo_caixa", __name__, url_prefix="/fluxo_caixa")
 
@@ -43,3 +43,29 @@ def fluxo_caixa():
         kpis=kpis,
         title="Fluxo de Caixa Mensal",
     )
+
+
+@fluxo_caixa_bp.route("/exportar", methods=["GET"])
+@login_required
+def exportar_fluxo_caixa():
+    try:
+        data_inicio, data_fim = exportacao_service.ler_intervalo_meses(
+            request.args, date.today().strftime("%m-%Y")
+        )
+    except (ValueError, TypeError):
+        flash("Período de exportação inválido.", "danger")
+        return redirect(url_for("fluxo_caixa.fluxo_caixa"))
+
+    linhas = (
+        [mov["data"], mov["origem"], mov["categoria"], mov["conta"], mov["valor"]]
+        for mov in relatorios_service.iterar_fluxo_caixa(
+            current_user.id, data_inicio, data_fim
+        )
+    )
+
+    return exportacao_service.resposta_exportacao(
+        exportacao_service.ler_formato(request.args),
+        f"fluxo_caixa_{data_inicio:%Y-%m}_{data_fim:%Y-%m}",
+        ["Data", "Origem", "Categoria", "Conta", "Valor"],
+        linhas,
+    )
@@ -2,7 +2,7 @@
 
 from datetime import date
 
-from flask import Blueprint, render_template, request
+from flask import Blueprint, current_app, render_template, request
 from flask_login import current_user, login_required
 
 from app.models.financiamento_model import Financiamento
@@ -85,9 +85,13 @@ def resumo_financiamentos():
 @login_required
 def evolucao_dividas_crediario():
     grouping_by = request.args.get("grouping_by", "crediario")
+    num_months = request.args.get(
+        "meses", current_app.config["EVOLUCAO_DIVIDAS_MESES"], type=int
+    )
+    num_months = max(1, min(num_months, 120))
 
     chart_data = get_installment_evolution_data(
-        user_id=current_user.id, grouping_by=grouping_by
+        user_id=current_user.id, grouping_by=grouping_by, num_months=num_months
     )
 
     return render_template(
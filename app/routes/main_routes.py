@@ -1,38 +1,16 @@
 # app/routes/main_routes.py
 
 import os
-from datetime import date, timedelta
-from decimal import Decimal
+from datetime import date
 
 from flask import Blueprint, render_template, request, send_from_directory
 from flask_login import current_user, login_required
-from sqlalchemy import func
-from sqlalchemy.orm import joinedload, subqueryload
 
-from app import db
+from app import cache
 from app.forms.fluxo_caixa_forms import FluxoCaixaForm
-from app.models.conta_model import Conta
-from app.models.crediario_fatura_model import CrediarioFatura
-from app.models.crediario_model import Crediario
-from app.models.crediario_movimento_model import CrediarioMovimento
-from app.models.crediario_parcela_model import CrediarioParcela
-from app.models.desp_rec_model import DespRec
-from app.models.desp_rec_movimento_model import DespRecMovimento
-from app.models.financiamento_model import Financiamento
-from app.models.financiamento_parcela_model import FinanciamentoParcela
-from app.models.salario_movimento_item_model import SalarioMovimentoItem
-from app.models.salario_movimento_model import SalarioMovimento
 from app.models.solicitacao_acesso_model import SolicitacaoAcesso
-from app.services import alerta_service, conta_service, relatorios_service
-from app.utils import (
-    NATUREZA_DESPESA,
-    STATUS_ATRASADO,
-    STATUS_PARCIAL_PAGO,
-    STATUS_PARCIAL_RECEBIDO,
-    STATUS_PENDENTE,
-    TIPO_ENTRADA,
-    TIPO_SAIDA,
-)
+from app.services import alerta_service, conta_service, dashboard_service
+from app.utils import STATUS_PENDENTE
 
 main_bp = Blueprint("main", __name__)
 
@@ -40,61 +18,7 @@ main_bp = Blueprint("main", __name__)
 @main_bp.route("/dashboard")
 @login_required
 def dashboard():
-    balance_kpis = conta_service.get_account_balance_kpis(current_user.id)
     hoje = date.today()
-    balanco_do_mes = relatorios_service.get_balanco_mensal(
-        current_user.id, hoje.year, hoje.month
-    )
-    kpis = {
-        "saldo_operacional": balance_kpis["saldo_operacional"],
-        "saldo_investimentos": balance_kpis["saldo_investimentos"],
-        "saldo_beneficios": balance_kpis["saldo_beneficios"],
-        "saldo_fgts": balance_kpis["saldo_fgts"],
-        "receitas_mes": balanco_do_mes["receitas"],
-        "despesas_mes": balanco_do_mes["despesas"],
-        "balanco_mes": balanco_do_mes["balanco"],
-    }
-    contas_do_usuario = (
-        Conta.query.filter_by(usuario_id=current_user.id, ativa=True)
-        .filter(Conta.saldo_atual != 0)
-        .order_by(Conta.nome_banco.asc())
-        .all()
-    )
-    financiamentos_ativos = Financiamento.query.filter_by(
-        usuario_id=current_user.id
-    ).all()
-
-    crediarios_ativos = Crediario.query.filter_by(
-        usuario_id=current_user.id, ativa=True
-    ).all()
-    crediario_ids = [c.id for c in crediarios_ativos]
-
-    if crediario_ids:
-        compras_por_crediario = dict(
-            db.session.query(
-                CrediarioMovimento.crediario_id,
-                func.sum(CrediarioMovimento.valor_total_compra),
-            )
-            .filter(CrediarioMovimento.crediario_id.in_(crediario_ids))
-            .group_by(CrediarioMovimento.crediario_id)
-            .all()
-        )
-        pagos_por_crediario = dict(
-            db.session.query(
-                CrediarioFatura.crediario_id,
-                func.sum(CrediarioFatura.valor_pago_fatura),
-            )
-            .filter(CrediarioFatura.crediario_id.in_(crediario_ids))
-            .group_by(CrediarioFatura.crediario_id)
-            .all()
-        )
-        for cred in crediarios_ativos:
-            total_compras = compras_por_crediario.get(cred.id, Decimal("0.0"))
-            total_pago = pagos_por_crediario.get(cred.id, Decimal("0.0"))
-            cred.saldo_devedor = total_compras - total_pago
-    else:
-        for cred in crediarios_ativos:
-            cred.saldo_devedor = Decimal("0.0")
 
     form = FluxoCaixaForm(request.args)
     mes_ano_selecionado = form.mes_ano.data
@@ -103,138 +27,28 @@ def dashboard():
         form.mes_ano.data = mes_ano_selecionado
 
     mes, ano = map(int, mes_ano_selecionado.split("-"))
-    data_inicio_mes = date(ano, mes, 1)
-    data_fim_mes = (data_inicio_mes + timedelta(days=32)).replace(day=1) - timedelta(
-        days=1
-    )
-
-    proximos_movimentos = []
 
-    desp_rec_mes = (
-        DespRecMovimento.query.join(DespRec)
-        .filter(
-            DespRecMovimento.usuario_id == current_user.id,
-            DespRecMovimento.data_vencimento.between(data_inicio_mes, data_fim_mes),
-            DespRecMovimento.status.in_([STATUS_PENDENTE, STATUS_ATRASADO]),
-        )
-        .options(joinedload(DespRecMovimento.despesa_receita))
-        .all()
+    versao = current_user.versao_dashboard
+    snapshot = cache.get_dashboard_snapshot(
+        current_user.id, versao, mes_ano_selecionado
     )
-    for item in desp_rec_mes:
-        proximos_movimentos.append(
-            {
-                "data": item.data_vencimento,
-                "descricao": item.despesa_receita.nome,
-                "valor": item.valor_previsto,
-                "tipo": (
-                    TIPO_SAIDA
-                    if item.despesa_receita.natureza == NATUREZA_DESPESA
-                    else TIPO_ENTRADA
-                ),
-            }
+    if snapshot is None:
+        snapshot = dashboard_service.get_dashboard_snapshot(current_user.id, ano, mes)
+        cache.set_dashboard_snapshot(
+            current_user.id, versao, mes_ano_selecionado, snapshot
         )
 
-    faturas_mes = (
-        CrediarioFatura.query.filter(
-            CrediarioFatura.usuario_id == current_user.id,
-            CrediarioFatura.data_vencimento_fatura.between(
-                data_inicio_mes, data_fim_mes
-            ),
-            CrediarioFatura.status.in_(
-                [STATUS_PENDENTE, STATUS_ATRASADO, STATUS_PARCIAL_PAGO]
-            ),
-        )
-        .options(joinedload(CrediarioFatura.crediario))
-        .all()
-    )
-    for fatura in faturas_mes:
-        proximos_movimentos.append(
-            {
-                "data": fatura.data_vencimento_fatura,
-                "descricao": f"Fatura {fatura.crediario.nome_crediario}",
-                "valor": fatura.valor_total_fatura - fatura.valor_pago_fatura,
-                "tipo": TIPO_SAIDA,
-            }
-        )
-
-    parcelas_mes = (
-        FinanciamentoParcela.query.join(Financiamento)
-        .filter(
-            Financiamento.usuario_id == current_user.id,
-            FinanciamentoParcela.data_vencimento.between(data_inicio_mes, data_fim_mes),
-            FinanciamentoParcela.status.in_([STATUS_PENDENTE, STATUS_ATRASADO]),
-        )
-        .options(joinedload(FinanciamentoParcela.financiamento))
-        .all()
-    )
-    for parcela in parcelas_mes:
-        proximos_movimentos.append(
-            {
-                "data": parcela.data_vencimento,
-                "descricao": f"{parcela.financiamento.nome_financiamento} ({parcela.numero_parcela}/{parcela.financiamento.prazo_meses})",
-                "valor": parcela.valor_total_previsto,
-                "tipo": TIPO_SAIDA,
-            }
-        )
-
-    salarios_mes = SalarioMovimento.query.filter(
-        SalarioMovimento.usuario_id == current_user.id,
-        SalarioMovimento.data_recebimento.between(data_inicio_mes, data_fim_mes),
-        SalarioMovimento.status.in_([STATUS_PENDENTE, STATUS_PARCIAL_RECEBIDO]),
-    ).all()
-    for salario in salarios_mes:
-        if not salario.movimento_bancario_salario_id and salario.salario_liquido > 0:
-            proximos_movimentos.append(
-                {
-                    "data": salario.data_recebimento,
-                    "descricao": f"Salário Líquido (Ref: {salario.mes_referencia})",
-                    "valor": salario.salario_liquido,
-                    "tipo": TIPO_ENTRADA,
-                }
-            )
-
-        for item_beneficio in salario.itens:
-            if (
-                item_beneficio.salario_item.tipo == "Benefício"
-                and not item_beneficio.movimento_bancario_id
-            ):
-                proximos_movimentos.append(
-                    {
-                        "data": salario.data_recebimento,
-                        "descricao": f"{item_beneficio.salario_item.nome} (Ref: {salario.mes_referencia})",
-                        "valor": item_beneficio.valor,
-                        "tipo": TIPO_ENTRADA,
-                    }
-                )
-
-    proximos_movimentos.sort(key=lambda x: x["data"])
-
     pending_requests_count = (
         SolicitacaoAcesso.query.filter_by(status=STATUS_PENDENTE).count()
         if current_user.is_admin
         else 0
     )
 
-    contas_a_vencer = relatorios_service.get_contas_a_vencer(current_user.id)
-    contas_a_vencer_count = len(contas_a_vencer)
-
-    contas_vencidas = relatorios_service.get_contas_vencidas(current_user.id)
-    contas_vencidas_count = len(contas_vencidas)
-
-    ultimos_movimentos = conta_service.get_ultimos_movimentos_bancarios(current_user.id)
-
     return render_template(
         "dashboard.html",
-        kpis=kpis,
-        contas_do_usuario=contas_do_usuario,
-        proximos_movimentos=proximos_movimentos,
         pending_requests=pending_requests_count,
-        financiamentos=financiamentos_ativos,
-        crediarios=crediarios_ativos,
         form_movimentos=form,
-        contas_a_vencer_count=contas_a_vencer_count,
-        contas_vencidas_count=contas_vencidas_count,
-        ultimos_movimentos=ultimos_movimentos,
+        **snapshot,
     )
 
 
@@ -7,20 +7,17 @@ from datetime import (
 )
 
 from dateutil.relativedelta import relativedelta
-from flask import Blueprint, abort, render_template, request
+from flask import Blueprint, abort, flash, redirect, render_template, request, url_for
 from flask_login import current_user, login_required
-from sqlalchemy import extract, func
+from sqlalchemy import func
 
 from app import db
 from app.forms.fluxo_caixa_forms import FluxoCaixaForm
 from app.forms.relatorios_forms import GastosCrediarioForm, ResumoAnualForm
-from app.models.crediario_grupo_model import CrediarioGrupo
 from app.models.crediario_movimento_model import CrediarioMovimento
-from app.models.crediario_parcela_model import CrediarioParcela
-from app.models.crediario_subgrupo_model import CrediarioSubgrupo
-from app.models.fornecedor_model import Fornecedor
 from app.models.salario_movimento_model import SalarioMovimento
-from app.services import relatorios_service
+from app.replica import usar_replica
+from app.services import exportacao_service, relatorios_service
 from app.services.relatorios_service import (
     get_detalhes_parcelas_por_grupo,
     get_gastos_crediario_por_destino_anual,
@@ -66,6 +63,35 @@ def resumo_salario():
     )
 
 
+@relatorios_bp.route("/resumo_salario/exportar", methods=["GET"])
+@login_required
+def exportar_resumo_salario():
+    ano = request.args.get("ano", type=int)
+    if not ano:
+        flash("Selecione o ano para exportar.", "warning")
+        return redirect(url_for("relatorios.resumo_salario"))
+
+    dados = relatorios_service.get_resumo_salario_anual(current_user.id, ano)
+
+    def linha(categoria, verba):
+        return [categoria, verba["nome"], *verba["valores_mes"], verba["total_anual"]]
+
+    def linhas():
+        for categoria, verbas in dados["tabela"].items():
+            for verba in verbas:
+                yield linha(categoria, verba)
+        for total in dados["totais"].values():
+            yield linha("Total", total)
+        yield linha("Total", dados["salario_liquido"])
+
+    return exportacao_service.resposta_exportacao(
+        exportacao_service.ler_formato(request.args),
+        f"resumo_salario_{ano}",
+        ["Categoria", "Verba", *dados["meses_nomes"], "Total"],
+        linhas(),
+    )
+
+
 @relatorios_bp.route("/resumo-mensal", methods=["GET"])
 @login_required
 def resumo_mensal():
@@ -86,6 +112,41 @@ def resumo_mensal():
     )
 
 
+@relatorios_bp.route("/resumo-mensal/exportar", methods=["GET"])
+@login_required
+def exportar_resumo_mensal():
+    try:
+        mes, ano = map(
+            int, request.args.get("mes_ano", date.today().strftime("%m-%Y")).split("-")
+        )
+        dados = relatorios_service.get_resumo_mensal(current_user.id, ano, mes)
+    except (ValueError, TypeError):
+        flash("Formato de data inválido.", "danger")
+        return redirect(url_for("relatorios.resumo_mensal"))
+
+    def linhas():
+        for situacao, chave in (
+            ("Em aberto", "movimentacoes_em_aberto"),
+            ("Realizado", "movimentacoes_realizadas"),
+        ):
+            for mov in dados[chave]:
+                yield [
+                    situacao,
+                    mov["data"],
+                    mov["descricao"],
+                    mov["tipo"],
+                    mov["status"],
+                    mov["valor"],
+                ]
+
+    return exportacao_service.resposta_exportacao(
+        exportacao_service.ler_formato(request.args),
+        f"resumo_mensal_{ano}-{mes:02d}",
+        ["Situação", "Data", "Descrição", "Natureza", "Status", "Valor"],
+        linhas(),
+    )
+
+
 @relatorios_bp.route("/gastos_por_grupo", methods=["GET"])
 @login_required
 def gastos_por_grupo():
@@ -162,49 +223,14 @@ def crediario_resumo(grupo_id, ano):
 
 @relatorios_bp.route("/crediario_detalhado")
 @login_required
+@usar_replica
 def crediario_detalhado():
     hoje = date.today()
     primeiro_dia_mes_atual = date(hoje.year, hoje.month, 1)
 
-    resultados = (
-        db.session.query(
-            CrediarioGrupo.id.label("grupo_id"),
-            CrediarioGrupo.grupo_crediario.label("grupo_nome"),
-            CrediarioSubgrupo.id.label("subgrupo_id"),
-            CrediarioSubgrupo.nome.label("subgrupo_nome"),
-            Fornecedor.nome.label("fornecedor_nome"),
-            extract("year", CrediarioParcela.data_vencimento).label("ano"),
-            extract("month", CrediarioParcela.data_vencimento).label("mes"),
-            func.sum(CrediarioParcela.valor_parcela).label("total"),
-        )
-        .join(
-            CrediarioMovimento,
-            CrediarioParcela.crediario_movimento_id == CrediarioMovimento.id,
-        )
-        .outerjoin(
-            CrediarioGrupo, CrediarioMovimento.crediario_grupo_id == CrediarioGrupo.id
-        )
-        .outerjoin(
-            CrediarioSubgrupo,
-            CrediarioMovimento.crediario_subgrupo_id == CrediarioSubgrupo.id,
-        )
-        .outerjoin(Fornecedor, CrediarioMovimento.fornecedor_id == Fornecedor.id)
-        .filter(
-            CrediarioMovimento.usuario_id == current_user.id,
-            CrediarioParcela.data_vencimento >= primeiro_dia_mes_atual,
-            CrediarioParcela.pago == False,
-        )
-        .group_by(
-            CrediarioGrupo.id,
-            CrediarioGrupo.grupo_crediario,
-            CrediarioSubgrupo.id,
-            CrediarioSubgrupo.nome,
-            Fornecedor.nome,
-            extract("year", CrediarioParcela.data_vencimento),
-            extract("month", CrediarioParcela.data_vencimento),
-        )
-        .all()
-    )
+    resultados = relatorios_service.query_crediario_detalhado(
+        current_user.id, primeiro_dia_mes_atual
+    ).all()
 
     colunas_meses = set()
 
@@ -269,3 +295,31 @@ def crediario_detalhado():
         dados=dados_organizados,
         meses=meses_header,
     )
+
+
+@relatorios_bp.route("/crediario_detalhado/exportar")
+@login_required
+def exportar_crediario_detalhado():
+    hoje = date.today()
+
+    resultados = relatorios_service.iterar_crediario_detalhado(
+        current_user.id, date(hoje.year, hoje.month, 1)
+    )
+
+    linhas = (
+        [
+            row.grupo_nome or "Sem Grupo",
+            row.subgrupo_nome or "Geral",
+            row.fornecedor_nome or "Sem Fornecedor",
+            f"{int(row.mes):02d}/{int(row.ano)}",
+            row.total,
+        ]
+        for row in resultados
+    )
+
+    return exportacao_service.resposta_exportacao(
+        exportacao_service.ler_formato(request.args),
+        f"crediario_detalhado_{hoje:%Y-%m}",
+        ["Grupo", "Subgrupo", "Fornecedor", "Mês", "Total"],
+        linhas,
+    )
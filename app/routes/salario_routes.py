@@ -2,7 +2,7 @@
 
 import calendar
 import json
-from datetime import date, datetime
+from datetime import datetime
 from operator import and_
 
 from flask import (
@@ -16,9 +16,11 @@ from flask import (
     url_for,
 )
 from flask_login import current_user, login_required
+from sqlalchemy import select
 from sqlalchemy.orm import joinedload, subqueryload
 
 from app import db
+from app.cache import invalidar_dashboard
 from app.forms.salario_forms import (
     AdicionarItemFolhaForm,
     CabecalhoFolhaForm,
@@ -29,7 +31,7 @@ from app.models.conta_model import Conta
 from app.models.salario_item_model import SalarioItem
 from app.models.salario_movimento_item_model import SalarioMovimentoItem
 from app.models.salario_movimento_model import SalarioMovimento
-from app.services import salario_service
+from app.services import salario_service, tabela_service
 from app.services.salario_service import (
     adicionar_item_folha,
     criar_folha_pagamento,
@@ -40,6 +42,7 @@ from app.services.salario_service import (
 from app.services.salario_service import (
     excluir_item_folha as excluir_item_folha_service,
 )
+from app.services.tabela_service import coluna
 
 salario_bp = Blueprint("salario", __name__, url_prefix="/salario")
 
@@ -86,6 +89,7 @@ def adicionar_item():
             )
             db.session.add(novo_item)
             db.session.commit()
+            invalidar_dashboard(current_user.id)
             flash("Item da folha adicionado com sucesso!", "success")
             return redirect(url_for("salario.listar_itens"))
         except Exception as e:
@@ -128,6 +132,7 @@ def editar_item(id):
                 form.conta_destino_id.data if item.tipo == "Benefício" else None
             )
             db.session.commit()
+            invalidar_dashboard(current_user.id)
             flash("Item da folha atualizado com sucesso!", "success")
             return redirect(url_for("salario.listar_itens"))
         except Exception as e:
@@ -164,6 +169,7 @@ def excluir_item(id):
     try:
         db.session.delete(item)
         db.session.commit()
+        invalidar_dashboard(current_user.id)
         flash("Item da folha excluído com sucesso!", "success")
     except Exception as e:
         db.session.rollback()
@@ -175,46 +181,95 @@ def excluir_item(id):
     return redirect(url_for("salario.listar_itens"))
 
 
-@salario_bp.route("/lancamentos")
-@login_required
-def listar_movimentos():
-    data_inicial_str = request.args.get("data_inicial")
-    data_final_str = request.args.get("data_final")
-
-    query = (
-        db.session.query(SalarioMovimento)
-        .outerjoin(SalarioMovimento.itens)
-        .filter(SalarioMovimento.usuario_id == current_user.id)
-        .options(
-            joinedload(SalarioMovimento.itens).joinedload(
-                SalarioMovimentoItem.salario_item
-            )
+COLUNAS_MOVIMENTOS = [
+    coluna("id", SalarioMovimento.id),
+    coluna("mes_referencia", SalarioMovimento.mes_referencia, pesquisavel=True),
+    coluna("tipo", SalarioMovimento.tipo, pesquisavel=True),
+    coluna("data_recebimento", SalarioMovimento.data_recebimento),
+    coluna("salario_liquido", SalarioMovimento.salario_liquido),
+    coluna("total_beneficios", SalarioMovimento.total_beneficios),
+    coluna("total_fgts", SalarioMovimento.total_fgts),
+    coluna("status", SalarioMovimento.status, pesquisavel=True),
+]
+ORDEM_PADRAO_MOVIMENTOS = ("data_recebimento", "desc")
+
+
+def _query_movimentos(periodo):
+    query = select(SalarioMovimento.id).where(
+        SalarioMovimento.usuario_id == current_user.id
+    )
+    if periodo["data_inicial"]:
+        query = query.where(
+            SalarioMovimento.data_recebimento >= periodo["data_inicial"]
         )
-        .distinct()
+    if periodo["data_final"]:
+        query = query.where(
+            SalarioMovimento.data_recebimento <= periodo["data_final"]
+        )
+    return query
+
+
+def _cartoes_movimentos(periodo, apos=None):
+    return tabela_service.pagina_de_cartoes(
+        _query_movimentos(periodo),
+        COLUNAS_MOVIMENTOS,
+        SalarioMovimento.id,
+        ORDEM_PADRAO_MOVIMENTOS,
+        apos=apos,
     )
 
-    try:
-        if data_inicial_str:
-            data_inicial = date.fromisoformat(data_inicial_str)
-            query = query.filter(SalarioMovimento.data_recebimento >= data_inicial)
 
-        if data_final_str:
-            data_final = date.fromisoformat(data_final_str)
-            query = query.filter(SalarioMovimento.data_recebimento <= data_final)
+@salario_bp.route("/lancamentos")
+@login_required
+def listar_movimentos():
+    try:
+        periodo = tabela_service.ler_periodo(request.args)
     except ValueError:
         flash("Formato de data inválido. Use DD-MM-AAAA.", "danger")
         return redirect(url_for("salario.listar_movimentos"))
 
-    movimentos = query.order_by(
-        SalarioMovimento.data_recebimento.desc(),
-    ).all()
+    # Apenas a primeira página dos cartões é renderizada; a tabela é
+    # carregada sob demanda por dados_movimentos
+    pagina = _cartoes_movimentos(periodo)
 
     return render_template(
         "salario_movimento/list.html",
-        movimentos=movimentos,
-        data_inicial=data_inicial_str,
-        data_final=data_final_str,
+        movimentos=pagina["linhas"],
+        cursor=pagina["cursor"],
+        data_inicial=periodo["data_inicial_str"],
+        data_final=periodo["data_final_str"],
+    )
+
+
+@salario_bp.route("/lancamentos/dados")
+@login_required
+def dados_movimentos():
+    try:
+        periodo = tabela_service.ler_periodo(request.args)
+    except ValueError:
+        return jsonify({"error": "Formato de data inválido."}), 400
+
+    if request.args.get("formato") == "cartoes":
+        pagina = _cartoes_movimentos(periodo, apos=request.args.get("apos"))
+        return jsonify(
+            {
+                "html": render_template(
+                    "salario_movimento/_cartoes.html", movimentos=pagina["linhas"]
+                ),
+                "cursor": pagina["cursor"],
+            }
+        )
+
+    parametros = tabela_service.ler_parametros(
+        request.args, COLUNAS_MOVIMENTOS, ORDEM_PADRAO_MOVIMENTOS
+    )
+    resultado = tabela_service.paginar(
+        _query_movimentos(periodo),
+        COLUNAS_MOVIMENTOS,
+        SalarioMovimento.id,
+        parametros,
     )
+    return jsonify(tabela_service.resposta_datatables(parametros, resultado))
 
 
 @salario_bp.route("/lancamento/novo", methods=["GET", "POST"])
@@ -24,6 +24,7 @@ from app.forms.usuario_forms import (
     EditarUsuarioForm,
     PerfilUsuarioForm,
 )
+from app.instrumentacao import get_estatisticas_sql
 from app.models.solicitacao_acesso_model import SolicitacaoAcesso
 from app.models.usuario_model import Usuario
 from app.services.usuario_service import atualizar_perfil_usuario, criar_novo_usuario
@@ -149,6 +150,24 @@ def excluir_usuario(id):
     return redirect(url_for("usuario.listar_usuarios"))
 
 
+@usuario_bp.route("/desempenho-sql")
+@admin_required
+def desempenho_sql():
+    return render_template(
+        "usuarios/desempenho_sql.html",
+        endpoints=get_estatisticas_sql().resumo(),
+        instrumentacao_ativa=current_app.config.get("SQL_INSTRUMENTACAO", True),
+    )
+
+
+@usuario_bp.route("/desempenho-sql/limpar", methods=["POST"])
+@admin_required
+def limpar_desempenho_sql():
+    get_estatisticas_sql().limpar()
+    flash("Estatísticas de SQL zeradas.", "success")
+    return redirect(url_for("usuario.desempenho_sql"))
+
+
 @usuario_bp.route("/perfil", methods=["GET", "POST"])
 @login_required
 def perfil():
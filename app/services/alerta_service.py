@@ -4,16 +4,9 @@ from datetime import date, timedelta
 from decimal import Decimal
 
 from flask_login import current_user
-from sqlalchemy import and_, func, or_
 
 from app import db
-from app.models.conta_model import Conta
-from app.models.crediario_fatura_model import CrediarioFatura
-from app.models.crediario_movimento_model import CrediarioMovimento
-from app.models.crediario_parcela_model import CrediarioParcela
-from app.models.desp_rec_movimento_model import DespRecMovimento
-from app.models.financiamento_parcela_model import FinanciamentoParcela
-from app.models.salario_movimento_model import SalarioMovimento
+from app.services import fatura_service, obrigacao_service
 from app.utils import (
     NATUREZA_DESPESA,
     NATUREZA_RECEITA,
@@ -52,21 +45,10 @@ def _formatar_item_financiamento(item):
     }
 
 
-def _formatar_item_crediario(item):
-    soma_parcelas_query = (
-        db.session.query(func.sum(CrediarioParcela.valor_parcela))
-        .join(
-            CrediarioMovimento,
-            CrediarioMovimento.id == CrediarioParcela.crediario_movimento_id,
-        )
-        .filter(
-            CrediarioMovimento.crediario_id == item.crediario_id,
-            func.date_format(CrediarioParcela.data_vencimento, "%Y-%m")
-            == item.mes_referencia,
-        )
-        .scalar()
+def _formatar_item_crediario(item, somas_parcelas):
+    soma_parcelas = somas_parcelas.get(
+        (item.crediario_id, item.mes_referencia), Decimal("0.00")
     )
-    soma_parcelas = soma_parcelas_query or Decimal("0.00")
 
     valor_fatura_rounded = (item.valor_total_fatura or Decimal("0.00")).quantize(
         TWO_PLACES
@@ -102,9 +84,6 @@ def _formatar_item_receita(item):
 
 
 def _formatar_item_salario(item):
-    folha_tem_fgts = any(
-        it.salario_item.tipo == "FGTS" and it.valor > 0 for it in item.itens
-    )
     return {
         "data": item.data_recebimento,
         "descricao": f"FOLHA REF. {item.mes_referencia}",
@@ -114,7 +93,7 @@ def _formatar_item_salario(item):
         "tipo_item": item.tipo,
         "valor_para_modal": item.salario_liquido,
         "conta_sugerida_id": None,
-        "folha_tem_fgts": folha_tem_fgts,
+        "folha_tem_fgts": item.total_fgts > 0,
     }
 
 
@@ -132,150 +111,82 @@ def _formatar_item_beneficio(item):
     }
 
 
-def get_contas_vencidas():
-    hoje = date.today()
-    movimentos = []
+# Status considerados em aberto por fonte, compartilhados entre as listas de
+# alertas e a contagem exibida no dashboard
+STATUS_ALERTA = {
+    obrigacao_service.FONTE_DESP_REC: STATUS_NAO_PAGO + [STATUS_PARCIAL_RECEBIDO],
+    obrigacao_service.FONTE_FINANCIAMENTO: STATUS_NAO_PAGO,
+    obrigacao_service.FONTE_CREDIARIO: STATUS_NAO_PAGO,
+    obrigacao_service.FONTE_SALARIO: STATUS_NAO_RECEBIDO,
+    obrigacao_service.FONTE_BENEFICIO: STATUS_NAO_RECEBIDO,
+}
+
+
+def _filtros_alerta(hoje, data_limite=None):
+    if data_limite is None:
+        return {
+            "data_fim": hoje - timedelta(days=1),
+            "status": STATUS_ALERTA,
+            "apenas_em_aberto": True,
+        }
+    return {
+        "data_inicio": hoje,
+        "data_fim": data_limite,
+        "status": STATUS_ALERTA,
+        "apenas_em_aberto": True,
+    }
 
-    despesas = (
-        DespRecMovimento.query.join(DespRecMovimento.despesa_receita)
-        .filter(
-            DespRecMovimento.usuario_id == current_user.id,
-            DespRecMovimento.data_vencimento < hoje,
-            DespRecMovimento.despesa_receita.has(natureza=NATUREZA_DESPESA),
-            DespRecMovimento.status.in_(STATUS_NAO_PAGO),
-        )
-        .all()
-    )
-    movimentos.extend([_formatar_item_despesa(d) for d in despesas])
-
-    parcelas = (
-        FinanciamentoParcela.query.join(FinanciamentoParcela.financiamento)
-        .filter(
-            FinanciamentoParcela.data_vencimento < hoje,
-            FinanciamentoParcela.financiamento.has(usuario_id=current_user.id),
-            FinanciamentoParcela.status.in_(STATUS_NAO_PAGO),
-        )
-        .all()
-    )
-    movimentos.extend([_formatar_item_financiamento(p) for p in parcelas])
-
-    faturas = CrediarioFatura.query.filter(
-        CrediarioFatura.usuario_id == current_user.id,
-        CrediarioFatura.data_vencimento_fatura < hoje,
-        CrediarioFatura.status.in_(STATUS_NAO_PAGO),
-    ).all()
-    movimentos.extend([_formatar_item_crediario(f) for f in faturas])
-
-    receitas = (
-        DespRecMovimento.query.join(DespRecMovimento.despesa_receita)
-        .filter(
-            DespRecMovimento.usuario_id == current_user.id,
-            DespRecMovimento.data_vencimento < hoje,
-            DespRecMovimento.despesa_receita.has(natureza=NATUREZA_RECEITA),
-            DespRecMovimento.status.in_(STATUS_NAO_RECEBIDO),
-        )
-        .all()
+
+def _listar_alertas(hoje, data_limite=None):
+    linhas = obrigacao_service.get_obrigacoes(
+        current_user.id, carregar_itens=True, **_filtros_alerta(hoje, data_limite)
     )
-    movimentos.extend([_formatar_item_receita(r) for r in receitas])
-
-    salarios_query = SalarioMovimento.query.filter(
-        SalarioMovimento.usuario_id == current_user.id,
-        SalarioMovimento.data_recebimento < hoje,
-        SalarioMovimento.status.in_(STATUS_NAO_RECEBIDO),
-    ).all()
-
-    salarios_filtrados = [
-        s
-        for s in salarios_query
-        if s.salario_liquido > 0 and s.movimento_bancario_salario_id is None
-    ]
-    movimentos.extend([_formatar_item_salario(s) for s in salarios_filtrados])
 
-    beneficios_pendentes = []
-    for s in salarios_query:
-        for item in s.itens:
-            if (
-                item.salario_item.tipo == "Benefício"
-                and item.movimento_bancario_id is None
-            ):
-                beneficios_pendentes.append(item)
+    faturas = [
+        linha["item"]
+        for linha in linhas
+        if linha["fonte"] == obrigacao_service.FONTE_CREDIARIO
+    ]
+    somas_parcelas = fatura_service.get_somas_parcelas_das_faturas(
+        current_user.id, faturas
+    )
 
-    movimentos.extend([_formatar_item_beneficio(b) for b in beneficios_pendentes])
+    movimentos = []
+    for linha in linhas:
+        fonte, item = linha["fonte"], linha["item"]
+        if fonte == obrigacao_service.FONTE_DESP_REC:
+            if linha["natureza"] == NATUREZA_DESPESA:
+                movimentos.append(_formatar_item_despesa(item))
+            else:
+                movimentos.append(_formatar_item_receita(item))
+        elif fonte == obrigacao_service.FONTE_FINANCIAMENTO:
+            movimentos.append(_formatar_item_financiamento(item))
+        elif fonte == obrigacao_service.FONTE_CREDIARIO:
+            movimentos.append(_formatar_item_crediario(item, somas_parcelas))
+        elif fonte == obrigacao_service.FONTE_SALARIO:
+            movimentos.append(_formatar_item_salario(item))
+        elif fonte == obrigacao_service.FONTE_BENEFICIO:
+            movimentos.append(_formatar_item_beneficio(item))
 
-    movimentos.sort(key=lambda x: x["data"])
     return movimentos
 
 
-def get_contas_a_vencer(dias=7):
-    hoje = date.today()
-    data_limite = hoje + timedelta(days=dias)
-    movimentos = []
+def get_contas_vencidas():
+    return _listar_alertas(date.today())
 
-    despesas = (
-        DespRecMovimento.query.join(DespRecMovimento.despesa_receita)
-        .filter(
-            DespRecMovimento.usuario_id == current_user.id,
-            DespRecMovimento.data_vencimento.between(hoje, data_limite),
-            DespRecMovimento.despesa_receita.has(natureza=NATUREZA_DESPESA),
-            DespRecMovimento.status.in_(STATUS_NAO_PAGO),
-        )
-        .all()
-    )
-    movimentos.extend([_formatar_item_despesa(d) for d in despesas])
-
-    parcelas = (
-        FinanciamentoParcela.query.join(FinanciamentoParcela.financiamento)
-        .filter(
-            FinanciamentoParcela.data_vencimento.between(hoje, data_limite),
-            FinanciamentoParcela.financiamento.has(usuario_id=current_user.id),
-            FinanciamentoParcela.status.in_(STATUS_NAO_PAGO),
-        )
-        .all()
-    )
-    movimentos.extend([_formatar_item_financiamento(p) for p in parcelas])
-
-    faturas = CrediarioFatura.query.filter(
-        CrediarioFatura.usuario_id == current_user.id,
-        CrediarioFatura.data_vencimento_fatura.between(hoje, data_limite),
-        CrediarioFatura.status.in_(STATUS_NAO_PAGO),
-    ).all()
-    movimentos.extend([_formatar_item_crediario(f) for f in faturas])
-
-    receitas = (
-        DespRecMovimento.query.join(DespRecMovimento.despesa_receita)
-        .filter(
-            DespRecMovimento.usuario_id == current_user.id,
-            DespRecMovimento.data_vencimento.between(hoje, data_limite),
-            DespRecMovimento.despesa_receita.has(natureza=NATUREZA_RECEITA),
-            DespRecMovimento.status.in_(STATUS_NAO_RECEBIDO),
-        )
-        .all()
-    )
-    movimentos.extend([_formatar_item_receita(r) for r in receitas])
-
-    salarios_query = SalarioMovimento.query.filter(
-        SalarioMovimento.usuario_id == current_user.id,
-        SalarioMovimento.data_recebimento.between(hoje, data_limite),
-        SalarioMovimento.status.in_(STATUS_NAO_RECEBIDO),
-    ).all()
-
-    salarios_filtrados = [
-        s
-        for s in salarios_query
-        if s.salario_liquido > 0 and s.movimento_bancario_salario_id is None
-    ]
-    movimentos.extend([_formatar_item_salario(s) for s in salarios_filtrados])
 
-    beneficios_pendentes = []
-    for s in salarios_query:
-        for item in s.itens:
-            if (
-                item.salario_item.tipo == "Benefício"
-                and item.movimento_bancario_id is None
-            ):
-                beneficios_pendentes.append(item)
+def get_contas_a_vencer(dias=7):
+    hoje = date.today()
+    return _listar_alertas(hoje, hoje + timedelta(days=dias))
 
-    movimentos.extend([_formatar_item_beneficio(b) for b in beneficios_pendentes])
 
-    movimentos.sort(key=lambda x: x["data"])
-    return movimentos
+def contar_alertas(user_id, dias=7):
+    # Mesmos filtros de get_contas_vencidas/get_contas_a_vencer, em uma única consulta
+    hoje = date.today()
+    vencidas, a_vencer = db.session.query(
+        obrigacao_service.contar_obrigacoes_sql(user_id, **_filtros_alerta(hoje)),
+        obrigacao_service.contar_obrigacoes_sql(
+            user_id, **_filtros_alerta(hoje, hoje + timedelta(days=dias))
+        ),
+    ).one()
+    return {"vencidas": vencidas, "a_vencer": a_vencer}
@@ -0,0 +1,139 @@
+# app/services/atraso_service.py
+
+from datetime import date, datetime, timezone
+
+from flask import current_app
+from sqlalchemy import and_, case, or_, update
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.cache import invalidar_todos_dashboards
+from app.models.crediario_fatura_model import CrediarioFatura
+from app.models.desp_rec_movimento_model import DespRecMovimento
+from app.models.execucao_tarefa_model import ExecucaoTarefa
+from app.models.financiamento_parcela_model import FinanciamentoParcela
+from app.models.salario_movimento_model import SalarioMovimento
+from app.utils import STATUS_ATRASADO, STATUS_PENDENTE
+
+TAREFA_ATRASOS = "envelhecer_status"
+
+# Tabela e coluna de vencimento de cada item que pode ficar atrasado
+_ALVOS = (
+    ("desp_rec_movimento", DespRecMovimento, DespRecMovimento.data_vencimento),
+    (
+        "financiamento_parcela",
+        FinanciamentoParcela,
+        FinanciamentoParcela.data_vencimento,
+    ),
+    ("crediario_fatura", CrediarioFatura, CrediarioFatura.data_vencimento_fatura),
+    ("salario_movimento", SalarioMovimento, SalarioMovimento.data_recebimento),
+)
+
+
+def status_em_aberto(data_vencimento, hoje=None):
+    """Status de um item sem pagamento: Atrasado se já venceu, senão Pendente."""
+    hoje = hoje or date.today()
+    if data_vencimento and data_vencimento < hoje:
+        return STATUS_ATRASADO
+    return STATUS_PENDENTE
+
+
+def get_ultima_execucao(nome=TAREFA_ATRASOS):
+    return ExecucaoTarefa.query.filter_by(nome=nome).first()
+
+
+def _reservar_execucao(hoje):
+    """
+    Marca `hoje` em execucao_tarefa se ainda não estava marcado, com um
+    UPDATE condicional: a linha fica travada até o commit, e o UPDATE de
+    outro processo só vê a data já gravada e não altera nada. Na primeira
+    execução, a restrição única de `nome` faz o mesmo papel no INSERT.
+    Devolve False se outro processo já ficou com o dia.
+    """
+    resultado = db.session.execute(
+        update(ExecucaoTarefa)
+        .where(
+            ExecucaoTarefa.nome == TAREFA_ATRASOS,
+            ExecucaoTarefa.data_referencia < hoje,
+        )
+        .values(data_referencia=hoje)
+        .execution_options(synchronize_session=False)
+    )
+    if resultado.rowcount:
+        return True
+    if get_ultima_execucao() is not None:
+        return False
+    try:
+        db.session.add(ExecucaoTarefa(nome=TAREFA_ATRASOS, data_referencia=hoje))
+        db.session.flush()
+    except IntegrityError:
+        db.session.rollback()
+        return False
+    return True
+
+
+def envelhecer_status(hoje=None, reservar=False):
+    """
+    Move para Atrasado os itens Pendentes já vencidos e devolve para
+    Pendente os Atrasados cujo vencimento foi adiado, com um UPDATE por
+    tabela. Itens parcialmente pagos/recebidos não mudam. Registra a
+    execução em execucao_tarefa e devolve {tabela: linhas alteradas}.
+    Com `reservar`, devolve None sem alterar nada se o dia já foi
+    processado (ver _reservar_execucao).
+    """
+    hoje = hoje or date.today()
+    alterados = {}
+    try:
+        if reservar and not _reservar_execucao(hoje):
+            db.session.rollback()
+            return None
+
+        for tabela, modelo, vencimento in _ALVOS:
+            resultado = db.session.execute(
+                update(modelo)
+                .where(
+                    or_(
+                        and_(modelo.status == STATUS_PENDENTE, vencimento < hoje),
+                        and_(modelo.status == STATUS_ATRASADO, vencimento >= hoje),
+                    )
+                )
+                .values(
+                    status=case(
+                        (vencimento < hoje, STATUS_ATRASADO), else_=STATUS_PENDENTE
+                    )
+                )
+                .execution_options(synchronize_session=False)
+            )
+            alterados[tabela] = resultado.rowcount
+
+        execucao = get_ultima_execucao()
+        if execucao is None:
+            execucao = ExecucaoTarefa(nome=TAREFA_ATRASOS)
+            db.session.add(execucao)
+        execucao.data_referencia = hoje
+        execucao.ultima_execucao = datetime.now(timezone.utc)
+        execucao.itens_atualizados = sum(alterados.values())
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(
+            f"Erro ao atualizar status de itens atrasados: {e}", exc_info=True
+        )
+        raise
+
+    # O job altera itens de todos os usuários, então nenhum dashboard vale mais
+    if any(alterados.values()):
+        invalidar_todos_dashboards()
+    current_app.logger.info(
+        f"Envelhecimento de status ({hoje}): "
+        + ", ".join(f"{tabela}={total}" for tabela, total in alterados.items())
+    )
+    return alterados
+
+
+def envelhecer_status_se_pendente(hoje=None):
+    """
+    Executa o envelhecimento apenas se ainda não rodou para `hoje`. Seguro
+    com vários workers rodando o agendador: só um deles processa o dia.
+    """
+    return envelhecer_status(hoje, reservar=True)
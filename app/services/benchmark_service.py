@@ -0,0 +1,193 @@
+# app/services/benchmark_service.py
+
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime
+
+from flask import url_for
+from sqlalchemy import event
+
+from app import db
+from app.models.conta_model import Conta
+
+# Páginas medidas: nome, endpoint e função que monta os parâmetros da URL
+PAGINAS = (
+    ("dashboard", "main.dashboard", lambda contexto: {}),
+    (
+        "extrato_bancario",
+        "extrato.extrato_bancario",
+        lambda contexto: {
+            "conta_id": contexto["conta_id"],
+            "mes_ano": contexto["hoje"].strftime("%m-%Y"),
+        },
+    ),
+    ("fluxo_caixa", "fluxo_caixa.fluxo_caixa", lambda contexto: {}),
+    ("graficos", "graphics.view_graphics", lambda contexto: {}),
+    ("pagamentos_painel", "pagamentos.painel", lambda contexto: {}),
+)
+
+TOLERANCIA_PADRAO = 0.3
+
+
+class _ContadorConsultas:
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, *args):
+        self.total += 1
+
+
+def _medir(cliente, url, contador, medir_memoria=False):
+    contador.total = 0
+    if medir_memoria:
+        tracemalloc.start()
+    inicio = time.perf_counter()
+    resposta = cliente.get(url)
+    duracao_ms = (time.perf_counter() - inicio) * 1000
+    pico_kb = None
+    if medir_memoria:
+        pico_kb = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+    if resposta.status_code != 200:
+        raise RuntimeError(f"{url} respondeu {resposta.status_code}.")
+    return duracao_ms, contador.total, pico_kb
+
+
+def medir_paginas(app, usuario_id, repeticoes=10, aquecimento=1):
+    """
+    Percorre PAGINAS com o cliente de testes autenticado como `usuario_id`.
+    Para cada página devolve a mediana e o máximo da latência, o número de
+    consultas e o pico de memória alocada (medido em uma execução extra,
+    com tracemalloc, para não distorcer a latência).
+    """
+    cliente = app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao["_user_id"] = str(usuario_id)
+        sessao["_fresh"] = True
+
+    with app.app_context():
+        conta = (
+            Conta.query.filter_by(usuario_id=usuario_id, tipo="Corrente")
+            .order_by(Conta.id)
+            .first()
+        )
+        contexto = {"conta_id": conta.id if conta else None, "hoje": date.today()}
+        engines = list(db.engines.values())
+
+    contador = _ContadorConsultas()
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", contador)
+
+    resultados = {}
+    try:
+        for nome, endpoint, parametros in PAGINAS:
+            with app.test_request_context():
+                url = url_for(endpoint, **parametros(contexto))
+
+            for _ in range(aquecimento):
+                _medir(cliente, url, contador)
+            medicoes = [_medir(cliente, url, contador) for _ in range(repeticoes)]
+            _, _, pico_kb = _medir(cliente, url, contador, medir_memoria=True)
+
+            tempos = [tempo for tempo, _, _ in medicoes]
+            resultados[nome] = {
+                "url": url,
+                "mediana_ms": round(statistics.median(tempos), 2),
+                "max_ms": round(max(tempos), 2),
+                "consultas": max(consultas for _, consultas, _ in medicoes),
+                "pico_memoria_kb": round(pico_kb, 1),
+            }
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", contador)
+    return resultados
+
+
+def executar_suite(semente=42, repeticoes=10, aquecimento=1, **parametros_dados):
+    """
+    Gera um usuário sintético em um banco SQLite temporário e mede as
+    páginas críticas com o cache do dashboard desligado.
+    """
+    from app import create_app
+    from app.services.dados_sinteticos_service import gerar_usuario_sintetico
+
+    with tempfile.TemporaryDirectory() as pasta:
+        app = create_app(
+            config_overrides={
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(pasta, 'benchmark.db')}",
+                "SECRET_KEY": "benchmark",
+                "DASHBOARD_CACHE_BACKEND": "app.cache.NullCacheBackend",
+            }
+        )
+        with app.app_context():
+            db.create_all()
+            inicio = time.perf_counter()
+            usuario, resumo = gerar_usuario_sintetico(
+                semente=semente, **parametros_dados
+            )
+            usuario_id = usuario.id
+            resumo["geracao_s"] = round(time.perf_counter() - inicio, 2)
+
+        try:
+            paginas = medir_paginas(app, usuario_id, repeticoes, aquecimento)
+        finally:
+            with app.app_context():
+                db.session.remove()
+                for engine in db.engines.values():
+                    engine.dispose()
+
+    return {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "semente": semente,
+        "repeticoes": repeticoes,
+        "dados": resumo,
+        "paginas": paginas,
+    }
+
+
+def carregar_linha_base(caminho):
+    with open(caminho, encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+
+def salvar_linha_base(resultado, caminho):
+    os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+
+
+def comparar_com_linha_base(resultado, linha_base, tolerancia=TOLERANCIA_PADRAO):
+    """
+    Compara cada página com a linha de base. Qualquer consulta a mais é
+    regressão; latência e memória só contam acima da `tolerancia` relativa.
+    """
+    comparacao = []
+    for nome, atual in resultado["paginas"].items():
+        base = linha_base.get("paginas", {}).get(nome)
+        linha = {"pagina": nome, "atual": atual, "base": base, "problemas": []}
+        if base is None:
+            linha["situacao"] = "nova"
+            comparacao.append(linha)
+            continue
+
+        if atual["consultas"] > base["consultas"]:
+            linha["problemas"].append(
+                f"consultas {base['consultas']} -> {atual['consultas']}"
+            )
+        for chave, rotulo in (
+            ("mediana_ms", "latência"),
+            ("pico_memoria_kb", "memória"),
+        ):
+            if base[chave] and atual[chave] > base[chave] * (1 + tolerancia):
+                variacao = (atual[chave] / base[chave] - 1) * 100
+                linha["problemas"].append(f"{rotulo} +{variacao:.0f}%")
+
+        linha["situacao"] = "regressão" if linha["problemas"] else "ok"
+        comparacao.append(linha)
+    return comparacao
@@ -0,0 +1,126 @@
+# app/services/conciliacao_service.py
+
+from decimal import Decimal
+
+from flask import current_app
+from sqlalchemy import case, func, select, update
+
+from app import db
+from app.cache import invalidar_dashboard
+from app.models.conta_model import Conta
+from app.models.conta_movimento_model import ContaMovimento
+from app.models.conta_transacao_model import ContaTransacao
+from app.utils import TIPO_CREDITO
+
+_CENTAVO = Decimal("0.01")
+
+
+def _valor_assinado():
+    return case(
+        (ContaTransacao.tipo == TIPO_CREDITO, ContaMovimento.valor),
+        else_=-ContaMovimento.valor,
+    )
+
+
+def _decimal(valor):
+    return Decimal(str(valor or 0)).quantize(_CENTAVO)
+
+
+def calcular_saldos_contas(user_id=None):
+    """
+    Recalcula o saldo de todas as contas a partir do extrato com um único
+    agregado agrupado: saldo_inicial + Σcréditos − Σdébitos. Devolve um
+    dicionário {conta_id: linha} com o saldo gravado e o esperado.
+    """
+    query = (
+        select(
+            Conta.id,
+            Conta.usuario_id,
+            Conta.nome_banco,
+            Conta.tipo,
+            Conta.saldo_inicial,
+            Conta.saldo_atual,
+            func.coalesce(func.sum(_valor_assinado()), 0).label("movimentado"),
+            func.count(ContaMovimento.id).label("quantidade_movimentos"),
+        )
+        .select_from(Conta)
+        .outerjoin(ContaMovimento, ContaMovimento.conta_id == Conta.id)
+        .outerjoin(
+            ContaTransacao, ContaMovimento.conta_transacao_id == ContaTransacao.id
+        )
+        .group_by(
+            Conta.id,
+            Conta.usuario_id,
+            Conta.nome_banco,
+            Conta.tipo,
+            Conta.saldo_inicial,
+            Conta.saldo_atual,
+        )
+        .order_by(Conta.usuario_id, Conta.id)
+    )
+    if user_id is not None:
+        query = query.where(Conta.usuario_id == user_id)
+
+    saldos = {}
+    for linha in db.session.execute(query):
+        gravado = _decimal(linha.saldo_atual)
+        esperado = _decimal(linha.saldo_inicial) + _decimal(linha.movimentado)
+        saldos[linha.id] = {
+            "conta_id": linha.id,
+            "usuario_id": linha.usuario_id,
+            "nome_banco": linha.nome_banco,
+            "tipo": linha.tipo,
+            "quantidade_movimentos": linha.quantidade_movimentos,
+            "gravado": gravado,
+            "esperado": esperado,
+            "diferenca": gravado - esperado,
+        }
+    return saldos
+
+
+def _saldo_do_extrato():
+    # Subconsulta correlacionada usada na correção, recalculada pelo próprio banco
+    movimentado = (
+        select(func.coalesce(func.sum(_valor_assinado()), 0))
+        .select_from(ContaMovimento)
+        .join(ContaTransacao, ContaMovimento.conta_transacao_id == ContaTransacao.id)
+        .where(ContaMovimento.conta_id == Conta.id)
+        .scalar_subquery()
+    )
+    return Conta.saldo_inicial + movimentado
+
+
+def conciliar_saldos_contas(user_id=None, corrigir=False):
+    """
+    Compara o saldo_atual gravado de cada conta com o saldo do extrato e
+    devolve as divergências. Com `corrigir`, regrava o saldo das contas
+    divergentes em um único UPDATE, recalculando o agregado dentro do
+    próprio comando para não perder movimentos gravados nesse intervalo.
+    """
+    divergencias = [
+        linha
+        for linha in calcular_saldos_contas(user_id).values()
+        if linha["diferenca"] != 0
+    ]
+
+    if corrigir and divergencias:
+        try:
+            db.session.execute(
+                update(Conta)
+                .where(Conta.id.in_([linha["conta_id"] for linha in divergencias]))
+                .values(saldo_atual=_saldo_do_extrato())
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+            for usuario_id in {linha["usuario_id"] for linha in divergencias}:
+                invalidar_dashboard(usuario_id)
+            current_app.logger.info(
+                f"Saldo de {len(divergencias)} conta(s) corrigido pela conciliação."
+            )
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(
+                f"Erro ao corrigir saldos das contas: {e}", exc_info=True
+            )
+            raise
+    return divergencias
@@ -0,0 +1,286 @@
+# app/services/conta_saldo_service.py
+
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from flask import current_app
+from sqlalchemy import case, func, insert, literal, select, update
+from sqlalchemy.orm.util import identity_key
+
+from app import db
+from app.models.conta_model import Conta
+from app.models.conta_movimento_model import ContaMovimento
+from app.models.conta_saldo_mensal_model import ContaSaldoMensal
+from app.models.conta_transacao_model import ContaTransacao
+from app.periodo import ler_mes_referencia, limites_mes, mes_referencia
+from app.utils import TIPO_CORRENTE, TIPO_CREDITO, TIPO_DIGITAL
+
+# Tipos de conta em que o limite entra no saldo disponível
+TIPOS_CONTA_COM_LIMITE = (TIPO_CORRENTE, TIPO_DIGITAL)
+
+
+def saldo_disponivel(conta):
+    saldo = conta.saldo_atual
+    if conta.tipo in TIPOS_CONTA_COM_LIMITE and conta.limite:
+        saldo += conta.limite
+    return saldo
+
+
+def _saldo_disponivel_sql():
+    return Conta.saldo_atual + case(
+        (Conta.tipo.in_(TIPOS_CONTA_COM_LIMITE), func.coalesce(Conta.limite, 0)),
+        else_=0,
+    )
+
+
+def movimentar_saldo(conta_id, data_movimento, delta, verificar_limite=False):
+    """
+    Soma `delta` ao saldo_atual da conta em um único UPDATE atômico, sem
+    ler o saldo antes, e propaga o valor para os saldos mensais. Com
+    `verificar_limite`, um débito só é aplicado se saldo + limite cobrir o
+    valor; se não cobrir, nada é alterado e a função devolve False.
+    """
+    return movimentar_saldo_por_mes(
+        conta_id, {mes_referencia(data_movimento): delta}, verificar_limite
+    )
+
+
+def movimentar_saldo_por_mes(conta_id, deltas_por_mes, verificar_limite=False):
+    """
+    Igual a movimentar_saldo para vários meses de uma vez (ex.: importação
+    de extrato): `deltas_por_mes` é {AAAA-MM: delta}. O saldo_atual recebe a
+    soma em um único UPDATE, e o limite é verificado sobre ela.
+    """
+    delta = sum(deltas_por_mes.values())
+    comando = (
+        update(Conta)
+        .where(Conta.id == conta_id)
+        .values(saldo_atual=Conta.saldo_atual + delta)
+        .execution_options(synchronize_session=False)
+    )
+    if verificar_limite and delta < 0:
+        comando = comando.where(_saldo_disponivel_sql() >= -delta)
+
+    if db.session.execute(comando).rowcount == 0:
+        return False
+
+    # A instância carregada na sessão passa a ler o saldo gravado pelo UPDATE
+    conta = db.session.identity_map.get(identity_key(Conta, conta_id))
+    if conta is not None:
+        db.session.expire(conta, ["saldo_atual"])
+
+    # Primeiro movimento do mês corrente: grava o saldo do mês que fechou,
+    # já com a conta travada pelo UPDATE. Movimentos do mês corrente não
+    # entram nessa soma, então não importa se já foram gravados
+    ultimo_fechado = _ultimo_mes_fechado()
+    if min(deltas_por_mes) > ultimo_fechado:
+        _inserir_saldo_mensal_se_ausente(conta_id, ultimo_fechado)
+
+    # Atualiza o saldo final de cada mês e de todos os meses seguintes
+    for mes, delta_mes in deltas_por_mes.items():
+        ContaSaldoMensal.query.filter(
+            ContaSaldoMensal.conta_id == conta_id,
+            ContaSaldoMensal.mes_referencia >= mes,
+        ).update(
+            {ContaSaldoMensal.saldo_final: ContaSaldoMensal.saldo_final + delta_mes},
+            synchronize_session=False,
+        )
+    return True
+
+
+def debitar_saldo(conta_id, data_movimento, valor, verificar_limite=True):
+    return movimentar_saldo(
+        conta_id, data_movimento, -valor, verificar_limite=verificar_limite
+    )
+
+
+def creditar_saldo(conta_id, data_movimento, valor):
+    return movimentar_saldo(conta_id, data_movimento, valor)
+
+
+def _somar_movimentos(conta_id, data_inicio, data_fim):
+    valor_assinado = case(
+        (ContaTransacao.tipo == TIPO_CREDITO, ContaMovimento.valor),
+        else_=-ContaMovimento.valor,
+    )
+    query = (
+        db.session.query(func.coalesce(func.sum(valor_assinado), 0))
+        .join(ContaTransacao, ContaMovimento.conta_transacao_id == ContaTransacao.id)
+        .filter(
+            ContaMovimento.conta_id == conta_id,
+            ContaMovimento.data_movimento < data_fim,
+        )
+    )
+    if data_inicio:
+        query = query.filter(ContaMovimento.data_movimento >= data_inicio)
+    return Decimal(str(query.scalar()))
+
+
+def get_saldo_anterior(conta, ano, mes):
+    """
+    Saldo de fechamento do mês anterior a partir do saldo mensal gravado
+    mais próximo e dos movimentos desde então. Só lê: os saldos mensais
+    são gravados pelos movimentos (movimentar_saldo_por_mes) e por
+    gerar_saldos_mensais, nunca na consulta do extrato.
+    """
+    data_inicio_mes = date(ano, mes, 1)
+    mes_anterior = mes_referencia(data_inicio_mes - relativedelta(months=1))
+
+    checkpoint = (
+        ContaSaldoMensal.query.filter(
+            ContaSaldoMensal.conta_id == conta.id,
+            ContaSaldoMensal.mes_referencia <= mes_anterior,
+        )
+        .order_by(ContaSaldoMensal.mes_referencia.desc())
+        .first()
+    )
+
+    if checkpoint and checkpoint.mes_referencia == mes_anterior:
+        return Decimal(str(checkpoint.saldo_final))
+
+    if checkpoint:
+        ano_cp, mes_cp = ler_mes_referencia(checkpoint.mes_referencia)
+        saldo_base = Decimal(str(checkpoint.saldo_final))
+        data_inicio = date(ano_cp, mes_cp, 1) + relativedelta(months=1)
+    else:
+        saldo_base = Decimal(str(conta.saldo_inicial))
+        data_inicio = None
+
+    return saldo_base + _somar_movimentos(conta.id, data_inicio, data_inicio_mes)
+
+
+def _saldo_final_sql(conta_id, mes):
+    # saldo_inicial + movimentos até o fim de `mes`, calculado no próprio comando
+    ano, numero_mes = ler_mes_referencia(mes)
+    _, fim = limites_mes(ano, numero_mes)
+    valor_assinado = case(
+        (ContaTransacao.tipo == TIPO_CREDITO, ContaMovimento.valor),
+        else_=-ContaMovimento.valor,
+    )
+    movimentado = (
+        select(func.coalesce(func.sum(valor_assinado), 0))
+        .select_from(ContaMovimento)
+        .join(ContaTransacao, ContaMovimento.conta_transacao_id == ContaTransacao.id)
+        .where(
+            ContaMovimento.conta_id == conta_id,
+            ContaMovimento.data_movimento < fim + timedelta(days=1),
+        )
+        .scalar_subquery()
+    )
+    return (
+        select(Conta.saldo_inicial + movimentado)
+        .where(Conta.id == conta_id)
+        .scalar_subquery()
+    )
+
+
+def _ultimo_mes_fechado(hoje=None):
+    hoje = hoje or date.today()
+    return mes_referencia(hoje.replace(day=1) - relativedelta(months=1))
+
+
+def _inserir_saldo_mensal(conta_id, mes):
+    db.session.execute(
+        insert(ContaSaldoMensal).from_select(
+            ["conta_id", "mes_referencia", "saldo_final", "data_criacao"],
+            select(
+                literal(conta_id),
+                literal(mes),
+                _saldo_final_sql(conta_id, mes),
+                literal(datetime.now(timezone.utc)),
+            ),
+        )
+    )
+
+
+def _inserir_saldo_mensal_se_ausente(conta_id, mes):
+    # Quem chama já trava a linha da conta
+    existe = db.session.execute(
+        select(ContaSaldoMensal.id).where(
+            ContaSaldoMensal.conta_id == conta_id,
+            ContaSaldoMensal.mes_referencia == mes,
+        )
+    ).first()
+    if existe is None:
+        _inserir_saldo_mensal(conta_id, mes)
+
+
+def gravar_saldo_mensal(conta_id, mes):
+    """
+    Grava ou recalcula o saldo final de `mes` (AAAA-MM) em uma transação
+    própria. A linha da conta é travada antes, como no UPDATE de
+    movimentar_saldo: um movimento concorrente ou já entrou na soma ou
+    espera o commit e aplica seu delta sobre o saldo gravado.
+    """
+    try:
+        db.session.execute(
+            select(Conta.id).where(Conta.id == conta_id).with_for_update()
+        )
+        atualizados = db.session.execute(
+            update(ContaSaldoMensal)
+            .where(
+                ContaSaldoMensal.conta_id == conta_id,
+                ContaSaldoMensal.mes_referencia == mes,
+            )
+            .values(saldo_final=_saldo_final_sql(conta_id, mes))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not atualizados:
+            _inserir_saldo_mensal(conta_id, mes)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(
+            f"Erro ao gravar saldo mensal {mes} da conta {conta_id}: {e}",
+            exc_info=True,
+        )
+        raise
+
+
+def gerar_saldos_mensais(user_id=None, recalcular=False, hoje=None):
+    """
+    Grava o saldo final de cada mês fechado (até o mês anterior a `hoje`)
+    das contas com movimentos. O mês recém-fechado já é gravado pelo
+    primeiro movimento do mês seguinte (movimentar_saldo_por_mes); este
+    comando preenche o histórico e as contas paradas. Meses já gravados são
+    mantidos, salvo com `recalcular`. Devolve a quantidade de saldos
+    gravados.
+    """
+    ultimo_mes = _ultimo_mes_fechado(hoje)
+
+    query = (
+        db.session.query(Conta.id, func.min(ContaMovimento.data_movimento))
+        .join(ContaMovimento, ContaMovimento.conta_id == Conta.id)
+        .group_by(Conta.id)
+        .order_by(Conta.id)
+    )
+    if user_id:
+        query = query.filter(Conta.usuario_id == user_id)
+    primeiros_movimentos = query.all()
+
+    gravados = {}
+    if not recalcular and primeiros_movimentos:
+        gravados = {
+            (conta_id, mes)
+            for conta_id, mes in db.session.query(
+                ContaSaldoMensal.conta_id, ContaSaldoMensal.mes_referencia
+            ).filter(
+                ContaSaldoMensal.conta_id.in_(
+                    [linha[0] for linha in primeiros_movimentos]
+                )
+            )
+        }
+    # Encerra a leitura para cada saldo começar uma transação pela trava
+    db.session.commit()
+
+    total = 0
+    for conta_id, primeiro_movimento in primeiros_movimentos:
+        mes_atual = primeiro_movimento.replace(day=1)
+        while mes_referencia(mes_atual) <= ultimo_mes:
+            mes = mes_referencia(mes_atual)
+            if (conta_id, mes) not in gravados:
+                gravar_saldo_mensal(conta_id, mes)
+                total += 1
+            mes_atual += relativedelta(months=1)
+    return total
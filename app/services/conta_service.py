@@ -8,9 +8,11 @@ from sqlalchemy import case, func
 from sqlalchemy.orm import joinedload
 
 from app import db
+from app.cache import invalidar_dashboard
 from app.models.conta_model import Conta
 from app.models.conta_movimento_model import ContaMovimento
 from app.models.conta_transacao_model import ContaTransacao
+from app.services.conta_saldo_service import saldo_disponivel
 
 
 def criar_conta(form):
@@ -70,6 +72,7 @@ def criar_conta(form):
         )
         db.session.add(nova_conta)
         db.session.commit()
+        invalidar_dashboard(current_user.id)
 
         current_app.logger.info(
             f"Conta {nome_banco}-{conta_num} adicionada por {current_user.login}."
@@ -104,6 +107,7 @@ def atualizar_conta(conta, form):
         conta.saldo_operacional = form.saldo_operacional.data
 
         db.session.commit()
+        invalidar_dashboard(current_user.id)
 
         current_app.logger.info(
             f"Conta {conta.nome_banco}-{conta.conta} (ID: {conta.id}) atualizada por {current_user.login}."
@@ -134,6 +138,7 @@ def excluir_conta_por_id(conta_id):
     try:
         db.session.delete(conta)
         db.session.commit()
+        invalidar_dashboard(current_user.id)
         current_app.logger.info(
             f"Conta {conta.nome_banco}-{conta.conta} (ID: {conta.id}) excluída por {current_user.login}."
         )
@@ -213,14 +218,12 @@ def get_account_balance_kpis(user_id):
 
 
 def validar_estorno_saldo(conta, valor_a_debitar):
-    saldo_disponivel = conta.saldo_atual
-    if conta.tipo in ["Corrente", "Digital"] and conta.limite:
-        saldo_disponivel += conta.limite
+    disponivel = saldo_disponivel(conta)
 
-    if valor_a_debitar > saldo_disponivel:
+    if valor_a_debitar > disponivel:
         mensagem = (
             f"Estorno não permitido. Saldo insuficiente na conta {conta.nome_banco}. "
-            f"Saldo disponível (com limite): {saldo_disponivel:.2f}"
+            f"Saldo disponível (com limite): {disponivel:.2f}"
         )
         return False, mensagem
 
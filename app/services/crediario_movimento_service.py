@@ -1,21 +1,133 @@
 # app/services/crediario_movimento_service.py
 
+from collections import defaultdict
 from datetime import date
 from decimal import ROUND_HALF_UP, Decimal
 
 from dateutil.relativedelta import relativedelta
 from flask import current_app
 from flask_login import current_user
+from sqlalchemy import and_, bindparam, or_, select
 
 from app import db
+from app.cache import invalidar_dashboard
 from app.models.crediario_fatura_model import CrediarioFatura
 from app.models.crediario_grupo_model import CrediarioGrupo
 from app.models.crediario_movimento_model import CrediarioMovimento
 from app.models.crediario_parcela_model import CrediarioParcela
 from app.models.crediario_subgrupo_model import CrediarioSubgrupo
+from app.services.fatura_service import marcar_meses_para_sincronizacao
 from app.utils import STATUS_PAGO, STATUS_PARCIAL_PAGO, FormChoices
 
 
+def _planejar_parcelas(valor_total_compra, numero_parcelas, data_primeira_parcela):
+    """
+    Parcelas esperadas para a compra: {numero_parcela: (vencimento, valor)}.
+    A última parcela absorve a diferença de arredondamento.
+    """
+    valor_por_parcela = (valor_total_compra / Decimal(numero_parcelas)).quantize(
+        Decimal("0.01"), rounding=ROUND_HALF_UP
+    )
+    plano = {}
+    for i in range(numero_parcelas):
+        if i < numero_parcelas - 1:
+            valor = valor_por_parcela
+        else:
+            valor = valor_total_compra - valor_por_parcela * (numero_parcelas - 1)
+        plano[i + 1] = (data_primeira_parcela + relativedelta(months=i), valor)
+    return plano
+
+
+def _parcelas_gravadas(movimento_id):
+    tabela = CrediarioParcela.__table__
+    linhas = db.session.execute(
+        select(
+            tabela.c.id,
+            tabela.c.numero_parcela,
+            tabela.c.data_vencimento,
+            tabela.c.valor_parcela,
+        ).where(tabela.c.crediario_movimento_id == movimento_id)
+    )
+    return {
+        linha.numero_parcela: (linha.id, linha.data_vencimento, linha.valor_parcela)
+        for linha in linhas
+    }
+
+
+def _diferenca_parcelas(gravadas, plano):
+    """
+    Compara as parcelas gravadas com o plano pelo número da parcela e
+    devolve as linhas a inserir, atualizar e excluir.
+    """
+    inserir, atualizar, excluir = [], [], []
+    for numero, (vencimento, valor) in plano.items():
+        atual = gravadas.get(numero)
+        if atual is None:
+            inserir.append((numero, vencimento, valor))
+        elif (atual[1], atual[2]) != (vencimento, valor):
+            atualizar.append((atual[0], vencimento, valor))
+    for numero, (id_, _, _) in gravadas.items():
+        if numero not in plano:
+            excluir.append(id_)
+    return inserir, atualizar, excluir
+
+
+def _aplicar_diferenca_parcelas(movimento_id, inserir, atualizar, excluir):
+    # Um comando em lote por operação, apenas para as parcelas que mudaram
+    tabela = CrediarioParcela.__table__
+    if excluir:
+        db.session.execute(tabela.delete().where(tabela.c.id.in_(excluir)))
+    if atualizar:
+        db.session.execute(
+            tabela.update()
+            .where(tabela.c.id == bindparam("b_id"))
+            .values(
+                data_vencimento=bindparam("b_vencimento"),
+                valor_parcela=bindparam("b_valor"),
+            ),
+            [
+                {"b_id": id_, "b_vencimento": vencimento, "b_valor": valor}
+                for id_, vencimento, valor in atualizar
+            ],
+        )
+    if inserir:
+        db.session.execute(
+            tabela.insert(),
+            [
+                {
+                    "crediario_movimento_id": movimento_id,
+                    "numero_parcela": numero,
+                    "data_vencimento": vencimento,
+                    "valor_parcela": valor,
+                    "pago": False,
+                }
+                for numero, vencimento, valor in inserir
+            ],
+        )
+
+
+def _meses_com_fatura_paga(meses_por_crediario):
+    """Meses (AAAA-MM) com fatura paga ou parcialmente paga, em uma consulta."""
+    filtros = [
+        and_(
+            CrediarioFatura.crediario_id == crediario_id,
+            CrediarioFatura.mes_referencia.in_(meses),
+        )
+        for crediario_id, meses in meses_por_crediario.items()
+        if meses
+    ]
+    if not filtros:
+        return []
+    return sorted(
+        mes
+        for (mes,) in db.session.query(CrediarioFatura.mes_referencia).filter(
+            CrediarioFatura.usuario_id == current_user.id,
+            CrediarioFatura.status.in_([STATUS_PAGO, STATUS_PARCIAL_PAGO]),
+            or_(*filtros),
+        )
+    )
+
+
 def adicionar_movimento(form):
     try:
         crediario_id = form.crediario_id.data
@@ -81,30 +193,22 @@ def adicionar_movimento(form):
             numero_parcelas=numero_parcelas,
         )
         db.session.add(novo_movimento)
+        db.session.flush()
 
-        valor_por_parcela = (valor_total_compra / Decimal(numero_parcelas)).quantize(
-            Decimal("0.01"), rounding=ROUND_HALF_UP
+        plano = _planejar_parcelas(
+            valor_total_compra, numero_parcelas, data_primeira_parcela_obj
+        )
+        inserir, _, _ = _diferenca_parcelas({}, plano)
+        _aplicar_diferenca_parcelas(novo_movimento.id, inserir, [], [])
+
+        marcar_meses_para_sincronizacao(
+            current_user.id,
+            crediario_id,
+            [vencimento for vencimento, _ in plano.values()],
         )
-        soma_parcelas = Decimal("0.00")
-
-        for i in range(numero_parcelas):
-            data_vencimento = data_primeira_parcela_obj + relativedelta(months=i)
-
-            if i < numero_parcelas - 1:
-                valor = valor_por_parcela
-                soma_parcelas += valor
-            else:
-                valor = valor_total_compra - soma_parcelas
-
-            nova_parcela = CrediarioParcela(
-                numero_parcela=i + 1,
-                data_vencimento=data_vencimento,
-                valor_parcela=valor,
-                pago=False,
-            )
-            novo_movimento.parcelas.append(nova_parcela)
 
         db.session.commit()
+        invalidar_dashboard(current_user.id)
         return True, "Compra no crediário registrada e parcelas geradas com sucesso!"
 
     except Exception as e:
@@ -117,21 +221,6 @@ def adicionar_movimento(form):
 
 def editar_movimento(movimento, form):
     try:
-        nova_data_primeira_parcela = form.data_primeira_parcela.data
-        if nova_data_primeira_parcela != movimento.data_primeira_parcela:
-            mes_ano_referencia = nova_data_primeira_parcela.strftime("%Y-%m")
-            fatura_existente = CrediarioFatura.query.filter_by(
-                usuario_id=current_user.id,
-                crediario_id=movimento.crediario_id,
-                mes_referencia=mes_ano_referencia,
-            ).first()
-            if fatura_existente and fatura_existente.status in [
-                STATUS_PAGO,
-                STATUS_PARCIAL_PAGO,
-            ]:
-                msg = f"Não é possível mover a primeira parcela para {mes_ano_referencia.split('-')[1]}/{mes_ano_referencia.split('-')[0]}, pois a fatura para este período já foi paga."
-                return False, msg
-
         if any(p.pago for p in movimento.parcelas):
             return (
                 False,
@@ -163,7 +252,44 @@ def editar_movimento(movimento, form):
         if tipo_grupo_atual == TIPO_ESTORNO_VAL:
             valor_total_compra = -abs(valor_total_compra)
 
-        movimento.crediario_id = form.crediario_id.data
+        crediario_anterior = movimento.crediario_id
+        crediario_novo = form.crediario_id.data
+        gravadas = _parcelas_gravadas(movimento.id)
+        plano = _planejar_parcelas(
+            valor_total_compra,
+            form.numero_parcelas.data,
+            form.data_primeira_parcela.data,
+        )
+        inserir, atualizar, excluir = _diferenca_parcelas(gravadas, plano)
+
+        # Meses de fatura afetados: onde parcelas saem e onde entram. Se o
+        # crediário mudou, todas as parcelas trocam de fatura.
+        if crediario_novo != crediario_anterior:
+            meses_saindo = {venc for _, venc, _ in gravadas.values()}
+            meses_entrando = {venc for venc, _ in plano.values()}
+        else:
+            ids_excluidos = set(excluir) | {id_ for id_, _, _ in atualizar}
+            meses_saindo = {
+                venc for id_, venc, _ in gravadas.values() if id_ in ids_excluidos
+            }
+            meses_entrando = {venc for _, venc, _ in inserir} | {
+                venc for _, venc, _ in atualizar
+            }
+
+        meses_por_crediario = defaultdict(set)
+        meses_por_crediario[crediario_anterior] |= {
+            d.strftime("%Y-%m") for d in meses_saindo
+        }
+        meses_por_crediario[crediario_novo] |= {
+            d.strftime("%Y-%m") for d in meses_entrando
+        }
+        meses_pagos = _meses_com_fatura_paga(meses_por_crediario)
+        if meses_pagos:
+            ano, mes = meses_pagos[0].split("-")
+            msg = f"Não é possível alterar as parcelas de {mes}/{ano}, pois a fatura para este período já foi paga."
+            return False, msg
+
+        movimento.crediario_id = crediario_novo
         movimento.fornecedor_id = form.fornecedor_id.data or None
         movimento.crediario_grupo_id = form.crediario_grupo_id.data or None
         movimento.crediario_subgrupo_id = form.crediario_subgrupo_id.data or None
@@ -176,39 +302,17 @@ def editar_movimento(movimento, form):
         )
         movimento.destino = form.destino.data
 
-        for parcela in movimento.parcelas:
-            db.session.delete(parcela)
-
-        movimento.parcelas = []
-
-        db.session.flush()
+        _aplicar_diferenca_parcelas(movimento.id, inserir, atualizar, excluir)
+        # A coleção carregada ficou desatualizada pelos comandos em lote
+        db.session.expire(movimento, ["parcelas"])
 
-        numero_parcelas = form.numero_parcelas.data
-        valor_por_parcela = (valor_total_compra / Decimal(numero_parcelas)).quantize(
-            Decimal("0.01"), rounding=ROUND_HALF_UP
+        marcar_meses_para_sincronizacao(
+            current_user.id, crediario_anterior, meses_saindo
         )
-        soma_parcelas = Decimal("0.00")
-
-        for i in range(numero_parcelas):
-            data_vencimento = form.data_primeira_parcela.data + relativedelta(months=i)
-
-            if i < numero_parcelas - 1:
-                valor = valor_por_parcela
-                soma_parcelas += valor
-            else:
-                valor = valor_total_compra - soma_parcelas
-
-            nova_parcela = CrediarioParcela(
-                numero_parcela=i + 1,
-                data_vencimento=data_vencimento,
-                valor_parcela=valor,
-                pago=False,
-                crediario_movimento_id=movimento.id,
-            )
-            movimento.parcelas.append(nova_parcela)
-            db.session.add(nova_parcela)
+        marcar_meses_para_sincronizacao(current_user.id, crediario_novo, meses_entrando)
 
         db.session.commit()
+        invalidar_dashboard(current_user.id)
         return True, "Movimento de crediário atualizado com sucesso!"
 
     except Exception as e:
@@ -224,18 +328,18 @@ def excluir_movimento(movimento_id):
         id=movimento_id, usuario_id=current_user.id
     ).first_or_404()
 
-    for parcela in movimento.parcelas:
-        mes_referencia = parcela.data_vencimento.strftime("%Y-%m")
-        fatura = CrediarioFatura.query.filter_by(
-            crediario_id=movimento.crediario_id,
-            usuario_id=current_user.id,
-            mes_referencia=mes_referencia,
-        ).first()
-        if fatura and fatura.status in [STATUS_PAGO, STATUS_PARCIAL_PAGO]:
-            return (
-                False,
-                f"Não é possível excluir esta compra. A fatura do mês {mes_referencia} já foi paga ou está parcialmente paga.",
-            )
+    meses_pagos = _meses_com_fatura_paga(
+        {
+            movimento.crediario_id: {
+                p.data_vencimento.strftime("%Y-%m") for p in movimento.parcelas
+            }
+        }
+    )
+    if meses_pagos:
+        return (
+            False,
+            f"Não é possível excluir esta compra. A fatura do mês {meses_pagos[0]} já foi paga ou está parcialmente paga.",
+        )
 
     if any(parcela.pago for parcela in movimento.parcelas):
         return (
@@ -244,11 +348,20 @@ def excluir_movimento(movimento_id):
         )
 
     try:
-        for p in movimento.parcelas:
-            db.session.delete(p)
+        marcar_meses_para_sincronizacao(
+            current_user.id,
+            movimento.crediario_id,
+            [p.data_vencimento for p in movimento.parcelas],
+        )
 
+        _aplicar_diferenca_parcelas(
+            movimento.id, [], [], [p.id for p in movimento.parcelas]
+        )
+        # A cascata não deve tentar excluir de novo as parcelas já apagadas
+        db.session.expire(movimento, ["parcelas"])
         db.session.delete(movimento)
         db.session.commit()
+        invalidar_dashboard(current_user.id)
         current_app.logger.info(
             f"Movimentação {movimento.id} excluída por {current_user.login}."
         )
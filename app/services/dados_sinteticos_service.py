@@ -0,0 +1,582 @@
+# app/services/dados_sinteticos_service.py
+
+import random
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+
+from dateutil.relativedelta import relativedelta
+from flask import current_app
+
+from app import db
+from app.models.conta_model import Conta
+from app.models.conta_movimento_model import ContaMovimento
+from app.models.conta_transacao_model import ContaTransacao
+from app.models.crediario_fatura_model import CrediarioFatura
+from app.models.crediario_grupo_model import CrediarioGrupo
+from app.models.crediario_model import Crediario
+from app.models.crediario_movimento_model import CrediarioMovimento
+from app.models.crediario_parcela_model import CrediarioParcela
+from app.models.crediario_subgrupo_model import CrediarioSubgrupo
+from app.models.desp_rec_model import DespRec
+from app.models.desp_rec_movimento_model import DespRecMovimento
+from app.models.financiamento_model import Financiamento
+from app.models.financiamento_parcela_model import FinanciamentoParcela
+from app.models.salario_item_model import SalarioItem
+from app.models.salario_movimento_item_model import SalarioMovimentoItem
+from app.models.salario_movimento_model import SalarioMovimento
+from app.models.usuario_model import Usuario
+from app.services import resumo_mensal_service
+from app.services.conciliacao_service import conciliar_saldos_contas
+from app.services.fatura_service import automatizar_geracao_e_atualizacao_faturas
+from app.services.salario_service import get_quinto_dia_util
+from app.services.simulacao_financiamento_service import gerar_cronograma
+from app.utils import (
+    NATUREZA_DESPESA,
+    NATUREZA_RECEITA,
+    STATUS_PAGO,
+    STATUS_PENDENTE,
+    STATUS_RECEBIDO,
+    TIPO_BENEFICIO,
+    TIPO_CREDITO,
+    TIPO_DEBITO,
+    TIPO_DESCONTO,
+    TIPO_FGTS,
+    TIPO_FIXA,
+    TIPO_IMPOSTO,
+    TIPO_PROVENTO,
+    TIPO_SAC,
+    TIPO_VARIAVEL,
+)
+
+SENHA_SINTETICA = "sintetico"
+TAMANHO_LOTE = 1000
+
+_CENTAVO = Decimal("0.01")
+_DESPESAS_FIXAS = (
+    ("ALUGUEL", 1800, 5),
+    ("CONDOMÍNIO", 650, 10),
+    ("ENERGIA", 280, 15),
+    ("ÁGUA", 120, 15),
+    ("INTERNET", 130, 20),
+    ("ESCOLA", 1400, 8),
+)
+_GRUPOS_CREDIARIO = {
+    "MERCADO": ("SUPERMERCADO", "PADARIA", "FEIRA"),
+    "CASA": ("MÓVEIS", "ELETRODOMÉSTICOS", "MANUTENÇÃO"),
+    "LAZER": ("RESTAURANTE", "VIAGEM", "STREAMING"),
+    "SAÚDE": ("FARMÁCIA", "CONSULTA"),
+    "ELETRÔNICOS": ("CELULAR", "INFORMÁTICA"),
+}
+# Quantidade de parcelas das compras e o peso de cada uma no sorteio
+_PARCELAMENTOS = ((1, 40), (2, 10), (3, 12), (4, 6), (6, 12), (10, 10), (12, 10))
+
+
+def _dinheiro(valor):
+    return Decimal(str(valor)).quantize(_CENTAVO, rounding=ROUND_HALF_UP)
+
+
+def _inserir_em_lotes(modelo, linhas):
+    tabela = modelo.__table__
+    for inicio in range(0, len(linhas), TAMANHO_LOTE):
+        db.session.execute(tabela.insert(), linhas[inicio : inicio + TAMANHO_LOTE])
+
+
+class _Gerador:
+    def __init__(self, usuario, semente, inicio, hoje):
+        self.usuario = usuario
+        self.aleatorio = random.Random(semente)
+        self.inicio = inicio
+        self.hoje = hoje
+        self.contas = {}
+        self.transacoes = {}
+
+    def movimento(self, conta, transacao, data_movimento, valor, descricao):
+        novo = ContaMovimento(
+            usuario_id=self.usuario.id,
+            conta_id=self.contas[conta].id,
+            conta_transacao_id=self.transacoes[transacao].id,
+            data_movimento=data_movimento,
+            valor=valor,
+            descricao=descricao,
+        )
+        db.session.add(novo)
+        return novo
+
+    def meses(self, ate=None):
+        mes = self.inicio
+        while mes <= (ate or self.hoje):
+            yield mes
+            mes += relativedelta(months=1)
+
+    def cadastros(self):
+        usuario_id = self.usuario.id
+        contas = {
+            "corrente": ("BANCO SINTÉTICO", "Corrente", Decimal("5000.00"), 3000),
+            "digital": ("BANCO DIGITAL", "Digital", Decimal("1500.00"), 500),
+            "poupanca": ("BANCO SINTÉTICO", "Poupança", Decimal("20000.00"), None),
+            "beneficio": ("VALE REFEIÇÃO", "Benefício", Decimal("0.00"), None),
+            "fgts": ("CAIXA", "FGTS", Decimal("0.00"), None),
+        }
+        for chave, (banco, tipo, saldo, limite) in contas.items():
+            self.contas[chave] = Conta(
+                usuario_id=usuario_id,
+                nome_banco=banco,
+                agencia="0001",
+                conta=f"{usuario_id}-{chave}",
+                tipo=tipo,
+                saldo_inicial=saldo,
+                saldo_atual=saldo,
+                limite=limite,
+            )
+
+        transacoes = {
+            "deposito": ("DEPÓSITO", TIPO_CREDITO),
+            "compra": ("COMPRA DÉBITO", TIPO_DEBITO),
+            "pix_debito": ("PIX", TIPO_DEBITO),
+            "pix_credito": ("PIX", TIPO_CREDITO),
+            "pagamento": ("PAGAMENTO", TIPO_DEBITO),
+            "recebimento": ("RECEBIMENTO", TIPO_CREDITO),
+            "fgts": ("RECEBIMENTO_FGTS", TIPO_CREDITO),
+            "amortizacao": ("AMORTIZAÇÃO", TIPO_DEBITO),
+        }
+        for chave, (nome, tipo) in transacoes.items():
+            self.transacoes[chave] = ContaTransacao(
+                usuario_id=usuario_id, transacao_tipo=nome, tipo=tipo
+            )
+
+        db.session.add_all([*self.contas.values(), *self.transacoes.values()])
+        db.session.flush()
+
+    def movimentos_avulsos(self, por_mes):
+        # Volume principal do extrato, inserido em lote sem passar pelo ORM
+        linhas = []
+        for mes in self.meses():
+            fim = min(mes + relativedelta(months=1, days=-1), self.hoje)
+            dias = (fim - mes).days
+            for _ in range(por_mes):
+                conta = "corrente" if self.aleatorio.random() < 0.8 else "digital"
+                # A conta digital não recebe salário, então recebe mais PIX
+                if self.aleatorio.random() < (0.2 if conta == "corrente" else 0.3):
+                    transacao = "pix_credito"
+                    valor = self.aleatorio.lognormvariate(5, 0.8)
+                else:
+                    transacao = self.aleatorio.choice(("compra", "pix_debito"))
+                    valor = self.aleatorio.lognormvariate(3.8, 0.9)
+                linhas.append(
+                    {
+                        "usuario_id": self.usuario.id,
+                        "conta_id": self.contas[conta].id,
+                        "conta_transacao_id": self.transacoes[transacao].id,
+                        "data_movimento": mes
+                        + relativedelta(days=self.aleatorio.randint(0, dias)),
+                        "valor": _dinheiro(valor),
+                        "descricao": f"MOVIMENTO SINTÉTICO {len(linhas) + 1}",
+                    }
+                )
+        _inserir_em_lotes(ContaMovimento, linhas)
+        return len(linhas)
+
+    def folhas(self):
+        usuario_id = self.usuario.id
+        itens = {
+            "salario": SalarioItem(
+                usuario_id=usuario_id, nome="SALÁRIO BASE", tipo=TIPO_PROVENTO
+            ),
+            "inss": SalarioItem(usuario_id=usuario_id, nome="INSS", tipo=TIPO_IMPOSTO),
+            "irrf": SalarioItem(usuario_id=usuario_id, nome="IRRF", tipo=TIPO_IMPOSTO),
+            "saude": SalarioItem(
+                usuario_id=usuario_id, nome="PLANO DE SAÚDE", tipo=TIPO_DESCONTO
+            ),
+            "vr": SalarioItem(
+                usuario_id=usuario_id,
+                nome="VALE REFEIÇÃO",
+                tipo=TIPO_BENEFICIO,
+                id_conta_destino=self.contas["beneficio"].id,
+            ),
+            "fgts": SalarioItem(usuario_id=usuario_id, nome="FGTS", tipo=TIPO_FGTS),
+        }
+        db.session.add_all(itens.values())
+        db.session.flush()
+
+        quantidade = 0
+        salario = Decimal("15000.00")
+        for mes in self.meses(ate=self.hoje + relativedelta(months=1)):
+            if mes.month == 1:
+                salario = _dinheiro(salario * Decimal("1.05"))
+            valores = {
+                "salario": salario,
+                "inss": Decimal("908.85"),
+                "irrf": _dinheiro(salario * Decimal("0.2")),
+                "saude": Decimal("350.00"),
+                "vr": Decimal("900.00"),
+                "fgts": _dinheiro(salario * Decimal("0.08")),
+            }
+            liquido = (
+                valores["salario"]
+                - valores["inss"]
+                - valores["irrf"]
+                - valores["saude"]
+            )
+            data_recebimento = get_quinto_dia_util(mes.year, mes.month)
+
+            folha = SalarioMovimento(
+                usuario_id=usuario_id,
+                mes_referencia=mes.strftime("%Y-%m"),
+                data_recebimento=data_recebimento,
+                total_proventos=valores["salario"],
+                salario_liquido=liquido,
+                total_beneficios=valores["vr"],
+                total_fgts=valores["fgts"],
+            )
+            verbas = {
+                chave: SalarioMovimentoItem(
+                    salario_item_id=itens[chave].id, valor=valor
+                )
+                for chave, valor in valores.items()
+            }
+            folha.itens = list(verbas.values())
+            db.session.add(folha)
+
+            if data_recebimento <= self.hoje:
+                referencia = mes.strftime("%m/%Y")
+                salario_mov = self.movimento(
+                    "corrente",
+                    "recebimento",
+                    data_recebimento,
+                    liquido,
+                    f"SALÁRIO {referencia}",
+                )
+                vr_mov = self.movimento(
+                    "beneficio",
+                    "recebimento",
+                    data_recebimento,
+                    valores["vr"],
+                    f"VALE REFEIÇÃO {referencia}",
+                )
+                fgts_mov = self.movimento(
+                    "fgts",
+                    "fgts",
+                    data_recebimento,
+                    valores["fgts"],
+                    f"Crédito de FGTS - Ref: {folha.mes_referencia}",
+                )
+                # Consumo do benefício ao longo do mês
+                self.movimento(
+                    "beneficio",
+                    "compra",
+                    data_recebimento + relativedelta(days=10),
+                    valores["vr"],
+                    "CONSUMO VALE REFEIÇÃO",
+                )
+                db.session.flush()
+                folha.movimento_bancario_salario_id = salario_mov.id
+                folha.movimento_bancario_fgts_id = fgts_mov.id
+                verbas["vr"].movimento_bancario_id = vr_mov.id
+                folha.status = STATUS_RECEBIDO
+            quantidade += 1
+        db.session.flush()
+        return quantidade
+
+    def despesas_receitas(self, meses_futuros=12):
+        usuario_id = self.usuario.id
+        cadastros = [
+            (
+                DespRec(
+                    usuario_id=usuario_id,
+                    nome=nome,
+                    natureza=NATUREZA_DESPESA,
+                    tipo=TIPO_FIXA,
+                    dia_vencimento=dia,
+                ),
+                valor,
+            )
+            for nome, valor, dia in _DESPESAS_FIXAS
+        ]
+        cadastros.append(
+            (
+                DespRec(
+                    usuario_id=usuario_id,
+                    nome="FREELANCE",
+                    natureza=NATUREZA_RECEITA,
+                    tipo=TIPO_VARIAVEL,
+                    dia_vencimento=25,
+                ),
+                1200,
+            )
+        )
+        db.session.add_all([cadastro for cadastro, _ in cadastros])
+        db.session.flush()
+
+        quantidade = 0
+        for mes in self.meses(ate=self.hoje + relativedelta(months=meses_futuros)):
+            for cadastro, valor_base in cadastros:
+                vencimento = mes.replace(day=cadastro.dia_vencimento)
+                valor = _dinheiro(valor_base * self.aleatorio.uniform(0.9, 1.1))
+                item = DespRecMovimento(
+                    usuario_id=usuario_id,
+                    desp_rec_id=cadastro.id,
+                    data_vencimento=vencimento,
+                    mes=vencimento.month,
+                    ano=vencimento.year,
+                    valor_previsto=valor,
+                    status=STATUS_PENDENTE,
+                )
+                if vencimento < self.hoje:
+                    receita = cadastro.natureza == NATUREZA_RECEITA
+                    movimento = self.movimento(
+                        "corrente",
+                        "recebimento" if receita else "pagamento",
+                        vencimento,
+                        valor,
+                        cadastro.nome,
+                    )
+                    db.session.flush()
+                    item.status = STATUS_RECEBIDO if receita else STATUS_PAGO
+                    item.valor_realizado = valor
+                    item.data_pagamento = vencimento
+                    item.movimento_bancario_id = movimento.id
+                db.session.add(item)
+                quantidade += 1
+        db.session.flush()
+        return quantidade
+
+    def financiamento(self, valor=Decimal("350000.00"), prazo_meses=360):
+        data_inicio = self.inicio + relativedelta(months=6)
+        cronograma = gerar_cronograma(valor, Decimal("9.5"), prazo_meses, TIPO_SAC)
+        financiamento = Financiamento(
+            usuario_id=self.usuario.id,
+            conta_id=self.contas["corrente"].id,
+            nome_financiamento="IMÓVEL SINTÉTICO",
+            valor_total_financiado=valor,
+            saldo_devedor_atual=valor,
+            taxa_juros_anual=Decimal("9.5"),
+            data_inicio=data_inicio,
+            prazo_meses=prazo_meses,
+            tipo_amortizacao=TIPO_SAC,
+        )
+        db.session.add(financiamento)
+        db.session.flush()
+
+        linhas = []
+        saldo_devedor = valor
+        for indice in range(prazo_meses):
+            vencimento = data_inicio + relativedelta(months=indice)
+            principal = _dinheiro(cronograma["amortizacao"][indice])
+            juros = _dinheiro(cronograma["juros"][indice])
+            saldo_devedor -= principal
+            linha = {
+                "financiamento_id": financiamento.id,
+                "numero_parcela": indice + 1,
+                "data_vencimento": vencimento,
+                "valor_principal": principal,
+                "valor_juros": juros,
+                "valor_total_previsto": principal + juros,
+                "saldo_devedor": max(saldo_devedor, Decimal("0.00")),
+                "pago": False,
+                "status": STATUS_PENDENTE,
+                "data_pagamento": None,
+                "valor_pago": None,
+                "movimento_bancario_id": None,
+            }
+            if vencimento < self.hoje:
+                movimento = self.movimento(
+                    "corrente",
+                    "pagamento",
+                    vencimento,
+                    principal + juros,
+                    f"IMÓVEL SINTÉTICO ({indice + 1}/{prazo_meses})",
+                )
+                db.session.flush()
+                linha.update(
+                    pago=True,
+                    status=STATUS_PAGO,
+                    data_pagamento=vencimento,
+                    valor_pago=principal + juros,
+                    movimento_bancario_id=movimento.id,
+                )
+                financiamento.saldo_devedor_atual -= principal
+            linhas.append(linha)
+        _inserir_em_lotes(FinanciamentoParcela, linhas)
+        return len(linhas)
+
+    def crediarios(self, compras):
+        usuario_id = self.usuario.id
+        cartoes = [
+            Crediario(
+                usuario_id=usuario_id,
+                nome_crediario="CARTÃO SINTÉTICO",
+                tipo_crediario="Cartão Físico",
+                dia_vencimento=10,
+            ),
+            Crediario(
+                usuario_id=usuario_id,
+                nome_crediario="CARTÃO LOJA",
+                tipo_crediario="Cartão Físico",
+                dia_vencimento=20,
+            ),
+        ]
+        db.session.add_all(cartoes)
+        subgrupos = []
+        for nome_grupo, nomes in _GRUPOS_CREDIARIO.items():
+            grupo = CrediarioGrupo(
+                usuario_id=usuario_id,
+                grupo_crediario=nome_grupo,
+                tipo_grupo_crediario="Compra",
+            )
+            db.session.add(grupo)
+            db.session.flush()
+            for nome in nomes:
+                subgrupos.append(
+                    CrediarioSubgrupo(
+                        usuario_id=usuario_id, grupo_id=grupo.id, nome=nome
+                    )
+                )
+        db.session.add_all(subgrupos)
+        db.session.flush()
+
+        quantidades, pesos = zip(*_PARCELAMENTOS)
+        dias = (self.hoje - self.inicio).days
+        movimentos = []
+        for numero in range(compras):
+            cartao = self.aleatorio.choice(cartoes)
+            subgrupo = self.aleatorio.choice(subgrupos)
+            data_compra = self.inicio + relativedelta(
+                days=self.aleatorio.randint(0, dias)
+            )
+            parcelas = self.aleatorio.choices(quantidades, weights=pesos)[0]
+            primeira = (data_compra + relativedelta(months=1)).replace(
+                day=cartao.dia_vencimento
+            )
+            movimentos.append(
+                CrediarioMovimento(
+                    usuario_id=usuario_id,
+                    crediario_id=cartao.id,
+                    crediario_grupo_id=subgrupo.grupo_id,
+                    crediario_subgrupo_id=subgrupo.id,
+                    data_compra=data_compra,
+                    valor_total_compra=_dinheiro(
+                        self.aleatorio.lognormvariate(5, 1) + 10
+                    ),
+                    descricao=f"COMPRA SINTÉTICA {numero + 1}",
+                    data_primeira_parcela=primeira,
+                    numero_parcelas=parcelas,
+                )
+            )
+        db.session.add_all(movimentos)
+        db.session.flush()
+
+        linhas = []
+        for movimento in movimentos:
+            total = movimento.valor_total_compra
+            parcelas = movimento.numero_parcelas
+            valor_parcela = _dinheiro(total / parcelas)
+            for indice in range(parcelas):
+                linhas.append(
+                    {
+                        "crediario_movimento_id": movimento.id,
+                        "numero_parcela": indice + 1,
+                        "data_vencimento": movimento.data_primeira_parcela
+                        + relativedelta(months=indice),
+                        "valor_parcela": (
+                            valor_parcela
+                            if indice < parcelas - 1
+                            else total - valor_parcela * (parcelas - 1)
+                        ),
+                        "pago": False,
+                    }
+                )
+        _inserir_em_lotes(CrediarioParcela, linhas)
+        return len(linhas)
+
+    def pagar_faturas_vencidas(self):
+        faturas = CrediarioFatura.query.filter(
+            CrediarioFatura.usuario_id == self.usuario.id,
+            CrediarioFatura.data_vencimento_fatura < self.hoje,
+        ).all()
+        for fatura in faturas:
+            movimento = self.movimento(
+                "corrente",
+                "pagamento",
+                fatura.data_vencimento_fatura,
+                fatura.valor_total_fatura,
+                f"FATURA {fatura.mes_referencia}",
+            )
+            db.session.flush()
+            fatura.valor_pago_fatura = fatura.valor_total_fatura
+            fatura.data_pagamento = fatura.data_vencimento_fatura
+            fatura.movimento_bancario_id = movimento.id
+            fatura.status = STATUS_PAGO
+        return len(faturas)
+
+
+def gerar_usuario_sintetico(
+    semente=42,
+    anos=5,
+    movimentos_por_mes=60,
+    compras_crediario=400,
+    prazo_financiamento=360,
+    hoje=None,
+):
+    """
+    Cria um usuário com histórico realista e reproduzível pela `semente`:
+    `anos` de extrato, folhas mensais, despesas fixas, um financiamento SAC
+    de `prazo_financiamento` meses e compras parceladas com faturas geradas
+    e pagas até hoje. O saldo das contas é conciliado com o extrato no fim.
+    Devolve (usuario, resumo com a quantidade de linhas por tabela).
+    """
+    hoje = hoje or date.today()
+    login = f"sintetico{semente}"
+    if Usuario.query.filter_by(login=login).first():
+        raise ValueError(f"Já existe um usuário sintético com a semente {semente}.")
+
+    try:
+        usuario = Usuario(
+            nome="Usuário",
+            sobrenome=f"Sintético {semente}",
+            email=f"{login}@exemplo.com",
+            login=login,
+            is_admin=True,
+            precisa_alterar_senha=False,
+        )
+        usuario.set_password(SENHA_SINTETICA)
+        db.session.add(usuario)
+        db.session.flush()
+
+        gerador = _Gerador(
+            usuario, semente, (hoje - relativedelta(years=anos)).replace(day=1), hoje
+        )
+        gerador.cadastros()
+        resumo = {
+            "movimentos_avulsos": gerador.movimentos_avulsos(movimentos_por_mes),
+            "folhas": gerador.folhas(),
+            "despesas_receitas": gerador.despesas_receitas(),
+            "parcelas_financiamento": gerador.financiamento(
+                prazo_meses=prazo_financiamento
+            ),
+            "parcelas_crediario": gerador.crediarios(compras_crediario),
+        }
+        db.session.commit()
+
+        sucesso, mensagem = automatizar_geracao_e_atualizacao_faturas(usuario.id)
+        if not sucesso:
+            raise RuntimeError(mensagem)
+        resumo["faturas_pagas"] = gerador.pagar_faturas_vencidas()
+        # As cargas acima gravam direto nas tabelas, sem passar pelos deltas
+        resumo_mensal_service.substituir_resumo(usuario.id)
+        db.session.commit()
+
+        conciliar_saldos_contas(user_id=usuario.id, corrigir=True)
+        resumo["movimentos"] = ContaMovimento.query.filter_by(
+            usuario_id=usuario.id
+        ).count()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(
+            f"Erro ao gerar dados sintéticos (semente {semente}): {e}", exc_info=True
+        )
+        raise
+
+    current_app.logger.info(
+        f"Usuário sintético {login} (ID: {usuario.id}) gerado: {resumo}"
+    )
+    return usuario, resumo
@@ -0,0 +1,180 @@
+# app/services/dashboard_service.py
+
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import func
+
+from app import db
+from app.models.conta_model import Conta
+from app.models.crediario_fatura_model import CrediarioFatura
+from app.models.crediario_model import Crediario
+from app.models.crediario_movimento_model import CrediarioMovimento
+from app.models.financiamento_model import Financiamento
+from app.periodo import limites_mes
+from app.services import (
+    alerta_service,
+    conta_service,
+    obrigacao_service,
+    relatorios_service,
+)
+from app.utils import (
+    NATUREZA_DESPESA,
+    STATUS_ATRASADO,
+    STATUS_PARCIAL_PAGO,
+    STATUS_PARCIAL_RECEBIDO,
+    STATUS_PENDENTE,
+    TIPO_ENTRADA,
+    TIPO_SAIDA,
+)
+
+
+# O snapshot contém apenas dados simples (dicts, listas, Decimal, date) para
+# que possa ser guardado em cache fora da sessão do SQLAlchemy
+def get_dashboard_snapshot(user_id, ano, mes):
+    balance_kpis = conta_service.get_account_balance_kpis(user_id)
+    hoje = date.today()
+    balanco_do_mes = relatorios_service.get_balanco_mensal(
+        user_id, hoje.year, hoje.month
+    )
+    kpis = {
+        "saldo_operacional": balance_kpis["saldo_operacional"],
+        "saldo_investimentos": balance_kpis["saldo_investimentos"],
+        "saldo_beneficios": balance_kpis["saldo_beneficios"],
+        "saldo_fgts": balance_kpis["saldo_fgts"],
+        "receitas_mes": balanco_do_mes["receitas"],
+        "despesas_mes": balanco_do_mes["despesas"],
+        "balanco_mes": balanco_do_mes["balanco"],
+    }
+    contas_do_usuario = [
+        {"nome_banco": c.nome_banco, "tipo": c.tipo, "saldo_atual": c.saldo_atual}
+        for c in Conta.query.filter_by(usuario_id=user_id, ativa=True)
+        .filter(Conta.saldo_atual != 0)
+        .order_by(Conta.nome_banco.asc())
+        .all()
+    ]
+    financiamentos_ativos = [
+        {
+            "nome_financiamento": f.nome_financiamento,
+            "saldo_devedor_atual": f.saldo_devedor_atual,
+        }
+        for f in Financiamento.query.filter_by(usuario_id=user_id).all()
+    ]
+
+    crediarios_ativos = Crediario.query.filter_by(usuario_id=user_id, ativa=True).all()
+    crediario_ids = [c.id for c in crediarios_ativos]
+
+    compras_por_crediario = {}
+    pagos_por_crediario = {}
+    if crediario_ids:
+        compras_por_crediario = dict(
+            db.session.query(
+                CrediarioMovimento.crediario_id,
+                func.sum(CrediarioMovimento.valor_total_compra),
+            )
+            .filter(CrediarioMovimento.crediario_id.in_(crediario_ids))
+            .group_by(CrediarioMovimento.crediario_id)
+            .all()
+        )
+        pagos_por_crediario = dict(
+            db.session.query(
+                CrediarioFatura.crediario_id,
+                func.sum(CrediarioFatura.valor_pago_fatura),
+            )
+            .filter(
+                CrediarioFatura.usuario_id == user_id,
+                CrediarioFatura.crediario_id.in_(crediario_ids),
+            )
+            .group_by(CrediarioFatura.crediario_id)
+            .all()
+        )
+    crediarios = [
+        {
+            "nome_crediario": cred.nome_crediario,
+            "saldo_devedor": compras_por_crediario.get(cred.id, Decimal("0.0"))
+            - pagos_por_crediario.get(cred.id, Decimal("0.0")),
+        }
+        for cred in crediarios_ativos
+    ]
+
+    data_inicio_mes, data_fim_mes = limites_mes(ano, mes)
+
+    proximos_movimentos = []
+
+    obrigacoes = obrigacao_service.get_obrigacoes(
+        user_id,
+        data_inicio=data_inicio_mes,
+        data_fim=data_fim_mes,
+        status={
+            obrigacao_service.FONTE_DESP_REC: [STATUS_PENDENTE, STATUS_ATRASADO],
+            obrigacao_service.FONTE_CREDIARIO: [
+                STATUS_PENDENTE,
+                STATUS_ATRASADO,
+                STATUS_PARCIAL_PAGO,
+            ],
+            obrigacao_service.FONTE_FINANCIAMENTO: [STATUS_PENDENTE, STATUS_ATRASADO],
+            obrigacao_service.FONTE_SALARIO: [
+                STATUS_PENDENTE,
+                STATUS_ATRASADO,
+                STATUS_PARCIAL_RECEBIDO,
+            ],
+            obrigacao_service.FONTE_BENEFICIO: [
+                STATUS_PENDENTE,
+                STATUS_ATRASADO,
+                STATUS_PARCIAL_RECEBIDO,
+            ],
+        },
+        apenas_em_aberto=True,
+        carregar_itens=True,
+    )
+    for obrigacao in obrigacoes:
+        fonte, item = obrigacao["fonte"], obrigacao["item"]
+        tipo = TIPO_SAIDA if obrigacao["natureza"] == NATUREZA_DESPESA else TIPO_ENTRADA
+        valor = obrigacao["valor_previsto"]
+
+        if fonte == obrigacao_service.FONTE_DESP_REC:
+            descricao = item.despesa_receita.nome
+        elif fonte == obrigacao_service.FONTE_CREDIARIO:
+            descricao = f"Fatura {item.crediario.nome_crediario}"
+            valor = item.valor_total_fatura - item.valor_pago_fatura
+        elif fonte == obrigacao_service.FONTE_FINANCIAMENTO:
+            descricao = f"{item.financiamento.nome_financiamento} ({item.numero_parcela}/{item.financiamento.prazo_meses})"
+        elif fonte == obrigacao_service.FONTE_SALARIO:
+            descricao = f"Salário Líquido (Ref: {item.mes_referencia})"
+        else:
+            descricao = f"{item.salario_item.nome} (Ref: {item.movimento_pai.mes_referencia})"
+
+        proximos_movimentos.append(
+            {
+                "data": obrigacao["data"],
+                "descricao": descricao,
+                "valor": valor,
+                "tipo": tipo,
+            }
+        )
+
+    proximos_movimentos.sort(key=lambda x: x["data"])
+
+    contagem_alertas = alerta_service.contar_alertas(user_id)
+
+    ultimos_movimentos = [
+        {
+            "descricao": mov.descricao,
+            "data_movimento": mov.data_movimento,
+            "valor": mov.valor,
+            "conta": {"nome_banco": mov.conta.nome_banco, "tipo": mov.conta.tipo},
+            "tipo_transacao": {"tipo": mov.tipo_transacao.tipo},
+        }
+        for mov in conta_service.get_ultimos_movimentos_bancarios(user_id)
+    ]
+
+    return {
+        "kpis": kpis,
+        "contas_do_usuario": contas_do_usuario,
+        "proximos_movimentos": proximos_movimentos,
+        "financiamentos": financiamentos_ativos,
+        "crediarios": crediarios,
+        "contas_a_vencer_count": contagem_alertas["a_vencer"],
+        "contas_vencidas_count": contagem_alertas["vencidas"],
+        "ultimos_movimentos": ultimos_movimentos,
+    }
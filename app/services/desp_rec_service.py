@@ -9,9 +9,11 @@ from sqlalchemy import extract
 from sqlalchemy.exc import IntegrityError
 
 from app import db
+from app.cache import invalidar_dashboard
 from app.models.desp_rec_model import DespRec
 from app.models.desp_rec_movimento_model import DespRecMovimento
-from app.utils import STATUS_PENDENTE
+from app.services import resumo_mensal_service
+from app.services.atraso_service import status_em_aberto
 
 
 def gerar_previsoes(form):
@@ -45,13 +47,15 @@ def gerar_previsoes(form):
             ano=data_vencimento_final.year,
             valor_previsto=valor_previsto,
             descricao=descricao,
-            status=STATUS_PENDENTE,
+            status=status_em_aberto(data_vencimento_final),
         )
         novos_lancamentos.append(novo_movimento)
 
     try:
         db.session.bulk_save_objects(novos_lancamentos)
+        resumo_mensal_service.incluir_no_resumo(novos_lancamentos)
         db.session.commit()
+        invalidar_dashboard(current_user.id)
         return True, f"{numero_meses} lançamentos previstos gerados com sucesso!"
 
     except IntegrityError:
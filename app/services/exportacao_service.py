@@ -0,0 +1,242 @@
+# app/services/exportacao_service.py
+
+import csv
+import io
+import re
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from flask import Response, stream_with_context
+from werkzeug.utils import secure_filename
+
+from app.periodo import limites_mes
+
+FORMATO_CSV = "csv"
+FORMATO_XLSX = "xlsx"
+FORMATOS = (FORMATO_CSV, FORMATO_XLSX)
+
+# Linhas acumuladas antes de enviar um bloco ao cliente
+LINHAS_POR_BLOCO = 500
+
+_MIMETYPES = {
+    FORMATO_CSV: "text/csv; charset=utf-8",
+    FORMATO_XLSX: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+_CARACTERES_INVALIDOS_XML = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_CARACTERES_INVALIDOS_ABA = re.compile(r"[\[\]:*?/\\]")
+_EPOCA_EXCEL = date(1899, 12, 30)
+# Texto iniciado por estes caracteres é interpretado como fórmula pelo Excel
+_INICIO_FORMULA = ("=", "+", "-", "@")
+
+
+def ler_formato(args):
+    formato = args.get("formato", FORMATO_CSV)
+    return formato if formato in FORMATOS else FORMATO_CSV
+
+
+def ler_intervalo_meses(args, mes_ano_padrao):
+    """
+    Lê o intervalo `de`/`ate` (MM-AAAA) da query string, caindo para
+    `mes_ano` e depois para `mes_ano_padrao`. Devolve o primeiro dia do mês
+    inicial e o último dia do mês final; levanta ValueError se inválido.
+    """
+    de = args.get("de") or args.get("mes_ano") or mes_ano_padrao
+    ate = args.get("ate") or de
+
+    mes, ano = map(int, de.split("-"))
+    data_inicio = date(ano, mes, 1)
+    mes, ano = map(int, ate.split("-"))
+    _, data_fim = limites_mes(ano, mes)
+
+    if data_fim < data_inicio:
+        raise ValueError("Intervalo de meses invertido.")
+    return data_inicio, data_fim
+
+
+def _valor_csv(valor):
+    if valor is None:
+        return ""
+    if isinstance(valor, datetime):
+        return valor.strftime("%d/%m/%Y %H:%M")
+    if isinstance(valor, date):
+        return valor.strftime("%d/%m/%Y")
+    if isinstance(valor, (Decimal, float)):
+        return f"{valor:.2f}".replace(".", ",")
+    if isinstance(valor, str) and valor.startswith(_INICIO_FORMULA):
+        return f"'{valor}"
+    return valor
+
+
+def gerar_csv(cabecalho, linhas):
+    """
+    CSV no padrão do Excel em pt-BR (separador ";", vírgula decimal e BOM),
+    enviado em blocos de LINHAS_POR_BLOCO linhas.
+    """
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, delimiter=";")
+
+    buffer.write("\ufeff")
+    escritor.writerow(cabecalho)
+
+    for indice, linha in enumerate(linhas, start=1):
+        escritor.writerow([_valor_csv(valor) for valor in linha])
+        if indice % LINHAS_POR_BLOCO == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue().encode("utf-8")
+
+
+class _SaidaZip:
+    # Arquivo sem seek: o zipfile passa a gravar descritores de dados e o
+    # conteúdo pode ser repassado ao cliente à medida que é comprimido
+    def __init__(self):
+        self._partes = []
+
+    def write(self, dados):
+        self._partes.append(bytes(dados))
+        return len(dados)
+
+    def flush(self):
+        pass
+
+    def drenar(self):
+        dados = b"".join(self._partes)
+        self._partes = []
+        return dados
+
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    "</Types>"
+)
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{nome}" sheetId="1" r:id="rId1"/></sheets>'
+    "</workbook>"
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+    "</Relationships>"
+)
+# Estilos: 0 padrão, 1 número (#,##0.00), 2 data, 3 cabeçalho em negrito
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="4">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="4" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    "</cellXfs></styleSheet>"
+)
+
+
+def _celula_xlsx(valor, estilo_texto=0):
+    if valor is None or valor == "":
+        return "<c/>"
+    if isinstance(valor, bool):
+        valor = "Sim" if valor else "Não"
+    if isinstance(valor, datetime):
+        valor = valor.date()
+    if isinstance(valor, date):
+        return f'<c s="2"><v>{(valor - _EPOCA_EXCEL).days}</v></c>'
+    if isinstance(valor, (Decimal, float)):
+        return f'<c s="1"><v>{valor}</v></c>'
+    if isinstance(valor, int):
+        return f"<c><v>{valor}</v></c>"
+    texto = escape(_CARACTERES_INVALIDOS_XML.sub("", str(valor)))
+    return (
+        f'<c t="inlineStr" s="{estilo_texto}"><is><t xml:space="preserve">'
+        f"{texto}</t></is></c>"
+    )
+
+
+def _linha_xlsx(valores, estilo_texto=0):
+    return "<row>" + "".join(_celula_xlsx(v, estilo_texto) for v in valores) + "</row>"
+
+
+def gerar_xlsx(cabecalho, linhas, nome_planilha="Dados"):
+    """
+    Planilha XLSX de uma aba com strings inline, gerada e comprimida em
+    blocos de LINHAS_POR_BLOCO linhas, sem montar o arquivo em memória.
+    """
+    saida = _SaidaZip()
+    nome_planilha = escape(_CARACTERES_INVALIDOS_ABA.sub("_", nome_planilha)[:31])
+
+    with zipfile.ZipFile(saida, "w", zipfile.ZIP_DEFLATED) as arquivo:
+        arquivo.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        arquivo.writestr("_rels/.rels", _RELS)
+        arquivo.writestr("xl/workbook.xml", _WORKBOOK.format(nome=nome_planilha))
+        arquivo.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        arquivo.writestr("xl/styles.xml", _STYLES)
+        yield saida.drenar()
+
+        with arquivo.open("xl/worksheets/sheet1.xml", "w") as planilha:
+            planilha.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b"<sheetData>"
+            )
+            planilha.write(_linha_xlsx(cabecalho, estilo_texto=3).encode("utf-8"))
+
+            bloco = []
+            for linha in linhas:
+                bloco.append(_linha_xlsx(linha))
+                if len(bloco) == LINHAS_POR_BLOCO:
+                    planilha.write("".join(bloco).encode("utf-8"))
+                    bloco = []
+                    yield saida.drenar()
+
+            planilha.write("".join(bloco).encode("utf-8"))
+            planilha.write(b"</sheetData></worksheet>")
+
+    yield saida.drenar()
+
+
+def resposta_exportacao(formato, nome_arquivo, cabecalho, linhas):
+    """
+    Response em streaming para `linhas` (um iterável de sequências na ordem
+    de `cabecalho`). O gerador roda dentro do contexto da requisição, então
+    consultas com yield_per continuam abertas enquanto o arquivo é enviado.
+    """
+    nome_arquivo = secure_filename(nome_arquivo) or "exportacao"
+    if formato == FORMATO_XLSX:
+        gerador = gerar_xlsx(cabecalho, linhas, nome_planilha=nome_arquivo)
+    else:
+        formato = FORMATO_CSV
+        gerador = gerar_csv(cabecalho, linhas)
+
+    return Response(
+        stream_with_context(gerador),
+        mimetype=_MIMETYPES[formato],
+        headers={
+            "Content-Disposition": f'attachment; filename="{nome_arquivo}.{formato}"'
+        },
+    )
@@ -1,8 +1,7 @@
 # app/services/fatura_service.py
 
-from calendar import monthrange
 from collections import defaultdict
-from datetime import date, timedelta
+from datetime import datetime, timezone
 from decimal import Decimal
 
 from flask import current_app
@@ -11,26 +10,163 @@ from sqlalchemy import func
 from sqlalchemy.orm import joinedload
 
 from app import db
+from app.cache import invalidar_dashboard
+from app.insercao import comando_inserir_ou_atualizar
 from app.models.crediario_fatura_model import CrediarioFatura
+from app.models.crediario_fatura_pendencia_model import CrediarioFaturaPendencia
 from app.models.crediario_model import Crediario
 from app.models.crediario_movimento_model import CrediarioMovimento
 from app.models.crediario_parcela_model import CrediarioParcela
-from app.utils import STATUS_ATRASADO, STATUS_PAGO, STATUS_PARCIAL_PAGO, STATUS_PENDENTE
+from app.periodo import (
+    ano_mes,
+    ler_mes_referencia,
+    limites_meses_referencia,
+    mes_referencia,
+    no_intervalo,
+    vencimento_no_mes,
+)
+from app.services import resumo_mensal_service
+from app.services.atraso_service import status_em_aberto
+from app.utils import STATUS_ATRASADO, STATUS_PAGO, STATUS_PARCIAL_PAGO
 
 
-def automatizar_geracao_e_atualizacao_faturas(user_id):
+def get_somas_parcelas_por_mes(user_id, crediario_ids=None, data_inicio=None, data_fim=None):
+    # Soma das parcelas agrupada por (crediário, mês) em uma única consulta
+    ano_col, mes_col = ano_mes(CrediarioParcela.data_vencimento)
+
+    query = (
+        db.session.query(
+            CrediarioMovimento.crediario_id,
+            ano_col,
+            mes_col,
+            func.sum(CrediarioParcela.valor_parcela).label("total"),
+        )
+        .join(
+            CrediarioMovimento,
+            CrediarioMovimento.id == CrediarioParcela.crediario_movimento_id,
+        )
+        .filter(CrediarioMovimento.usuario_id == user_id)
+    )
+    if crediario_ids is not None:
+        query = query.filter(CrediarioMovimento.crediario_id.in_(crediario_ids))
+    if data_inicio:
+        query = query.filter(CrediarioParcela.data_vencimento >= data_inicio)
+    if data_fim:
+        query = query.filter(CrediarioParcela.data_vencimento <= data_fim)
+
+    resultados = query.group_by(
+        CrediarioMovimento.crediario_id, ano_col, mes_col
+    ).all()
+
+    return {
+        (r.crediario_id, f"{int(r.ano):04d}-{int(r.mes):02d}"): Decimal(
+            str(r.total or 0)
+        )
+        for r in resultados
+    }
+
+
+def get_somas_parcelas_das_faturas(user_id, faturas):
+    if not faturas:
+        return {}
+
+    data_inicio, data_fim = limites_meses_referencia(
+        [f.mes_referencia for f in faturas]
+    )
+
+    return get_somas_parcelas_por_mes(
+        user_id,
+        crediario_ids={f.crediario_id for f in faturas},
+        data_inicio=data_inicio,
+        data_fim=data_fim,
+    )
+
+
+def marcar_meses_para_sincronizacao(user_id, crediario_id, datas_vencimento):
+    meses = sorted({mes_referencia(d) for d in datas_vencimento})
+    if not meses:
+        return
+
+    # Marcação existente é "tocada" em vez de ignorada: o UPDATE trava a
+    # linha até o commit, e a sincronização que a estiver lendo espera
+    agora = datetime.now(timezone.utc)
+    db.session.execute(
+        comando_inserir_ou_atualizar(
+            CrediarioFaturaPendencia,
+            ["usuario_id", "crediario_id", "mes_referencia"],
+            lambda tabela, novos: {"data_criacao": novos.data_criacao},
+        ),
+        [
+            {
+                "usuario_id": user_id,
+                "crediario_id": crediario_id,
+                "mes_referencia": mes,
+                "data_criacao": agora,
+            }
+            for mes in meses
+        ],
+    )
+
+
+def _chave_resumo_crediario(user_id, data_vencimento):
+    return (
+        user_id,
+        data_vencimento.year,
+        data_vencimento.month,
+        resumo_mensal_service.CATEGORIA_CREDIARIO,
+        resumo_mensal_service.PREVISTO,
+    )
+
+
+def automatizar_geracao_e_atualizacao_faturas(user_id, incremental=False):
     try:
         current_app.logger.info(
-            f"Iniciando sincronização (ORM) para user ID: {user_id}"
+            f"Iniciando sincronização (incremental={incremental}) para user ID: {user_id}"
         )
 
-        tarefas = (
+        # Transação nova, começando pela trava das marcações: quem alterar
+        # parcelas depois disso marca de novo e espera este commit, e as
+        # somas abaixo já enxergam o que foi gravado antes
+        db.session.commit()
+        pendencias = (
             db.session.query(
-                CrediarioMovimento.crediario_id,
-                func.date_format(CrediarioParcela.data_vencimento, "%Y-%m").label(
-                    "mes_referencia"
-                ),
+                CrediarioFaturaPendencia.id,
+                CrediarioFaturaPendencia.crediario_id,
+                CrediarioFaturaPendencia.mes_referencia,
+            )
+            .filter(CrediarioFaturaPendencia.usuario_id == user_id)
+            .with_for_update()
+            .all()
+        )
+        # Só as marcações lidas são apagadas no fim
+        pendencias_lidas = CrediarioFaturaPendencia.query.filter(
+            CrediarioFaturaPendencia.id.in_([p.id for p in pendencias])
+        )
+
+        crediario_ids = None
+        data_inicio = data_fim = None
+        pares_pendentes = None
+        if incremental:
+            pares_pendentes = {(p.crediario_id, p.mes_referencia) for p in pendencias}
+            if not pares_pendentes:
+                return (
+                    True,
+                    "Nenhuma alteração desde a última sincronização das faturas.",
+                )
+            crediario_ids = {crediario_id for crediario_id, _ in pares_pendentes}
+            data_inicio, data_fim = limites_meses_referencia(
+                [mes for _, mes in pares_pendentes]
             )
+
+        # Uma consulta agrupada para os totais e outra para saber quais meses
+        # ainda possuem parcelas em aberto
+        totais = get_somas_parcelas_por_mes(
+            user_id, crediario_ids=crediario_ids, data_inicio=data_inicio, data_fim=data_fim
+        )
+
+        ano_col, mes_col = ano_mes(CrediarioParcela.data_vencimento)
+        query_abertos = (
+            db.session.query(CrediarioMovimento.crediario_id, ano_col, mes_col)
             .join(
                 CrediarioMovimento,
                 CrediarioMovimento.id == CrediarioParcela.crediario_movimento_id,
@@ -39,82 +175,115 @@ def automatizar_geracao_e_atualizacao_faturas(user_id):
                 CrediarioMovimento.usuario_id == user_id,
                 CrediarioParcela.pago == False,
             )
-            .distinct()
-            .all()
         )
+        if incremental:
+            query_abertos = query_abertos.filter(
+                CrediarioMovimento.crediario_id.in_(crediario_ids),
+                no_intervalo(CrediarioParcela.data_vencimento, data_inicio, data_fim),
+            )
+        tarefas = {
+            (crediario_id, f"{int(ano):04d}-{int(mes):02d}")
+            for crediario_id, ano, mes in query_abertos.distinct()
+        }
+
+        lookup_faturas = {
+            (f.crediario_id, f.mes_referencia): (
+                f.id,
+                f.status,
+                f.valor_total_fatura,
+                f.data_vencimento_fatura,
+            )
+            for f in db.session.query(
+                CrediarioFatura.id,
+                CrediarioFatura.crediario_id,
+                CrediarioFatura.mes_referencia,
+                CrediarioFatura.status,
+                CrediarioFatura.valor_total_fatura,
+                CrediarioFatura.data_vencimento_fatura,
+            ).filter(CrediarioFatura.usuario_id == user_id)
+        }
+        # Fatura em aberto é recalculada mesmo sem parcelas em aberto (ex.:
+        # compra excluída), para o total ir a zero antes de a marcação sumir
+        if incremental:
+            tarefas = (tarefas & pares_pendentes) | (
+                pares_pendentes & lookup_faturas.keys()
+            )
+        else:
+            tarefas |= {
+                chave
+                for chave, (_, status, _, _) in lookup_faturas.items()
+                if status not in [STATUS_PAGO, STATUS_PARCIAL_PAGO]
+            }
 
         current_app.logger.info(
             f"Encontradas {len(tarefas)} combinações de (crediário, mês) para processar."
         )
         if not tarefas:
+            pendencias_lidas.delete(synchronize_session=False)
+            db.session.commit()
+            invalidar_dashboard(user_id)
             return (
                 True,
                 "Não foram encontradas novas parcelas para gerar ou atualizar faturas.",
             )
 
-        todas_as_faturas_existentes = CrediarioFatura.query.filter(
-            CrediarioFatura.usuario_id == user_id
-        ).all()
-        lookup_faturas = {
-            (f.crediario_id, f.mes_referencia): f for f in todas_as_faturas_existentes
-        }
+        dias_vencimento = dict(
+            db.session.query(Crediario.id, Crediario.dia_vencimento).filter(
+                Crediario.id.in_({crediario_id for crediario_id, _ in tarefas})
+            )
+        )
 
-        faturas_criadas = 0
-        faturas_atualizadas = 0
-
-        for tarefa in tarefas:
-            crediario_id = tarefa.crediario_id
-            mes_ano_str = tarefa.mes_referencia
-            ano, mes = map(int, mes_ano_str.split("-"))
-            data_inicio_mes = date(ano, mes, 1)
-            data_fim_mes = (data_inicio_mes + timedelta(days=32)).replace(
-                day=1
-            ) - timedelta(days=1)
-
-            valor_total_real = (
-                db.session.query(func.sum(CrediarioParcela.valor_parcela))
-                .join(CrediarioMovimento)
-                .filter(
-                    CrediarioMovimento.usuario_id == user_id,
-                    CrediarioMovimento.crediario_id == crediario_id,
-                    CrediarioParcela.data_vencimento.between(
-                        data_inicio_mes, data_fim_mes
-                    ),
-                )
-                .scalar()
-            ) or Decimal("0.00")
+        novas_faturas = []
+        faturas_alteradas = []
+        # Faturas em aberto só mudam o previsto do mês de vencimento
+        deltas_resumo = defaultdict(Decimal)
 
+        for crediario_id, mes_ano_str in sorted(tarefas):
+            valor_total_real = totais.get((crediario_id, mes_ano_str), Decimal("0.00"))
             fatura_existente = lookup_faturas.get((crediario_id, mes_ano_str))
 
             if fatura_existente:
-                if fatura_existente.status not in [STATUS_PAGO, STATUS_PARCIAL_PAGO]:
-                    if fatura_existente.valor_total_fatura != valor_total_real:
-                        fatura_existente.valor_total_fatura = valor_total_real
-                        faturas_atualizadas += 1
+                fatura_id, status, valor_atual, vencimento = fatura_existente
+                if status not in [STATUS_PAGO, STATUS_PARCIAL_PAGO]:
+                    if valor_atual != valor_total_real:
+                        faturas_alteradas.append(
+                            {"id": fatura_id, "valor_total_fatura": valor_total_real}
+                        )
+                        deltas_resumo[
+                            _chave_resumo_crediario(user_id, vencimento)
+                        ] += valor_total_real - valor_atual
             else:
-                crediario = db.session.get(Crediario, crediario_id)
-                dia_venc = (
-                    crediario.dia_vencimento
-                    if crediario and crediario.dia_vencimento
-                    else 30
+                data_vencimento = vencimento_no_mes(
+                    *ler_mes_referencia(mes_ano_str),
+                    dias_vencimento.get(crediario_id) or 30,
                 )
-                ultimo_dia_mes = monthrange(ano, mes)[1]
-                data_vencimento = date(ano, mes, min(dia_venc, ultimo_dia_mes))
-
-                nova_fatura = CrediarioFatura(
-                    usuario_id=user_id,
-                    crediario_id=crediario_id,
-                    mes_referencia=mes_ano_str,
-                    valor_total_fatura=valor_total_real,
-                    data_vencimento_fatura=data_vencimento,
-                    status=STATUS_PENDENTE,
+
+                novas_faturas.append(
+                    {
+                        "usuario_id": user_id,
+                        "crediario_id": crediario_id,
+                        "mes_referencia": mes_ano_str,
+                        "valor_total_fatura": valor_total_real,
+                        "valor_pago_fatura": Decimal("0.00"),
+                        "data_vencimento_fatura": data_vencimento,
+                        "status": status_em_aberto(data_vencimento),
+                    }
                 )
-                db.session.add(nova_fatura)
-                faturas_criadas += 1
+                deltas_resumo[
+                    _chave_resumo_crediario(user_id, data_vencimento)
+                ] += valor_total_real
+
+        if novas_faturas:
+            db.session.bulk_insert_mappings(CrediarioFatura, novas_faturas)
+        if faturas_alteradas:
+            db.session.bulk_update_mappings(CrediarioFatura, faturas_alteradas)
+        resumo_mensal_service.aplicar_deltas(deltas_resumo)
 
+        pendencias_lidas.delete(synchronize_session=False)
         db.session.commit()
+        invalidar_dashboard(user_id)
 
-        mensagem = f"{faturas_criadas} nova(s) fatura(s) gerada(s) e {faturas_atualizadas} fatura(s) atualizada(s) com sucesso!"
+        mensagem = f"{len(novas_faturas)} nova(s) fatura(s) gerada(s) e {len(faturas_alteradas)} fatura(s) atualizada(s) com sucesso!"
         current_app.logger.info(
             f"Sincronização de faturas para user {user_id}: {mensagem}"
         )
@@ -123,6 +292,6 @@ def automatizar_geracao_e_atualizacao_faturas(user_id):
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(
-            f"Erro ao automatizar faturas com ORM: {e}", exc_info=True
+            f"Erro ao automatizar faturas: {e}", exc_info=True
         )
         return False, "Ocorreu um erro inesperado durante a sincronização das faturas."
@@ -1,19 +1,22 @@
 # app/services/financiamento_service.py
 
-import csv
-import io
-from datetime import date, datetime
+from datetime import date
 from decimal import ROUND_DOWN, Decimal
 
+import numpy as np
+import pandas as pd
 from flask import current_app
 from flask_login import current_user
 from sqlalchemy import func
 
 from app import db
+from app.cache import invalidar_dashboard
 from app.models.conta_model import Conta
 from app.models.conta_movimento_model import ContaMovimento
 from app.models.conta_transacao_model import ContaTransacao
 from app.models.financiamento_parcela_model import FinanciamentoParcela
+from app.services import resumo_mensal_service
+from app.services.conta_saldo_service import debitar_saldo, saldo_disponivel
 from app.utils import (
     STATUS_AMORTIZADO,
     STATUS_ATRASADO,
@@ -23,140 +26,247 @@ from app.utils import (
 )
 
 
-def _determinar_status_parcela(valor_pago, data_vencimento, hoje):
-    if data_vencimento < hoje:
-        return STATUS_PAGO if valor_pago else STATUS_ATRASADO
-    else:
-        return STATUS_AMORTIZADO if valor_pago else STATUS_PENDENTE
+# Colunas do CSV de parcelas, nesta ordem; observacoes é opcional
+COLUNAS_CSV_PARCELAS = [
+    "numero_parcela",
+    "data_vencimento",
+    "valor_principal",
+    "valor_juros",
+    "valor_seguro",
+    "valor_seguro_2",
+    "valor_seguro_3",
+    "valor_taxas",
+    "multa",
+    "mora",
+    "ajustes",
+    "valor_total_previsto",
+    "saldo_devedor",
+    "data_pagamento",
+    "valor_pago",
+    "observacoes",
+]
+_COLUNAS_COMPONENTES = [
+    "valor_principal",
+    "valor_juros",
+    "valor_seguro",
+    "valor_seguro_2",
+    "valor_seguro_3",
+    "valor_taxas",
+    "multa",
+    "mora",
+    "ajustes",
+]
+_COLUNAS_TEXTO = [
+    "data_vencimento",
+    "valor_total_previsto",
+    "data_pagamento",
+    "valor_pago",
+    "observacoes",
+]
+MAXIMO_ERROS_EXIBIDOS = 10
+
+
+def _ler_datas(serie):
+    # Aceita AAAA-MM-DD e DD-MM-AAAA; vazios e inválidos viram NaT
+    datas = pd.to_datetime(serie, format="%Y-%m-%d", errors="coerce")
+    return datas.fillna(pd.to_datetime(serie, format="%d-%m-%Y", errors="coerce"))
+
+
+def _ler_centavos(serie):
+    # Valores em centavos (int64) para que somas e saldos sejam exatos
+    numeros = pd.to_numeric(serie, errors="coerce")
+    return numeros, np.rint(numeros.fillna(0).to_numpy() * 100).astype(np.int64)
+
+
+def _decimais(centavos):
+    return [Decimal(int(c)).scaleb(-2) for c in centavos]
+
+
+def _ler_parcelas_csv(csv_file):
+    """
+    Lê o CSV em colunas e valida todas as linhas de uma vez. Devolve
+    (colunas, erros), em que erros lista todas as linhas com problema.
+    """
+    df = pd.read_csv(
+        csv_file.stream,
+        dtype=str,
+        keep_default_na=False,
+        skip_blank_lines=True,
+        index_col=False,
+        encoding="utf-8",
+    )
+    if df.shape[1] < len(COLUNAS_CSV_PARCELAS) - 1:
+        return None, [
+            f"O arquivo deve ter ao menos {len(COLUNAS_CSV_PARCELAS) - 1} colunas, "
+            f"mas tem {df.shape[1]}"
+        ]
+
+    brutos = {
+        nome: df.iloc[:, indice].fillna("")
+        for indice, nome in enumerate(COLUNAS_CSV_PARCELAS)
+        if indice < df.shape[1]
+    }
+    brutos.setdefault("observacoes", pd.Series("", index=df.index))
+    # to_numeric já ignora espaços; datas e campos opcionais precisam do strip
+    for nome in _COLUNAS_TEXTO:
+        brutos[nome] = brutos[nome].str.strip()
+
+    invalidos = {}
+    colunas = {}
+
+    numero = pd.to_numeric(brutos["numero_parcela"], errors="coerce")
+    invalidos["numero_parcela"] = (
+        numero.isna() | (numero % 1 != 0) | (numero < 1) | numero.duplicated(keep=False)
+    ).to_numpy()
+    colunas["numero_parcela"] = numero.fillna(0).to_numpy(dtype=np.int64)
+
+    vencimento = _ler_datas(brutos["data_vencimento"])
+    # O vencimento deve avançar junto com o número da parcela
+    fora_de_ordem = vencimento.diff().dt.days.fillna(1) <= 0
+    invalidos["data_vencimento"] = (vencimento.isna() | fora_de_ordem).to_numpy()
+    colunas["data_vencimento"] = vencimento
+
+    for nome in _COLUNAS_COMPONENTES:
+        numeros, colunas[nome] = _ler_centavos(brutos[nome])
+        invalidos[nome] = numeros.isna().to_numpy()
+
+    total_em_branco = (brutos["valor_total_previsto"] == "").to_numpy()
+    numeros, total = _ler_centavos(brutos["valor_total_previsto"])
+    invalidos["valor_total_previsto"] = numeros.isna().to_numpy() & ~total_em_branco
+    componentes = sum(colunas[nome] for nome in _COLUNAS_COMPONENTES)
+    colunas["valor_total_previsto"] = np.where(total_em_branco, componentes, total)
+
+    pagamento_em_branco = (brutos["data_pagamento"] == "").to_numpy()
+    pagamento = _ler_datas(brutos["data_pagamento"])
+    invalidos["data_pagamento"] = pagamento.isna().to_numpy() & ~pagamento_em_branco
+    colunas["data_pagamento"] = pagamento
+
+    pago_em_branco = (brutos["valor_pago"] == "").to_numpy()
+    numeros, colunas["valor_pago"] = _ler_centavos(brutos["valor_pago"])
+    invalidos["valor_pago"] = numeros.isna().to_numpy() & ~pago_em_branco
+    colunas["valor_pago_informado"] = ~pago_em_branco
+
+    invalidos["observacoes"] = (brutos["observacoes"].str.len() > 255).to_numpy()
+    colunas["observacoes"] = brutos["observacoes"].to_numpy()
+
+    nomes = list(invalidos)
+    matriz = np.column_stack([invalidos[nome] for nome in nomes])
+    erros = []
+    for indice in np.flatnonzero(matriz.any(axis=1)):
+        detalhes = ", ".join(
+            f"{nome} ('{brutos[nome].iat[indice]}')"
+            for nome, invalido in zip(nomes, matriz[indice])
+            if invalido
+        )
+        # +2: cabeçalho e numeração a partir de 1
+        erros.append(f"Linha {indice + 2}: {detalhes}")
 
+    return colunas, erros
 
-def importar_e_processar_csv(financiamento, csv_file):
-    try:
-        FinanciamentoParcela.query.filter_by(financiamento_id=financiamento.id).delete()
-        db.session.flush()
 
-        stream = io.StringIO(csv_file.stream.read().decode("UTF-8"), newline=None)
-        csv_reader = csv.reader(stream)
-        header = next(csv_reader, None)
-        all_rows = list(csv_reader)
+def _status_parcelas(data_vencimento, valor_pago, valor_pago_informado, hoje):
+    vencida = (data_vencimento < pd.Timestamp(hoje)).to_numpy()
+    pago = valor_pago_informado & (valor_pago != 0)
+    return np.select(
+        [vencida & pago, vencida, pago],
+        [STATUS_PAGO, STATUS_ATRASADO, STATUS_AMORTIZADO],
+        default=STATUS_PENDENTE,
+    )
 
-        if len(all_rows) != financiamento.prazo_meses:
-            message = (
-                f"Erro: O arquivo CSV contém {len(all_rows)} parcelas, "
-                f"mas o financiamento espera {financiamento.prazo_meses}. "
-                "A importação foi cancelada."
-            )
-            return False, message
 
-        soma_principal_csv = Decimal("0.00")
-        parcelas_temporarias = []
-        hoje = date.today()
-
-        for i, row in enumerate(all_rows, start=1):
-            if not row:
-                continue
-
-            (
-                numero_parcela,
-                data_vencimento_str,
-                valor_principal_str,
-                valor_juros_str,
-                valor_seguro_str,
-                valor_seguro_2_str,
-                valor_seguro_3_str,
-                valor_taxas_str,
-                multa_str,
-                mora_str,
-                ajustes_str,
-                valor_total_previsto_str,
-                _,
-                data_pagamento_str,
-                valor_pago_str,
-                *observacoes_tuple,
-            ) = row
-
-            valor_principal = Decimal(valor_principal_str)
-            soma_principal_csv += valor_principal
-
-            data_vencimento_obj = datetime.strptime(
-                data_vencimento_str, "%Y-%m-%d"
-            ).date()
-            data_pagamento = (
-                datetime.strptime(data_pagamento_str, "%Y-%m-%d").date()
-                if data_pagamento_str.strip()
-                else None
-            )
-            valor_pago = Decimal(valor_pago_str) if valor_pago_str.strip() else None
-
-            status = _determinar_status_parcela(valor_pago, data_vencimento_obj, hoje)
-            pago = status in [STATUS_PAGO, STATUS_AMORTIZADO]
-
-            parcelas_temporarias.append(
-                {
-                    "financiamento_id": financiamento.id,
-                    "numero_parcela": int(numero_parcela),
-                    "data_vencimento": data_vencimento_obj,
-                    "valor_principal": valor_principal,
-                    "valor_juros": Decimal(valor_juros_str),
-                    "valor_seguro": Decimal(valor_seguro_str),
-                    "valor_seguro_2": Decimal(valor_seguro_2_str),
-                    "valor_seguro_3": Decimal(valor_seguro_3_str),
-                    "valor_taxas": Decimal(valor_taxas_str),
-                    "multa": Decimal(multa_str),
-                    "mora": Decimal(mora_str),
-                    "ajustes": Decimal(ajustes_str),
-                    "valor_total_previsto": Decimal(valor_total_previsto_str),
-                    "pago": pago,
-                    "data_pagamento": data_pagamento,
-                    "valor_pago": valor_pago,
-                    "status": status,
-                    "observacoes": (
-                        observacoes_tuple[0] if observacoes_tuple else None
-                    ),
-                }
+def importar_e_processar_csv(financiamento, csv_file):
+    try:
+        colunas, erros = _ler_parcelas_csv(csv_file)
+
+        if colunas is not None:
+            quantidade = len(colunas["numero_parcela"])
+            if quantidade != financiamento.prazo_meses:
+                erros.insert(
+                    0,
+                    f"O arquivo CSV contém {quantidade} parcelas, mas o "
+                    f"financiamento espera {financiamento.prazo_meses}",
+                )
+
+            soma_principal = int(colunas["valor_principal"].sum())
+            total_financiado = int(
+                (financiamento.valor_total_financiado * 100).to_integral_value()
             )
+            if soma_principal != total_financiado:
+                erros.insert(
+                    0,
+                    f"O valor total financiado ({financiamento.valor_total_financiado:,.2f}) "
+                    f"não corresponde à soma do valor principal das parcelas "
+                    f"({Decimal(soma_principal).scaleb(-2):,.2f})",
+                )
 
-        if soma_principal_csv.quantize(
-            Decimal("0.01")
-        ) != financiamento.valor_total_financiado.quantize(Decimal("0.01")):
+        if erros:
+            exibidos = erros[:MAXIMO_ERROS_EXIBIDOS]
+            if len(erros) > MAXIMO_ERROS_EXIBIDOS:
+                exibidos.append(f"e mais {len(erros) - MAXIMO_ERROS_EXIBIDOS} erro(s)")
             message = (
-                f"Erro de validação: O valor total financiado ( {financiamento.valor_total_financiado:,.2f}) "
-                f"não corresponde à soma do valor principal das parcelas no arquivo CSV ( {soma_principal_csv:,.2f})."
+                "A importação foi cancelada. Corrija o arquivo CSV: "
+                + "; ".join(exibidos)
+                + "."
             )
             return False, message
 
-        saldo_devedor_cumulativo = Decimal("0.00")
-        parcelas_para_adicionar = []
-        for parcela_data in reversed(parcelas_temporarias):
-            saldo_devedor_cumulativo += parcela_data["valor_principal"]
-            parcela_data["saldo_devedor"] = saldo_devedor_cumulativo
-            parcelas_para_adicionar.append(FinanciamentoParcela(**parcela_data))
-
-        parcelas_para_adicionar.reverse()
-
-        db.session.bulk_save_objects(parcelas_para_adicionar)
-
-        novo_saldo_devedor = db.session.query(
-            func.sum(FinanciamentoParcela.valor_principal)
-        ).filter(
-            FinanciamentoParcela.financiamento_id == financiamento.id,
-            FinanciamentoParcela.status.in_([STATUS_PENDENTE, STATUS_ATRASADO]),
-        ).scalar() or Decimal(
-            "0.00"
+        status = _status_parcelas(
+            colunas["data_vencimento"],
+            colunas["valor_pago"],
+            colunas["valor_pago_informado"],
+            date.today(),
         )
+        pago = np.isin(status, [STATUS_PAGO, STATUS_AMORTIZADO])
+        # Saldo devedor de cada parcela: principal dela e de todas as seguintes
+        saldo_devedor = np.cumsum(colunas["valor_principal"][::-1])[::-1]
+        em_aberto = np.isin(status, [STATUS_PENDENTE, STATUS_ATRASADO])
+
+        decimais = {
+            nome: _decimais(colunas[nome])
+            for nome in _COLUNAS_COMPONENTES + ["valor_total_previsto"]
+        }
+        decimais["saldo_devedor"] = _decimais(saldo_devedor)
+        valores_pagos = _decimais(colunas["valor_pago"])
+        vencimentos = colunas["data_vencimento"].dt.date.to_numpy()
+        pagamentos = colunas["data_pagamento"].dt.date.to_numpy()
+
+        registros = [
+            {
+                "financiamento_id": financiamento.id,
+                "numero_parcela": int(colunas["numero_parcela"][i]),
+                "data_vencimento": vencimentos[i],
+                **{nome: valores[i] for nome, valores in decimais.items()},
+                "valor_pago": (
+                    valores_pagos[i] if colunas["valor_pago_informado"][i] else None
+                ),
+                "data_pagamento": (
+                    pagamentos[i] if not pd.isna(pagamentos[i]) else None
+                ),
+                "pago": bool(pago[i]),
+                "status": str(status[i]),
+                "observacoes": colunas["observacoes"][i] or None,
+            }
+            for i in range(len(status))
+        ]
 
-        financiamento.saldo_devedor_atual = novo_saldo_devedor
+        FinanciamentoParcela.query.filter_by(financiamento_id=financiamento.id).delete()
+        db.session.execute(FinanciamentoParcela.__table__.insert(), registros)
+
+        financiamento.saldo_devedor_atual = Decimal(
+            int(colunas["valor_principal"][em_aberto].sum())
+        ).scaleb(-2)
+        resumo_mensal_service.substituir_resumo(current_user.id)
 
         db.session.commit()
+        invalidar_dashboard(current_user.id)
 
-        return True, f"{len(parcelas_para_adicionar)} parcelas importadas com sucesso!"
+        return True, f"{len(registros)} parcelas importadas com sucesso!"
 
-    except (ValueError, IndexError) as e:
+    except (ValueError, UnicodeDecodeError, pd.errors.ParserError) as e:
         db.session.rollback()
         message = (
-            f"Erro de formato no arquivo CSV na linha {i}. Verifique se todas as "
-            "colunas necessárias estão presentes e no formato correto."
-            f" Detalhe: {e}"
+            "Erro de formato no arquivo CSV. Verifique se todas as colunas "
+            f"necessárias estão presentes e no formato correto. Detalhe: {e}"
         )
         current_app.logger.error(message)
         return False, message
@@ -185,15 +295,6 @@ def amortizar_parcelas(financiamento, form):
                 f"O valor da amortização não pode exceder o saldo devedor de  {saldo_devedor_maximo:,.2f}.",
             )
 
-        saldo_disponivel = conta_debito.saldo_atual
-        if conta_debito.tipo in ["Corrente", "Digital"] and conta_debito.limite:
-            saldo_disponivel += conta_debito.limite
-        if valor_amortizacao > saldo_disponivel:
-            return (
-                False,
-                f"Saldo insuficiente na conta {conta_debito.nome_banco}. Saldo disponível:  {saldo_disponivel:,.2f}",
-            )
-
         tipo_transacao = ContaTransacao.query.filter_by(
             usuario_id=current_user.id, transacao_tipo="AMORTIZAÇÃO", tipo=TIPO_DEBITO
         ).first()
@@ -203,6 +304,13 @@ def amortizar_parcelas(financiamento, form):
                 'Tipo de transação "AMORTIZAÇÃO" (Débito) não encontrado. Cadastre-o primeiro.',
             )
 
+        if not debitar_saldo(conta_debito.id, data_pagamento, valor_amortizacao):
+            db.session.rollback()
+            return (
+                False,
+                f"Saldo insuficiente na conta {conta_debito.nome_banco}. Saldo disponível:  {saldo_disponivel(conta_debito):,.2f}",
+            )
+
         novo_movimento = ContaMovimento(
             usuario_id=current_user.id,
             conta_id=conta_debito.id,
@@ -212,7 +320,6 @@ def amortizar_parcelas(financiamento, form):
             descricao=f"Amortização do financiamento {financiamento.nome_financiamento}",
         )
         db.session.add(novo_movimento)
-        conta_debito.saldo_atual -= valor_amortizacao
         db.session.flush()
 
         msg = ""
@@ -230,6 +337,7 @@ def amortizar_parcelas(financiamento, form):
                 .order_by(FinanciamentoParcela.numero_parcela.desc())
                 .all()
             )
+            resumo_antes = resumo_mensal_service.contribuicoes(parcelas_pendentes)
 
             for parcela in parcelas_pendentes:
                 if valor_restante <= Decimal("0.00"):
@@ -258,6 +366,8 @@ def amortizar_parcelas(financiamento, form):
                     (parcela.observacoes + "; " + obs) if parcela.observacoes else obs
                 )
 
+            resumo_mensal_service.aplicar_diferenca(resumo_antes, parcelas_pendentes)
+
             msg = f"Amortização de  {valor_amortizacao:,.2f} realizada para reduzir prazo. {parcelas_quitadas} parcelas foram quitadas."
             if parcela_parcial:
                 msg += " Uma parcela foi parcialmente paga."
@@ -274,6 +384,7 @@ def amortizar_parcelas(financiamento, form):
 
             if not parcelas_pendentes:
                 return False, "Não há parcelas pendentes para amortizar."
+            resumo_antes = resumo_mensal_service.contribuicoes(parcelas_pendentes)
 
             qtd_parcelas = len(parcelas_pendentes)
             reducao_por_parcela = (valor_amortizacao / qtd_parcelas).quantize(
@@ -295,6 +406,8 @@ def amortizar_parcelas(financiamento, form):
                     (parcela.observacoes + "; " + obs) if parcela.observacoes else obs
                 )
 
+            resumo_mensal_service.aplicar_diferenca(resumo_antes, parcelas_pendentes)
+
             msg = f"Amortização de  {valor_amortizacao:,.2f} distribuída para reduzir o valor de {qtd_parcelas} parcelas futuras."
 
         novo_saldo_devedor = db.session.query(
@@ -311,6 +424,7 @@ def amortizar_parcelas(financiamento, form):
         financiamento.saldo_devedor_atual = novo_saldo_devedor
 
         db.session.commit()
+        invalidar_dashboard(current_user.id)
         return True, msg.strip()
 
     except Exception as e:
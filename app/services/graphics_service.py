@@ -1,11 +1,12 @@
 # app/services/graphics_service.py
 
-from datetime import date, timedelta
+from datetime import date
 from decimal import Decimal
 
+import numpy as np
 from dateutil.relativedelta import relativedelta
 from flask_login import current_user
-from sqlalchemy import func
+from sqlalchemy import case, func
 
 from app import db
 from app.models.conta_movimento_model import ContaMovimento
@@ -20,28 +21,22 @@ from app.models.desp_rec_model import DespRec
 from app.models.desp_rec_movimento_model import DespRecMovimento
 from app.models.financiamento_model import Financiamento
 from app.models.financiamento_parcela_model import FinanciamentoParcela
-from app.models.salario_movimento_model import SalarioMovimento
-from app.services import relatorios_service
+from app.periodo import ano_mes, limites_mes, no_ano
+from app.replica import usar_replica
+from app.services import relatorios_service, resumo_mensal_service
 from app.utils import (
     NATUREZA_DESPESA,
-    NATUREZA_RECEITA,
     STATUS_AMORTIZADO,
     STATUS_PAGO,
     STATUS_PARCIAL_PAGO,
-    STATUS_PARCIAL_RECEBIDO,
     STATUS_PENDENTE,
-    STATUS_RECEBIDO,
-    TIPO_FIXA,
-    TIPO_VARIAVEL,
 )
 
 
 # Gráfico(1) --> Progresso do Mês (gráfico de rosca)
+@usar_replica
 def get_monthly_graphics_data(user_id, year, month):
-    data_inicio_mes = date(year, month, 1)
-    data_fim_mes = (data_inicio_mes + timedelta(days=32)).replace(day=1) - timedelta(
-        days=1
-    )
+    data_inicio_mes, data_fim_mes = limites_mes(year, month)
     # Valores previstos
 
     # DESPESAS
@@ -130,52 +125,25 @@ def get_monthly_graphics_data(user_id, year, month):
         dados_progresso_valores["labels"].append(STATUS_PENDENTE)
         dados_progresso_valores["valores"].append(float(valor_pendente))
 
-    balanco = relatorios_service.get_balanco_mensal(user_id, year, month)
-
-    # Gráfico(1) --> Saídas do Mês
-    # Despesas FIXAS
-    saidas_fixas = db.session.query(func.sum(DespRecMovimento.valor_realizado)).join(
-        DespRec
-    ).filter(
-        DespRecMovimento.usuario_id == user_id,
-        DespRecMovimento.status == STATUS_PAGO,
-        DespRecMovimento.data_vencimento.between(data_inicio_mes, data_fim_mes),
-        DespRec.natureza == NATUREZA_DESPESA,
-        DespRec.tipo == TIPO_FIXA,
-    ).scalar() or Decimal(
-        "0.00"
+    # Gráfico(1) --> Saídas do Mês, lidas do resumo mensal
+    realizado = {
+        categoria: valor
+        for (categoria, tipo_valor), valor in resumo_mensal_service.get_resumo_anual(
+            user_id, year, [month]
+        )[month].items()
+        if tipo_valor == resumo_mensal_service.REALIZADO
+    }
+    saidas_fixas = realizado.get(
+        resumo_mensal_service.CATEGORIA_DESPESA_FIXA, Decimal("0.00")
     )
-    # Despesas VARIÁVEIS
-    saidas_variaveis = db.session.query(
-        func.sum(DespRecMovimento.valor_realizado)
-    ).join(DespRec).filter(
-        DespRecMovimento.usuario_id == user_id,
-        DespRecMovimento.status == STATUS_PAGO,
-        DespRecMovimento.data_vencimento.between(data_inicio_mes, data_fim_mes),
-        DespRec.natureza == NATUREZA_DESPESA,
-        DespRec.tipo == TIPO_VARIAVEL,
-    ).scalar() or Decimal(
-        "0.00"
+    saidas_variaveis = realizado.get(
+        resumo_mensal_service.CATEGORIA_DESPESA_VARIAVEL, Decimal("0.00")
     )
-    # FINANCIAMENTOS
-    saidas_financiamento = db.session.query(
-        func.sum(FinanciamentoParcela.valor_pago)
-    ).filter(
-        FinanciamentoParcela.financiamento.has(usuario_id=user_id),
-        FinanciamentoParcela.data_vencimento.between(data_inicio_mes, data_fim_mes),
-        FinanciamentoParcela.status.in_([STATUS_PAGO, STATUS_AMORTIZADO]),
-    ).scalar() or Decimal(
-        "0.00"
+    saidas_financiamento = realizado.get(
+        resumo_mensal_service.CATEGORIA_FINANCIAMENTO, Decimal("0.00")
     )
-    # CREDIÁRIO
-    saidas_crediario = db.session.query(
-        func.sum(CrediarioFatura.valor_pago_fatura)
-    ).filter(
-        CrediarioFatura.usuario_id == user_id,
-        CrediarioFatura.data_vencimento_fatura.between(data_inicio_mes, data_fim_mes),
-        CrediarioFatura.status.in_([STATUS_PAGO, STATUS_PARCIAL_PAGO]),
-    ).scalar() or Decimal(
-        "0.00"
+    saidas_crediario = realizado.get(
+        resumo_mensal_service.CATEGORIA_CREDIARIO, Decimal("0.00")
     )
     dados_saidas = {
         "labels": [
@@ -193,28 +161,14 @@ def get_monthly_graphics_data(user_id, year, month):
     }
 
     # Gráfico das Entradas do Mês
-    entradas_salario = Decimal("0.00")
-    entradas_beneficios = Decimal("0.00")
-    # SALÁRIOS e BENEFÍCIOS
-    salarios_recebidos = SalarioMovimento.query.filter(
-        SalarioMovimento.usuario_id == user_id,
-        SalarioMovimento.data_recebimento.between(data_inicio_mes, data_fim_mes),
-    ).all()
-    for salario in salarios_recebidos:
-        if salario.status in [STATUS_RECEBIDO, STATUS_PARCIAL_RECEBIDO]:
-            entradas_salario += salario.salario_liquido
-            entradas_beneficios += salario.total_beneficios
-
-    # OUTRAS RECEITAS
-    outras_receitas = db.session.query(func.sum(DespRecMovimento.valor_realizado)).join(
-        DespRec
-    ).filter(
-        DespRecMovimento.usuario_id == user_id,
-        DespRecMovimento.status == STATUS_RECEBIDO,
-        DespRecMovimento.data_vencimento.between(data_inicio_mes, data_fim_mes),
-        DespRec.natureza == NATUREZA_RECEITA,
-    ).scalar() or Decimal(
-        "0.00"
+    entradas_salario = realizado.get(
+        resumo_mensal_service.CATEGORIA_SALARIO, Decimal("0.00")
+    )
+    entradas_beneficios = realizado.get(
+        resumo_mensal_service.CATEGORIA_BENEFICIO, Decimal("0.00")
+    )
+    outras_receitas = realizado.get(
+        resumo_mensal_service.CATEGORIA_RECEITA, Decimal("0.00")
     )
     dados_entradas = {
         "labels": ["Salários", "Benefícios", "Outras Receitas"],
@@ -233,6 +187,7 @@ def get_monthly_graphics_data(user_id, year, month):
 
 
 # Cálculo da evolução do mês (Receitas x Despesas)
+@usar_replica
 def get_annual_evolution_data(user_id, year):
     labels = [
         "Jan",
@@ -248,14 +203,10 @@ def get_annual_evolution_data(user_id, year):
         "Nov",
         "Dez",
     ]
-    receitas_por_mes = [0.0] * 12
-    despesas_por_mes = [0.0] * 12
-
-    for month in range(1, 13):
-        balanco = relatorios_service.get_balanco_mensal(user_id, year, month)
-        receitas_por_mes[month - 1] = float(balanco["receitas"])
-        despesas_por_mes[month - 1] = float(balanco["despesas"])
+    balancos = relatorios_service.get_balanco_anual(user_id, year)
 
+    receitas_por_mes = [float(balancos[month]["receitas"]) for month in range(1, 13)]
+    despesas_por_mes = [float(balancos[month]["despesas"]) for month in range(1, 13)]
     balanco_por_mes = [r - d for r, d in zip(receitas_por_mes, despesas_por_mes)]
 
     return {
@@ -267,6 +218,7 @@ def get_annual_evolution_data(user_id, year):
 
 
 # Gráfico(2) --> Progresso de Financiamento
+@usar_replica
 def get_financing_progress_data(user_id, year, financiamento_id):
     if not financiamento_id:
         return None
@@ -295,38 +247,31 @@ def get_financing_progress_data(user_id, year, financiamento_id):
     valores_previstos = [0.0] * 12
     valores_realizados = [0.0] * 12
 
-    for month in range(1, 13):
-        data_inicio_mes = date(year, month, 1)
-        data_fim_mes = (data_inicio_mes + timedelta(days=32)).replace(
-            day=1
-        ) - timedelta(days=1)
-        # PREVISTOS
-        previsto_mes = (
-            db.session.query(func.sum(FinanciamentoParcela.valor_total_previsto))
-            .filter(
-                FinanciamentoParcela.financiamento_id == financiamento.id,
-                FinanciamentoParcela.data_vencimento.between(
-                    data_inicio_mes, data_fim_mes
-                ),
-            )
-            .scalar()
-            or 0
+    # Previsto e realizado de todos os meses do ano em uma consulta
+    _, mes_col = ano_mes(FinanciamentoParcela.data_vencimento)
+    totais_mes = (
+        db.session.query(
+            mes_col,
+            func.sum(FinanciamentoParcela.valor_total_previsto).label("previsto"),
+            func.sum(
+                case(
+                    (
+                        FinanciamentoParcela.status == STATUS_PAGO,
+                        FinanciamentoParcela.valor_pago,
+                    ),
+                    else_=0,
+                )
+            ).label("realizado"),
         )
-        valores_previstos[month - 1] = float(previsto_mes)
-        # REALIZADOS
-        realizado_mes = (
-            db.session.query(func.sum(FinanciamentoParcela.valor_pago))
-            .filter(
-                FinanciamentoParcela.financiamento_id == financiamento.id,
-                FinanciamentoParcela.status == STATUS_PAGO,
-                FinanciamentoParcela.data_vencimento.between(
-                    data_inicio_mes, data_fim_mes
-                ),
-            )
-            .scalar()
-            or 0
+        .filter(
+            FinanciamentoParcela.financiamento_id == financiamento.id,
+            no_ano(FinanciamentoParcela.data_vencimento, year),
         )
-        valores_realizados[month - 1] = float(realizado_mes)
+        .group_by(mes_col)
+    )
+    for row in totais_mes:
+        valores_previstos[int(row.mes) - 1] = float(row.previsto or 0)
+        valores_realizados[int(row.mes) - 1] = float(row.realizado or 0)
 
     return {
         "nome_financiamento": financiamento.nome_financiamento,
@@ -337,6 +282,7 @@ def get_financing_progress_data(user_id, year, financiamento_id):
 
 
 # Gráfico(3) --> Resumo do Financiamento (PIZZA)
+@usar_replica
 def get_financing_summary_data(user_id, financiamento_id=None):
     query = (
         db.session.query(
@@ -367,9 +313,10 @@ def get_financing_summary_data(user_id, financiamento_id=None):
 
 
 # Gráfico(4) --> Evolução do Saldo Devedor do Crediário
-def get_installment_evolution_data(user_id, grouping_by="crediario"):
+@usar_replica
+def get_installment_evolution_data(user_id, grouping_by="crediario", num_months=36):
     hoje = date.today()
-    num_months = 36
+    inicio_mes_atual = hoje.replace(day=1)
     labels = []
     for i in range(num_months):
         data_ponto = hoje + relativedelta(months=i)
@@ -378,73 +325,73 @@ def get_installment_evolution_data(user_id, grouping_by="crediario"):
     if grouping_by == "grupo":
         group_entity = CrediarioGrupo
         group_field = CrediarioGrupo.grupo_crediario
-        join_path = [CrediarioMovimento, CrediarioParcela]
+        join_path = [CrediarioSubgrupo, CrediarioGrupo]
     elif grouping_by == "subgrupo":
         group_entity = CrediarioSubgrupo
         group_field = CrediarioSubgrupo.nome
-        join_path = [CrediarioMovimento, CrediarioParcela]
+        join_path = [CrediarioSubgrupo]
     else:
         group_entity = Crediario
         group_field = Crediario.nome_crediario
-        join_path = [CrediarioMovimento, CrediarioParcela]
+        join_path = [Crediario]
 
-    query_distintos = db.session.query(group_entity.id, group_field)
+    ano_col, mes_col = ano_mes(CrediarioParcela.data_vencimento)
 
-    for model_to_join in join_path:
-        query_distintos = query_distintos.join(model_to_join)
-
-    query_distintos = query_distintos.filter(
-        CrediarioMovimento.usuario_id == user_id,
-        CrediarioParcela.pago == False,
-        CrediarioParcela.data_vencimento >= hoje,
+    # Uma consulta agrupada por (grupo, mês); o saldo de cada ponto é a soma
+    # acumulada reversa dos meses seguintes
+    query = (
+        db.session.query(
+            group_entity.id,
+            group_field,
+            ano_col,
+            mes_col,
+            func.sum(CrediarioParcela.valor_parcela).label("total"),
+            func.max(CrediarioParcela.data_vencimento).label("ultimo_vencimento"),
+        )
+        .select_from(CrediarioParcela)
+        .join(CrediarioMovimento)
     )
 
-    grupos_distintos = query_distintos.distinct().all()
-
-    datasets = []
-
-    for item_id, nome_item in grupos_distintos:
-        data_values = []
-        for i in range(num_months):
-            data_ponto_inicio_mes = (hoje + relativedelta(months=i)).replace(day=1)
-
-            query_saldo = db.session.query(func.sum(CrediarioParcela.valor_parcela))
-
-            if grouping_by == "grupo":
-                query_saldo = (
-                    query_saldo.join(CrediarioMovimento)
-                    .join(CrediarioSubgrupo)
-                    .join(CrediarioGrupo)
-                    .filter(CrediarioGrupo.id == item_id)
-                )
-            elif grouping_by == "subgrupo":
-                query_saldo = (
-                    query_saldo.join(CrediarioMovimento)
-                    .join(CrediarioSubgrupo)
-                    .filter(CrediarioSubgrupo.id == item_id)
-                )
-            else:
-                query_saldo = (
-                    query_saldo.join(CrediarioMovimento)
-                    .join(Crediario)
-                    .filter(Crediario.id == item_id)
-                )
-
-            query_saldo = query_saldo.filter(
-                CrediarioMovimento.usuario_id == user_id,
-                CrediarioParcela.pago == False,
-                CrediarioParcela.data_vencimento >= data_ponto_inicio_mes,
-            )
-
-            saldo = query_saldo.scalar() or Decimal("0.00")
-
-            data_values.append(float(saldo))
+    for model_to_join in join_path:
+        query = query.join(model_to_join)
 
-        datasets.append(
-            {
-                "label": nome_item,
-                "data": data_values,
-            }
+    resultados = (
+        query.filter(
+            CrediarioMovimento.usuario_id == user_id,
+            CrediarioParcela.pago == False,
+            CrediarioParcela.data_vencimento >= inicio_mes_atual,
         )
+        .group_by(group_entity.id, group_field, ano_col, mes_col)
+        .all()
+    )
+
+    grupos = {}
+    for row in resultados:
+        grupo = grupos.setdefault(row[0], {"nome": row[1], "ativo": False})
+        if row.ultimo_vencimento >= hoje:
+            grupo["ativo"] = True
+    grupos_ids = [gid for gid, g in grupos.items() if g["ativo"]]
+
+    if not grupos_ids or num_months <= 0:
+        return {"labels": labels, "datasets": []}
+
+    indice_grupo = {gid: idx for idx, gid in enumerate(grupos_ids)}
+    linhas, colunas, centavos = [], [], []
+    for row in resultados:
+        if row[0] not in indice_grupo:
+            continue
+        offset = (int(row.ano) - hoje.year) * 12 + int(row.mes) - hoje.month
+        linhas.append(indice_grupo[row[0]])
+        colunas.append(min(offset, num_months - 1))
+        centavos.append(int((Decimal(str(row.total)) * 100).to_integral_value()))
+
+    valores_mensais = np.zeros((len(grupos_ids), num_months), dtype=np.int64)
+    np.add.at(valores_mensais, (linhas, colunas), centavos)
+    saldos = np.cumsum(valores_mensais[:, ::-1], axis=1)[:, ::-1] / 100
+
+    datasets = [
+        {"label": grupos[gid]["nome"], "data": saldos[idx].tolist()}
+        for gid, idx in indice_grupo.items()
+    ]
 
     return {"labels": labels, "datasets": datasets}
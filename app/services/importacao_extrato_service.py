@@ -0,0 +1,434 @@
+# app/services/importacao_extrato_service.py
+
+import codecs
+import csv
+import hashlib
+import os
+import re
+import time
+import unicodedata
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from flask import current_app
+from sqlalchemy import insert
+
+from app import db
+from app.cache import invalidar_dashboard
+from app.models.conta_movimento_model import ContaMovimento
+from app.models.conta_transacao_model import ContaTransacao
+from app.periodo import mes_referencia
+from app.services.conta_saldo_service import (
+    movimentar_saldo_por_mes,
+    saldo_disponivel,
+)
+from app.utils import TIPO_CREDITO, TIPO_DEBITO
+
+FORMATO_CSV = "csv"
+FORMATO_OFX = "ofx"
+FORMATOS = (FORMATO_CSV, FORMATO_OFX)
+
+# Linhas enviadas por executemany
+TAMANHO_LOTE = 1000
+# Linhas novas exibidas na pré-visualização
+TAMANHO_AMOSTRA = 50
+MAXIMO_ERROS_EXIBIDOS = 20
+# Arquivos de pré-visualização não confirmados são descartados após 1 dia
+VALIDADE_ARQUIVO_TEMPORARIO = 24 * 60 * 60
+
+_COLUNAS_CSV = {
+    "data": ("data", "data_movimento", "data movimento", "date"),
+    "valor": ("valor", "valor (r$)", "amount"),
+    "descricao": ("descricao", "historico", "lancamento", "memo"),
+    "transacao": ("tipo", "transacao", "tipo_transacao", "tipo transacao"),
+}
+_FORMATOS_DATA = ("%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y", "%d/%m/%y")
+_TAG_OFX = re.compile(r"<(/?)(\w+)>([^<\r\n]*)")
+_TOKEN = re.compile(r"^[0-9a-f]{32}$")
+
+
+class LinhaInvalida(ValueError):
+    pass
+
+
+def _sem_acentos(texto):
+    normalizado = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in normalizado if not unicodedata.combining(c))
+
+
+def _normalizar_descricao(texto):
+    return " ".join((texto or "").split()).upper()
+
+
+def _ler_valor(texto):
+    texto = (texto or "").strip().replace("R$", "").replace(" ", "")
+    if not texto:
+        raise LinhaInvalida("valor vazio")
+    # "1.234,56" (pt-BR) ou "1234.56"
+    if "," in texto:
+        texto = texto.replace(".", "").replace(",", ".")
+    try:
+        valor = Decimal(texto).quantize(Decimal("0.01"))
+    except InvalidOperation:
+        raise LinhaInvalida(f"valor inválido '{texto}'")
+    if valor == 0:
+        raise LinhaInvalida("valor zerado")
+    return valor
+
+
+def _ler_data(texto):
+    texto = (texto or "").strip()
+    for formato in _FORMATOS_DATA:
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    raise LinhaInvalida(f"data inválida '{texto}'")
+
+
+def _ler_data_ofx(texto):
+    # AAAAMMDD[HHMMSS[.XXX][TZ]]
+    try:
+        return datetime.strptime(texto.strip()[:8], "%Y%m%d").date()
+    except ValueError:
+        raise LinhaInvalida(f"data inválida '{texto}'")
+
+
+def _abrir_texto(arquivo_binario, codificacao):
+    return codecs.getreader(codificacao)(arquivo_binario, errors="replace")
+
+
+def _campo_csv(campos, indices, nome):
+    indice = indices.get(nome)
+    if indice is None or indice >= len(campos):
+        return ""
+    return campos[indice].strip()
+
+
+def _linhas_csv(arquivo_binario):
+    """
+    Lê o CSV linha a linha. O cabeçalho define as colunas (data, valor,
+    descrição e, opcionalmente, o tipo de transação); o valor é assinado:
+    negativo para débitos. Produz (numero_linha, registro ou mensagem de erro).
+    """
+    texto = _abrir_texto(arquivo_binario, "utf-8-sig")
+    primeira = texto.readline()
+    delimitador = ";" if primeira.count(";") >= primeira.count(",") else ","
+    cabecalho = [
+        _sem_acentos(c).strip().lower()
+        for c in next(csv.reader([primeira], delimiter=delimitador), [])
+    ]
+
+    indices = {}
+    for campo, apelidos in _COLUNAS_CSV.items():
+        for apelido in apelidos:
+            if apelido in cabecalho:
+                indices[campo] = cabecalho.index(apelido)
+                break
+    if "data" not in indices or "valor" not in indices:
+        raise LinhaInvalida(
+            "O cabeçalho do CSV precisa das colunas 'data' e 'valor'."
+        )
+
+    leitor = csv.reader(texto, delimiter=delimitador)
+    for numero, campos in enumerate(leitor, start=2):
+        if not any(c.strip() for c in campos):
+            continue
+        try:
+            registro = {
+                "data": _ler_data(_campo_csv(campos, indices, "data")),
+                "valor": _ler_valor(_campo_csv(campos, indices, "valor")),
+                "descricao": _campo_csv(campos, indices, "descricao"),
+                "transacao": _campo_csv(campos, indices, "transacao"),
+            }
+        except LinhaInvalida as e:
+            yield numero, str(e)
+            continue
+        yield numero, registro
+
+
+def _codificacao_ofx(arquivo_binario):
+    # O cabeçalho SGML do OFX 1.x informa o charset (ex.: CHARSET:1252)
+    inicio = arquivo_binario.read(1024)
+    arquivo_binario.seek(0)
+    cabecalho = inicio.decode("ascii", errors="ignore").upper()
+    if "CHARSET:1252" in cabecalho or "ENCODING:USASCII" in cabecalho:
+        return "cp1252"
+    if "ISO-8859-1" in cabecalho:
+        return "latin-1"
+    return "utf-8"
+
+
+def _linhas_ofx(arquivo_binario):
+    """
+    Percorre os blocos <STMTTRN> do OFX (SGML ou XML) sem montar a árvore do
+    documento. O tipo de transação vem dos padrões informados no formulário.
+    """
+    texto = _abrir_texto(arquivo_binario, _codificacao_ofx(arquivo_binario))
+    transacao = None
+    numero_inicio = 0
+
+    for numero, linha in enumerate(texto, start=1):
+        for fechamento, tag, valor in _TAG_OFX.findall(linha):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if not fechamento:
+                    transacao, numero_inicio = {}, numero
+                    continue
+                if transacao is None:
+                    continue
+                try:
+                    registro = {
+                        "data": _ler_data_ofx(transacao.get("DTPOSTED", "")),
+                        "valor": _ler_valor(transacao.get("TRNAMT", "")),
+                        "descricao": transacao.get("MEMO") or transacao.get("NAME", ""),
+                        "transacao": "",
+                    }
+                except LinhaInvalida as e:
+                    registro = str(e)
+                yield numero_inicio, registro
+                transacao = None
+            elif transacao is not None and not fechamento:
+                transacao[tag] = valor.strip()
+
+
+def _mapa_tipos_transacao(usuario_id):
+    # {(NOME, tipo): (id, nome)} carregado uma única vez por importação
+    return {
+        (_sem_acentos(ct.transacao_tipo).upper(), ct.tipo): (ct.id, ct.transacao_tipo)
+        for ct in ContaTransacao.query.filter_by(usuario_id=usuario_id)
+    }
+
+
+def _chave(data, valor, tipo, descricao):
+    bruto = f"{data.isoformat()}|{valor:.2f}|{tipo}|{_normalizar_descricao(descricao)}"
+    return hashlib.sha1(bruto.encode("utf-8")).hexdigest()
+
+
+def _chaves_existentes(conta_id, data_inicio, data_fim):
+    linhas = (
+        db.session.query(
+            ContaMovimento.data_movimento,
+            ContaMovimento.valor,
+            ContaTransacao.tipo,
+            ContaMovimento.descricao,
+        )
+        .join(ContaTransacao, ContaMovimento.conta_transacao_id == ContaTransacao.id)
+        .filter(
+            ContaMovimento.conta_id == conta_id,
+            ContaMovimento.data_movimento >= data_inicio,
+            ContaMovimento.data_movimento <= data_fim,
+        )
+    )
+    return Counter(_chave(*linha) for linha in linhas)
+
+
+def analisar_extrato(conta, arquivo_binario, formato, tipo_credito_id, tipo_debito_id):
+    """
+    Lê o extrato e separa as linhas novas das já lançadas na conta. Duplicadas
+    são identificadas por data, valor, tipo e descrição normalizada; linhas
+    repetidas no próprio arquivo só são descartadas se já houver a mesma
+    quantidade lançada na conta.
+    """
+    tipos = _mapa_tipos_transacao(conta.usuario_id)
+    nomes_por_id = {id_: nome for id_, nome in tipos.values()}
+    padrao = {TIPO_CREDITO: tipo_credito_id, TIPO_DEBITO: tipo_debito_id}
+
+    resumo = {
+        "linhas_lidas": 0,
+        "novas": 0,
+        "duplicadas": 0,
+        "invalidas": 0,
+        "erros": [],
+        "total_creditos": Decimal("0.00"),
+        "total_debitos": Decimal("0.00"),
+        "data_inicial": None,
+        "data_final": None,
+        "amostra": [],
+    }
+    candidatas = []
+
+    linhas = _linhas_ofx if formato == FORMATO_OFX else _linhas_csv
+    for numero, registro in linhas(arquivo_binario):
+        resumo["linhas_lidas"] += 1
+        if isinstance(registro, str):
+            resumo["invalidas"] += 1
+            if len(resumo["erros"]) < MAXIMO_ERROS_EXIBIDOS:
+                resumo["erros"].append(f"Linha {numero}: {registro}.")
+            continue
+
+        tipo = TIPO_CREDITO if registro["valor"] > 0 else TIPO_DEBITO
+        transacao_id = None
+        if registro["transacao"]:
+            encontrado = tipos.get((_sem_acentos(registro["transacao"]).upper(), tipo))
+            transacao_id = encontrado[0] if encontrado else None
+        transacao_id = transacao_id or padrao[tipo]
+        if not transacao_id or transacao_id not in nomes_por_id:
+            resumo["invalidas"] += 1
+            if len(resumo["erros"]) < MAXIMO_ERROS_EXIBIDOS:
+                resumo["erros"].append(
+                    f"Linha {numero}: tipo de transação de {tipo.lower()} não "
+                    f"encontrado ('{registro['transacao'] or '-'}')."
+                )
+            continue
+
+        valor = abs(registro["valor"])
+        descricao = registro["descricao"][:255] or nomes_por_id[transacao_id]
+        candidatas.append((registro["data"], valor, tipo, transacao_id, descricao))
+
+    if candidatas:
+        resumo["data_inicial"] = min(c[0] for c in candidatas)
+        resumo["data_final"] = max(c[0] for c in candidatas)
+        existentes = _chaves_existentes(
+            conta.id, resumo["data_inicial"], resumo["data_final"]
+        )
+    else:
+        existentes = Counter()
+
+    novas = []
+    for data, valor, tipo, transacao_id, descricao in candidatas:
+        chave = _chave(data, valor, tipo, descricao)
+        if existentes[chave] > 0:
+            existentes[chave] -= 1
+            resumo["duplicadas"] += 1
+            continue
+
+        novas.append(
+            {
+                "usuario_id": conta.usuario_id,
+                "conta_id": conta.id,
+                "conta_transacao_id": transacao_id,
+                "data_movimento": data,
+                "valor": valor,
+                "descricao": descricao,
+                "tipo": tipo,
+            }
+        )
+        if tipo == TIPO_CREDITO:
+            resumo["total_creditos"] += valor
+        else:
+            resumo["total_debitos"] += valor
+        if len(resumo["amostra"]) < TAMANHO_AMOSTRA:
+            resumo["amostra"].append(
+                {
+                    "data_movimento": data,
+                    "transacao_tipo": nomes_por_id[transacao_id],
+                    "tipo": tipo,
+                    "valor": valor,
+                    "descricao": descricao,
+                }
+            )
+
+    resumo["novas"] = len(novas)
+    resumo["saldo_atual"] = conta.saldo_atual
+    resumo["saldo_previsto"] = (
+        conta.saldo_atual + resumo["total_creditos"] - resumo["total_debitos"]
+    )
+    return novas, resumo
+
+
+def importar_extrato(
+    conta, arquivo_binario, formato, tipo_credito_id, tipo_debito_id, simular=True
+):
+    """
+    Importa as linhas novas do extrato em lotes (executemany) e aplica o
+    efeito no saldo uma única vez por conta e por mês. Com `simular=True`
+    apenas devolve o resumo da pré-visualização. Retorna (sucesso, mensagem,
+    resumo).
+    """
+    try:
+        novas, resumo = analisar_extrato(
+            conta, arquivo_binario, formato, tipo_credito_id, tipo_debito_id
+        )
+    except (LinhaInvalida, UnicodeError) as e:
+        return False, f"Não foi possível ler o arquivo: {e}", None
+
+    if simular:
+        return True, "Pré-visualização gerada.", resumo
+    if not novas:
+        return False, "Nenhuma movimentação nova para importar.", resumo
+
+    try:
+        delta_por_mes = defaultdict(Decimal)
+        for linha in novas:
+            tipo = linha.pop("tipo")
+            delta = linha["valor"] if tipo == TIPO_CREDITO else -linha["valor"]
+            delta_por_mes[mes_referencia(linha["data_movimento"])] += delta
+
+        # Mesma regra dos lançamentos manuais: o saldo líquido do extrato não
+        # pode passar do limite da conta
+        if not movimentar_saldo_por_mes(
+            conta.id, delta_por_mes, verificar_limite=True
+        ):
+            db.session.rollback()
+            return (
+                False,
+                f"Saldo e limite insuficientes na conta {conta.nome_banco} para "
+                f"importar o extrato. Saldo disponível: {saldo_disponivel(conta):.2f}",
+                resumo,
+            )
+
+        for inicio in range(0, len(novas), TAMANHO_LOTE):
+            db.session.execute(
+                insert(ContaMovimento), novas[inicio : inicio + TAMANHO_LOTE]
+            )
+
+        db.session.commit()
+        invalidar_dashboard(conta.usuario_id)
+        return (
+            True,
+            f"{resumo['novas']} movimentação(ões) importada(s) com sucesso!",
+            resumo,
+        )
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(
+            f"Erro ao importar extrato na conta {conta.id}: {e}", exc_info=True
+        )
+        return False, "Ocorreu um erro ao importar o extrato.", resumo
+
+
+def _pasta_temporaria():
+    pasta = os.path.join(current_app.instance_path, "importacoes")
+    os.makedirs(pasta, exist_ok=True)
+    return pasta
+
+
+def _limpar_arquivos_antigos(pasta):
+    limite = time.time() - VALIDADE_ARQUIVO_TEMPORARIO
+    for nome in os.listdir(pasta):
+        caminho = os.path.join(pasta, nome)
+        try:
+            if os.path.getmtime(caminho) < limite:
+                os.remove(caminho)
+        except OSError:
+            pass
+
+
+def salvar_arquivo_temporario(arquivo):
+    """Guarda o upload da pré-visualização até a confirmação. Retorna o token."""
+    pasta = _pasta_temporaria()
+    _limpar_arquivos_antigos(pasta)
+    token = uuid.uuid4().hex
+    arquivo.save(os.path.join(pasta, token))
+    return token
+
+
+def caminho_arquivo_temporario(token):
+    if not token or not _TOKEN.match(token):
+        return None
+    caminho = os.path.join(_pasta_temporaria(), token)
+    return caminho if os.path.exists(caminho) else None
+
+
+def remover_arquivo_temporario(token):
+    caminho = caminho_arquivo_temporario(token)
+    if caminho:
+        os.remove(caminho)
+
+
+def formato_do_arquivo(nome_arquivo):
+    extensao = os.path.splitext(nome_arquivo or "")[1].lower().lstrip(".")
+    return extensao if extensao in FORMATOS else None
@@ -7,12 +7,19 @@ from flask_login import current_user
 from sqlalchemy import or_
 
 from app import db
+from app.cache import invalidar_dashboard
 from app.models.conta_model import Conta
 from app.models.conta_movimento_model import ContaMovimento
 from app.models.conta_transacao_model import ContaTransacao
 from app.models.desp_rec_movimento_model import DespRecMovimento
 from app.models.financiamento_parcela_model import FinanciamentoParcela
 from app.models.salario_movimento_model import SalarioMovimento
+from app.services.conta_saldo_service import (
+    creditar_saldo,
+    debitar_saldo,
+    movimentar_saldo,
+    saldo_disponivel,
+)
 from app.utils import (
     TIPO_DEBITO,
     TIPO_MOVIMENTACAO_SIMPLES,
@@ -20,6 +27,15 @@ from app.utils import (
 )
 
 
+def _saldo_insuficiente(conta):
+    # Desfaz o que já foi feito na sessão e relê o saldo gravado
+    db.session.rollback()
+    return (
+        False,
+        f"Saldo e limite insuficientes na conta {conta.nome_banco}. Saldo disponível:  {saldo_disponivel(conta):.2f}",
+    )
+
+
 def registrar_movimento(form):
     try:
         tipo_operacao = form.tipo_operacao.data
@@ -33,30 +49,13 @@ def registrar_movimento(form):
         if valor <= 0:
             return False, "O valor da movimentação deve ser maior que zero."
 
-        is_debit_operation = False
         transacao_id_para_descricao = None
 
         if tipo_operacao == TIPO_MOVIMENTACAO_SIMPLES:
-            tipo_transacao_obj = db.session.get(
-                ContaTransacao, form.conta_transacao_id.data
-            )
-            if tipo_transacao_obj and tipo_transacao_obj.tipo == TIPO_DEBITO:
-                is_debit_operation = True
             transacao_id_para_descricao = form.conta_transacao_id.data
         elif tipo_operacao == TIPO_MOVIMENTACAO_TRANSFERENCIA:
-            is_debit_operation = True
             transacao_id_para_descricao = form.transferencia_tipo_id.data
 
-        if is_debit_operation:
-            saldo_disponivel = conta_origem.saldo_atual
-            if conta_origem.tipo in ["Corrente", "Digital"] and conta_origem.limite:
-                saldo_disponivel += conta_origem.limite
-            if valor > saldo_disponivel:
-                return (
-                    False,
-                    f"Saldo e limite insuficientes na conta {conta_origem.nome_banco}. Saldo disponível:  {saldo_disponivel:.2f}",
-                )
-
         descricao_final = descricao_manual
         if not descricao_final and transacao_id_para_descricao:
             tipo_transacao_fallback = db.session.get(
@@ -72,6 +71,12 @@ def registrar_movimento(form):
             if not tipo_transacao:
                 return False, "Tipo de transação inválido ou não encontrado."
 
+            if tipo_transacao.tipo == TIPO_DEBITO:
+                if not debitar_saldo(conta_origem_id, data_movimento, valor):
+                    return _saldo_insuficiente(conta_origem)
+            else:
+                creditar_saldo(conta_origem_id, data_movimento, valor)
+
             movimento = ContaMovimento(
                 usuario_id=current_user.id,
                 conta_id=conta_origem_id,
@@ -81,10 +86,6 @@ def registrar_movimento(form):
                 descricao=descricao_final,
             )
             db.session.add(movimento)
-            if tipo_transacao.tipo == TIPO_DEBITO:
-                conta_origem.saldo_atual -= valor
-            else:
-                conta_origem.saldo_atual += valor
 
         elif tipo_operacao == TIPO_MOVIMENTACAO_TRANSFERENCIA:
             conta_destino = db.session.get(Conta, form.conta_destino_id.data)
@@ -121,6 +122,9 @@ def registrar_movimento(form):
                 else descricao_base_destino
             )
 
+            if not debitar_saldo(conta_origem_id, data_movimento, valor):
+                return _saldo_insuficiente(conta_origem)
+
             movimento_origem = ContaMovimento(
                 usuario_id=current_user.id,
                 conta_id=conta_origem_id,
@@ -130,7 +134,6 @@ def registrar_movimento(form):
                 descricao=desc_origem,
             )
             db.session.add(movimento_origem)
-            conta_origem.saldo_atual -= valor
             db.session.flush()
 
             movimento_destino = ContaMovimento(
@@ -142,13 +145,14 @@ def registrar_movimento(form):
                 descricao=desc_destino,
             )
             db.session.add(movimento_destino)
-            conta_destino.saldo_atual += valor
+            creditar_saldo(conta_destino.id, data_movimento, valor)
             db.session.flush()
 
             movimento_origem.id_movimento_relacionado = movimento_destino.id
             movimento_destino.id_movimento_relacionado = movimento_origem.id
 
         db.session.commit()
+        invalidar_dashboard(current_user.id)
         current_app.logger.info(
             f"Movimentação registrada com sucesso por {current_user.login}."
         )
@@ -213,25 +217,28 @@ def excluir_movimento(movimento_id):
             movimento_relacionado.id_movimento_relacionado = None
             db.session.flush()
 
-        conta_afetada = db.session.get(Conta, movimento.conta_id)
-        if conta_afetada:
-            if movimento.tipo_transacao.tipo == "Débito":
-                conta_afetada.saldo_atual += movimento.valor
-            else:
-                conta_afetada.saldo_atual -= movimento.valor
+        if movimento.tipo_transacao.tipo == "Débito":
+            delta = movimento.valor
+        else:
+            delta = -movimento.valor
+        movimentar_saldo(movimento.conta_id, movimento.data_movimento, delta)
 
         if movimento_relacionado:
-            conta_destino = db.session.get(Conta, movimento_relacionado.conta_id)
-            if conta_destino:
-                if movimento_relacionado.tipo_transacao.tipo == "Débito":
-                    conta_destino.saldo_atual += movimento_relacionado.valor
-                else:
-                    conta_destino.saldo_atual -= movimento_relacionado.valor
+            if movimento_relacionado.tipo_transacao.tipo == "Débito":
+                delta = movimento_relacionado.valor
+            else:
+                delta = -movimento_relacionado.valor
+            movimentar_saldo(
+                movimento_relacionado.conta_id,
+                movimento_relacionado.data_movimento,
+                delta,
+            )
             db.session.delete(movimento_relacionado)
 
         db.session.delete(movimento)
 
         db.session.commit()
+        invalidar_dashboard(current_user.id)
         current_app.logger.info(
             f"Movimentação {movimento.id} excluída por {current_user.login}."
         )
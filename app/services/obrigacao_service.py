@@ -0,0 +1,324 @@
+# app/services/obrigacao_service.py
+
+from collections import defaultdict
+
+from sqlalchemy import Numeric, String, cast, func, literal, null, select, union_all
+from sqlalchemy.orm import joinedload
+
+from app import db
+from app.models.conta_movimento_model import ContaMovimento
+from app.models.crediario_fatura_model import CrediarioFatura
+from app.models.desp_rec_model import DespRec
+from app.models.desp_rec_movimento_model import DespRecMovimento
+from app.models.financiamento_model import Financiamento
+from app.models.financiamento_parcela_model import FinanciamentoParcela
+from app.models.salario_item_model import SalarioItem
+from app.models.salario_movimento_item_model import SalarioMovimentoItem
+from app.models.salario_movimento_model import SalarioMovimento
+from app.utils import NATUREZA_DESPESA, NATUREZA_RECEITA, TIPO_BENEFICIO
+
+FONTE_DESP_REC = "DespRec"
+FONTE_FINANCIAMENTO = "Financiamento"
+FONTE_CREDIARIO = "Crediário"
+FONTE_SALARIO = "Salário"
+FONTE_BENEFICIO = "Benefício"
+
+FONTES = [
+    FONTE_DESP_REC,
+    FONTE_FINANCIAMENTO,
+    FONTE_CREDIARIO,
+    FONTE_SALARIO,
+    FONTE_BENEFICIO,
+]
+
+_MODELOS = {
+    FONTE_DESP_REC: DespRecMovimento,
+    FONTE_FINANCIAMENTO: FinanciamentoParcela,
+    FONTE_CREDIARIO: CrediarioFatura,
+    FONTE_SALARIO: SalarioMovimento,
+    FONTE_BENEFICIO: SalarioMovimentoItem,
+}
+
+_OPCOES_CARREGAMENTO = {
+    FONTE_DESP_REC: [
+        joinedload(DespRecMovimento.despesa_receita),
+        joinedload(DespRecMovimento.movimento_bancario).joinedload(
+            ContaMovimento.conta
+        ),
+    ],
+    FONTE_FINANCIAMENTO: [
+        joinedload(FinanciamentoParcela.financiamento),
+        joinedload(FinanciamentoParcela.movimento_bancario).joinedload(
+            ContaMovimento.conta
+        ),
+    ],
+    FONTE_CREDIARIO: [
+        joinedload(CrediarioFatura.crediario),
+        joinedload(CrediarioFatura.movimento_bancario).joinedload(
+            ContaMovimento.conta
+        ),
+    ],
+    FONTE_SALARIO: [
+        joinedload(SalarioMovimento.movimento_bancario_salario).joinedload(
+            ContaMovimento.conta
+        ),
+    ],
+    FONTE_BENEFICIO: [
+        joinedload(SalarioMovimentoItem.salario_item),
+        joinedload(SalarioMovimentoItem.movimento_pai),
+        joinedload(SalarioMovimentoItem.movimento_bancario).joinedload(
+            ContaMovimento.conta
+        ),
+    ],
+}
+
+# Cada fonte usa um Enum de status diferente, por isso as colunas textuais
+# do UNION são convertidas para String
+VALOR = Numeric(12, 2)
+TEXTO = String(50)
+
+
+def _status_da_fonte(status, fonte):
+    if isinstance(status, dict):
+        return status.get(fonte)
+    return status
+
+
+def _filtros_comuns(coluna_data, coluna_status, data_inicio, data_fim, status):
+    filtros = []
+    if data_inicio:
+        filtros.append(coluna_data >= data_inicio)
+    if data_fim:
+        filtros.append(coluna_data <= data_fim)
+    if status is not None:
+        filtros.append(coluna_status.in_(status))
+    return filtros
+
+
+def _colunas(
+    fonte, id_col, data_col, natureza_col, status_col, previsto, pago, mov_col
+):
+    return [
+        literal(fonte).label("fonte"),
+        id_col.label("id"),
+        data_col.label("data"),
+        cast(natureza_col, TEXTO).label("natureza"),
+        cast(status_col, TEXTO).label("status"),
+        cast(previsto, VALOR).label("valor_previsto"),
+        cast(pago, VALOR).label("valor_pago"),
+        mov_col.label("movimento_bancario_id"),
+    ]
+
+
+def query_obrigacoes(
+    user_id,
+    data_inicio=None,
+    data_fim=None,
+    natureza=None,
+    status=None,
+    fontes=None,
+    apenas_em_aberto=False,
+):
+    """
+    Monta um único UNION ALL com as obrigações (contas a pagar e a receber)
+    do usuário. `status` pode ser uma lista ou um dict {fonte: lista}.
+    Com `apenas_em_aberto`, salários e benefícios já recebidos (ou com
+    líquido zerado) ficam de fora.
+    """
+    fontes = fontes or FONTES
+    partes = []
+
+    def incluir(fonte, natureza_fixa=None):
+        if fonte not in fontes:
+            return False
+        if status is not None and _status_da_fonte(status, fonte) is None:
+            return False
+        return natureza is None or natureza_fixa is None or natureza_fixa == natureza
+
+    if incluir(FONTE_DESP_REC):
+        filtros = [DespRecMovimento.usuario_id == user_id]
+        filtros += _filtros_comuns(
+            DespRecMovimento.data_vencimento,
+            DespRecMovimento.status,
+            data_inicio,
+            data_fim,
+            _status_da_fonte(status, FONTE_DESP_REC),
+        )
+        if natureza:
+            filtros.append(DespRec.natureza == natureza)
+        partes.append(
+            select(
+                *_colunas(
+                    FONTE_DESP_REC,
+                    DespRecMovimento.id,
+                    DespRecMovimento.data_vencimento,
+                    DespRec.natureza,
+                    DespRecMovimento.status,
+                    DespRecMovimento.valor_previsto,
+                    DespRecMovimento.valor_realizado,
+                    DespRecMovimento.movimento_bancario_id,
+                )
+            )
+            .join(DespRec, DespRecMovimento.desp_rec_id == DespRec.id)
+            .where(*filtros)
+        )
+
+    if incluir(FONTE_FINANCIAMENTO, NATUREZA_DESPESA):
+        filtros = [Financiamento.usuario_id == user_id]
+        filtros += _filtros_comuns(
+            FinanciamentoParcela.data_vencimento,
+            FinanciamentoParcela.status,
+            data_inicio,
+            data_fim,
+            _status_da_fonte(status, FONTE_FINANCIAMENTO),
+        )
+        partes.append(
+            select(
+                *_colunas(
+                    FONTE_FINANCIAMENTO,
+                    FinanciamentoParcela.id,
+                    FinanciamentoParcela.data_vencimento,
+                    literal(NATUREZA_DESPESA),
+                    FinanciamentoParcela.status,
+                    FinanciamentoParcela.valor_total_previsto,
+                    FinanciamentoParcela.valor_pago,
+                    FinanciamentoParcela.movimento_bancario_id,
+                )
+            )
+            .join(
+                Financiamento,
+                FinanciamentoParcela.financiamento_id == Financiamento.id,
+            )
+            .where(*filtros)
+        )
+
+    if incluir(FONTE_CREDIARIO, NATUREZA_DESPESA):
+        filtros = [CrediarioFatura.usuario_id == user_id]
+        filtros += _filtros_comuns(
+            CrediarioFatura.data_vencimento_fatura,
+            CrediarioFatura.status,
+            data_inicio,
+            data_fim,
+            _status_da_fonte(status, FONTE_CREDIARIO),
+        )
+        partes.append(
+            select(
+                *_colunas(
+                    FONTE_CREDIARIO,
+                    CrediarioFatura.id,
+                    CrediarioFatura.data_vencimento_fatura,
+                    literal(NATUREZA_DESPESA),
+                    CrediarioFatura.status,
+                    CrediarioFatura.valor_total_fatura,
+                    CrediarioFatura.valor_pago_fatura,
+                    CrediarioFatura.movimento_bancario_id,
+                )
+            ).where(*filtros)
+        )
+
+    if incluir(FONTE_SALARIO, NATUREZA_RECEITA):
+        filtros = [SalarioMovimento.usuario_id == user_id]
+        filtros += _filtros_comuns(
+            SalarioMovimento.data_recebimento,
+            SalarioMovimento.status,
+            data_inicio,
+            data_fim,
+            _status_da_fonte(status, FONTE_SALARIO),
+        )
+        if apenas_em_aberto:
+            filtros += [
+                SalarioMovimento.movimento_bancario_salario_id.is_(None),
+                SalarioMovimento.salario_liquido > 0,
+            ]
+        partes.append(
+            select(
+                *_colunas(
+                    FONTE_SALARIO,
+                    SalarioMovimento.id,
+                    SalarioMovimento.data_recebimento,
+                    literal(NATUREZA_RECEITA),
+                    SalarioMovimento.status,
+                    SalarioMovimento.salario_liquido,
+                    null(),
+                    SalarioMovimento.movimento_bancario_salario_id,
+                )
+            ).where(*filtros)
+        )
+
+    if incluir(FONTE_BENEFICIO, NATUREZA_RECEITA):
+        filtros = [
+            SalarioMovimento.usuario_id == user_id,
+            SalarioItem.tipo == TIPO_BENEFICIO,
+        ]
+        filtros += _filtros_comuns(
+            SalarioMovimento.data_recebimento,
+            SalarioMovimento.status,
+            data_inicio,
+            data_fim,
+            _status_da_fonte(status, FONTE_BENEFICIO),
+        )
+        if apenas_em_aberto:
+            filtros.append(SalarioMovimentoItem.movimento_bancario_id.is_(None))
+        partes.append(
+            select(
+                *_colunas(
+                    FONTE_BENEFICIO,
+                    SalarioMovimentoItem.id,
+                    SalarioMovimento.data_recebimento,
+                    literal(NATUREZA_RECEITA),
+                    SalarioMovimento.status,
+                    SalarioMovimentoItem.valor,
+                    null(),
+                    SalarioMovimentoItem.movimento_bancario_id,
+                )
+            )
+            .join(
+                SalarioMovimento,
+                SalarioMovimentoItem.salario_movimento_id == SalarioMovimento.id,
+            )
+            .join(SalarioItem, SalarioMovimentoItem.salario_item_id == SalarioItem.id)
+            .where(*filtros)
+        )
+
+    if not partes:
+        return None
+    return union_all(*partes).subquery("obrigacoes")
+
+
+def contar_obrigacoes_sql(user_id, **filtros):
+    obrigacoes = query_obrigacoes(user_id, **filtros)
+    if obrigacoes is None:
+        return literal(0)
+    return select(func.count()).select_from(obrigacoes).scalar_subquery()
+
+
+def _carregar_itens(linhas):
+    ids_por_fonte = defaultdict(list)
+    for linha in linhas:
+        ids_por_fonte[linha["fonte"]].append(linha["id"])
+
+    objetos = {}
+    for fonte, ids in ids_por_fonte.items():
+        modelo = _MODELOS[fonte]
+        for obj in modelo.query.options(*_OPCOES_CARREGAMENTO[fonte]).filter(
+            modelo.id.in_(ids)
+        ):
+            objetos[(fonte, obj.id)] = obj
+
+    for linha in linhas:
+        linha["item"] = objetos.get((linha["fonte"], linha["id"]))
+
+
+def get_obrigacoes(user_id, carregar_itens=False, **filtros):
+    obrigacoes = query_obrigacoes(user_id, **filtros)
+    if obrigacoes is None:
+        return []
+
+    resultado = db.session.execute(
+        select(obrigacoes).order_by(obrigacoes.c.data, obrigacoes.c.id)
+    )
+    linhas = [dict(row._mapping) for row in resultado]
+
+    if carregar_itens and linhas:
+        _carregar_itens(linhas)
+    return linhas
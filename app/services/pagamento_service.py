@@ -1,6 +1,5 @@
 # app/services/pagamento_service.py
 
-from datetime import date, timedelta
 from decimal import Decimal
 
 from flask import current_app
@@ -9,15 +8,21 @@ from sqlalchemy import and_, func
 from sqlalchemy.orm import joinedload
 
 from app import db
+from app.cache import invalidar_dashboard
 from app.models.conta_model import Conta
 from app.models.conta_movimento_model import ContaMovimento
 from app.models.conta_transacao_model import ContaTransacao
 from app.models.crediario_fatura_model import CrediarioFatura
-from app.models.crediario_movimento_model import CrediarioMovimento
-from app.models.crediario_parcela_model import CrediarioParcela
 from app.models.desp_rec_movimento_model import DespRecMovimento
-from app.models.financiamento_model import Financiamento
 from app.models.financiamento_parcela_model import FinanciamentoParcela
+from app.periodo import limites_mes
+from app.services import fatura_service, obrigacao_service, resumo_mensal_service
+from app.services.atraso_service import status_em_aberto
+from app.services.conta_saldo_service import (
+    creditar_saldo,
+    debitar_saldo,
+    saldo_disponivel,
+)
 from app.utils import (
     NATUREZA_DESPESA,
     STATUS_ATRASADO,
@@ -27,120 +32,69 @@ from app.utils import (
 )
 
 
+def _descricao_conta(movimento_bancario):
+    if movimento_bancario and movimento_bancario.conta:
+        return f"{movimento_bancario.conta.nome_banco} ({movimento_bancario.conta.tipo})"
+    return None
+
+
 def get_contas_a_pagar_por_mes(ano, mes):
-    primeiro_dia = date(ano, mes, 1)
-    ultimo_dia = (primeiro_dia + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    primeiro_dia, ultimo_dia = limites_mes(ano, mes)
 
     contas_a_pagar = []
     TWO_PLACES = Decimal("0.01")
 
-    faturas = CrediarioFatura.query.filter(
-        CrediarioFatura.usuario_id == current_user.id,
-        CrediarioFatura.data_vencimento_fatura.between(primeiro_dia, ultimo_dia),
-    ).all()
-    for fatura in faturas:
-        pago_com = None
-        if fatura.movimento_bancario and fatura.movimento_bancario.conta:
-            pago_com = f"{fatura.movimento_bancario.conta.nome_banco} ({fatura.movimento_bancario.conta.tipo})"
-
-        soma_parcelas_query = (
-            db.session.query(func.sum(CrediarioParcela.valor_parcela))
-            .join(
-                CrediarioMovimento,
-                CrediarioMovimento.id == CrediarioParcela.crediario_movimento_id,
+    obrigacoes = obrigacao_service.get_obrigacoes(
+        current_user.id,
+        data_inicio=primeiro_dia,
+        data_fim=ultimo_dia,
+        natureza=NATUREZA_DESPESA,
+        carregar_itens=True,
+    )
+    faturas = [
+        o["item"] for o in obrigacoes if o["fonte"] == obrigacao_service.FONTE_CREDIARIO
+    ]
+    somas_parcelas = fatura_service.get_somas_parcelas_das_faturas(
+        current_user.id, faturas
+    )
+
+    for obrigacao in obrigacoes:
+        fonte, item = obrigacao["fonte"], obrigacao["item"]
+        valor_pago = obrigacao["valor_pago"] or Decimal("0.00")
+        conta = {
+            "vencimento": obrigacao["data"],
+            "valor_display": obrigacao["valor_previsto"],
+            "valor_pago": valor_pago,
+            "status": obrigacao["status"],
+            "data_pagamento": item.data_pagamento,
+            "id_original": obrigacao["id"],
+            "pago_com": _descricao_conta(item.movimento_bancario),
+            "valor_pendente": obrigacao["valor_previsto"] - valor_pago,
+        }
+
+        if fonte == obrigacao_service.FONTE_CREDIARIO:
+            soma_parcelas = somas_parcelas.get(
+                (item.crediario_id, item.mes_referencia), Decimal("0.00")
             )
-            .filter(
-                CrediarioMovimento.crediario_id == fatura.crediario_id,
-                func.date_format(CrediarioParcela.data_vencimento, "%Y-%m")
-                == fatura.mes_referencia,
+            valor_fatura_rounded = (
+                item.valor_total_fatura or Decimal("0.00")
+            ).quantize(TWO_PLACES)
+            soma_parcelas_rounded = soma_parcelas.quantize(TWO_PLACES)
+            conta.update(
+                origem=f"FATURA {item.crediario.nome_crediario}",
+                tipo="Crediário",
+                desatualizada=valor_fatura_rounded != soma_parcelas_rounded,
             )
-            .scalar()
-        )
-        soma_parcelas = soma_parcelas_query or Decimal("0.00")
-
-        valor_fatura_rounded = (fatura.valor_total_fatura or Decimal("0.00")).quantize(
-            TWO_PLACES
-        )
-        soma_parcelas_rounded = soma_parcelas.quantize(TWO_PLACES)
-        desatualizada = valor_fatura_rounded != soma_parcelas_rounded
-
-        contas_a_pagar.append(
-            {
-                "vencimento": fatura.data_vencimento_fatura,
-                "origem": f"FATURA {fatura.crediario.nome_crediario}",
-                "valor_display": fatura.valor_total_fatura,
-                "valor_pago": fatura.valor_pago_fatura or Decimal("0.00"),
-                "status": fatura.status,
-                "data_pagamento": fatura.data_pagamento,
-                "id_original": fatura.id,
-                "tipo": "Crediário",
-                "pago_com": pago_com,
-                "valor_pendente": fatura.valor_total_fatura
-                - (fatura.valor_pago_fatura or 0),
-                "desatualizada": desatualizada,
-            }
-        )
+        elif fonte == obrigacao_service.FONTE_FINANCIAMENTO:
+            conta.update(
+                origem=f"{item.financiamento.nome_financiamento} ({item.numero_parcela}/{item.financiamento.prazo_meses})",
+                tipo="Financiamento",
+            )
+        else:
+            conta.update(origem=item.despesa_receita.nome, tipo="Despesa")
 
-    parcelas = (
-        FinanciamentoParcela.query.join(FinanciamentoParcela.financiamento)
-        .filter(
-            FinanciamentoParcela.data_vencimento.between(primeiro_dia, ultimo_dia),
-            Financiamento.usuario_id == current_user.id,
-        )
-        .all()
-    )
-    for parcela in parcelas:
-        pago_com = None
-        if parcela.movimento_bancario and parcela.movimento_bancario.conta:
-            pago_com = f"{parcela.movimento_bancario.conta.nome_banco} ({parcela.movimento_bancario.conta.tipo})"
-
-        contas_a_pagar.append(
-            {
-                "vencimento": parcela.data_vencimento,
-                "origem": f"{parcela.financiamento.nome_financiamento} ({parcela.numero_parcela}/{parcela.financiamento.prazo_meses})",
-                "valor_display": parcela.valor_total_previsto,
-                "valor_pago": parcela.valor_pago or Decimal("0.00"),
-                "status": parcela.status,
-                "data_pagamento": parcela.data_pagamento,
-                "id_original": parcela.id,
-                "tipo": "Financiamento",
-                "pago_com": pago_com,
-                "valor_pendente": parcela.valor_total_previsto
-                - (parcela.valor_pago or 0),
-            }
-        )
+        contas_a_pagar.append(conta)
 
-    despesas = (
-        DespRecMovimento.query.join(DespRecMovimento.despesa_receita)
-        .filter(
-            DespRecMovimento.usuario_id == current_user.id,
-            DespRecMovimento.data_vencimento.between(primeiro_dia, ultimo_dia),
-            DespRecMovimento.despesa_receita.has(natureza="Despesa"),
-        )
-        .all()
-    )
-    for despesa in despesas:
-        pago_com = None
-        if despesa.movimento_bancario and despesa.movimento_bancario.conta:
-            pago_com = f"{despesa.movimento_bancario.conta.nome_banco} ({despesa.movimento_bancario.conta.tipo})"
-
-        contas_a_pagar.append(
-            {
-                "vencimento": despesa.data_vencimento,
-                "origem": despesa.despesa_receita.nome,
-                "valor_display": despesa.valor_previsto,
-                "valor_pago": despesa.valor_realizado or Decimal("0.00"),
-                "status": despesa.status,
-                "data_pagamento": despesa.data_pagamento,
-                "id_original": despesa.id,
-                "tipo": "Despesa",
-                "pago_com": pago_com,
-                "valor_pendente": despesa.valor_previsto
-                - (despesa.valor_realizado or 0),
-            }
-        )
-
-    contas_a_pagar.sort(key=lambda x: x["vencimento"])
     return contas_a_pagar
 
 
@@ -149,16 +103,6 @@ def registrar_pagamento(form):
         conta_debito = Conta.query.get(form.conta_id.data)
         valor_pago = form.valor_pago.data
 
-        saldo_disponivel = conta_debito.saldo_atual
-        if conta_debito.tipo in ["Corrente", "Digital"] and conta_debito.limite:
-            saldo_disponivel += conta_debito.limite
-
-        if valor_pago > saldo_disponivel:
-            return (
-                False,
-                f"Saldo insuficiente na conta {conta_debito.nome_banco}. Saldo disponível (com limite):  {saldo_disponivel:.2f}",
-            )
-
         tipo_transacao_debito = ContaTransacao.query.filter_by(
             usuario_id=current_user.id, transacao_tipo="PAGAMENTO", tipo="Débito"
         ).first()
@@ -168,6 +112,13 @@ def registrar_pagamento(form):
                 'Tipo de transação "PAGAMENTO" (Débito) não encontrado. Por favor, cadastre-o primeiro.',
             )
 
+        if not debitar_saldo(conta_debito.id, form.data_pagamento.data, valor_pago):
+            db.session.rollback()
+            return (
+                False,
+                f"Saldo insuficiente na conta {conta_debito.nome_banco}. Saldo disponível (com limite):  {saldo_disponivel(conta_debito):.2f}",
+            )
+
         novo_movimento = ContaMovimento(
             usuario_id=current_user.id,
             conta_id=conta_debito.id,
@@ -177,7 +128,6 @@ def registrar_pagamento(form):
             descricao=form.item_descricao.data,
         )
         db.session.add(novo_movimento)
-        conta_debito.saldo_atual -= valor_pago
         db.session.flush()
 
         item_id = form.item_id.data
@@ -185,18 +135,20 @@ def registrar_pagamento(form):
 
         if item_tipo == "Despesa":
             item = DespRecMovimento.query.get(item_id)
-            item.status = STATUS_PAGO
-            item.valor_realizado = valor_pago
+            with resumo_mensal_service.acompanhar(item):
+                item.status = STATUS_PAGO
+                item.valor_realizado = valor_pago
             item.data_pagamento = form.data_pagamento.data
             item.movimento_bancario_id = novo_movimento.id
 
         elif item_tipo == "Financiamento":
             item = FinanciamentoParcela.query.get(item_id)
-            item.status = STATUS_PAGO
+            with resumo_mensal_service.acompanhar(item):
+                item.status = STATUS_PAGO
+                item.valor_pago = valor_pago
             item.pago = True
             item.data_pagamento = form.data_pagamento.data
             item.movimento_bancario_id = novo_movimento.id
-            item.valor_pago = valor_pago
             data_formatada = form.data_pagamento.data.strftime("%d/%m/%Y")
             item.observacoes = f"Paga em {data_formatada}"
 
@@ -214,15 +166,17 @@ def registrar_pagamento(form):
 
         elif item_tipo == "Crediário":
             item = CrediarioFatura.query.get(item_id)
-            item.valor_pago_fatura = (item.valor_pago_fatura or 0) + valor_pago
+            with resumo_mensal_service.acompanhar(item):
+                item.valor_pago_fatura = (item.valor_pago_fatura or 0) + valor_pago
+                if item.valor_pago_fatura >= item.valor_total_fatura:
+                    item.status = STATUS_PAGO
+                else:
+                    item.status = STATUS_PARCIAL_PAGO
             item.data_pagamento = form.data_pagamento.data
             item.movimento_bancario_id = novo_movimento.id
-            if item.valor_pago_fatura >= item.valor_total_fatura:
-                item.status = STATUS_PAGO
-            else:
-                item.status = STATUS_PARCIAL_PAGO
 
         db.session.commit()
+        invalidar_dashboard(current_user.id)
         return True, "Pagamento registrado com sucesso!"
     except Exception as e:
         db.session.rollback()
@@ -256,18 +210,22 @@ def estornar_pagamento(item_id, item_tipo):
             return False, "Movimentação bancária para estorno não existe mais."
 
         valor_a_creditar = abs(movimento_a_estornar.valor)
-        conta_bancaria = movimento_a_estornar.conta
-        conta_bancaria.saldo_atual += valor_a_creditar
+        creditar_saldo(
+            movimento_a_estornar.conta_id,
+            movimento_a_estornar.data_movimento,
+            valor_a_creditar,
+        )
         db.session.delete(movimento_a_estornar)
 
+        resumo_antes = resumo_mensal_service.contribuicoes([item_a_atualizar])
         if item_tipo == "Despesa":
-            item_a_atualizar.status = STATUS_PENDENTE
+            item_a_atualizar.status = status_em_aberto(item_a_atualizar.data_vencimento)
             item_a_atualizar.valor_realizado = None
             item_a_atualizar.data_pagamento = None
             item_a_atualizar.movimento_bancario_id = None
 
         elif item_tipo == "Financiamento":
-            item_a_atualizar.status = STATUS_PENDENTE
+            item_a_atualizar.status = status_em_aberto(item_a_atualizar.data_vencimento)
             item_a_atualizar.data_pagamento = None
             item_a_atualizar.pago = False
             item_a_atualizar.movimento_bancario_id = None
@@ -289,11 +247,16 @@ def estornar_pagamento(item_id, item_tipo):
 
         elif item_tipo == "Crediário":
             item_a_atualizar.valor_pago_fatura = Decimal("0.00")
-            item_a_atualizar.status = STATUS_PENDENTE
+            item_a_atualizar.status = status_em_aberto(
+                item_a_atualizar.data_vencimento_fatura
+            )
             item_a_atualizar.data_pagamento = None
             item_a_atualizar.movimento_bancario_id = None
 
+        resumo_mensal_service.aplicar_diferenca(resumo_antes, [item_a_atualizar])
+
         db.session.commit()
+        invalidar_dashboard(current_user.id)
         return True, "Pagamento estornado com sucesso!"
     except Exception as e:
         db.session.rollback()
@@ -0,0 +1,117 @@
+# app/services/plano_consulta_service.py
+
+import re
+from contextlib import contextmanager
+
+from flask import current_app
+from sqlalchemy import event
+
+from app import db
+from app.cache import invalidar_dashboard
+from app.models.conta_model import Conta
+
+TABELAS_MONITORADAS = {
+    "conta_movimento",
+    "crediario_fatura",
+    "crediario_parcela",
+    "desp_rec_movimento",
+    "financiamento_parcela",
+}
+
+ROTAS_MONITORADAS = [
+    "/dashboard",
+    "/alertas/contas-a-vencer",
+    "/alertas/contas-vencidas",
+    "/relatorios/resumo-mensal",
+    "/pagamentos/painel",
+    "/recebimentos/painel",
+    "/fluxo_caixa/fluxo_caixa",
+    "/extratos/extrato_bancario?conta_id={conta_id}",
+]
+
+_SCAN_SQLITE = re.compile(r"^SCAN (?:TABLE )?(\w+)")
+
+
+@contextmanager
+def capturar_consultas(engine):
+    consultas = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            consultas.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", registrar)
+    try:
+        yield consultas
+    finally:
+        event.remove(engine, "before_cursor_execute", registrar)
+
+
+def _varreduras_completas(conexao, statement, parameters):
+    dialeto = conexao.dialect.name
+    if dialeto == "sqlite":
+        plano = conexao.exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {statement}", parameters
+        ).fetchall()
+        detalhes = [linha[-1] for linha in plano]
+        tabelas = [
+            m.group(1)
+            for detalhe in detalhes
+            if (m := _SCAN_SQLITE.match(detalhe)) and "USING" not in detalhe
+        ]
+    else:
+        plano = conexao.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+        linhas = [dict(linha._mapping) for linha in plano]
+        detalhes = [str(linha) for linha in linhas]
+        tabelas = [linha["table"] for linha in linhas if linha.get("type") == "ALL"]
+
+    return [t for t in tabelas if t in TABELAS_MONITORADAS], detalhes
+
+
+def verificar_planos(user_id, rotas=None):
+    """
+    Acessa as rotas mais usadas como o usuário informado, captura os SELECTs
+    executados e roda EXPLAIN em cada um. Devolve as consultas que fazem
+    varredura completa em alguma das TABELAS_MONITORADAS.
+    """
+    conta = (
+        Conta.query.filter_by(usuario_id=user_id, ativa=True)
+        .order_by(Conta.id)
+        .first()
+    )
+    rotas = rotas or [
+        rota.format(conta_id=conta.id if conta else 0) for rota in ROTAS_MONITORADAS
+    ]
+    invalidar_dashboard(user_id)
+
+    cliente = current_app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao["_user_id"] = str(user_id)
+        sessao["_fresh"] = True
+
+    problemas = []
+    vistas = set()
+    for rota in rotas:
+        with capturar_consultas(db.engine) as consultas:
+            resposta = cliente.get(rota)
+        if resposta.status_code != 200:
+            current_app.logger.warning(
+                f"Verificação de planos: {rota} respondeu {resposta.status_code}"
+            )
+
+        with db.engine.connect() as conexao:
+            for statement, parameters in consultas:
+                if statement in vistas:
+                    continue
+                vistas.add(statement)
+                tabelas, plano = _varreduras_completas(conexao, statement, parameters)
+                if tabelas:
+                    problemas.append(
+                        {
+                            "rota": rota,
+                            "tabelas": tabelas,
+                            "sql": statement,
+                            "plano": plano,
+                        }
+                    )
+    return problemas
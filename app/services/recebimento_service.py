@@ -5,16 +5,18 @@ from decimal import Decimal
 
 from flask import current_app
 from flask_login import current_user
-from sqlalchemy import and_
 
 from app import db
+from app.cache import invalidar_dashboard
 from app.models.conta_model import Conta
 from app.models.conta_movimento_model import ContaMovimento
 from app.models.conta_transacao_model import ContaTransacao
 from app.models.desp_rec_movimento_model import DespRecMovimento
 from app.models.salario_movimento_item_model import SalarioMovimentoItem
 from app.models.salario_movimento_model import SalarioMovimento
-from app.services import conta_service
+from app.services import conta_service, obrigacao_service, resumo_mensal_service
+from app.services.atraso_service import status_em_aberto
+from app.services.conta_saldo_service import creditar_saldo, debitar_saldo
 from app.utils import (
     NATUREZA_RECEITA,
     STATUS_PARCIAL_RECEBIDO,
@@ -24,111 +26,98 @@ from app.utils import (
 )
 
 
+def _descricao_conta(movimento_bancario):
+    if movimento_bancario and movimento_bancario.conta:
+        return f"{movimento_bancario.conta.nome_banco} ({movimento_bancario.conta.tipo})"
+    return None
+
+
 def get_contas_a_receber_por_mes(ano, mes):
     primeiro_dia = date(ano, mes, 1)
     ultimo_dia = date(ano, mes, 28) + timedelta(days=4)
     ultimo_dia = ultimo_dia - timedelta(days=ultimo_dia.day)
 
-    query_filter = and_(
-        DespRecMovimento.usuario_id == current_user.id,
-        DespRecMovimento.despesa_receita.has(natureza=NATUREZA_RECEITA),
-        DespRecMovimento.data_vencimento.between(primeiro_dia, ultimo_dia),
+    obrigacoes = obrigacao_service.get_obrigacoes(
+        current_user.id,
+        data_inicio=primeiro_dia,
+        data_fim=ultimo_dia,
+        natureza=NATUREZA_RECEITA,
+        carregar_itens=True,
     )
-    receitas_recorrentes = DespRecMovimento.query.filter(query_filter).all()
 
     lista_contas = []
-    for receita in receitas_recorrentes:
-        recebido_em = None
-        if receita.movimento_bancario and receita.movimento_bancario.conta:
-            recebido_em = f"{receita.movimento_bancario.conta.nome_banco} ({receita.movimento_bancario.conta.tipo})"
-
-        lista_contas.append(
-            {
-                "id_original": receita.id,
-                "origem": receita.despesa_receita.nome,
-                "tipo": NATUREZA_RECEITA,
-                "categoria": "Receita",
-                "vencimento": receita.data_vencimento,
-                "valor_previsto": receita.valor_previsto,
-                "valor_recebido": receita.valor_realizado or Decimal(0),
-                "data_pagamento": receita.data_pagamento,
-                "recebido_em": recebido_em,
-                "status": receita.status,
-                "conta_sugerida_id": None,
-            }
-        )
+    for obrigacao in obrigacoes:
+        fonte, item = obrigacao["fonte"], obrigacao["item"]
 
-    salarios = SalarioMovimento.query.filter(
-        SalarioMovimento.usuario_id == current_user.id,
-        SalarioMovimento.data_recebimento.between(primeiro_dia, ultimo_dia),
-    ).all()
-
-    for salario in salarios:
-        salario_liquido = salario.salario_liquido
-        if salario_liquido > 0:
-            is_pago = salario.movimento_bancario_salario_id is not None
-            recebido_em_salario = None
-            if is_pago and salario.movimento_bancario_salario:
-                recebido_em_salario = f"{salario.movimento_bancario_salario.conta.nome_banco} ({salario.movimento_bancario_salario.conta.tipo})"
-
-            folha_tem_fgts = any(
-                item.salario_item.tipo == "FGTS" and item.valor > 0
-                for item in salario.itens
+        if fonte == obrigacao_service.FONTE_DESP_REC:
+            lista_contas.append(
+                {
+                    "id_original": item.id,
+                    "origem": item.despesa_receita.nome,
+                    "tipo": NATUREZA_RECEITA,
+                    "categoria": "Receita",
+                    "vencimento": item.data_vencimento,
+                    "valor_previsto": item.valor_previsto,
+                    "valor_recebido": item.valor_realizado or Decimal(0),
+                    "data_pagamento": item.data_pagamento,
+                    "recebido_em": _descricao_conta(item.movimento_bancario),
+                    "status": item.status,
+                    "conta_sugerida_id": None,
+                }
             )
 
+        elif fonte == obrigacao_service.FONTE_SALARIO:
+            salario_liquido = obrigacao["valor_previsto"]
+            if salario_liquido <= 0:
+                continue
+            movimento = item.movimento_bancario_salario
+            is_pago = item.movimento_bancario_salario_id is not None
+
             lista_contas.append(
                 {
-                    "id_original": salario.id,
-                    "origem": f"FOLHA REF. {salario.mes_referencia}",
-                    "tipo": salario.tipo,
+                    "id_original": item.id,
+                    "origem": f"FOLHA REF. {item.mes_referencia}",
+                    "tipo": item.tipo,
                     "categoria": "Salário",
-                    "vencimento": salario.data_recebimento,
+                    "vencimento": item.data_recebimento,
                     "valor_previsto": salario_liquido,
                     "valor_recebido": salario_liquido if is_pago else Decimal(0),
                     "data_pagamento": (
-                        salario.movimento_bancario_salario.data_movimento
-                        if is_pago and salario.movimento_bancario_salario
-                        else None
+                        movimento.data_movimento if is_pago and movimento else None
                     ),
-                    "recebido_em": recebido_em_salario,
+                    "recebido_em": _descricao_conta(movimento) if is_pago else None,
                     "status": STATUS_RECEBIDO if is_pago else STATUS_PENDENTE,
                     "conta_sugerida_id": None,
-                    "folha_tem_fgts": folha_tem_fgts,
+                    "folha_tem_fgts": item.total_fgts > 0,
                 }
             )
 
-        beneficios_itens = [
-            item for item in salario.itens if item.salario_item.tipo == "Benefício"
-        ]
-        for item_beneficio in beneficios_itens:
-            is_beneficio_pago = item_beneficio.movimento_bancario_id is not None
-            recebido_em_beneficio = None
-            if is_beneficio_pago and item_beneficio.movimento_bancario:
-                recebido_em_beneficio = f"{item_beneficio.movimento_bancario.conta.nome_banco} ({item_beneficio.movimento_bancario.conta.tipo})"
+        elif fonte == obrigacao_service.FONTE_BENEFICIO:
+            movimento = item.movimento_bancario
+            is_beneficio_pago = item.movimento_bancario_id is not None
 
             lista_contas.append(
                 {
-                    "id_original": item_beneficio.id,
-                    "origem": item_beneficio.salario_item.nome,
+                    "id_original": item.id,
+                    "origem": item.salario_item.nome,
                     "tipo": "Benefício",
                     "categoria": "Benefício",
-                    "vencimento": salario.data_recebimento,
-                    "valor_previsto": item_beneficio.valor,
-                    "valor_recebido": (
-                        item_beneficio.valor if is_beneficio_pago else Decimal(0)
-                    ),
+                    "vencimento": obrigacao["data"],
+                    "valor_previsto": item.valor,
+                    "valor_recebido": item.valor if is_beneficio_pago else Decimal(0),
                     "data_pagamento": (
-                        item_beneficio.movimento_bancario.data_movimento
-                        if is_beneficio_pago and item_beneficio.movimento_bancario
+                        movimento.data_movimento
+                        if is_beneficio_pago and movimento
                         else None
                     ),
-                    "recebido_em": recebido_em_beneficio,
+                    "recebido_em": (
+                        _descricao_conta(movimento) if is_beneficio_pago else None
+                    ),
                     "status": STATUS_RECEBIDO if is_beneficio_pago else STATUS_PENDENTE,
-                    "conta_sugerida_id": item_beneficio.salario_item.id_conta_destino,
+                    "conta_sugerida_id": item.salario_item.id_conta_destino,
                 }
             )
 
-    lista_contas.sort(key=lambda x: x["vencimento"])
     return lista_contas
 
 
@@ -152,7 +141,7 @@ def _atualizar_status_folha(salario_movimento):
     elif salario_pago or any(item.movimento_bancario_id for item in beneficios_itens):
         salario_movimento.status = STATUS_PARCIAL_RECEBIDO
     else:
-        salario_movimento.status = STATUS_PENDENTE
+        salario_movimento.status = status_em_aberto(salario_movimento.data_recebimento)
 
 
 def registrar_recebimento(form):
@@ -182,21 +171,23 @@ def registrar_recebimento(form):
             descricao=form.item_descricao.data,
         )
         db.session.add(novo_movimento)
-        conta_credito.saldo_atual += valor_recebido
+        creditar_saldo(conta_credito.id, form.data_recebimento.data, valor_recebido)
         db.session.flush()
 
         tipos_folha = [t.value for t in FormChoices.TipoFolha]
 
         if item_tipo == NATUREZA_RECEITA:
             item = DespRecMovimento.query.get(item_id)
-            item.status = STATUS_RECEBIDO
-            item.valor_realizado = valor_recebido
+            with resumo_mensal_service.acompanhar(item):
+                item.status = STATUS_RECEBIDO
+                item.valor_realizado = valor_recebido
             item.data_pagamento = form.data_recebimento.data
             item.movimento_bancario_id = novo_movimento.id
 
         elif item_tipo in tipos_folha:
             item = SalarioMovimento.query.get(item_id)
-            item.movimento_bancario_salario_id = novo_movimento.id
+            with resumo_mensal_service.acompanhar(item):
+                item.movimento_bancario_salario_id = novo_movimento.id
             _processar_fgts(item, form.data_recebimento.data, tipo_transacao_credito)
             _atualizar_status_folha(item)
 
@@ -204,10 +195,12 @@ def registrar_recebimento(form):
             item = SalarioMovimentoItem.query.get(item_id)
             if not item:
                 raise ValueError("Item de benefício não encontrado.")
-            item.movimento_bancario_id = novo_movimento.id
+            with resumo_mensal_service.acompanhar(item.movimento_pai):
+                item.movimento_bancario_id = novo_movimento.id
             _atualizar_status_folha(item.movimento_pai)
 
         db.session.commit()
+        invalidar_dashboard(current_user.id)
         return True, "Recebimento registrado com sucesso!"
     except Exception as e:
         db.session.rollback()
@@ -226,8 +219,11 @@ def estornar_recebimento(item_id, item_tipo):
             item_a_atualizar = DespRecMovimento.query.get(item_id)
             if item_a_atualizar:
                 movimento_bancario_id = item_a_atualizar.movimento_bancario_id
-                item_a_atualizar.status = STATUS_PENDENTE
-                item_a_atualizar.valor_realizado = None
+                with resumo_mensal_service.acompanhar(item_a_atualizar):
+                    item_a_atualizar.status = status_em_aberto(
+                        item_a_atualizar.data_vencimento
+                    )
+                    item_a_atualizar.valor_realizado = None
                 item_a_atualizar.data_pagamento = None
                 item_a_atualizar.movimento_bancario_id = None
 
@@ -235,7 +231,8 @@ def estornar_recebimento(item_id, item_tipo):
             item_a_atualizar = SalarioMovimento.query.get(item_id)
             if item_a_atualizar:
                 movimento_bancario_id = item_a_atualizar.movimento_bancario_salario_id
-                item_a_atualizar.movimento_bancario_salario_id = None
+                with resumo_mensal_service.acompanhar(item_a_atualizar):
+                    item_a_atualizar.movimento_bancario_salario_id = None
                 _estornar_fgts(item_a_atualizar)
                 _atualizar_status_folha(item_a_atualizar)
 
@@ -243,7 +240,8 @@ def estornar_recebimento(item_id, item_tipo):
             item_a_atualizar = SalarioMovimentoItem.query.get(item_id)
             if item_a_atualizar:
                 movimento_bancario_id = item_a_atualizar.movimento_bancario_id
-                item_a_atualizar.movimento_bancario_id = None
+                with resumo_mensal_service.acompanhar(item_a_atualizar.movimento_pai):
+                    item_a_atualizar.movimento_bancario_id = None
                 _atualizar_status_folha(item_a_atualizar.movimento_pai)
 
         if not movimento_bancario_id:
@@ -253,12 +251,17 @@ def estornar_recebimento(item_id, item_tipo):
         if not movimento_a_estornar:
             return False, "Movimentação bancária para estorno não existe mais."
 
-        valor_a_debitar = movimento_a_estornar.valor
-        conta_bancaria = movimento_a_estornar.conta
-        conta_bancaria.saldo_atual -= valor_a_debitar
+        # O estorno desfaz um crédito já lançado e não depende do limite
+        debitar_saldo(
+            movimento_a_estornar.conta_id,
+            movimento_a_estornar.data_movimento,
+            movimento_a_estornar.valor,
+            verificar_limite=False,
+        )
         db.session.delete(movimento_a_estornar)
 
         db.session.commit()
+        invalidar_dashboard(current_user.id)
         return True, "Recebimento estornado com sucesso!"
     except Exception as e:
         db.session.rollback()
@@ -296,7 +299,7 @@ def _processar_fgts(salario_movimento, data_movimento, transacao_fallback):
         )
         db.session.add(novo_movimento_fgts)
         db.session.flush()
-        conta_fgts.saldo_atual += fgts_valor
+        creditar_saldo(conta_fgts.id, data_movimento, fgts_valor)
         salario_movimento.movimento_bancario_fgts_id = novo_movimento_fgts.id
     else:
         current_app.logger.warning("Conta bancária do FGTS não encontrada.")
@@ -311,7 +314,12 @@ def _estornar_fgts(salario_movimento):
     )
 
     if movimento_fgts_a_estornar:
-        movimento_fgts_a_estornar.conta.saldo_atual -= movimento_fgts_a_estornar.valor
+        debitar_saldo(
+            movimento_fgts_a_estornar.conta_id,
+            movimento_fgts_a_estornar.data_movimento,
+            movimento_fgts_a_estornar.valor,
+            verificar_limite=False,
+        )
         db.session.delete(movimento_fgts_a_estornar)
 
     salario_movimento.movimento_bancario_fgts_id = None
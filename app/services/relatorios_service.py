@@ -4,10 +4,10 @@ from collections import defaultdict
 from datetime import (
     date,
     datetime,
-    timedelta,
 )
 from decimal import ROUND_HALF_UP, Decimal
 
+from dateutil.relativedelta import relativedelta
 from flask import current_app
 from flask_login import current_user
 from sqlalchemy import case, extract, func
@@ -15,9 +15,9 @@ from sqlalchemy.orm import aliased, joinedload
 
 from app import db
 from app.models.conta_movimento_model import ContaMovimento
+from app.models.conta_transacao_model import ContaTransacao
 from app.models.crediario_fatura_model import CrediarioFatura
 from app.models.crediario_grupo_model import CrediarioGrupo
-from app.models.crediario_model import Crediario
 from app.models.crediario_movimento_model import CrediarioMovimento
 from app.models.crediario_parcela_model import (
     CrediarioParcela,
@@ -25,11 +25,15 @@ from app.models.crediario_parcela_model import (
 from app.models.crediario_subgrupo_model import CrediarioSubgrupo
 from app.models.desp_rec_model import DespRec
 from app.models.desp_rec_movimento_model import DespRecMovimento
+from app.models.financiamento_model import Financiamento
 from app.models.financiamento_parcela_model import FinanciamentoParcela
 from app.models.fornecedor_model import Fornecedor
 from app.models.salario_item_model import SalarioItem
 from app.models.salario_movimento_item_model import SalarioMovimentoItem
 from app.models.salario_movimento_model import SalarioMovimento
+from app.periodo import ano_mes, limites_mes, no_ano
+from app.replica import usar_replica
+from app.services import obrigacao_service, resumo_mensal_service
 from app.utils import (
     NATUREZA_DESPESA,
     NATUREZA_RECEITA,
@@ -40,10 +44,26 @@ from app.utils import (
     STATUS_PARCIAL_RECEBIDO,
     STATUS_PENDENTE,
     STATUS_RECEBIDO,
+    TIPO_CREDITO,
+    TIPO_DESCONTO,
     TIPO_ENTRADA,
+    TIPO_IMPOSTO,
+    TIPO_PROVENTO,
     TIPO_SAIDA,
 )
 
+# Benefícios ficam fora do balanço, como nos relatórios anteriores
+CATEGORIAS_RECEITA_BALANCO = (
+    resumo_mensal_service.CATEGORIA_SALARIO,
+    resumo_mensal_service.CATEGORIA_RECEITA,
+)
+CATEGORIAS_DESPESA_BALANCO = (
+    resumo_mensal_service.CATEGORIA_DESPESA_FIXA,
+    resumo_mensal_service.CATEGORIA_DESPESA_VARIAVEL,
+    resumo_mensal_service.CATEGORIA_CREDIARIO,
+    resumo_mensal_service.CATEGORIA_FINANCIAMENTO,
+)
+
 STATUS_ABERTO_PAGAR = [STATUS_PENDENTE, STATUS_ATRASADO, STATUS_PARCIAL_PAGO]
 STATUS_ABERTO_RECEBER = [STATUS_PENDENTE, STATUS_ATRASADO, STATUS_PARCIAL_RECEBIDO]
 SSTATUS_TUDO = [
@@ -57,6 +77,7 @@ SSTATUS_TUDO = [
 ]
 
 
+@usar_replica
 def get_resumo_salario_anual(user_id, ano):
     from app.models.salario_item_model import SalarioItem
     from app.models.salario_movimento_item_model import SalarioMovimentoItem
@@ -64,7 +85,7 @@ def get_resumo_salario_anual(user_id, ano):
     itens_salario_ano = (
         db.session.query(
             SalarioMovimentoItem.valor,
-            func.extract("month", SalarioMovimento.data_recebimento).label("mes"),
+            extract("month", SalarioMovimento.data_recebimento).label("mes"),
             SalarioItem.nome,
             SalarioItem.tipo,
         )
@@ -75,7 +96,7 @@ def get_resumo_salario_anual(user_id, ano):
         .join(SalarioItem, SalarioMovimentoItem.salario_item_id == SalarioItem.id)
         .filter(
             SalarioMovimento.usuario_id == user_id,
-            func.extract("year", SalarioMovimento.data_recebimento) == ano,
+            no_ano(SalarioMovimento.data_recebimento, ano),
         )
         .all()
     )
@@ -171,12 +192,9 @@ def get_resumo_salario_anual(user_id, ano):
     }
 
 
+@usar_replica
 def get_resumo_mensal(user_id, ano, mes):
-    data_inicio_mes = date(ano, mes, 1)
-    if mes == 12:
-        data_fim_mes = date(ano + 1, 1, 1) - timedelta(days=1)
-    else:
-        data_fim_mes = date(ano, mes + 1, 1) - timedelta(days=1)
+    data_inicio_mes, data_fim_mes = limites_mes(ano, mes)
 
     from app.models.conta_model import Conta
 
@@ -193,147 +211,117 @@ def get_resumo_mensal(user_id, ano, mes):
     STATUS_ABERTO_PAGAR = [STATUS_PENDENTE, STATUS_ATRASADO, STATUS_PARCIAL_PAGO]
     STATUS_ABERTO_RECEBER = [STATUS_PENDENTE, STATUS_ATRASADO, STATUS_PARCIAL_RECEBIDO]
 
-    desp_rec_mes = (
-        DespRecMovimento.query.join(DespRec)
-        .filter(
-            DespRecMovimento.usuario_id == user_id,
-            DespRecMovimento.data_vencimento.between(data_inicio_mes, data_fim_mes),
-        )
-        .options(joinedload(DespRecMovimento.despesa_receita))
-        .all()
+    obrigacoes = obrigacao_service.get_obrigacoes(
+        user_id,
+        data_inicio=data_inicio_mes,
+        data_fim=data_fim_mes,
+        carregar_itens=True,
     )
 
-    for item in desp_rec_mes:
-        is_realizado = item.status in [
-            STATUS_PAGO,
-            STATUS_RECEBIDO,
-            STATUS_PARCIAL_PAGO,
-            STATUS_PARCIAL_RECEBIDO,
-        ]
-        valor_para_lista = item.valor_realizado if is_realizado else item.valor_previsto
-
-        movimentacoes_completas.append(
-            {
-                "data": item.data_vencimento,
-                "descricao": item.despesa_receita.nome,
-                "valor": valor_para_lista,
-                "tipo": item.despesa_receita.natureza,
-                "status": item.status,
-            }
-        )
-
-        if item.status in (STATUS_ABERTO_PAGAR + STATUS_ABERTO_RECEBER):
-            valor_pendente = item.valor_previsto - (item.valor_realizado or Decimal(0))
-
-            if item.despesa_receita.natureza == NATUREZA_RECEITA:
-                total_receitas_em_aberto += valor_pendente
-            else:
-                total_despesas_em_aberto += valor_pendente
-
-    from app.models.crediario_model import Crediario
-
-    faturas_mes = (
-        CrediarioFatura.query.join(Crediario)
-        .filter(
-            Crediario.usuario_id == user_id,
-            CrediarioFatura.data_vencimento_fatura.between(
-                data_inicio_mes, data_fim_mes
-            ),
-        )
-        .options(joinedload(CrediarioFatura.crediario))
-        .all()
-    )
-
-    for fatura in faturas_mes:
-        valor_a_pagar = fatura.valor_total_fatura - (
-            fatura.valor_pago_fatura or Decimal(0)
-        )
-
-        movimentacoes_completas.append(
-            {
-                "data": fatura.data_vencimento_fatura,
-                "descricao": f"Fatura {fatura.crediario.nome_crediario}",
-                "valor": fatura.valor_total_fatura,
-                "tipo": NATUREZA_DESPESA,
-                "status": fatura.status,
-            }
-        )
-
-        if fatura.status in STATUS_ABERTO_PAGAR:
-            total_despesas_em_aberto += valor_a_pagar
+    for obrigacao in obrigacoes:
+        fonte, item = obrigacao["fonte"], obrigacao["item"]
+
+        if fonte == obrigacao_service.FONTE_DESP_REC:
+            is_realizado = item.status in [
+                STATUS_PAGO,
+                STATUS_RECEBIDO,
+                STATUS_PARCIAL_PAGO,
+                STATUS_PARCIAL_RECEBIDO,
+            ]
+            valor_para_lista = (
+                item.valor_realizado if is_realizado else item.valor_previsto
+            )
 
-    from app.models.financiamento_model import Financiamento
+            movimentacoes_completas.append(
+                {
+                    "data": item.data_vencimento,
+                    "descricao": item.despesa_receita.nome,
+                    "valor": valor_para_lista,
+                    "tipo": item.despesa_receita.natureza,
+                    "status": item.status,
+                }
+            )
 
-    parcelas_mes = (
-        FinanciamentoParcela.query.join(Financiamento)
-        .filter(
-            Financiamento.usuario_id == user_id,
-            FinanciamentoParcela.data_vencimento.between(data_inicio_mes, data_fim_mes),
-        )
-        .options(joinedload(FinanciamentoParcela.financiamento))
-        .all()
-    )
+            if item.status in (STATUS_ABERTO_PAGAR + STATUS_ABERTO_RECEBER):
+                valor_pendente = item.valor_previsto - (
+                    item.valor_realizado or Decimal(0)
+                )
 
-    for parcela in parcelas_mes:
-        valor_para_lista = parcela.valor_total_previsto
+                if item.despesa_receita.natureza == NATUREZA_RECEITA:
+                    total_receitas_em_aberto += valor_pendente
+                else:
+                    total_despesas_em_aberto += valor_pendente
 
-        movimentacoes_completas.append(
-            {
-                "data": parcela.data_vencimento,
-                "descricao": f"{parcela.financiamento.nome_financiamento} ({parcela.numero_parcela}/{parcela.financiamento.prazo_meses})",
-                "valor": valor_para_lista,
-                "tipo": NATUREZA_DESPESA,
-                "status": parcela.status,
-            }
-        )
+        elif fonte == obrigacao_service.FONTE_CREDIARIO:
+            valor_a_pagar = item.valor_total_fatura - (
+                item.valor_pago_fatura or Decimal(0)
+            )
 
-        if parcela.status in STATUS_ABERTO_PAGAR:
-            total_despesas_em_aberto += valor_para_lista
+            movimentacoes_completas.append(
+                {
+                    "data": item.data_vencimento_fatura,
+                    "descricao": f"Fatura {item.crediario.nome_crediario}",
+                    "valor": item.valor_total_fatura,
+                    "tipo": NATUREZA_DESPESA,
+                    "status": item.status,
+                }
+            )
 
-    salarios_mes = SalarioMovimento.query.filter(
-        SalarioMovimento.usuario_id == user_id,
-        SalarioMovimento.data_recebimento.between(data_inicio_mes, data_fim_mes),
-    ).all()
+            if item.status in STATUS_ABERTO_PAGAR:
+                total_despesas_em_aberto += valor_a_pagar
 
-    for salario in salarios_mes:
-        if salario.salario_liquido > 0:
-            is_salario_pago = salario.movimento_bancario_salario_id is not None
-            valor_para_lista = salario.salario_liquido
+        elif fonte == obrigacao_service.FONTE_FINANCIAMENTO:
+            valor_para_lista = item.valor_total_previsto
 
             movimentacoes_completas.append(
                 {
-                    "data": salario.data_recebimento,
-                    "descricao": f"Salário Líquido (Ref: {salario.mes_referencia})",
+                    "data": item.data_vencimento,
+                    "descricao": f"{item.financiamento.nome_financiamento} ({item.numero_parcela}/{item.financiamento.prazo_meses})",
                     "valor": valor_para_lista,
-                    "tipo": NATUREZA_RECEITA,
-                    "status": salario.status,
+                    "tipo": NATUREZA_DESPESA,
+                    "status": item.status,
                 }
             )
 
-            if not is_salario_pago and salario.status in STATUS_ABERTO_RECEBER:
-                total_receitas_em_aberto += valor_para_lista
+            if item.status in STATUS_ABERTO_PAGAR:
+                total_despesas_em_aberto += valor_para_lista
 
-        total_beneficios_pendentes = Decimal(0)
-        for item_beneficio in salario.itens:
-            if item_beneficio.salario_item.tipo == "Benefício":
+        elif fonte == obrigacao_service.FONTE_SALARIO:
+            valor_para_lista = obrigacao["valor_previsto"]
+            if valor_para_lista > 0:
+                is_salario_pago = item.movimento_bancario_salario_id is not None
 
                 movimentacoes_completas.append(
                     {
-                        "data": salario.data_recebimento,
-                        "descricao": f"Benefício: {item_beneficio.salario_item.nome} (Ref: {salario.mes_referencia})",
-                        "valor": item_beneficio.valor,
+                        "data": item.data_recebimento,
+                        "descricao": f"Salário Líquido (Ref: {item.mes_referencia})",
+                        "valor": valor_para_lista,
                         "tipo": NATUREZA_RECEITA,
-                        "status": salario.status,
+                        "status": item.status,
                     }
                 )
 
-                if (
-                    item_beneficio.movimento_bancario_id is None
-                    and salario.status in STATUS_ABERTO_RECEBER
-                ):
-                    total_beneficios_pendentes += item_beneficio.valor
+                if not is_salario_pago and item.status in STATUS_ABERTO_RECEBER:
+                    total_receitas_em_aberto += valor_para_lista
+
+        elif fonte == obrigacao_service.FONTE_BENEFICIO:
+            salario = item.movimento_pai
+
+            movimentacoes_completas.append(
+                {
+                    "data": salario.data_recebimento,
+                    "descricao": f"Benefício: {item.salario_item.nome} (Ref: {salario.mes_referencia})",
+                    "valor": item.valor,
+                    "tipo": NATUREZA_RECEITA,
+                    "status": salario.status,
+                }
+            )
 
-        total_receitas_em_aberto += total_beneficios_pendentes
+            if (
+                item.movimento_bancario_id is None
+                and salario.status in STATUS_ABERTO_RECEBER
+            ):
+                total_receitas_em_aberto += item.valor
 
     movimentacoes_completas.sort(key=lambda x: x["data"])
 
@@ -366,287 +354,49 @@ def get_resumo_mensal(user_id, ano, mes):
     }
 
 
-def get_contas_a_vencer(user_id):
-    hoje = date.today()
-    data_limite = hoje + timedelta(days=7)
-    movimentos = []
-    desp_rec_a_vencer = (
-        DespRecMovimento.query.join(DespRec)
-        .filter(
-            DespRecMovimento.usuario_id == user_id,
-            DespRecMovimento.data_vencimento.between(hoje, data_limite),
-            DespRecMovimento.status.in_(
-                [STATUS_PENDENTE, STATUS_ATRASADO, STATUS_PARCIAL_PAGO]
-            ),
-        )
-        .options(joinedload(DespRecMovimento.despesa_receita))
-        .all()
-    )
-    for item in desp_rec_a_vencer:
-        movimentos.append(
-            {
-                "data": item.data_vencimento,
-                "descricao": item.despesa_receita.nome,
-                "valor": item.valor_previsto,
-                "tipo": (
-                    TIPO_SAIDA
-                    if item.despesa_receita.natureza == NATUREZA_DESPESA
-                    else TIPO_ENTRADA
-                ),
-            }
-        )
-
-    faturas_a_vencer = (
-        CrediarioFatura.query.filter(
-            CrediarioFatura.usuario_id == user_id,
-            CrediarioFatura.data_vencimento_fatura.between(hoje, data_limite),
-            CrediarioFatura.status.in_(
-                [STATUS_PENDENTE, STATUS_ATRASADO, STATUS_PARCIAL_PAGO]
-            ),
-        )
-        .options(joinedload(CrediarioFatura.crediario))
-        .all()
-    )
-    for fatura in faturas_a_vencer:
-        movimentos.append(
-            {
-                "data": fatura.data_vencimento_fatura,
-                "descricao": f"Fatura {fatura.crediario.nome_crediario}",
-                "valor": fatura.valor_total_fatura - fatura.valor_pago_fatura,
-                "tipo": TIPO_SAIDA,
-            }
-        )
-
-    parcelas_a_vencer = (
-        FinanciamentoParcela.query.join(FinanciamentoParcela.financiamento)
-        .filter(
-            FinanciamentoParcela.financiamento.has(usuario_id=user_id),
-            FinanciamentoParcela.data_vencimento.between(hoje, data_limite),
-            FinanciamentoParcela.status.in_([STATUS_PENDENTE, STATUS_ATRASADO]),
-        )
-        .options(joinedload(FinanciamentoParcela.financiamento))
-        .all()
-    )
-    for parcela in parcelas_a_vencer:
-        movimentos.append(
-            {
-                "data": parcela.data_vencimento,
-                "descricao": f"{parcela.financiamento.nome_financiamento} ({parcela.numero_parcela}/{parcela.financiamento.prazo_meses})",
-                "valor": parcela.valor_total_previsto,
-                "tipo": TIPO_SAIDA,
-            }
-        )
-
-    salarios_a_receber = SalarioMovimento.query.filter(
-        SalarioMovimento.usuario_id == user_id,
-        SalarioMovimento.data_recebimento.between(hoje, data_limite),
-        SalarioMovimento.status.in_([STATUS_PENDENTE, STATUS_PARCIAL_RECEBIDO]),
-    ).all()
-
-    for salario in salarios_a_receber:
-        if not salario.movimento_bancario_salario_id and salario.salario_liquido > 0:
-            movimentos.append(
-                {
-                    "data": salario.data_recebimento,
-                    "descricao": f"Salário Líquido (Ref: {salario.mes_referencia})",
-                    "valor": salario.salario_liquido,
-                    "tipo": TIPO_ENTRADA,
-                }
-            )
-        if not salario.movimento_bancario_beneficio_id and salario.total_beneficios > 0:
-            movimentos.append(
-                {
-                    "data": salario.data_recebimento,
-                    "descricao": f"Benefícios (Ref: {salario.mes_referencia})",
-                    "valor": salario.total_beneficios,
-                    "tipo": TIPO_ENTRADA,
-                }
-            )
-
-    movimentos.sort(key=lambda x: x["data"])
-    return movimentos
-
-
-def get_contas_vencidas(user_id):
-    hoje = date.today()
-    movimentos = []
-
-    desp_rec_vencidas = (
-        DespRecMovimento.query.join(DespRec)
-        .filter(
-            DespRecMovimento.usuario_id == user_id,
-            DespRecMovimento.data_vencimento < hoje,
-            DespRecMovimento.status.in_(
-                [STATUS_PENDENTE, STATUS_ATRASADO, STATUS_PARCIAL_PAGO]
-            ),
-        )
-        .options(joinedload(DespRecMovimento.despesa_receita))
-        .all()
-    )
-    for item in desp_rec_vencidas:
-        movimentos.append(
-            {
-                "data": item.data_vencimento,
-                "descricao": item.despesa_receita.nome,
-                "valor": item.valor_previsto,
-                "tipo": (
-                    TIPO_SAIDA
-                    if item.despesa_receita.natureza == NATUREZA_DESPESA
-                    else TIPO_ENTRADA
-                ),
-            }
-        )
-
-    faturas_vencidas = (
-        CrediarioFatura.query.filter(
-            CrediarioFatura.usuario_id == user_id,
-            CrediarioFatura.data_vencimento_fatura < hoje,
-            CrediarioFatura.status.in_(
-                [STATUS_PENDENTE, STATUS_ATRASADO, STATUS_PARCIAL_PAGO]
-            ),
-        )
-        .options(joinedload(CrediarioFatura.crediario))
-        .all()
-    )
-    for fatura in faturas_vencidas:
-        movimentos.append(
-            {
-                "data": fatura.data_vencimento_fatura,
-                "descricao": f"Fatura {fatura.crediario.nome_crediario}",
-                "valor": fatura.valor_total_fatura - fatura.valor_pago_fatura,
-                "tipo": TIPO_SAIDA,
-            }
-        )
-
-    parcelas_vencidas = (
-        FinanciamentoParcela.query.join(FinanciamentoParcela.financiamento)
-        .filter(
-            FinanciamentoParcela.financiamento.has(usuario_id=user_id),
-            FinanciamentoParcela.data_vencimento < hoje,
-            FinanciamentoParcela.status.in_([STATUS_PENDENTE, STATUS_ATRASADO]),
-        )
-        .options(joinedload(FinanciamentoParcela.financiamento))
-        .all()
-    )
-    for parcela in parcelas_vencidas:
-        movimentos.append(
-            {
-                "data": parcela.data_vencimento,
-                "descricao": f"{parcela.financiamento.nome_financiamento} ({parcela.numero_parcela}/{parcela.financiamento.prazo_meses})",
-                "valor": parcela.valor_total_previsto,
-                "tipo": TIPO_SAIDA,
-            }
-        )
-
-    salarios_vencidos = SalarioMovimento.query.filter(
-        SalarioMovimento.usuario_id == user_id,
-        SalarioMovimento.data_recebimento < hoje,
-        SalarioMovimento.status.in_([STATUS_PENDENTE, STATUS_PARCIAL_RECEBIDO]),
-    ).all()
-
-    for salario in salarios_vencidos:
-        if not salario.movimento_bancario_salario_id and salario.salario_liquido > 0:
-            movimentos.append(
-                {
-                    "data": salario.data_recebimento,
-                    "descricao": f"Salário Líquido (Ref: {salario.mes_referencia})",
-                    "valor": salario.salario_liquido,
-                    "tipo": TIPO_ENTRADA,
-                }
-            )
-        if not salario.movimento_bancario_beneficio_id and salario.total_beneficios > 0:
-            movimentos.append(
-                {
-                    "data": salario.data_recebimento,
-                    "descricao": f"Benefícios (Ref: {salario.mes_referencia})",
-                    "valor": salario.total_beneficios,
-                    "tipo": TIPO_ENTRADA,
-                }
-            )
+@usar_replica
+def get_balanco_anual(user_id, ano, meses=None):
+    # Lê o resumo mensal mantido a cada pagamento/recebimento: uma consulta
+    meses = sorted(set(meses)) if meses else list(range(1, 13))
+    resumo = resumo_mensal_service.get_resumo_anual(user_id, ano, meses)
+
+    receitas_mes = defaultdict(Decimal)
+    despesas_mes = defaultdict(Decimal)
+    for mes, valores in resumo.items():
+        for (categoria, tipo_valor), valor in valores.items():
+            if tipo_valor != resumo_mensal_service.REALIZADO:
+                continue
+            if categoria in CATEGORIAS_RECEITA_BALANCO:
+                receitas_mes[mes] += valor
+            elif categoria in CATEGORIAS_DESPESA_BALANCO:
+                despesas_mes[mes] += valor
+
+    balancos = {}
+    for mes in meses:
+        total_receitas = receitas_mes[mes]
+        total_despesas = despesas_mes[mes]
+
+        comprometimento = 0
+        if total_receitas > 0:
+            comprometimento = round((total_despesas / total_receitas) * 100, 2)
+
+        balancos[mes] = {
+            "receitas": total_receitas,
+            "despesas": total_despesas,
+            "balanco": total_receitas - total_despesas,
+            "comprometimento": comprometimento,
+        }
 
-    movimentos.sort(key=lambda x: x["data"])
-    return movimentos
+    return balancos
 
 
 def get_balanco_mensal(user_id, ano, mes):
-    data_inicio_mes = date(ano, mes, 1)
-    if mes == 12:
-        data_fim_mes = date(ano + 1, 1, 1) - timedelta(days=1)
-    else:
-        data_fim_mes = date(ano, mes + 1, 1) - timedelta(days=1)
-
-    total_receitas = Decimal("0.00")
-    salarios_mes = SalarioMovimento.query.filter(
-        SalarioMovimento.usuario_id == user_id,
-        SalarioMovimento.data_criacao.between(data_inicio_mes, data_fim_mes),
-        SalarioMovimento.status.in_([STATUS_RECEBIDO, STATUS_PARCIAL_RECEBIDO]),
-    ).all()
-
-    for s in salarios_mes:
-        if s.movimento_bancario_salario_id:
-            total_receitas += s.salario_liquido
-
-    outras_receitas = db.session.query(func.sum(DespRecMovimento.valor_realizado)).join(
-        DespRec
-    ).filter(
-        DespRecMovimento.usuario_id == user_id,
-        DespRecMovimento.status == STATUS_RECEBIDO,
-        DespRecMovimento.data_vencimento.between(data_inicio_mes, data_fim_mes),
-        DespRec.natureza == NATUREZA_RECEITA,
-    ).scalar() or Decimal(
-        "0.00"
-    )
-    total_receitas += outras_receitas
-
-    total_despesas = Decimal("0.00")
-    despesas_gerais = db.session.query(func.sum(DespRecMovimento.valor_realizado)).join(
-        DespRec
-    ).filter(
-        DespRecMovimento.usuario_id == user_id,
-        DespRecMovimento.status == STATUS_PAGO,
-        DespRecMovimento.data_vencimento.between(data_inicio_mes, data_fim_mes),
-        DespRec.natureza == NATUREZA_DESPESA,
-    ).scalar() or Decimal(
-        "0.00"
-    )
-    total_despesas += despesas_gerais
-
-    faturas_pagas = db.session.query(
-        func.sum(CrediarioFatura.valor_pago_fatura)
-    ).filter(
-        CrediarioFatura.usuario_id == user_id,
-        CrediarioFatura.status.in_([STATUS_PAGO, STATUS_PARCIAL_PAGO]),
-        CrediarioFatura.data_vencimento_fatura.between(data_inicio_mes, data_fim_mes),
-    ).scalar() or Decimal(
-        "0.00"
-    )
-    total_despesas += faturas_pagas
-
-    parcelas_pagas = db.session.query(func.sum(FinanciamentoParcela.valor_pago)).filter(
-        FinanciamentoParcela.status.in_([STATUS_PAGO, STATUS_AMORTIZADO]),
-        FinanciamentoParcela.data_vencimento.between(data_inicio_mes, data_fim_mes),
-        FinanciamentoParcela.financiamento.has(usuario_id=user_id),
-    ).scalar() or Decimal("0.00")
-    total_despesas += parcelas_pagas
-
-    comprometimento = 0
-    if total_receitas > 0:
-        comprometimento = round((total_despesas / total_receitas) * 100, 2)
-
-    return {
-        "receitas": total_receitas,
-        "despesas": total_despesas,
-        "balanco": total_receitas - total_despesas,
-        "comprometimento": comprometimento,
-    }
+    return get_balanco_anual(user_id, ano, meses=[mes])[mes]
 
 
+@usar_replica
 def get_fluxo_caixa_mensal_consolidado(user_id, ano, mes):
-    data_inicio_mes = date(ano, mes, 1)
-    if mes == 12:
-        data_fim_mes = date(ano + 1, 1, 1) - timedelta(days=1)
-    else:
-        data_fim_mes = date(ano, mes + 1, 1) - timedelta(days=1)
+    data_inicio_mes, data_fim_mes = limites_mes(ano, mes)
 
     movimentacoes_consolidadas = []
 
@@ -699,7 +449,8 @@ def get_fluxo_caixa_mensal_consolidado(user_id, ano, mes):
             )
 
     outras_receitas = (
-        DespRecMovimento.query.options(
+        DespRecMovimento.query.join(DespRec, DespRecMovimento.desp_rec_id == DespRec.id)
+        .options(
             joinedload(DespRecMovimento.despesa_receita),
             joinedload(DespRecMovimento.movimento_bancario).joinedload(
                 ContaMovimento.conta
@@ -730,7 +481,8 @@ def get_fluxo_caixa_mensal_consolidado(user_id, ano, mes):
         )
 
     despesas_gerais = (
-        DespRecMovimento.query.options(
+        DespRecMovimento.query.join(DespRec, DespRecMovimento.desp_rec_id == DespRec.id)
+        .options(
             joinedload(DespRecMovimento.despesa_receita),
             joinedload(DespRecMovimento.movimento_bancario).joinedload(
                 ContaMovimento.conta
@@ -791,7 +543,10 @@ def get_fluxo_caixa_mensal_consolidado(user_id, ano, mes):
         )
 
     parcelas_pagas_no_mes = (
-        FinanciamentoParcela.query.options(
+        FinanciamentoParcela.query.join(
+            Financiamento, FinanciamentoParcela.financiamento_id == Financiamento.id
+        )
+        .options(
             joinedload(FinanciamentoParcela.financiamento),
             joinedload(FinanciamentoParcela.movimento_bancario).joinedload(
                 ContaMovimento.conta
@@ -800,7 +555,7 @@ def get_fluxo_caixa_mensal_consolidado(user_id, ano, mes):
         .filter(
             FinanciamentoParcela.status.in_([STATUS_PAGO, STATUS_AMORTIZADO]),
             FinanciamentoParcela.data_pagamento.between(data_inicio_mes, data_fim_mes),
-            FinanciamentoParcela.financiamento.has(usuario_id=user_id),
+            Financiamento.usuario_id == user_id,
         )
         .all()
     )
@@ -830,6 +585,114 @@ def get_fluxo_caixa_mensal_consolidado(user_id, ano, mes):
     return movimentacoes_consolidadas
 
 
+def iterar_fluxo_caixa(user_id, data_inicio, data_fim):
+    # Um mês por vez, para exportar períodos longos sem acumular tudo em memória
+    mes_atual = date(data_inicio.year, data_inicio.month, 1)
+    while mes_atual <= data_fim:
+        yield from get_fluxo_caixa_mensal_consolidado(
+            user_id, mes_atual.year, mes_atual.month
+        )
+        mes_atual += relativedelta(months=1)
+
+
+@usar_replica
+def iterar_extrato_bancario(conta, data_inicio, data_fim, saldo_anterior):
+    """
+    Movimentações da conta no período com o saldo acumulado, lidas do banco
+    em lotes (yield_per) para que extratos de vários anos não sejam
+    carregados de uma vez.
+    """
+    movimentos = (
+        db.session.query(
+            ContaMovimento.id,
+            ContaMovimento.data_movimento,
+            ContaMovimento.valor,
+            ContaMovimento.descricao,
+            ContaTransacao.transacao_tipo,
+            ContaTransacao.tipo,
+        )
+        .join(ContaTransacao, ContaMovimento.conta_transacao_id == ContaTransacao.id)
+        .filter(
+            ContaMovimento.conta_id == conta.id,
+            ContaMovimento.data_movimento >= data_inicio,
+            ContaMovimento.data_movimento <= data_fim,
+        )
+        .order_by(ContaMovimento.data_movimento.asc(), ContaMovimento.id.asc())
+        .yield_per(500)
+    )
+
+    saldo_acumulado = saldo_anterior
+    for mov in movimentos:
+        if mov.tipo == TIPO_CREDITO:
+            saldo_acumulado += mov.valor
+        else:
+            saldo_acumulado -= mov.valor
+
+        yield {
+            "id": mov.id,
+            "data_movimento": mov.data_movimento,
+            "tipo_transacao_nome": mov.transacao_tipo,
+            "tipo_movimento": mov.tipo,
+            "valor": mov.valor,
+            "descricao": mov.descricao,
+            "saldo_acumulado": saldo_acumulado,
+        }
+
+
+def query_crediario_detalhado(user_id, data_inicio):
+    # Parcelas em aberto a partir de data_inicio, somadas por
+    # grupo > subgrupo > fornecedor e mês de vencimento
+    ano, mes = ano_mes(CrediarioParcela.data_vencimento)
+    return (
+        db.session.query(
+            CrediarioGrupo.id.label("grupo_id"),
+            CrediarioGrupo.grupo_crediario.label("grupo_nome"),
+            CrediarioSubgrupo.id.label("subgrupo_id"),
+            CrediarioSubgrupo.nome.label("subgrupo_nome"),
+            Fornecedor.nome.label("fornecedor_nome"),
+            ano,
+            mes,
+            func.sum(CrediarioParcela.valor_parcela).label("total"),
+        )
+        .join(
+            CrediarioMovimento,
+            CrediarioParcela.crediario_movimento_id == CrediarioMovimento.id,
+        )
+        .outerjoin(
+            CrediarioGrupo, CrediarioMovimento.crediario_grupo_id == CrediarioGrupo.id
+        )
+        .outerjoin(
+            CrediarioSubgrupo,
+            CrediarioMovimento.crediario_subgrupo_id == CrediarioSubgrupo.id,
+        )
+        .outerjoin(Fornecedor, CrediarioMovimento.fornecedor_id == Fornecedor.id)
+        .filter(
+            CrediarioMovimento.usuario_id == user_id,
+            CrediarioParcela.data_vencimento >= data_inicio,
+            CrediarioParcela.pago == False,
+        )
+        .group_by(
+            CrediarioGrupo.id,
+            CrediarioGrupo.grupo_crediario,
+            CrediarioSubgrupo.id,
+            CrediarioSubgrupo.nome,
+            Fornecedor.nome,
+            ano,
+            mes,
+        )
+    )
+
+
+@usar_replica
+def iterar_crediario_detalhado(user_id, data_inicio):
+    yield from (
+        query_crediario_detalhado(user_id, data_inicio)
+        .order_by("grupo_nome", "subgrupo_nome", "fornecedor_nome", "ano", "mes")
+        .yield_per(500)
+    )
+
+
+@usar_replica
 def get_gastos_crediario_por_destino_anual(ano):
     try:
         query_destino = (
@@ -839,7 +702,7 @@ def get_gastos_crediario_por_destino_anual(ano):
             )
             .filter(
                 CrediarioMovimento.usuario_id == current_user.id,
-                extract("year", CrediarioMovimento.data_compra) == ano,
+                no_ano(CrediarioMovimento.data_compra, ano),
             )
             .group_by(CrediarioMovimento.destino)
             .order_by(CrediarioMovimento.destino)
@@ -891,6 +754,7 @@ def get_gastos_crediario_por_destino_anual(ano):
         }
 
 
+@usar_replica
 def get_gastos_crediario_por_grupo_anual(ano):
     try:
         query = (
@@ -906,7 +770,7 @@ def get_gastos_crediario_por_grupo_anual(ano):
             )
             .filter(
                 CrediarioMovimento.usuario_id == current_user.id,
-                extract("year", CrediarioMovimento.data_compra) == ano,
+                no_ano(CrediarioMovimento.data_compra, ano),
             )
             .group_by(CrediarioGrupo.id, CrediarioGrupo.grupo_crediario)
             .order_by(func.sum(CrediarioMovimento.valor_total_compra).desc())
@@ -929,6 +793,7 @@ def get_gastos_crediario_por_grupo_anual(ano):
         return []
 
 
+@usar_replica
 def get_detalhes_parcelas_por_grupo(grupo_id, ano):
     try:
         grupo = db.session.get(CrediarioGrupo, grupo_id)
@@ -939,7 +804,7 @@ def get_detalhes_parcelas_por_grupo(grupo_id, ano):
             CrediarioMovimento.query.filter(
                 CrediarioMovimento.usuario_id == current_user.id,
                 CrediarioMovimento.crediario_grupo_id == grupo_id,
-                extract("year", CrediarioMovimento.data_compra) == ano,
+                no_ano(CrediarioMovimento.data_compra, ano),
             )
             .options(
                 joinedload(CrediarioMovimento.parcelas),
@@ -1006,6 +871,7 @@ def get_detalhes_parcelas_por_grupo(grupo_id, ano):
         return None
 
 
+@usar_replica
 def get_gastos_crediario_por_subgrupo_anual(ano):
     try:
         subgrupo_nome = case(
@@ -1026,7 +892,7 @@ def get_gastos_crediario_por_subgrupo_anual(ano):
             )
             .filter(
                 CrediarioMovimento.usuario_id == current_user.id,
-                extract("year", CrediarioMovimento.data_compra) == ano,
+                no_ano(CrediarioMovimento.data_compra, ano),
             )
             .group_by(CrediarioSubgrupo.id, subgrupo_nome)
             .order_by(func.sum(CrediarioMovimento.valor_total_compra).desc())
@@ -1049,6 +915,7 @@ def get_gastos_crediario_por_subgrupo_anual(ano):
         return []
 
 
+@usar_replica
 def get_gastos_crediario_por_fornecedor_anual(ano, limit=100):
     try:
         fornecedor_nome = case(
@@ -1066,7 +933,7 @@ def get_gastos_crediario_por_fornecedor_anual(ano, limit=100):
             .outerjoin(Fornecedor, Fornecedor.id == CrediarioMovimento.fornecedor_id)
             .filter(
                 CrediarioMovimento.usuario_id == current_user.id,
-                extract("year", CrediarioMovimento.data_compra) == ano,
+                no_ano(CrediarioMovimento.data_compra, ano),
             )
             .group_by(Fornecedor.id, fornecedor_nome)
             .order_by(func.sum(CrediarioMovimento.valor_total_compra).desc())
@@ -0,0 +1,504 @@
+# app/services/resumo_mensal_service.py
+
+from collections import defaultdict
+from contextlib import contextmanager
+from decimal import Decimal
+
+from flask import current_app
+from sqlalchemy import and_, case, delete, func, inspect, select
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app import db
+from app.insercao import comando_inserir_ou_atualizar
+from app.models.crediario_fatura_model import CrediarioFatura
+from app.models.desp_rec_model import DespRec
+from app.models.desp_rec_movimento_model import DespRecMovimento
+from app.models.financiamento_model import Financiamento
+from app.models.financiamento_parcela_model import FinanciamentoParcela
+from app.models.resumo_mensal_model import ResumoMensal
+from app.models.salario_item_model import SalarioItem
+from app.models.salario_movimento_item_model import SalarioMovimentoItem
+from app.models.salario_movimento_model import SalarioMovimento
+from app.periodo import ano_mes
+from app.utils import (
+    NATUREZA_DESPESA,
+    NATUREZA_RECEITA,
+    STATUS_AMORTIZADO,
+    STATUS_PAGO,
+    STATUS_PARCIAL_PAGO,
+    STATUS_RECEBIDO,
+    TIPO_BENEFICIO,
+    TIPO_FIXA,
+)
+
+CATEGORIA_SALARIO = "Salário"
+CATEGORIA_BENEFICIO = "Benefício"
+CATEGORIA_RECEITA = "Receita"
+CATEGORIA_DESPESA_FIXA = "Despesa Fixa"
+CATEGORIA_DESPESA_VARIAVEL = "Despesa Variável"
+CATEGORIA_CREDIARIO = "Crediário"
+CATEGORIA_FINANCIAMENTO = "Financiamento"
+
+NATUREZA_CATEGORIA = {
+    CATEGORIA_SALARIO: NATUREZA_RECEITA,
+    CATEGORIA_BENEFICIO: NATUREZA_RECEITA,
+    CATEGORIA_RECEITA: NATUREZA_RECEITA,
+    CATEGORIA_DESPESA_FIXA: NATUREZA_DESPESA,
+    CATEGORIA_DESPESA_VARIAVEL: NATUREZA_DESPESA,
+    CATEGORIA_CREDIARIO: NATUREZA_DESPESA,
+    CATEGORIA_FINANCIAMENTO: NATUREZA_DESPESA,
+}
+
+PREVISTO = "Previsto"
+REALIZADO = "Realizado"
+
+STATUS_FATURA_REALIZADA = (STATUS_PAGO, STATUS_PARCIAL_PAGO)
+STATUS_PARCELA_REALIZADA = (STATUS_PAGO, STATUS_AMORTIZADO)
+
+_ZERO = Decimal("0.00")
+
+
+# Contribuição de cada item ao resumo: {(usuario, ano, mes, categoria, tipo_valor): valor}.
+# As mesmas regras estão em SQL em calcular_resumo, usado na reconstrução e na verificação.
+
+
+def _somar(totais, usuario_id, data, categoria, tipo_valor, valor):
+    if data is not None and valor:
+        totais[(usuario_id, data.year, data.month, categoria, tipo_valor)] += valor
+
+
+def _categoria_desp_rec(cadastro):
+    if cadastro.natureza == NATUREZA_RECEITA:
+        return CATEGORIA_RECEITA
+    if cadastro.tipo == TIPO_FIXA:
+        return CATEGORIA_DESPESA_FIXA
+    return CATEGORIA_DESPESA_VARIAVEL
+
+
+def _contribuir_desp_rec(totais, item):
+    cadastro = item.despesa_receita or db.session.get(DespRec, item.desp_rec_id)
+    categoria = _categoria_desp_rec(cadastro)
+    _somar(
+        totais,
+        item.usuario_id,
+        item.data_vencimento,
+        categoria,
+        PREVISTO,
+        item.valor_previsto,
+    )
+    status_realizado = (
+        STATUS_RECEBIDO if cadastro.natureza == NATUREZA_RECEITA else STATUS_PAGO
+    )
+    if item.status == status_realizado:
+        _somar(
+            totais,
+            item.usuario_id,
+            item.data_vencimento,
+            categoria,
+            REALIZADO,
+            item.valor_realizado,
+        )
+
+
+def _contribuir_parcela(totais, parcela):
+    financiamento = parcela.financiamento or db.session.get(
+        Financiamento, parcela.financiamento_id
+    )
+    argumentos = (
+        financiamento.usuario_id,
+        parcela.data_vencimento,
+        CATEGORIA_FINANCIAMENTO,
+    )
+    _somar(totais, *argumentos, PREVISTO, parcela.valor_total_previsto)
+    if parcela.status in STATUS_PARCELA_REALIZADA:
+        _somar(totais, *argumentos, REALIZADO, parcela.valor_pago)
+
+
+def _contribuir_fatura(totais, fatura):
+    argumentos = (
+        fatura.usuario_id,
+        fatura.data_vencimento_fatura,
+        CATEGORIA_CREDIARIO,
+    )
+    _somar(totais, *argumentos, PREVISTO, fatura.valor_total_fatura)
+    if fatura.status in STATUS_FATURA_REALIZADA:
+        _somar(totais, *argumentos, REALIZADO, fatura.valor_pago_fatura)
+
+
+def _contribuir_folha(totais, folha):
+    argumentos = (folha.usuario_id, folha.data_recebimento)
+    _somar(totais, *argumentos, CATEGORIA_SALARIO, PREVISTO, folha.salario_liquido)
+    _somar(totais, *argumentos, CATEGORIA_BENEFICIO, PREVISTO, folha.total_beneficios)
+    if folha.movimento_bancario_salario_id:
+        _somar(totais, *argumentos, CATEGORIA_SALARIO, REALIZADO, folha.salario_liquido)
+    for item in folha.itens:
+        if item.movimento_bancario_id and item.salario_item.tipo == TIPO_BENEFICIO:
+            _somar(totais, *argumentos, CATEGORIA_BENEFICIO, REALIZADO, item.valor)
+
+
+_CONTRIBUICOES = {
+    DespRecMovimento: _contribuir_desp_rec,
+    FinanciamentoParcela: _contribuir_parcela,
+    CrediarioFatura: _contribuir_fatura,
+    SalarioMovimento: _contribuir_folha,
+}
+
+
+def _carregar_itens_das_folhas(folhas):
+    # Itens das folhas (com os cadastros) em uma consulta, em vez de uma por
+    # folha e outra por item em _contribuir_folha
+    sem_itens = {
+        folha.id: folha
+        for folha in folhas
+        if folha.id is not None and "itens" in inspect(folha).unloaded
+    }
+    if sem_itens:
+        itens_por_folha = defaultdict(list)
+        for item in db.session.scalars(
+            select(SalarioMovimentoItem)
+            .where(SalarioMovimentoItem.salario_movimento_id.in_(sem_itens))
+            .options(joinedload(SalarioMovimentoItem.salario_item))
+        ):
+            itens_por_folha[item.salario_movimento_id].append(item)
+        for folha_id, folha in sem_itens.items():
+            set_committed_value(folha, "itens", itens_por_folha[folha_id])
+
+    sem_cadastro = [
+        item
+        for folha in folhas
+        for item in folha.itens
+        if item.salario_item_id is not None and "salario_item" in inspect(item).unloaded
+    ]
+    if sem_cadastro:
+        cadastros = {
+            cadastro.id: cadastro
+            for cadastro in db.session.scalars(
+                select(SalarioItem).where(
+                    SalarioItem.id.in_({i.salario_item_id for i in sem_cadastro})
+                )
+            )
+        }
+        for item in sem_cadastro:
+            set_committed_value(
+                item, "salario_item", cadastros.get(item.salario_item_id)
+            )
+
+
+def contribuicoes(itens):
+    totais = defaultdict(Decimal)
+    _carregar_itens_das_folhas(
+        [item for item in itens if isinstance(item, SalarioMovimento)]
+    )
+    for item in itens:
+        if item is not None:
+            _CONTRIBUICOES[type(item)](totais, item)
+    return totais
+
+
+def aplicar_deltas(deltas):
+    """
+    Soma cada delta à linha do resumo, criando a linha se ainda não existir.
+    É um único INSERT ... ON CONFLICT DO UPDATE (ON DUPLICATE KEY UPDATE no
+    MySQL): duas transações criando a mesma linha não violam a restrição
+    única, a segunda soma o seu delta à linha da primeira.
+    """
+    # Ordenadas para que transações concorrentes travem as linhas na mesma
+    # ordem
+    linhas = [
+        {
+            "usuario_id": usuario_id,
+            "ano": ano,
+            "mes": mes,
+            "categoria": categoria,
+            "natureza": NATUREZA_CATEGORIA[categoria],
+            "tipo_valor": tipo_valor,
+            "valor": delta,
+        }
+        for (usuario_id, ano, mes, categoria, tipo_valor), delta in sorted(
+            deltas.items()
+        )
+        if delta
+    ]
+    if not linhas:
+        return
+    db.session.execute(
+        comando_inserir_ou_atualizar(
+            ResumoMensal,
+            ["usuario_id", "ano", "mes", "categoria", "tipo_valor"],
+            lambda tabela, novos: {"valor": tabela.c.valor + novos.valor},
+        ),
+        linhas,
+    )
+
+
+def incluir_no_resumo(itens):
+    aplicar_deltas(contribuicoes(itens))
+
+
+def remover_do_resumo(itens):
+    aplicar_deltas({chave: -valor for chave, valor in contribuicoes(itens).items()})
+
+
+def aplicar_diferenca(antes, itens):
+    """Aplica a diferença entre a contribuição atual dos itens e `antes`."""
+    depois = contribuicoes(itens)
+    aplicar_deltas(
+        {
+            chave: depois.get(chave, _ZERO) - antes.get(chave, _ZERO)
+            for chave in antes.keys() | depois.keys()
+        }
+    )
+
+
+@contextmanager
+def acompanhar(*itens):
+    """
+    Aplica ao resumo a diferença entre a contribuição dos itens antes e
+    depois do bloco. Não faz commit: o delta entra na transação de quem
+    alterou os itens.
+    """
+    antes = contribuicoes(itens)
+    yield
+    aplicar_diferenca(antes, itens)
+
+
+def _soma_se(condicao, valor):
+    return func.sum(case((condicao, valor), else_=0))
+
+
+def calcular_resumo(user_id=None, conexao=None):
+    """
+    Recalcula o resumo a partir das tabelas de origem, com um agregado por
+    fonte. `conexao` permite rodar o cálculo na conexão de uma migração.
+    """
+    conexao = conexao if conexao is not None else db.session
+    totais = defaultdict(Decimal)
+
+    def filtrar(query, coluna_usuario):
+        if user_id is not None:
+            query = query.where(coluna_usuario == user_id)
+        return query
+
+    def acumular(linha, categoria, previsto, realizado):
+        chave = (linha.usuario_id, int(linha.ano), int(linha.mes), categoria)
+        totais[chave + (PREVISTO,)] += previsto or _ZERO
+        totais[chave + (REALIZADO,)] += realizado or _ZERO
+
+    realizado_desp_rec = case(
+        (
+            DespRec.natureza == NATUREZA_RECEITA,
+            DespRecMovimento.status == STATUS_RECEBIDO,
+        ),
+        else_=DespRecMovimento.status == STATUS_PAGO,
+    )
+    # Pela data de vencimento: ano/mes do lançamento não acompanham a edição
+    ano, mes = ano_mes(DespRecMovimento.data_vencimento)
+    query = filtrar(
+        select(
+            DespRecMovimento.usuario_id,
+            ano,
+            mes,
+            DespRec.natureza,
+            DespRec.tipo,
+            func.sum(DespRecMovimento.valor_previsto).label("previsto"),
+            _soma_se(realizado_desp_rec, DespRecMovimento.valor_realizado).label(
+                "realizado"
+            ),
+        )
+        .join(DespRec, DespRecMovimento.desp_rec_id == DespRec.id)
+        .group_by(
+            DespRecMovimento.usuario_id,
+            ano,
+            mes,
+            DespRec.natureza,
+            DespRec.tipo,
+        ),
+        DespRecMovimento.usuario_id,
+    )
+    for linha in conexao.execute(query):
+        acumular(linha, _categoria_desp_rec(linha), linha.previsto, linha.realizado)
+
+    ano, mes = ano_mes(FinanciamentoParcela.data_vencimento)
+    query = filtrar(
+        select(
+            Financiamento.usuario_id,
+            ano,
+            mes,
+            func.sum(FinanciamentoParcela.valor_total_previsto).label("previsto"),
+            _soma_se(
+                FinanciamentoParcela.status.in_(STATUS_PARCELA_REALIZADA),
+                FinanciamentoParcela.valor_pago,
+            ).label("realizado"),
+        )
+        .join(Financiamento, FinanciamentoParcela.financiamento_id == Financiamento.id)
+        .group_by(Financiamento.usuario_id, ano, mes),
+        Financiamento.usuario_id,
+    )
+    for linha in conexao.execute(query):
+        acumular(linha, CATEGORIA_FINANCIAMENTO, linha.previsto, linha.realizado)
+
+    ano, mes = ano_mes(CrediarioFatura.data_vencimento_fatura)
+    query = filtrar(
+        select(
+            CrediarioFatura.usuario_id,
+            ano,
+            mes,
+            func.sum(CrediarioFatura.valor_total_fatura).label("previsto"),
+            _soma_se(
+                CrediarioFatura.status.in_(STATUS_FATURA_REALIZADA),
+                CrediarioFatura.valor_pago_fatura,
+            ).label("realizado"),
+        ).group_by(CrediarioFatura.usuario_id, ano, mes),
+        CrediarioFatura.usuario_id,
+    )
+    for linha in conexao.execute(query):
+        acumular(linha, CATEGORIA_CREDIARIO, linha.previsto, linha.realizado)
+
+    ano, mes = ano_mes(SalarioMovimento.data_recebimento)
+    query = filtrar(
+        select(
+            SalarioMovimento.usuario_id,
+            ano,
+            mes,
+            func.sum(SalarioMovimento.salario_liquido).label("salario_previsto"),
+            _soma_se(
+                SalarioMovimento.movimento_bancario_salario_id.isnot(None),
+                SalarioMovimento.salario_liquido,
+            ).label("salario_realizado"),
+            func.sum(SalarioMovimento.total_beneficios).label("beneficio_previsto"),
+        ).group_by(SalarioMovimento.usuario_id, ano, mes),
+        SalarioMovimento.usuario_id,
+    )
+    for linha in conexao.execute(query):
+        acumular(
+            linha, CATEGORIA_SALARIO, linha.salario_previsto, linha.salario_realizado
+        )
+        acumular(linha, CATEGORIA_BENEFICIO, linha.beneficio_previsto, _ZERO)
+
+    query = filtrar(
+        select(
+            SalarioMovimento.usuario_id,
+            ano,
+            mes,
+            func.sum(SalarioMovimentoItem.valor).label("realizado"),
+        )
+        .join(
+            SalarioMovimento,
+            SalarioMovimentoItem.salario_movimento_id == SalarioMovimento.id,
+        )
+        .join(SalarioItem, SalarioMovimentoItem.salario_item_id == SalarioItem.id)
+        .where(
+            and_(
+                SalarioItem.tipo == TIPO_BENEFICIO,
+                SalarioMovimentoItem.movimento_bancario_id.isnot(None),
+            )
+        )
+        .group_by(SalarioMovimento.usuario_id, ano, mes),
+        SalarioMovimento.usuario_id,
+    )
+    for linha in conexao.execute(query):
+        acumular(linha, CATEGORIA_BENEFICIO, _ZERO, linha.realizado)
+
+    return {chave: valor for chave, valor in totais.items() if valor}
+
+
+def _resumo_gravado(user_id=None):
+    query = select(ResumoMensal)
+    if user_id is not None:
+        query = query.where(ResumoMensal.usuario_id == user_id)
+    return {
+        (r.usuario_id, r.ano, r.mes, r.categoria, r.tipo_valor): r.valor
+        for r in db.session.scalars(query)
+    }
+
+
+def linhas_do_resumo(totais):
+    """Converte o resultado de calcular_resumo em linhas de resumo_mensal."""
+    return [
+        {
+            "usuario_id": usuario_id,
+            "ano": ano,
+            "mes": mes,
+            "categoria": categoria,
+            "natureza": NATUREZA_CATEGORIA[categoria],
+            "tipo_valor": tipo_valor,
+            "valor": valor,
+        }
+        for (usuario_id, ano, mes, categoria, tipo_valor), valor in totais.items()
+    ]
+
+
+def substituir_resumo(user_id=None):
+    """
+    Apaga e regrava o resumo do usuário (ou de todos) sem fazer commit.
+    Usado depois de cargas em massa que não passam pelos deltas.
+    """
+    comando = delete(ResumoMensal)
+    if user_id is not None:
+        comando = comando.where(ResumoMensal.usuario_id == user_id)
+    db.session.execute(comando.execution_options(synchronize_session=False))
+
+    linhas = linhas_do_resumo(calcular_resumo(user_id))
+    if linhas:
+        db.session.execute(ResumoMensal.__table__.insert(), linhas)
+    return len(linhas)
+
+
+def reconstruir_resumo(user_id=None):
+    try:
+        total = substituir_resumo(user_id)
+        db.session.commit()
+        return total
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(
+            f"Erro ao reconstruir o resumo mensal: {e}", exc_info=True
+        )
+        raise
+
+
+def verificar_resumo(user_id=None):
+    """
+    Compara o resumo gravado com o recalculado das tabelas de origem e
+    devolve as divergências (linhas zeradas contam como ausentes).
+    """
+    esperado = calcular_resumo(user_id)
+    gravado = {
+        chave: valor for chave, valor in _resumo_gravado(user_id).items() if valor
+    }
+    divergencias = []
+    for chave in sorted(esperado.keys() | gravado.keys()):
+        valor_gravado = gravado.get(chave, _ZERO)
+        valor_esperado = esperado.get(chave, _ZERO)
+        if valor_gravado != valor_esperado:
+            usuario_id, ano, mes, categoria, tipo_valor = chave
+            divergencias.append(
+                {
+                    "usuario_id": usuario_id,
+                    "ano": ano,
+                    "mes": mes,
+                    "categoria": categoria,
+                    "tipo_valor": tipo_valor,
+                    "gravado": valor_gravado,
+                    "esperado": valor_esperado,
+                }
+            )
+    return divergencias
+
+
+def get_resumo_anual(user_id, ano, meses=None):
+    """Lê o resumo do ano em uma consulta: {mes: {(categoria, tipo_valor): valor}}."""
+    query = select(
+        ResumoMensal.mes,
+        ResumoMensal.categoria,
+        ResumoMensal.tipo_valor,
+        ResumoMensal.valor,
+    ).where(ResumoMensal.usuario_id == user_id, ResumoMensal.ano == ano)
+    if meses:
+        query = query.where(ResumoMensal.mes.in_(meses))
+
+    resumo = defaultdict(lambda: defaultdict(Decimal))
+    for linha in db.session.execute(query):
+        resumo[linha.mes][(linha.categoria, linha.tipo_valor)] += linha.valor
+    return resumo
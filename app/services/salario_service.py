@@ -1,16 +1,28 @@
 # app/services/salario_service.py
 
+from collections import defaultdict
 from datetime import date
+from decimal import Decimal
 
 from dateutil.relativedelta import relativedelta
 from flask import current_app
 from flask_login import current_user
+from sqlalchemy import func
 
 from app import db
+from app.cache import invalidar_dashboard
 from app.models.salario_item_model import SalarioItem
 from app.models.salario_movimento_item_model import SalarioMovimentoItem
 from app.models.salario_movimento_model import SalarioMovimento
-from app.utils import FormChoices
+from app.services import resumo_mensal_service
+from app.utils import (
+    TIPO_BENEFICIO,
+    TIPO_DESCONTO,
+    TIPO_FGTS,
+    TIPO_IMPOSTO,
+    TIPO_PROVENTO,
+    FormChoices,
+)
 
 
 def get_quinto_dia_util(ano, mes):
@@ -29,6 +41,91 @@ def get_quinto_dia_util(ano, mes):
     return date(data_base.year, data_base.month, dia)
 
 
+def _somas_por_tipo(movimento_ids):
+    somas = defaultdict(lambda: defaultdict(Decimal))
+    if not movimento_ids:
+        return somas
+
+    linhas = (
+        db.session.query(
+            SalarioMovimentoItem.salario_movimento_id,
+            SalarioItem.tipo,
+            func.sum(SalarioMovimentoItem.valor),
+        )
+        .join(SalarioItem, SalarioMovimentoItem.salario_item_id == SalarioItem.id)
+        .filter(SalarioMovimentoItem.salario_movimento_id.in_(movimento_ids))
+        .group_by(SalarioMovimentoItem.salario_movimento_id, SalarioItem.tipo)
+        .all()
+    )
+    for movimento_id, tipo, soma in linhas:
+        somas[movimento_id][tipo] = soma or Decimal("0.00")
+    return somas
+
+
+def _totais_da_folha(somas):
+    proventos = somas[TIPO_PROVENTO]
+    return {
+        "total_proventos": proventos,
+        "salario_liquido": proventos - somas[TIPO_IMPOSTO] - somas[TIPO_DESCONTO],
+        "total_beneficios": somas[TIPO_BENEFICIO],
+        "total_fgts": somas[TIPO_FGTS],
+    }
+
+
+def atualizar_totais_folha(movimento):
+    db.session.flush()
+    totais = _totais_da_folha(_somas_por_tipo([movimento.id])[movimento.id])
+    with resumo_mensal_service.acompanhar(movimento):
+        for coluna, valor in totais.items():
+            setattr(movimento, coluna, valor)
+
+
+def verificar_totais_folhas(user_id=None, corrigir=False):
+    """
+    Compara os totais gravados em cada folha com a soma das verbas e
+    devolve as divergências encontradas. Com `corrigir`, grava os valores
+    recalculados e reconstrói o resumo mensal dos usuários afetados: o
+    total divergente pode ou não ter entrado no resumo, então um delta
+    não basta.
+    """
+    query = SalarioMovimento.query
+    if user_id is not None:
+        query = query.filter(SalarioMovimento.usuario_id == user_id)
+    movimentos = query.order_by(SalarioMovimento.id).all()
+    somas = _somas_por_tipo([m.id for m in movimentos])
+
+    divergencias = []
+    for movimento in movimentos:
+        esperado = _totais_da_folha(somas[movimento.id])
+        diferencas = {
+            coluna: (getattr(movimento, coluna), valor)
+            for coluna, valor in esperado.items()
+            if getattr(movimento, coluna) != valor
+        }
+        if diferencas:
+            divergencias.append((movimento, diferencas))
+            if corrigir:
+                for coluna, (_, valor) in diferencas.items():
+                    setattr(movimento, coluna, valor)
+
+    if corrigir and divergencias:
+        usuarios = {m.usuario_id for m, _ in divergencias}
+        try:
+            db.session.flush()
+            for usuario_id in usuarios:
+                resumo_mensal_service.substituir_resumo(usuario_id)
+            db.session.commit()
+            for usuario_id in usuarios:
+                invalidar_dashboard(usuario_id)
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(
+                f"Erro ao corrigir totais das folhas: {e}", exc_info=True
+            )
+            raise
+    return divergencias
+
+
 def criar_folha_pagamento(mes_referencia, tipo_folha, data_recebimento_form):
     if isinstance(mes_referencia, date):
         mes_referencia_db = mes_referencia.strftime("%Y-%m")
@@ -65,6 +162,7 @@ def criar_folha_pagamento(mes_referencia, tipo_folha, data_recebimento_form):
         )
         db.session.add(novo_movimento)
         db.session.commit()
+        invalidar_dashboard(current_user.id)
         return (
             True,
             "Folha de pagamento criada. Agora adicione as verbas.",
@@ -98,7 +196,9 @@ def adicionar_item_folha(movimento_id, form):
             valor=form.valor.data,
         )
         db.session.add(novo_item)
+        atualizar_totais_folha(movimento)
         db.session.commit()
+        invalidar_dashboard(current_user.id)
         item_data = {
             "id": novo_item.id,
             "nome": novo_item.salario_item.nome,
@@ -132,7 +232,9 @@ def excluir_item_folha(item_id):
 
     try:
         db.session.delete(item)
+        atualizar_totais_folha(movimento)
         db.session.commit()
+        invalidar_dashboard(current_user.id)
         return True, "Verba removida com sucesso!", item_id
     except Exception as e:
         db.session.rollback()
@@ -162,8 +264,10 @@ def excluir_folha_pagamento(movimento_id):
         )
 
     try:
+        resumo_mensal_service.remover_do_resumo([movimento])
         db.session.delete(movimento)
         db.session.commit()
+        invalidar_dashboard(current_user.id)
         current_app.logger.info(
             f"Folha de pagamento ID {movimento_id} excluída por {current_user.login}."
         )
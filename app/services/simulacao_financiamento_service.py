@@ -0,0 +1,220 @@
+# app/services/simulacao_financiamento_service.py
+
+from datetime import date
+
+import numpy as np
+from dateutil.relativedelta import relativedelta
+
+from app.utils import TIPO_SAC
+
+ESTRATEGIA_PRAZO = "prazo"
+ESTRATEGIA_PARCELA = "parcela"
+ESTRATEGIAS = (ESTRATEGIA_PRAZO, ESTRATEGIA_PARCELA)
+
+MAXIMO_CENARIOS = 50
+MAXIMO_PRAZO_MESES = 600
+# Saldos abaixo de meio centavo são considerados quitados
+_RESIDUO = 0.005
+
+
+def taxa_mensal(taxa_juros_anual):
+    """Taxa mensal equivalente à taxa anual efetiva informada em %."""
+    return (1 + float(taxa_juros_anual) / 100) ** (1 / 12) - 1
+
+
+def _prestacao_price(saldo, taxa, meses):
+    meses = np.maximum(meses, 1)
+    if taxa == 0:
+        return saldo / meses
+    return saldo * taxa / (1 - (1 + taxa) ** -meses)
+
+
+def gerar_cronograma(saldo, taxa_juros_anual, prazo_meses, tipo_amortizacao):
+    """
+    Cronograma completo sem amortizações extras, calculado em forma fechada.
+    Devolve arrays por mês: amortização, juros, prestação e saldo devedor
+    após o pagamento.
+    """
+    saldo = float(saldo)
+    taxa = taxa_mensal(taxa_juros_anual)
+    meses = np.arange(1, prazo_meses + 1)
+
+    if tipo_amortizacao == TIPO_SAC:
+        amortizacao = np.full(prazo_meses, saldo / prazo_meses)
+        saldo_anterior = saldo - amortizacao * (meses - 1)
+        juros = saldo_anterior * taxa
+    else:
+        prestacao = _prestacao_price(saldo, taxa, prazo_meses)
+        fator = (1 + taxa) ** (meses - 1)
+        saldo_anterior = (
+            saldo * fator - prestacao * (fator - 1) / taxa
+            if taxa
+            else saldo - prestacao * (meses - 1)
+        )
+        juros = saldo_anterior * taxa
+        amortizacao = prestacao - juros
+
+    saldo_devedor = np.maximum(saldo_anterior - amortizacao, 0)
+    return {
+        "numero_parcela": meses,
+        "amortizacao": amortizacao,
+        "juros": juros,
+        "prestacao": amortizacao + juros,
+        "saldo_devedor": saldo_devedor,
+    }
+
+
+def ler_cenarios(cenarios, prazo_meses, data_primeira_parcela):
+    """
+    Valida os cenários recebidos no JSON. Cada cenário tem `estrategia`
+    ("prazo" ou "parcela"), `amortizacoes` ([{"mes" ou "data", "valor"}]) e,
+    opcionalmente, `nome` e `extra_mensal`. Levanta ValueError se inválido.
+    """
+    if not isinstance(cenarios, list) or not cenarios:
+        raise ValueError("Informe ao menos um cenário.")
+    if len(cenarios) > MAXIMO_CENARIOS:
+        raise ValueError(f"Informe no máximo {MAXIMO_CENARIOS} cenários.")
+
+    lidos = []
+    for numero, cenario in enumerate(cenarios, start=1):
+        if not isinstance(cenario, dict):
+            raise ValueError(f"Cenário {numero} inválido.")
+        estrategia = cenario.get("estrategia", ESTRATEGIA_PRAZO)
+        if estrategia not in ESTRATEGIAS:
+            raise ValueError(f"Cenário {numero}: estratégia '{estrategia}' inválida.")
+
+        extras = np.zeros(prazo_meses)
+        try:
+            extra_mensal = float(cenario.get("extra_mensal") or 0)
+            for amortizacao in cenario.get("amortizacoes") or []:
+                if amortizacao.get("data"):
+                    data = date.fromisoformat(amortizacao["data"])
+                    diferenca = relativedelta(data, data_primeira_parcela)
+                    mes = max(diferenca.years * 12 + diferenca.months + 1, 1)
+                else:
+                    mes = int(amortizacao["mes"])
+                valor = float(amortizacao["valor"])
+                if not 1 <= mes <= prazo_meses or valor <= 0:
+                    raise ValueError
+                extras[mes - 1] += valor
+        except (KeyError, TypeError, ValueError, AttributeError):
+            raise ValueError(
+                f"Cenário {numero}: amortizações devem ter mês entre 1 e "
+                f"{prazo_meses} (ou data) e valor maior que zero."
+            )
+        if extra_mensal < 0:
+            raise ValueError(f"Cenário {numero}: extra mensal não pode ser negativo.")
+        extras += extra_mensal
+
+        lidos.append(
+            {
+                "nome": str(cenario.get("nome") or f"Cenário {numero}"),
+                "estrategia": estrategia,
+                "extras": extras,
+            }
+        )
+    return lidos
+
+
+def simular_cenarios(
+    saldo,
+    taxa_juros_anual,
+    prazo_meses,
+    tipo_amortizacao,
+    cenarios,
+    data_primeira_parcela,
+):
+    """
+    Simula o cronograma base e todos os cenários de uma vez: cada mês é um
+    passo vetorizado sobre os cenários. Na estratégia "prazo" a amortização
+    (SAC) ou a prestação (Price) é mantida e o financiamento termina antes;
+    em "parcela" o prazo é mantido e a prestação é recalculada após cada
+    amortização extra. Nada é lido ou gravado no banco.
+    """
+    taxa = taxa_mensal(taxa_juros_anual)
+    quantidade = len(cenarios) + 1
+
+    # Linha 0 é o cronograma base, sem amortizações extras
+    extras = np.zeros((quantidade, prazo_meses))
+    reduz_parcela = np.zeros(quantidade, dtype=bool)
+    for indice, cenario in enumerate(cenarios, start=1):
+        extras[indice] = cenario["extras"]
+        reduz_parcela[indice] = cenario["estrategia"] == ESTRATEGIA_PARCELA
+
+    saldos = np.full(quantidade, float(saldo))
+    if tipo_amortizacao == TIPO_SAC:
+        cota = saldos / prazo_meses
+    else:
+        cota = _prestacao_price(saldos, taxa, prazo_meses)
+
+    prestacoes = np.zeros((quantidade, prazo_meses))
+    juros_total = np.zeros(quantidade)
+    extras_pagos = np.zeros(quantidade)
+    meses = np.zeros(quantidade, dtype=np.int64)
+
+    for mes in range(prazo_meses):
+        ativos = saldos > 0
+        if not ativos.any():
+            break
+        juros = saldos * taxa
+        if tipo_amortizacao == TIPO_SAC:
+            amortizacao = np.minimum(cota, saldos)
+        else:
+            amortizacao = np.minimum(np.maximum(cota - juros, 0), saldos)
+        saldos = saldos - amortizacao
+
+        extra = np.minimum(extras[:, mes], saldos)
+        saldos = saldos - extra
+        saldos[saldos < _RESIDUO] = 0
+
+        # Cenários já quitados têm saldo zero e não acumulam nada
+        prestacoes[:, mes] = amortizacao + juros
+        juros_total += juros
+        extras_pagos += extra
+        meses[ativos] = mes + 1
+
+        restantes = prazo_meses - mes - 1
+        recalcular = reduz_parcela & (extra > 0) & (restantes > 0)
+        if recalcular.any():
+            if tipo_amortizacao == TIPO_SAC:
+                nova_cota = saldos / max(restantes, 1)
+            else:
+                nova_cota = _prestacao_price(saldos, taxa, restantes)
+            cota = np.where(recalcular, nova_cota, cota)
+
+    def _data_final(quantidade_meses):
+        return data_primeira_parcela + relativedelta(months=int(quantidade_meses) - 1)
+
+    base = {
+        "juros_total": round(float(juros_total[0]), 2),
+        "total_pago": round(float(prestacoes[0].sum()), 2),
+        "meses": int(meses[0]),
+        "data_final": _data_final(meses[0]).isoformat(),
+        "primeira_prestacao": round(float(prestacoes[0, 0]), 2),
+    }
+
+    resultados = []
+    for indice, cenario in enumerate(cenarios, start=1):
+        com_extra = np.flatnonzero(cenario["extras"])
+        # Primeira prestação paga depois da primeira amortização extra
+        proximo_mes = min(com_extra[0] + 1, meses[indice] - 1) if com_extra.size else 0
+        resultados.append(
+            {
+                "nome": cenario["nome"],
+                "estrategia": cenario["estrategia"],
+                "total_amortizado": round(float(extras_pagos[indice]), 2),
+                "juros_total": round(float(juros_total[indice]), 2),
+                "economia_juros": round(float(juros_total[0] - juros_total[indice]), 2),
+                "total_pago": round(
+                    float(prestacoes[indice].sum() + extras_pagos[indice]), 2
+                ),
+                "meses": int(meses[indice]),
+                "meses_reduzidos": int(meses[0] - meses[indice]),
+                "data_final": _data_final(max(meses[indice], 1)).isoformat(),
+                "proxima_prestacao": round(
+                    float(prestacoes[indice, max(proximo_mes, 0)]), 2
+                ),
+            }
+        )
+
+    return {"base": base, "cenarios": resultados}
@@ -0,0 +1,226 @@
+# app/services/tabela_service.py
+
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import String, and_, func, or_
+
+from app import db
+from app.periodo import limites_mes
+
+TAMANHO_PAGINA_PADRAO = 25
+TAMANHO_PAGINA_MAXIMO = 200
+TAMANHO_PAGINA_CARTOES = 30
+
+
+def coluna(nome, expr, ordenavel=True, pesquisavel=False):
+    return {
+        "nome": nome,
+        "expr": expr,
+        "ordenavel": ordenavel,
+        "pesquisavel": pesquisavel,
+    }
+
+
+def _serializar(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return str(valor)
+    return valor
+
+
+def _converter(expr, valor):
+    if valor is None:
+        return None
+    try:
+        tipo = expr.type.python_type
+    except NotImplementedError:
+        return valor
+    if tipo is datetime:
+        return datetime.fromisoformat(valor)
+    if tipo is date:
+        return date.fromisoformat(valor)
+    if tipo is Decimal:
+        return Decimal(valor)
+    return tipo(valor)
+
+
+def codificar_cursor(valor, id_):
+    bruto = json.dumps([_serializar(valor), id_]).encode()
+    return base64.urlsafe_b64encode(bruto).decode()
+
+
+def decodificar_cursor(cursor):
+    try:
+        valor, id_ = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return valor, int(id_)
+    except (ValueError, TypeError):
+        return None
+
+
+def ler_periodo(args, mes_atual_por_padrao=False):
+    """
+    Lê data_inicial/data_final (ISO) da query string. Levanta ValueError se
+    alguma das datas for inválida.
+    """
+    data_inicial_str = args.get("data_inicial")
+    data_final_str = args.get("data_final")
+
+    if mes_atual_por_padrao and not data_inicial_str and not data_final_str:
+        hoje = date.today()
+        data_inicial, data_final = limites_mes(hoje.year, hoje.month)
+        data_inicial_str = data_inicial.isoformat()
+        data_final_str = data_final.isoformat()
+
+    return {
+        "data_inicial_str": data_inicial_str,
+        "data_final_str": data_final_str,
+        "data_inicial": (
+            date.fromisoformat(data_inicial_str) if data_inicial_str else None
+        ),
+        "data_final": date.fromisoformat(data_final_str) if data_final_str else None,
+    }
+
+
+def ler_parametros(args, colunas, ordem_padrao):
+    """
+    Lê os parâmetros do protocolo server-side do DataTables (draw, start,
+    length, order, search) e o cursor opcional `apos`, usado para seguir
+    para a próxima página sem OFFSET.
+    """
+    por_nome = {c["nome"]: c for c in colunas}
+
+    ordem, direcao = ordem_padrao
+    indice = args.get("order[0][column]", type=int)
+    if indice is not None:
+        nome = args.get(f"columns[{indice}][data]")
+        if nome in por_nome and por_nome[nome]["ordenavel"]:
+            ordem = nome
+            direcao = "asc" if args.get("order[0][dir]") == "asc" else "desc"
+
+    tamanho = args.get("length", TAMANHO_PAGINA_PADRAO, type=int)
+    if tamanho < 1:
+        tamanho = TAMANHO_PAGINA_PADRAO
+
+    return {
+        "draw": args.get("draw", 0, type=int),
+        "inicio": max(args.get("start", 0, type=int), 0),
+        "tamanho": min(tamanho, TAMANHO_PAGINA_MAXIMO),
+        "ordem": ordem,
+        "direcao": direcao,
+        "busca": (args.get("search[value]") or "").strip(),
+        "apos": args.get("apos"),
+    }
+
+
+def _escapar_like(texto):
+    # % e _ digitados na busca são literais, não curingas do LIKE
+    return texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _contar(query):
+    return db.session.execute(
+        query.with_only_columns(func.count(), maintain_column_froms=True).order_by(
+            None
+        )
+    ).scalar()
+
+
+def paginar(query, colunas, coluna_id, parametros, contar=True):
+    """
+    Executa uma página de `query` (um select() já filtrado pelo usuário)
+    projetando apenas as colunas informadas, que devem incluir "id". A
+    ordenação é sempre pela coluna escolhida e pelo id, o que permite
+    paginação por chave (seek) quando o cliente envia o cursor da última
+    linha da página anterior.
+    """
+    por_nome = {c["nome"]: c for c in colunas}
+    expr_ordem = por_nome[parametros["ordem"]]["expr"]
+    descendente = parametros["direcao"] == "desc"
+
+    query_total = query
+    if parametros["busca"]:
+        termo = f"%{_escapar_like(parametros['busca'].lower())}%"
+        query = query.where(
+            or_(
+                *(
+                    func.lower(c["expr"].cast(String)).like(termo, escape="\\")
+                    for c in colunas
+                    if c["pesquisavel"]
+                )
+            )
+        )
+
+    total = filtrados = None
+    if contar:
+        total = _contar(query_total)
+        filtrados = _contar(query) if parametros["busca"] else total
+
+    pagina = query.with_only_columns(
+        *(c["expr"].label(c["nome"]) for c in colunas), maintain_column_froms=True
+    ).order_by(
+        expr_ordem.desc() if descendente else expr_ordem.asc(),
+        coluna_id.desc() if descendente else coluna_id.asc(),
+    )
+
+    cursor = decodificar_cursor(parametros["apos"]) if parametros["apos"] else None
+    if cursor:
+        valor, id_ = cursor
+        valor = _converter(expr_ordem, valor)
+        if descendente:
+            pagina = pagina.where(
+                or_(expr_ordem < valor, and_(expr_ordem == valor, coluna_id < id_))
+            )
+        else:
+            pagina = pagina.where(
+                or_(expr_ordem > valor, and_(expr_ordem == valor, coluna_id > id_))
+            )
+    elif parametros["inicio"]:
+        pagina = pagina.offset(parametros["inicio"])
+
+    linhas = [
+        dict(row._mapping)
+        for row in db.session.execute(pagina.limit(parametros["tamanho"]))
+    ]
+
+    proximo = None
+    if len(linhas) == parametros["tamanho"]:
+        ultima = linhas[-1]
+        proximo = codificar_cursor(ultima[parametros["ordem"]], ultima["id"])
+
+    return {
+        "linhas": linhas,
+        "total": total,
+        "filtrados": filtrados,
+        "cursor": proximo,
+    }
+
+
+def pagina_de_cartoes(query, colunas, coluna_id, ordem_padrao, apos=None):
+    """Página de tamanho fixo na ordem padrão, usada pela listagem mobile."""
+    ordem, direcao = ordem_padrao
+    parametros = {
+        "inicio": 0,
+        "tamanho": TAMANHO_PAGINA_CARTOES,
+        "ordem": ordem,
+        "direcao": direcao,
+        "busca": "",
+        "apos": apos,
+    }
+    return paginar(query, colunas, coluna_id, parametros, contar=False)
+
+
+def resposta_datatables(parametros, resultado):
+    return {
+        "draw": parametros["draw"],
+        "recordsTotal": resultado["total"],
+        "recordsFiltered": resultado["filtrados"],
+        "data": [
+            {chave: _serializar(valor) for chave, valor in linha.items()}
+            for linha in resultado["linhas"]
+        ],
+        "cursor": resultado["cursor"],
+    }
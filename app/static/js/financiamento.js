@@ -95,13 +95,69 @@ document.addEventListener("DOMContentLoaded", () => {
       }
     };
 
+    const dataPagamentoInput = formAmortizacao.querySelector('input[name="data_pagamento"]');
+    const corpoSimulacao = document.querySelector("#tabela-simulacao tbody");
+    const rotulosEstrategia = { prazo: "Reduzir o prazo", parcela: "Reduzir a parcela" };
+    let temporizadorSimulacao = null;
+
+    const formatarData = (iso) => iso.split("-").reverse().join("/");
+
+    const simularEstrategias = () => {
+      const valor = parseFloat(valorAmortizacaoInput.value) || 0;
+      if (!corpoSimulacao || valor <= 0 || !dataPagamentoInput.value) return;
+
+      const amortizacoes = [{ data: dataPagamentoInput.value, valor: valor }];
+      fetch(formAmortizacao.dataset.urlSimulacao, {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+          "X-CSRFToken": formAmortizacao.querySelector('input[name="csrf_token"]').value
+        },
+        body: JSON.stringify({
+          cenarios: Object.keys(rotulosEstrategia).map((estrategia) => ({
+            nome: rotulosEstrategia[estrategia],
+            estrategia: estrategia,
+            amortizacoes: amortizacoes
+          }))
+        })
+      })
+        .then((response) => response.json())
+        .then((resultado) => {
+          if (resultado.error) {
+            corpoSimulacao.innerHTML = `<tr><td colspan="5" class="text-danger text-center">${resultado.error}</td></tr>`;
+            return;
+          }
+          corpoSimulacao.innerHTML = resultado.cenarios
+            .map(
+              (cenario) => `<tr>
+                <td>${cenario.nome}</td>
+                <td class="text-success fw-bold">${formatCurrency(cenario.economia_juros)}</td>
+                <td>${formatCurrency(cenario.proxima_prestacao)}</td>
+                <td>${formatarData(cenario.data_final)}</td>
+                <td>${cenario.meses_reduzidos}</td>
+              </tr>`
+            )
+            .join("");
+        });
+    };
+
+    const agendarSimulacao = () => {
+      clearTimeout(temporizadorSimulacao);
+      temporizadorSimulacao = setTimeout(simularEstrategias, 400);
+    };
+
     if (valorAmortizacaoInput) {
       valorAmortizacaoInput.addEventListener("input", atualizarResumo);
+      valorAmortizacaoInput.addEventListener("input", agendarSimulacao);
     }
     if (estrategiaSelect) {
       estrategiaSelect.addEventListener("change", atualizarResumo);
     }
+    if (dataPagamentoInput) {
+      dataPagamentoInput.addEventListener("change", agendarSimulacao);
+    }
 
     atualizarResumo();
+    simularEstrategias();
   }
 });
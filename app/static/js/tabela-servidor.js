@@ -0,0 +1,144 @@
+/**
+ * Tabelas paginadas no servidor (protocolo server-side do DataTables).
+ *
+ * As colunas são descritas nos <th> da tabela (.tabela-servidor):
+ *   data-coluna    chave do registro devolvido pelo servidor
+ *   data-render    texto (padrão) | data | mes | valor | badge | icone | modelo | acoes
+ *   data-ordenavel "false" desabilita a ordenação da coluna
+ *   data-vazio     texto exibido quando o valor é nulo ou vazio
+ *
+ * Ao avançar página a página, o cursor da última linha é reenviado em
+ * "apos" para que o servidor use paginação por chave em vez de OFFSET.
+ */
+(function () {
+  const formatoValor = new Intl.NumberFormat("pt-BR", {
+    minimumFractionDigits: 2,
+    maximumFractionDigits: 2
+  });
+
+  function escapar(texto) {
+    return String(texto)
+      .replace(/&/g, "&amp;")
+      .replace(/</g, "&lt;")
+      .replace(/>/g, "&gt;")
+      .replace(/"/g, "&quot;");
+  }
+
+  function substituirId(url, id) {
+    return url.replace(/\/0(?=\/|\?|$)/, `/${id}`);
+  }
+
+  const renderizadores = {
+    texto: (th) => (valor) =>
+      valor === null || valor === "" ? th.dataset.vazio || "-" : escapar(valor),
+    data: () => (valor) => {
+      if (!valor) return "-";
+      const [ano, mes, dia] = valor.substring(0, 10).split("-");
+      return `${dia}/${mes}/${ano}`;
+    },
+    mes: (th) => (valor) => {
+      if (!valor || !valor.includes("-")) return escapar(valor || "-");
+      const [ano, mes] = valor.split("-");
+      return `${mes}${th.dataset.separador || "/"}${ano}`;
+    },
+    valor: (th) => (valor) => {
+      if (valor === null) return th.dataset.vazio || "-";
+      const classe = Number(valor) < 0 && th.dataset.negativo ? ` class="${th.dataset.negativo}"` : "";
+      return `<span${classe}>${formatoValor.format(Number(valor))}</span>`;
+    },
+    badge: (th) => {
+      const classes = JSON.parse(th.dataset.classes || "{}");
+      const rotulos = JSON.parse(th.dataset.rotulos || "{}");
+      const base = th.dataset.baseClasse ?? "badge";
+      return (valor) =>
+        `<span class="${base} ${classes[valor] || th.dataset.classePadrao || ""}">${escapar(rotulos[valor] || valor)}</span>`;
+    },
+    icone: (th) => (valor) =>
+      valor === null || valor === undefined
+        ? ""
+        : `<i class="${th.dataset.icone}" title="${th.dataset.titulo || ""}"></i>`,
+    modelo: (th) => (valor, tipo, linha) =>
+      th.dataset.modelo.replace(/\{(\w+)\}/g, (_, chave) =>
+        linha[chave] === null || linha[chave] === undefined ? "-" : escapar(linha[chave])
+      ),
+    acoes: (th) => {
+      const acoes = JSON.parse(th.dataset.acoes);
+      return (valor, tipo, linha) =>
+        acoes
+          .map((acao) => {
+            const url = substituirId(acao.url, linha.id);
+            if (acao.modal) {
+              return `<button type="button" class="${acao.classe}" data-bs-toggle="modal" data-bs-target="${acao.modal}" data-form-action="${url}" title="${acao.titulo}"><i class="${acao.icone}"></i></button>`;
+            }
+            return `<a href="${url}" class="${acao.classe}" title="${acao.titulo}"><i class="${acao.icone}"></i></a>`;
+          })
+          .join(" ");
+    }
+  };
+
+  function inicializarTabelaServidor(tabela) {
+    const ths = Array.from(tabela.querySelectorAll("thead th"));
+    const colunas = ths.map((th) => ({
+      data: th.dataset.coluna || null,
+      orderable: Boolean(th.dataset.coluna) && th.dataset.ordenavel !== "false",
+      className: th.dataset.classe || "",
+      render: renderizadores[th.dataset.render || "texto"](th)
+    }));
+
+    let cursores = {};
+    let assinatura = null;
+
+    $(tabela).DataTable({
+      language: {
+        url: "//cdn.datatables.net/plug-ins/1.13.6/i18n/pt-BR.json"
+      },
+      serverSide: true,
+      processing: true,
+      responsive: true,
+      pageLength: 25,
+      order: [[Number(tabela.dataset.ordemColuna || 0), tabela.dataset.ordemDirecao || "desc"]],
+      columns: colunas,
+      ajax: function (dados, callback) {
+        const chave = JSON.stringify([dados.order, dados.search.value, dados.length]);
+        if (chave !== assinatura) {
+          cursores = {};
+          assinatura = chave;
+        }
+        if (cursores[dados.start]) {
+          dados.apos = cursores[dados.start];
+        }
+        $.getJSON(tabela.dataset.url, dados).done((resposta) => {
+          if (resposta.cursor) {
+            cursores[dados.start + dados.length] = resposta.cursor;
+          }
+          callback(resposta);
+        });
+      }
+    });
+  }
+
+  function carregarMais(botao) {
+    const lista = document.querySelector(botao.dataset.alvo);
+    botao.disabled = true;
+    $.getJSON(botao.dataset.url, { formato: "cartoes", apos: botao.dataset.cursor })
+      .done((resposta) => {
+        lista.insertAdjacentHTML("beforeend", resposta.html);
+        if (resposta.cursor) {
+          botao.dataset.cursor = resposta.cursor;
+          botao.disabled = false;
+        } else {
+          botao.remove();
+        }
+      })
+      .fail(() => {
+        botao.disabled = false;
+      });
+  }
+
+  $(document).ready(function () {
+    document.querySelectorAll("table.tabela-servidor").forEach(inicializarTabelaServidor);
+    document.querySelectorAll("[data-carregar-mais]").forEach((botao) => {
+      botao.addEventListener("click", () => carregarMais(botao));
+    });
+  });
+})();
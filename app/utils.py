@@ -137,6 +137,7 @@ class FormChoices:
         PENDENTE = STATUS_PENDENTE
         PARCIAL_RECEBIDO = STATUS_PARCIAL_RECEBIDO
         RECEBIDO = STATUS_RECEBIDO
+        ATRASADO = STATUS_ATRASADO
 
     class StatusSolicitacao(Enum):
         PENDENTE = STATUS_PENDENTE
@@ -185,6 +186,7 @@ PAGE_CONFIG = {
     "usuario.adicionar_usuario": {"title": "Usuários"},
     "usuario.editar_usuario": {"title": "Usuários"},
     "usuario.perfil": {"title": "Usuários"},
+    "usuario.desempenho_sql": {"title": "Desempenho SQL"},
     # Contas
     "conta.listar_contas": {"title": "Contas Bancárias"},
     "conta.adicionar_conta": {"title": "Contas Bancárias"},
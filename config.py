@@ -8,14 +8,49 @@ class Config:
     SECRET_KEY = os.environ.get("SECRET_KEY")
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Réplica somente leitura para relatórios e gráficos (opcional)
+    SQLALCHEMY_BINDS = (
+        {"replica": os.environ["DATABASE_REPLICA_URL"]}
+        if os.environ.get("DATABASE_REPLICA_URL")
+        else {}
+    )
+    # Acima desse atraso (segundos) as leituras voltam para o primário
+    REPLICA_ATRASO_MAXIMO = int(os.environ.get("REPLICA_ATRASO_MAXIMO", 10))
+    REPLICA_VERIFICACAO_INTERVALO = int(
+        os.environ.get("REPLICA_VERIFICACAO_INTERVALO", 5)
+    )
     # DEBUG = True  # Modo de produção: False, desenvolvimento: True
     FLASK_ENV = os.environ.get("FLASK_ENV")
 
     LOG_TO_STDOUT = os.environ.get("LOG_TO_STDOUT")
-    LOG_FILE = os.path.join(
-        os.path.abspath(os.path.dirname(__file__)), "logs", "web_finance.log"
-    )
+    # Padrão: <instance>/logs/web_finance.log
+    LOG_FILE = os.environ.get("LOG_FILE")
     LOG_LEVEL = logging.INFO
 
+    DASHBOARD_CACHE_BACKEND = os.environ.get(
+        "DASHBOARD_CACHE_BACKEND", "app.cache.LRUCacheBackend"
+    )
+    DASHBOARD_CACHE_TTL = int(os.environ.get("DASHBOARD_CACHE_TTL", 120))
+    DASHBOARD_CACHE_MAX_ENTRIES = int(os.environ.get("DASHBOARD_CACHE_MAX_ENTRIES", 256))
+
+    # Instrumentação de SQL por requisição; alerta no log ao exceder os limites
+    SQL_INSTRUMENTACAO = os.environ.get("SQL_INSTRUMENTACAO", "1") == "1"
+    SQL_ORCAMENTO_CONSULTAS = int(os.environ.get("SQL_ORCAMENTO_CONSULTAS", 50))
+    SQL_ORCAMENTO_MS = int(os.environ.get("SQL_ORCAMENTO_MS", 500))
+    SQL_LIMITE_REPETICOES = int(os.environ.get("SQL_LIMITE_REPETICOES", 10))
+
+    EVOLUCAO_DIVIDAS_MESES = int(os.environ.get("EVOLUCAO_DIVIDAS_MESES", 36))
+
+    # Job diário que marca itens vencidos como Atrasado dentro do processo web
+    AGENDADOR_ATRASOS = os.environ.get("AGENDADOR_ATRASOS", "0") == "1"
+    AGENDADOR_ATRASOS_HORA = int(os.environ.get("AGENDADOR_ATRASOS_HORA", 0))
+    AGENDADOR_ESPERA_INICIAL = int(os.environ.get("AGENDADOR_ESPERA_INICIAL", 60))
+
     LOG_MAX_BYTES = 1024 * 1024 * 5
     LOG_BACKUP_COUNT = 5
+    # Registros vão para uma fila gravada em JSON por uma thread própria;
+    # com a fila cheia são descartados em vez de travar a requisição
+    LOG_FILA_MAXIMO = int(os.environ.get("LOG_FILA_MAXIMO", 10000))
+    # Cada ponto do código grava no máximo N avisos (WARNING) por janela
+    LOG_AMOSTRAGEM_LIMITE = int(os.environ.get("LOG_AMOSTRAGEM_LIMITE", 10))
+    LOG_AMOSTRAGEM_JANELA = int(os.environ.get("LOG_AMOSTRAGEM_JANELA", 60))
@@ -0,0 +1,34 @@
+# tests/auxiliares.py
+
+from app import db
+from app.registro import parar_registro
+
+
+def configuracao_teste(tmp_path, **extras):
+    """Config de testes com banco SQLite em arquivo dentro de `tmp_path`."""
+    config = {
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'web_finance.db'}",
+        "SECRET_KEY": "teste",
+        "TESTING": True,
+        "WTF_CSRF_ENABLED": False,
+        "LOG_FILE": str(tmp_path / "logs" / "web_finance.log"),
+        "DASHBOARD_CACHE_BACKEND": "app.cache.NullCacheBackend",
+        "AGENDADOR_ATRASOS": False,
+    }
+    config.update(extras)
+    return config
+
+
+def encerrar_app(app):
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+    parar_registro(app)
+
+
+def autenticar(cliente, usuario_id):
+    with cliente.session_transaction() as sessao:
+        sessao["_user_id"] = str(usuario_id)
+        sessao["_fresh"] = True
+    return cliente
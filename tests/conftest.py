@@ -0,0 +1,17 @@
+# tests/conftest.py
+
+import pytest
+
+from app import create_app, db
+from tests.auxiliares import configuracao_teste, encerrar_app
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app(config_overrides=configuracao_teste(tmp_path))
+    with app.app_context():
+        # Só o banco principal: o db é global e guarda as binds (ex.: réplica)
+        # registradas por outros apps do processo
+        db.create_all(bind_key=None)
+    yield app
+    encerrar_app(app)
@@ -0,0 +1,61 @@
+# tests/test_alertas.py
+
+from datetime import date, timedelta
+
+from flask_login import login_user
+from sqlalchemy import update
+
+from app import db
+from app.models.desp_rec_movimento_model import DespRecMovimento
+from app.models.financiamento_model import Financiamento
+from app.models.financiamento_parcela_model import FinanciamentoParcela
+from app.services.dados_sinteticos_service import gerar_usuario_sintetico
+from app.services.plano_consulta_service import capturar_consultas
+from app.utils import STATUS_ATRASADO, STATUS_PENDENTE
+
+
+def test_contagem_igual_ao_tamanho_das_listas_de_alertas(app):
+    # Import tardio: o módulo monta consultas ao ser importado e precisa dos
+    # modelos já registrados pelo create_app
+    from app.services import alerta_service
+
+    with app.test_request_context():
+        hoje = date.today()
+        usuario, _ = gerar_usuario_sintetico(
+            semente=5, anos=1, movimentos_por_mes=1, compras_crediario=10
+        )
+        # Itens em aberto dos dois lados de hoje
+        db.session.execute(
+            update(DespRecMovimento)
+            .where(
+                DespRecMovimento.usuario_id == usuario.id,
+                DespRecMovimento.data_vencimento.between(
+                    hoje - timedelta(days=60), hoje - timedelta(days=1)
+                ),
+            )
+            .values(status=STATUS_ATRASADO)
+        )
+        db.session.execute(
+            update(FinanciamentoParcela)
+            .where(
+                FinanciamentoParcela.financiamento_id.in_(
+                    db.session.query(Financiamento.id).filter_by(usuario_id=usuario.id)
+                ),
+                FinanciamentoParcela.data_vencimento.between(
+                    hoje - timedelta(days=45), hoje + timedelta(days=40)
+                ),
+            )
+            .values(status=STATUS_PENDENTE, pago=False)
+        )
+        db.session.commit()
+        login_user(usuario)
+
+        vencidas = alerta_service.get_contas_vencidas()
+        assert vencidas
+        for dias in (7, 40):
+            a_vencer = alerta_service.get_contas_a_vencer(dias)
+            with capturar_consultas(db.engine) as consultas:
+                contagem = alerta_service.contar_alertas(usuario.id, dias)
+            assert len(consultas) == 1
+            assert contagem == {"vencidas": len(vencidas), "a_vencer": len(a_vencer)}
+        assert contagem["a_vencer"] > 0
@@ -0,0 +1,138 @@
+# tests/test_atrasos.py
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from sqlalchemy import update
+
+from app import db
+from app.agendador import _executar_atrasos
+from app.models.crediario_fatura_model import CrediarioFatura
+from app.models.crediario_model import Crediario
+from app.models.execucao_tarefa_model import ExecucaoTarefa
+from app.models.usuario_model import Usuario
+from app.services.atraso_service import (
+    envelhecer_status,
+    envelhecer_status_se_pendente,
+    get_ultima_execucao,
+)
+from app.utils import STATUS_ATRASADO, STATUS_PARCIAL_PAGO, STATUS_PENDENTE
+
+HOJE = date.today()
+ONTEM = HOJE - timedelta(days=1)
+AMANHA = HOJE + timedelta(days=1)
+
+
+def _faturas(*itens):
+    """Cria uma fatura por (vencimento, status) e devolve os ids na mesma ordem."""
+    usuario = Usuario(
+        nome="Teste",
+        sobrenome="Atrasos",
+        email="atrasos@teste.com",
+        login="atrasos",
+        precisa_alterar_senha=False,
+    )
+    usuario.set_password("teste")
+    db.session.add(usuario)
+    db.session.flush()
+    crediario = Crediario(
+        usuario_id=usuario.id,
+        nome_crediario="CARTAO",
+        tipo_crediario="Cartão Físico",
+        dia_vencimento=10,
+    )
+    db.session.add(crediario)
+    db.session.flush()
+    faturas = [
+        CrediarioFatura(
+            usuario_id=usuario.id,
+            crediario_id=crediario.id,
+            mes_referencia=f"2000-{numero:02d}",
+            valor_total_fatura=Decimal("100.00"),
+            valor_pago_fatura=Decimal("0.00"),
+            data_vencimento_fatura=vencimento,
+            status=status,
+        )
+        for numero, (vencimento, status) in enumerate(itens, start=1)
+    ]
+    db.session.add_all(faturas)
+    db.session.commit()
+    return [fatura.id for fatura in faturas]
+
+
+def _status(ids):
+    db.session.expire_all()
+    return [db.session.get(CrediarioFatura, id_).status for id_ in ids]
+
+
+def _definir_status(id_, status):
+    with db.engine.begin() as conexao:
+        conexao.execute(
+            update(CrediarioFatura.__table__)
+            .where(CrediarioFatura.id == id_)
+            .values(status=status)
+        )
+
+
+def test_envelhecer_status_vencidos_adiados_e_parciais(app):
+    with app.app_context():
+        ids = _faturas(
+            (ONTEM, STATUS_PENDENTE),
+            (HOJE, STATUS_PENDENTE),
+            (AMANHA, STATUS_ATRASADO),
+            (ONTEM, STATUS_ATRASADO),
+            (ONTEM, STATUS_PARCIAL_PAGO),
+        )
+
+        alterados = envelhecer_status(HOJE)
+
+        assert _status(ids) == [
+            STATUS_ATRASADO,
+            STATUS_PENDENTE,
+            STATUS_PENDENTE,
+            STATUS_ATRASADO,
+            STATUS_PARCIAL_PAGO,
+        ]
+        assert alterados["crediario_fatura"] == 2
+        execucao = get_ultima_execucao()
+        assert execucao.data_referencia == HOJE
+        assert execucao.itens_atualizados == 2
+
+
+def test_segunda_execucao_no_mesmo_dia_e_pulada(app):
+    with app.app_context():
+        (fatura_id,) = _faturas((ONTEM, STATUS_PENDENTE))
+
+        _executar_atrasos(app)
+        assert _status([fatura_id]) == [STATUS_ATRASADO]
+
+        # Se rodasse de novo, a fatura voltaria a Atrasado
+        _definir_status(fatura_id, STATUS_PENDENTE)
+        _executar_atrasos(app)
+        assert _status([fatura_id]) == [STATUS_PENDENTE]
+        assert ExecucaoTarefa.query.count() == 1
+
+        # No dia seguinte roda normalmente
+        assert envelhecer_status_se_pendente(AMANHA) == {
+            "desp_rec_movimento": 0,
+            "financiamento_parcela": 0,
+            "crediario_fatura": 1,
+            "salario_movimento": 0,
+        }
+
+
+def test_dia_reservado_por_outro_worker_nao_roda_de_novo(app):
+    with app.app_context():
+        (fatura_id,) = _faturas((ONTEM, STATUS_PENDENTE))
+        envelhecer_status_se_pendente(ONTEM)
+        # Este worker leu a execução antes de outro processar o dia
+        execucao = get_ultima_execucao()
+        assert execucao.data_referencia == ONTEM
+
+        with db.engine.begin() as conexao:
+            conexao.execute(
+                update(ExecucaoTarefa.__table__).values(data_referencia=HOJE)
+            )
+
+        assert envelhecer_status_se_pendente(HOJE) is None
+        assert _status([fatura_id]) == [STATUS_PENDENTE]
@@ -0,0 +1,98 @@
+# tests/test_benchmark.py
+
+from datetime import date
+
+from app import create_app, db
+from app.models.conta_movimento_model import ContaMovimento
+from app.models.crediario_parcela_model import CrediarioParcela
+from app.services.benchmark_service import (
+    carregar_linha_base,
+    comparar_com_linha_base,
+    salvar_linha_base,
+)
+from app.services.conciliacao_service import conciliar_saldos_contas
+from app.services.dados_sinteticos_service import gerar_usuario_sintetico
+from tests.auxiliares import configuracao_teste, encerrar_app
+
+HOJE = date(2026, 3, 15)
+
+
+def _gerar(app):
+    """Gera o usuário e devolve o resumo e um retrato das linhas gravadas."""
+    with app.app_context():
+        usuario, resumo = gerar_usuario_sintetico(
+            semente=15, anos=1, movimentos_por_mes=4, compras_crediario=6, hoje=HOJE
+        )
+        movimentos = db.session.execute(
+            db.select(
+                ContaMovimento.data_movimento,
+                ContaMovimento.valor,
+                ContaMovimento.descricao,
+            ).order_by(ContaMovimento.id)
+        ).all()
+        parcelas = db.session.execute(
+            db.select(
+                CrediarioParcela.data_vencimento, CrediarioParcela.valor_parcela
+            ).order_by(CrediarioParcela.id)
+        ).all()
+        assert conciliar_saldos_contas(usuario.id) == []
+        return resumo, movimentos, parcelas
+
+
+def test_gerador_reproduzivel_pela_semente(app, tmp_path):
+    primeiro = _gerar(app)
+
+    outro = create_app(config_overrides=configuracao_teste(tmp_path / "outro"))
+    try:
+        with outro.app_context():
+            db.create_all(bind_key=None)
+        segundo = _gerar(outro)
+    finally:
+        encerrar_app(outro)
+
+    assert primeiro[0]["movimentos"] > 0
+    assert primeiro == segundo
+
+
+def _pagina(consultas, mediana_ms, pico_memoria_kb=100.0):
+    return {
+        "consultas": consultas,
+        "mediana_ms": mediana_ms,
+        "pico_memoria_kb": pico_memoria_kb,
+    }
+
+
+def test_comparacao_com_linha_base(tmp_path):
+    caminho = tmp_path / "medidas" / "linha_base.json"
+    salvar_linha_base(
+        {
+            "paginas": {
+                "dashboard": _pagina(10, 20.0),
+                "extrato_bancario": _pagina(5, 10.0),
+                "graficos": _pagina(8, 30.0),
+            }
+        },
+        caminho,
+    )
+    resultado = {
+        "paginas": {
+            # Uma consulta a mais já é regressão
+            "dashboard": _pagina(11, 20.0),
+            # Latência dentro da tolerância de 30%, memória acima
+            "extrato_bancario": _pagina(5, 12.9, pico_memoria_kb=140.0),
+            "graficos": _pagina(7, 40.0),
+            "fluxo_caixa": _pagina(3, 5.0),
+        }
+    }
+
+    comparacao = {
+        linha["pagina"]: (linha["situacao"], linha["problemas"])
+        for linha in comparar_com_linha_base(resultado, carregar_linha_base(caminho))
+    }
+
+    assert comparacao == {
+        "dashboard": ("regressão", ["consultas 10 -> 11"]),
+        "extrato_bancario": ("regressão", ["memória +40%"]),
+        "graficos": ("regressão", ["latência +33%"]),
+        "fluxo_caixa": ("nova", []),
+    }
@@ -0,0 +1,130 @@
+# tests/test_cache_dashboard.py
+
+from sqlalchemy import select
+
+from app import create_app, db
+from app.cache import (
+    get_dashboard_snapshot,
+    invalidar_dashboard,
+    invalidar_todos_dashboards,
+    set_dashboard_snapshot,
+)
+from app.models.usuario_model import Usuario
+from tests.auxiliares import autenticar, configuracao_teste, encerrar_app
+
+
+def _usuario():
+    usuario = Usuario(
+        nome="Teste",
+        sobrenome="Cache",
+        email="cache@exemplo.com",
+        login="cache",
+        precisa_alterar_senha=False,
+    )
+    usuario.set_password("teste")
+    db.session.add(usuario)
+    db.session.commit()
+    return usuario.id
+
+
+def _versao(usuario_id):
+    return db.session.get(Usuario, usuario_id).versao_dashboard
+
+
+def test_invalidacao_alcanca_outros_workers(tmp_path):
+    # Dois apps sobre o mesmo banco, cada um com o seu cache em memória,
+    # como dois workers do gunicorn
+    config = configuracao_teste(
+        tmp_path, DASHBOARD_CACHE_BACKEND="app.cache.LRUCacheBackend"
+    )
+    worker_a = create_app(config_overrides=config)
+    worker_b = create_app(config_overrides=config)
+    try:
+        with worker_a.app_context():
+            db.create_all(bind_key=None)
+            usuario_id = _usuario()
+
+        cliente = autenticar(worker_a.test_client(), usuario_id)
+        assert cliente.get("/dashboard?mes_ano=01-2026").status_code == 200
+        with worker_a.app_context():
+            versao = _versao(usuario_id)
+            assert get_dashboard_snapshot(usuario_id, versao, "01-2026") is not None
+
+        with worker_b.app_context():
+            invalidar_dashboard(usuario_id)
+
+        with worker_a.app_context():
+            assert _versao(usuario_id) == versao + 1
+            assert get_dashboard_snapshot(usuario_id, versao + 1, "01-2026") is None
+
+        # O job de atrasos invalida todos os usuários de uma vez
+        with worker_b.app_context():
+            invalidar_todos_dashboards()
+        with worker_a.app_context():
+            assert _versao(usuario_id) == versao + 2
+    finally:
+        encerrar_app(worker_a)
+        encerrar_app(worker_b)
+
+
+def test_snapshot_calculado_durante_invalidacao_nao_e_servido(tmp_path):
+    app = create_app(
+        config_overrides=configuracao_teste(
+            tmp_path, DASHBOARD_CACHE_BACKEND="app.cache.LRUCacheBackend"
+        )
+    )
+    try:
+        with app.app_context():
+            db.create_all(bind_key=None)
+            usuario_id = _usuario()
+
+            versao_lida = _versao(usuario_id)
+            # Alteração gravada enquanto o snapshot ainda era calculado
+            invalidar_dashboard(usuario_id)
+            set_dashboard_snapshot(usuario_id, versao_lida, "01-2026", {"antigo": 1})
+
+            assert (
+                get_dashboard_snapshot(usuario_id, _versao(usuario_id), "01-2026")
+                is None
+            )
+    finally:
+        encerrar_app(app)
+
+
+def test_invalidacao_nao_grava_nem_descarta_a_sessao_de_quem_chamou(app):
+    with app.app_context():
+        usuario_id = _usuario()
+        versao = _versao(usuario_id)
+
+        usuario = db.session.get(Usuario, usuario_id)
+        usuario.nome = "Pendente"
+        novo = Usuario(
+            nome="Novo",
+            sobrenome="Cache",
+            email="novo@exemplo.com",
+            login="novo",
+            precisa_alterar_senha=False,
+        )
+        novo.set_password("teste")
+        db.session.add(novo)
+
+        invalidar_dashboard(usuario_id)
+
+        assert usuario in db.session.dirty
+        assert novo in db.session.new
+        with db.engine.connect() as conexao:
+            linha = conexao.execute(
+                select(Usuario.nome, Usuario.versao_dashboard).where(
+                    Usuario.id == usuario_id
+                )
+            ).one()
+            assert tuple(linha) == ("Teste", versao + 1)
+            assert (
+                conexao.scalar(select(Usuario.id).where(Usuario.login == "novo"))
+                is None
+            )
+
+        db.session.commit()
+        assert _versao(usuario_id) == versao + 1
+        assert db.session.get(Usuario, usuario_id).nome == "Pendente"
+        assert Usuario.query.filter_by(login="novo").count() == 1
@@ -0,0 +1,107 @@
+# tests/test_conciliacao.py
+
+from decimal import Decimal
+
+from sqlalchemy import update
+
+from app import db
+from app.models.conta_model import Conta
+from app.models.conta_movimento_model import ContaMovimento
+from app.services.conciliacao_service import (
+    calcular_saldos_contas,
+    conciliar_saldos_contas,
+)
+from app.services.dados_sinteticos_service import gerar_usuario_sintetico
+from app.utils import TIPO_CREDITO
+
+
+def _saldo_conta_a_conta(conta):
+    """Cálculo antigo: soma os movimentos da conta carregados um a um."""
+    saldo = conta.saldo_inicial
+    for movimento in ContaMovimento.query.filter_by(conta_id=conta.id):
+        if movimento.tipo_transacao.tipo == TIPO_CREDITO:
+            saldo += movimento.valor
+        else:
+            saldo -= movimento.valor
+    return saldo
+
+
+def _desviar_saldo(conta_id, diferenca):
+    with db.engine.begin() as conexao:
+        conexao.execute(
+            update(Conta.__table__)
+            .where(Conta.id == conta_id)
+            .values(saldo_atual=Conta.saldo_atual + diferenca)
+        )
+    db.session.expire_all()
+
+
+def _usuario():
+    usuario, _ = gerar_usuario_sintetico(
+        semente=11, anos=1, movimentos_por_mes=3, compras_crediario=2
+    )
+    contas = Conta.query.filter_by(usuario_id=usuario.id).order_by(Conta.id).all()
+    assert len(contas) > 1
+    return usuario.id, contas
+
+
+def test_agregado_igual_ao_calculo_conta_a_conta(app):
+    with app.app_context():
+        usuario_id, contas = _usuario()
+
+        saldos = calcular_saldos_contas(usuario_id)
+
+        assert saldos.keys() == {conta.id for conta in contas}
+        for conta in contas:
+            assert saldos[conta.id]["esperado"] == _saldo_conta_a_conta(conta)
+            assert saldos[conta.id]["diferenca"] == 0
+        assert conciliar_saldos_contas(usuario_id) == []
+
+
+def test_conciliacao_relata_e_corrige_saldo_divergente(app):
+    with app.app_context():
+        usuario_id, contas = _usuario()
+        divergente = contas[0]
+        esperado = divergente.saldo_atual
+        _desviar_saldo(divergente.id, Decimal("12.34"))
+
+        (linha,) = conciliar_saldos_contas(usuario_id)
+        assert linha["conta_id"] == divergente.id
+        assert linha["diferenca"] == Decimal("12.34")
+        assert linha["esperado"] == esperado
+        # Sem --corrigir nada é gravado
+        assert db.session.get(Conta, divergente.id).saldo_atual == esperado + Decimal(
+            "12.34"
+        )
+
+        assert len(conciliar_saldos_contas(usuario_id, corrigir=True)) == 1
+        db.session.expire_all()
+        assert db.session.get(Conta, divergente.id).saldo_atual == esperado
+        assert conciliar_saldos_contas(usuario_id) == []
+
+
+def test_comando_conciliar_saldos(app):
+    with app.app_context():
+        usuario_id, contas = _usuario()
+        conta_id = contas[-1].id
+        esperado = contas[-1].saldo_atual
+        _desviar_saldo(conta_id, Decimal("-5.00"))
+
+    executor = app.test_cli_runner()
+    resultado = executor.invoke(
+        args=["conta", "conciliar-saldos", "--usuario", str(usuario_id)]
+    )
+    assert resultado.exit_code == 1
+    assert f"Conta {conta_id} " in resultado.output
+    assert "(diferença -5.00)" in resultado.output
+    assert "1 conta(s) com divergência." in resultado.output
+
+    resultado = executor.invoke(args=["conta", "conciliar-saldos", "--corrigir"])
+    assert resultado.exit_code == 0
+    assert "1 conta(s) corrigida(s)." in resultado.output
+
+    resultado = executor.invoke(args=["conta", "conciliar-saldos"])
+    assert resultado.exit_code == 0
+    assert "Nenhuma divergência encontrada." in resultado.output
+    with app.app_context():
+        assert db.session.get(Conta, conta_id).saldo_atual == esperado
@@ -0,0 +1,61 @@
+# tests/test_consultas_constantes.py
+
+from app.services.benchmark_service import medir_paginas
+from app.services.dados_sinteticos_service import gerar_usuario_sintetico
+from tests.auxiliares import autenticar
+
+
+def _usuarios_pequeno_e_grande(app):
+    # Mesma estrutura (contas, crediários, financiamento), volumes bem diferentes
+    with app.app_context():
+        pequeno, _ = gerar_usuario_sintetico(
+            semente=1,
+            anos=1,
+            movimentos_por_mes=2,
+            compras_crediario=10,
+            prazo_financiamento=24,
+        )
+        grande, _ = gerar_usuario_sintetico(
+            semente=2,
+            anos=3,
+            movimentos_por_mes=20,
+            compras_crediario=60,
+            prazo_financiamento=120,
+        )
+        return pequeno.id, grande.id
+
+
+def test_consultas_nao_crescem_com_o_volume(app):
+    pequeno, grande = _usuarios_pequeno_e_grande(app)
+
+    medidas_pequeno = medir_paginas(app, pequeno, repeticoes=1)
+    medidas_grande = medir_paginas(app, grande, repeticoes=1)
+
+    for pagina in ("dashboard", "extrato_bancario", "graficos"):
+        assert (
+            medidas_grande[pagina]["consultas"] == medidas_pequeno[pagina]["consultas"]
+        ), pagina
+
+
+def _consultas_evolucao_dividas(app, usuario_id, **parametros):
+    cliente = autenticar(app.test_client(), usuario_id)
+    estatisticas = app.extensions["estatisticas_sql"]
+    estatisticas.limpar()
+    resposta = cliente.get("/graficos/evolucao-dividas", query_string=parametros)
+    assert resposta.status_code == 200
+    (linha,) = estatisticas.resumo()
+    return linha["max_consultas"]
+
+
+def test_evolucao_dividas_com_consultas_constantes(app):
+    pequeno, grande = _usuarios_pequeno_e_grande(app)
+
+    for agrupamento in ("crediario", "grupo", "subgrupo"):
+        consultas = {
+            _consultas_evolucao_dividas(
+                app, usuario_id, grouping_by=agrupamento, meses=meses
+            )
+            for usuario_id in (pequeno, grande)
+            for meses in (12, 120)
+        }
+        assert len(consultas) == 1, (agrupamento, consultas)
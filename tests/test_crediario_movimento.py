@@ -0,0 +1,206 @@
+# tests/test_crediario_movimento.py
+
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from dateutil.relativedelta import relativedelta
+from flask_login import login_user
+
+from app import db
+from app.models.crediario_fatura_model import CrediarioFatura
+from app.models.crediario_fatura_pendencia_model import CrediarioFaturaPendencia
+from app.models.crediario_model import Crediario
+from app.models.crediario_movimento_model import CrediarioMovimento
+from app.models.crediario_parcela_model import CrediarioParcela
+from app.models.usuario_model import Usuario
+from app.services import crediario_movimento_service
+from app.utils import STATUS_PAGO
+
+PRIMEIRA = date.today().replace(day=10) + relativedelta(months=1)
+
+
+def _form(**valores):
+    campos = {
+        "crediario_id": None,
+        "crediario_grupo_id": None,
+        "crediario_subgrupo_id": None,
+        "fornecedor_id": None,
+        "data_compra": date.today(),
+        "valor_total_compra": Decimal("90.00"),
+        "descricao": "compra",
+        "destino": "Próprio",
+        "data_primeira_parcela": PRIMEIRA,
+        "numero_parcelas": 3,
+    }
+    campos.update(valores)
+    return SimpleNamespace(
+        **{nome: SimpleNamespace(data=valor) for nome, valor in campos.items()}
+    )
+
+
+@pytest.fixture
+def compra(app):
+    """Compra de 90,00 em 3x gravada pelo serviço, com o usuário logado."""
+    with app.test_request_context():
+        usuario = Usuario(
+            nome="Teste",
+            sobrenome="Crediario",
+            email="crediario@teste.com",
+            login="crediario",
+            precisa_alterar_senha=False,
+        )
+        usuario.set_password("teste")
+        db.session.add(usuario)
+        db.session.flush()
+        crediario = Crediario(
+            usuario_id=usuario.id,
+            nome_crediario="CARTAO",
+            tipo_crediario="Cartão Físico",
+            dia_vencimento=10,
+        )
+        db.session.add(crediario)
+        db.session.commit()
+        login_user(usuario)
+
+        sucesso, _ = crediario_movimento_service.adicionar_movimento(
+            _form(crediario_id=crediario.id)
+        )
+        assert sucesso
+        movimento = CrediarioMovimento.query.one()
+        CrediarioFaturaPendencia.query.delete()
+        db.session.commit()
+        yield movimento
+
+
+def _parcelas(movimento_id):
+    return [
+        (p.id, p.numero_parcela, p.data_vencimento, p.valor_parcela)
+        for p in CrediarioParcela.query.filter_by(
+            crediario_movimento_id=movimento_id
+        ).order_by(CrediarioParcela.numero_parcela)
+    ]
+
+
+def _meses_marcados():
+    return sorted(p.mes_referencia for p in CrediarioFaturaPendencia.query)
+
+
+def _mes(data):
+    return data.strftime("%Y-%m")
+
+
+def _editar(movimento, **valores):
+    return crediario_movimento_service.editar_movimento(
+        movimento, _form(crediario_id=movimento.crediario_id, **valores)
+    )
+
+
+def test_alterar_so_o_valor_atualiza_as_mesmas_parcelas(compra):
+    antes = _parcelas(compra.id)
+
+    sucesso, _ = _editar(compra, valor_total_compra=Decimal("100.00"))
+
+    assert sucesso
+    depois = _parcelas(compra.id)
+    assert [p[:3] for p in depois] == [p[:3] for p in antes]
+    assert [p[3] for p in depois] == [
+        Decimal("33.33"),
+        Decimal("33.33"),
+        Decimal("33.34"),
+    ]
+    assert _meses_marcados() == sorted(_mes(p[2]) for p in antes)
+
+
+def test_aumentar_parcelas_mantem_as_iguais_e_insere_as_novas(compra):
+    antes = _parcelas(compra.id)
+
+    sucesso, _ = _editar(
+        compra, valor_total_compra=Decimal("150.00"), numero_parcelas=5
+    )
+
+    assert sucesso
+    depois = _parcelas(compra.id)
+    assert depois[:3] == antes
+    assert [p[1:] for p in depois[3:]] == [
+        (4, PRIMEIRA + relativedelta(months=3), Decimal("30.00")),
+        (5, PRIMEIRA + relativedelta(months=4), Decimal("30.00")),
+    ]
+    # Só os meses das parcelas novas mudam de fatura
+    assert _meses_marcados() == [_mes(p[2]) for p in depois[3:]]
+
+
+def test_reduzir_parcelas_exclui_as_excedentes(compra):
+    antes = _parcelas(compra.id)
+
+    sucesso, _ = _editar(compra, valor_total_compra=Decimal("60.00"), numero_parcelas=2)
+
+    assert sucesso
+    assert _parcelas(compra.id) == antes[:2]
+    assert _meses_marcados() == [_mes(antes[2][2])]
+    assert db.session.get(CrediarioMovimento, compra.id).numero_parcelas == 2
+
+
+def test_mover_o_primeiro_vencimento_desloca_todas_as_parcelas(compra):
+    antes = _parcelas(compra.id)
+    nova_primeira = PRIMEIRA + relativedelta(months=1)
+
+    sucesso, _ = _editar(compra, data_primeira_parcela=nova_primeira)
+
+    assert sucesso
+    depois = _parcelas(compra.id)
+    assert [p[0] for p in depois] == [p[0] for p in antes]
+    assert [p[2] for p in depois] == [
+        nova_primeira + relativedelta(months=i) for i in range(3)
+    ]
+    # Sai do primeiro mês antigo, entra no último mês novo
+    assert _meses_marcados() == sorted(
+        {_mes(p[2]) for p in antes} | {_mes(p[2]) for p in depois}
+    )
+
+
+def test_edicao_bloqueada_quando_a_fatura_do_mes_ja_foi_paga(compra):
+    antes = _parcelas(compra.id)
+    segunda = antes[1][2]
+    db.session.add(
+        CrediarioFatura(
+            usuario_id=compra.usuario_id,
+            crediario_id=compra.crediario_id,
+            mes_referencia=_mes(segunda),
+            valor_total_fatura=Decimal("30.00"),
+            valor_pago_fatura=Decimal("30.00"),
+            data_vencimento_fatura=segunda,
+            status=STATUS_PAGO,
+        )
+    )
+    db.session.commit()
+
+    sucesso, mensagem = _editar(compra, valor_total_compra=Decimal("120.00"))
+    assert not sucesso
+    assert segunda.strftime("%m/%Y") in mensagem
+    assert _parcelas(compra.id) == antes
+    assert _meses_marcados() == []
+
+    # Reduzir para uma parcela também tiraria a parcela do mês pago
+    sucesso, _ = _editar(compra, valor_total_compra=Decimal("30.00"), numero_parcelas=1)
+    assert not sucesso
+    assert _parcelas(compra.id) == antes
+
+    # Aumentar mantendo as parcelas pagas no lugar é permitido
+    sucesso, _ = _editar(
+        compra, valor_total_compra=Decimal("120.00"), numero_parcelas=4
+    )
+    assert sucesso
+    assert _parcelas(compra.id)[:3] == antes
+
+
+def test_excluir_movimento_apaga_as_parcelas_em_lote(compra):
+    antes = _parcelas(compra.id)
+
+    sucesso, _ = crediario_movimento_service.excluir_movimento(compra.id)
+
+    assert sucesso
+    assert CrediarioMovimento.query.count() == 0
+    assert CrediarioParcela.query.count() == 0
+    assert _meses_marcados() == sorted(_mes(p[2]) for p in antes)
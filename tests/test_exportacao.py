@@ -0,0 +1,147 @@
+# tests/test_exportacao.py
+
+import csv
+import io
+from datetime import date, datetime
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import update
+
+from app import db
+from app.models.conta_model import Conta
+from app.models.conta_movimento_model import ContaMovimento
+from app.periodo import limites_mes
+from app.services import exportacao_service
+from app.services.dados_sinteticos_service import gerar_usuario_sintetico
+from app.utils import TIPO_CREDITO
+from tests.auxiliares import autenticar
+
+HOJE = date.today()
+
+
+def _extrato_antigo(conta, data_inicio, data_fim):
+    """Cálculo antigo da tela: movimentos pelo ORM e saldo acumulado em Python."""
+    saldo = conta.saldo_inicial
+    linhas = []
+    for mov in ContaMovimento.query.filter(
+        ContaMovimento.conta_id == conta.id, ContaMovimento.data_movimento <= data_fim
+    ).order_by(ContaMovimento.data_movimento, ContaMovimento.id):
+        valor = mov.valor if mov.tipo_transacao.tipo == TIPO_CREDITO else -mov.valor
+        if mov.data_movimento < data_inicio:
+            saldo += valor
+            continue
+        if not linhas:
+            linhas.append([data_inicio, "Saldo anterior", "", "", None, saldo])
+        saldo += valor
+        linhas.append(
+            [
+                mov.data_movimento,
+                mov.tipo_transacao.transacao_tipo,
+                mov.tipo_transacao.tipo,
+                mov.descricao or "",
+                mov.valor,
+                saldo,
+            ]
+        )
+    return linhas
+
+
+def _ler_csv(conteudo):
+    texto = conteudo.decode("utf-8")
+    assert texto.startswith("\ufeff")
+    cabecalho, *linhas = csv.reader(io.StringIO(texto[1:]), delimiter=";")
+    assert cabecalho == [
+        "Data",
+        "Transação",
+        "Movimento",
+        "Descrição",
+        "Valor",
+        "Saldo",
+    ]
+    return [
+        [
+            datetime.strptime(data, "%d/%m/%Y").date(),
+            transacao,
+            movimento,
+            descricao,
+            Decimal(valor.replace(",", ".")) if valor else None,
+            Decimal(saldo.replace(",", ".")),
+        ]
+        for data, transacao, movimento, descricao, valor, saldo in linhas
+    ]
+
+
+def _conta(app):
+    with app.app_context():
+        usuario, _ = gerar_usuario_sintetico(
+            semente=13, anos=1, movimentos_por_mes=6, compras_crediario=2
+        )
+        conta = Conta.query.filter_by(usuario_id=usuario.id).order_by(Conta.id).first()
+        return usuario.id, conta.id
+
+
+def test_csv_do_extrato_igual_ao_calculo_antigo(app, monkeypatch):
+    usuario_id, conta_id = _conta(app)
+    # Blocos pequenos para o arquivo sair em várias partes
+    monkeypatch.setattr(exportacao_service, "LINHAS_POR_BLOCO", 10)
+    inicio = HOJE.replace(day=1) - relativedelta(months=8)
+
+    resposta = autenticar(app.test_client(), usuario_id).get(
+        "/extratos/extrato_bancario/exportar",
+        query_string={
+            "conta_id": conta_id,
+            "de": inicio.strftime("%m-%Y"),
+            "ate": HOJE.strftime("%m-%Y"),
+        },
+        buffered=False,
+    )
+    assert resposta.status_code == 200
+    assert resposta.mimetype == "text/csv"
+    blocos = list(resposta.iter_encoded())
+    resposta.close()
+
+    with app.app_context():
+        conta = db.session.get(Conta, conta_id)
+        _, fim = limites_mes(HOJE.year, HOJE.month)
+        esperado = _extrato_antigo(conta, inicio, fim)
+
+    assert len(esperado) > 30
+    assert len(blocos) > len(esperado) // 10
+    assert _ler_csv(b"".join(blocos)) == esperado
+
+
+def test_csv_neutraliza_formulas_em_texto(app):
+    usuario_id, conta_id = _conta(app)
+    descricoes = ['=HYPERLINK("http://x")', "+55 11 9999", "-pix", "@SUM(A1)"]
+    with app.app_context():
+        ids = db.session.scalars(
+            db.select(ContaMovimento.id)
+            .where(
+                ContaMovimento.conta_id == conta_id,
+                ContaMovimento.data_movimento >= HOJE.replace(day=1),
+            )
+            .order_by(ContaMovimento.data_movimento, ContaMovimento.id)
+        ).all()
+        assert len(ids) >= len(descricoes)
+        for id_, descricao in zip(ids, descricoes):
+            db.session.execute(
+                update(ContaMovimento)
+                .where(ContaMovimento.id == id_)
+                .values(descricao=descricao)
+            )
+        db.session.commit()
+
+    resposta = autenticar(app.test_client(), usuario_id).get(
+        "/extratos/extrato_bancario/exportar", query_string={"conta_id": conta_id}
+    )
+    linhas = _ler_csv(resposta.data)
+
+    assert [linha[3] for linha in linhas[1:5]] == [f"'{d}" for d in descricoes]
+    # Números negativos continuam números
+    assert (
+        b"".join(
+            exportacao_service.gerar_csv(["Valor"], [[Decimal("-12.34")], ["-"]])
+        ).decode("utf-8")
+        == "\ufeffValor\r\n-12,34\r\n'-\r\n"
+    )
@@ -0,0 +1,219 @@
+# tests/test_faturas.py
+
+from datetime import date
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import func, update
+
+from app import db
+from app.models.crediario_fatura_model import CrediarioFatura
+from app.models.crediario_fatura_pendencia_model import CrediarioFaturaPendencia
+from app.models.crediario_model import Crediario
+from app.models.crediario_movimento_model import CrediarioMovimento
+from app.models.crediario_parcela_model import CrediarioParcela
+from app.models.usuario_model import Usuario
+from app.periodo import limites_mes
+from app.services import fatura_service
+from app.services.dados_sinteticos_service import gerar_usuario_sintetico
+from app.services.plano_consulta_service import capturar_consultas
+
+
+def _compra_parcelada(parcelas=3):
+    usuario = Usuario(
+        nome="Teste",
+        sobrenome="Faturas",
+        email="faturas@teste.com",
+        login="faturas",
+        precisa_alterar_senha=False,
+    )
+    usuario.set_password("teste")
+    db.session.add(usuario)
+    db.session.flush()
+    crediario = Crediario(
+        usuario_id=usuario.id,
+        nome_crediario="CARTAO",
+        tipo_crediario="Cartão Físico",
+        dia_vencimento=10,
+    )
+    db.session.add(crediario)
+    db.session.flush()
+
+    primeira = date.today().replace(day=1) + relativedelta(months=1)
+    movimento = CrediarioMovimento(
+        usuario_id=usuario.id,
+        crediario_id=crediario.id,
+        data_compra=date.today(),
+        valor_total_compra=Decimal("30.00") * parcelas,
+        descricao="compra",
+        data_primeira_parcela=primeira,
+        numero_parcelas=parcelas,
+    )
+    for numero in range(parcelas):
+        movimento.parcelas.append(
+            CrediarioParcela(
+                numero_parcela=numero + 1,
+                data_vencimento=primeira + relativedelta(months=numero),
+                valor_parcela=Decimal("30.00"),
+                pago=False,
+            )
+        )
+    db.session.add(movimento)
+    db.session.commit()
+    return usuario.id, crediario.id, movimento
+
+
+def _totais_faturas(user_id):
+    return {
+        f.mes_referencia: f.valor_total_fatura
+        for f in CrediarioFatura.query.filter_by(usuario_id=user_id)
+    }
+
+
+def test_incremental_zera_fatura_de_compra_excluida(app):
+    with app.app_context():
+        user_id, crediario_id, movimento = _compra_parcelada()
+        sucesso, _ = fatura_service.automatizar_geracao_e_atualizacao_faturas(user_id)
+        assert sucesso
+        assert set(_totais_faturas(user_id).values()) == {Decimal("30.00")}
+
+        fatura_service.marcar_meses_para_sincronizacao(
+            user_id, crediario_id, [p.data_vencimento for p in movimento.parcelas]
+        )
+        db.session.delete(movimento)
+        db.session.commit()
+
+        sucesso, _ = fatura_service.automatizar_geracao_e_atualizacao_faturas(
+            user_id, incremental=True
+        )
+        assert sucesso
+        assert set(_totais_faturas(user_id).values()) == {Decimal("0.00")}
+        assert CrediarioFaturaPendencia.query.count() == 0
+
+
+def test_sincronizacao_completa_zera_fatura_de_compra_excluida(app):
+    with app.app_context():
+        user_id, crediario_id, movimento = _compra_parcelada()
+        fatura_service.automatizar_geracao_e_atualizacao_faturas(user_id)
+
+        fatura_service.marcar_meses_para_sincronizacao(
+            user_id, crediario_id, [p.data_vencimento for p in movimento.parcelas]
+        )
+        db.session.delete(movimento)
+        db.session.commit()
+
+        sucesso, _ = fatura_service.automatizar_geracao_e_atualizacao_faturas(user_id)
+        assert sucesso
+        assert set(_totais_faturas(user_id).values()) == {Decimal("0.00")}
+        assert CrediarioFaturaPendencia.query.count() == 0
+
+        # Nada ficou para a incremental corrigir
+        _, mensagem = fatura_service.automatizar_geracao_e_atualizacao_faturas(
+            user_id, incremental=True
+        )
+        assert mensagem.startswith("Nenhuma alteração")
+        assert set(_totais_faturas(user_id).values()) == {Decimal("0.00")}
+
+
+def test_marcacao_gravada_durante_a_sincronizacao_e_mantida(app, monkeypatch):
+    with app.app_context():
+        user_id, crediario_id, movimento = _compra_parcelada()
+        fatura_service.marcar_meses_para_sincronizacao(
+            user_id, crediario_id, [p.data_vencimento for p in movimento.parcelas]
+        )
+        db.session.commit()
+        mes_concorrente = date.today().replace(day=1) + relativedelta(months=12)
+
+        somas_originais = fatura_service.get_somas_parcelas_por_mes
+
+        def somas_com_escrita_concorrente(*args, **kwargs):
+            # Outra conexão marca um mês novo no meio da sincronização
+            with db.engine.begin() as conexao:
+                conexao.execute(
+                    CrediarioFaturaPendencia.__table__.insert().values(
+                        usuario_id=user_id,
+                        crediario_id=crediario_id,
+                        mes_referencia=mes_concorrente.strftime("%Y-%m"),
+                        data_criacao=date.today(),
+                    )
+                )
+            return somas_originais(*args, **kwargs)
+
+        monkeypatch.setattr(
+            fatura_service, "get_somas_parcelas_por_mes", somas_com_escrita_concorrente
+        )
+        sucesso, _ = fatura_service.automatizar_geracao_e_atualizacao_faturas(
+            user_id, incremental=True
+        )
+        assert sucesso
+        assert [p.mes_referencia for p in CrediarioFaturaPendencia.query] == [
+            mes_concorrente.strftime("%Y-%m")
+        ]
+
+
+def test_marcar_o_mesmo_mes_duas_vezes(app):
+    with app.app_context():
+        user_id, crediario_id, movimento = _compra_parcelada(parcelas=1)
+        vencimento = movimento.parcelas[0].data_vencimento
+        fatura_service.marcar_meses_para_sincronizacao(
+            user_id, crediario_id, [vencimento]
+        )
+        fatura_service.marcar_meses_para_sincronizacao(
+            user_id, crediario_id, [vencimento, vencimento]
+        )
+        db.session.commit()
+        assert CrediarioFaturaPendencia.query.count() == 1
+
+
+def _soma_parcelas_da_fatura(user_id, fatura):
+    """Cálculo antigo da tela de faturas: um SUM por fatura."""
+    ano, mes = map(int, fatura.mes_referencia.split("-"))
+    inicio, fim = limites_mes(ano, mes)
+    return (
+        db.session.query(
+            func.coalesce(func.sum(CrediarioParcela.valor_parcela), Decimal("0.00"))
+        )
+        .join(CrediarioMovimento)
+        .filter(
+            CrediarioMovimento.crediario_id == fatura.crediario_id,
+            CrediarioMovimento.usuario_id == user_id,
+            CrediarioParcela.data_vencimento >= inicio,
+            CrediarioParcela.data_vencimento <= fim,
+        )
+        .scalar()
+    )
+
+
+def test_somas_agrupadas_iguais_ao_sum_por_fatura(app):
+    with app.app_context():
+        usuario, _ = gerar_usuario_sintetico(
+            semente=3, anos=1, movimentos_por_mes=1, compras_crediario=40
+        )
+        # Uma parcela alterada por fora deixa a fatura desatualizada
+        parcela = (
+            CrediarioParcela.query.join(CrediarioMovimento)
+            .filter(CrediarioMovimento.usuario_id == usuario.id)
+            .first()
+        )
+        db.session.execute(
+            update(CrediarioParcela)
+            .where(CrediarioParcela.id == parcela.id)
+            .values(valor_parcela=CrediarioParcela.valor_parcela + 1)
+        )
+        db.session.commit()
+        faturas = CrediarioFatura.query.filter_by(usuario_id=usuario.id).all()
+        assert len(faturas) > 10
+
+        with capturar_consultas(db.engine) as consultas:
+            somas = fatura_service.get_somas_parcelas_das_faturas(usuario.id, faturas)
+        assert len(consultas) == 1
+
+        desatualizadas = 0
+        for fatura in faturas:
+            esperado = _soma_parcelas_da_fatura(usuario.id, fatura)
+            soma = somas.get(
+                (fatura.crediario_id, fatura.mes_referencia), Decimal("0.00")
+            )
+            assert soma == esperado
+            desatualizadas += fatura.valor_total_fatura != soma
+        assert desatualizadas == 1
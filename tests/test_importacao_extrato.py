@@ -0,0 +1,96 @@
+# tests/test_importacao_extrato.py
+
+import io
+from datetime import date
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+
+from app import db
+from app.models.conta_model import Conta
+from app.models.conta_movimento_model import ContaMovimento
+from app.models.conta_saldo_mensal_model import ContaSaldoMensal
+from app.models.conta_transacao_model import ContaTransacao
+from app.services import conta_saldo_service
+from app.services.dados_sinteticos_service import gerar_usuario_sintetico
+from app.services.importacao_extrato_service import FORMATO_CSV, importar_extrato
+from app.utils import TIPO_CREDITO, TIPO_DEBITO
+
+
+def _csv(*linhas):
+    texto = "data;valor;descricao\n" + "".join(
+        f"{data:%d/%m/%Y};{valor};{descricao}\n" for data, valor, descricao in linhas
+    )
+    return io.BytesIO(texto.encode("utf-8"))
+
+
+def _saldos_mensais(conta_id):
+    return dict(
+        db.session.query(
+            ContaSaldoMensal.mes_referencia, ContaSaldoMensal.saldo_final
+        ).filter_by(conta_id=conta_id)
+    )
+
+
+def _importar(conta, arquivo):
+    tipos = {
+        t.tipo: t.id
+        for t in ContaTransacao.query.filter_by(usuario_id=conta.usuario_id)
+    }
+    return importar_extrato(
+        conta,
+        arquivo,
+        FORMATO_CSV,
+        tipos[TIPO_CREDITO],
+        tipos[TIPO_DEBITO],
+        simular=False,
+    )
+
+
+def test_importacao_atualiza_saldo_e_saldos_mensais(app):
+    with app.app_context():
+        usuario, _ = gerar_usuario_sintetico(
+            semente=5, anos=1, movimentos_por_mes=5, compras_crediario=5
+        )
+        conta = Conta.query.filter_by(usuario_id=usuario.id, tipo="Corrente").first()
+        conta_saldo_service.gerar_saldos_mensais(user_id=usuario.id)
+        saldo_antes = conta.saldo_atual
+
+        hoje = date.today()
+        sucesso, mensagem, _ = _importar(
+            conta,
+            _csv(
+                (hoje - relativedelta(months=6), "150,00", "Depósito antigo"),
+                (hoje - relativedelta(months=3), "-40,50", "Tarifa"),
+            ),
+        )
+        assert sucesso, mensagem
+        assert conta.saldo_atual == saldo_antes + Decimal("109.50")
+
+        # Os saldos mensais já gravados receberam os deltas de cada mês
+        importados = _saldos_mensais(conta.id)
+        conta_saldo_service.gerar_saldos_mensais(user_id=usuario.id, recalcular=True)
+        assert _saldos_mensais(conta.id) == importados
+
+
+def test_importacao_respeita_limite_da_conta(app):
+    with app.app_context():
+        usuario, _ = gerar_usuario_sintetico(
+            semente=6, anos=1, movimentos_por_mes=5, compras_crediario=5
+        )
+        conta = Conta.query.filter_by(usuario_id=usuario.id, tipo="Corrente").first()
+        saldo_antes = conta.saldo_atual
+        movimentos_antes = ContaMovimento.query.filter_by(conta_id=conta.id).count()
+
+        excesso = conta_saldo_service.saldo_disponivel(conta) + Decimal("0.01")
+        sucesso, mensagem, _ = _importar(
+            conta, _csv((date.today(), f"-{excesso:.2f}", "Saque"))
+        )
+
+        assert not sucesso
+        assert "insuficientes" in mensagem
+        assert conta.saldo_atual == saldo_antes
+        assert (
+            ContaMovimento.query.filter_by(conta_id=conta.id).count()
+            == movimentos_antes
+        )
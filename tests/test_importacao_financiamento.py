@@ -0,0 +1,237 @@
+# tests/test_importacao_financiamento.py
+
+import csv
+import io
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from flask_login import login_user
+from werkzeug.datastructures import FileStorage
+
+from app import db
+from app.models.conta_model import Conta
+from app.models.financiamento_model import Financiamento
+from app.models.financiamento_parcela_model import FinanciamentoParcela
+from app.models.usuario_model import Usuario
+from app.services.financiamento_service import (
+    COLUNAS_CSV_PARCELAS,
+    importar_e_processar_csv,
+)
+from app.utils import (
+    STATUS_ATRASADO,
+    STATUS_PAGO,
+    STATUS_PENDENTE,
+    TIPO_CORRENTE,
+    TIPO_PRICE,
+)
+
+HOJE = date.today()
+
+
+def _linha(numero, vencimento, principal="100.00", juros="10.00", **extras):
+    valores = {
+        "numero_parcela": str(numero),
+        "data_vencimento": vencimento,
+        "valor_principal": principal,
+        "valor_juros": juros,
+        "valor_seguro": "0",
+        "valor_seguro_2": "0",
+        "valor_seguro_3": "0",
+        "valor_taxas": "0",
+        "multa": "0",
+        "mora": "0",
+        "ajustes": "0",
+        "valor_total_previsto": "",
+        "saldo_devedor": "",
+        "data_pagamento": "",
+        "valor_pago": "",
+        "observacoes": "",
+    }
+    valores.update(extras)
+    return [valores[coluna] for coluna in COLUNAS_CSV_PARCELAS]
+
+
+def _arquivo(*linhas):
+    texto = io.StringIO()
+    escritor = csv.writer(texto)
+    escritor.writerow(COLUNAS_CSV_PARCELAS)
+    escritor.writerows(linhas)
+    return FileStorage(stream=io.BytesIO(texto.getvalue().encode("utf-8")))
+
+
+def _iso(dias):
+    return (HOJE + timedelta(days=dias)).isoformat()
+
+
+def _parcelas(financiamento_id):
+    return FinanciamentoParcela.query.filter_by(
+        financiamento_id=financiamento_id
+    ).order_by(FinanciamentoParcela.numero_parcela)
+
+
+@pytest.fixture
+def financiamento(app):
+    """Financiamento de 300,00 em 3 parcelas, com o usuário logado."""
+    with app.test_request_context():
+        usuario = Usuario(
+            nome="Teste",
+            sobrenome="Importacao",
+            email="importacao@teste.com",
+            login="importacao",
+            precisa_alterar_senha=False,
+        )
+        usuario.set_password("teste")
+        db.session.add(usuario)
+        db.session.flush()
+        conta = Conta(
+            usuario_id=usuario.id,
+            nome_banco="Banco",
+            agencia="0001",
+            conta="123",
+            tipo=TIPO_CORRENTE,
+            saldo_inicial=Decimal("0.00"),
+            saldo_atual=Decimal("0.00"),
+        )
+        db.session.add(conta)
+        db.session.flush()
+        financiamento = Financiamento(
+            usuario_id=usuario.id,
+            conta_id=conta.id,
+            nome_financiamento="VEICULO",
+            valor_total_financiado=Decimal("300.00"),
+            saldo_devedor_atual=Decimal("300.00"),
+            taxa_juros_anual=Decimal("1.5"),
+            data_inicio=HOJE - timedelta(days=60),
+            prazo_meses=3,
+            tipo_amortizacao=TIPO_PRICE,
+        )
+        db.session.add(financiamento)
+        db.session.commit()
+        login_user(usuario)
+        yield financiamento
+
+
+def _importar_valido(financiamento):
+    vencida = HOJE - timedelta(days=30)
+    return importar_e_processar_csv(
+        financiamento,
+        _arquivo(
+            _linha(
+                1,
+                vencida.strftime("%d-%m-%Y"),
+                data_pagamento=vencida.isoformat(),
+                valor_pago="110.00",
+            ),
+            _linha(2, _iso(-1), principal="99.99", observacoes="  segunda  "),
+            _linha(3, _iso(29), principal="100.01", valor_total_previsto="115.50"),
+        ),
+    )
+
+
+def test_importacao_valida(financiamento):
+    sucesso, mensagem = _importar_valido(financiamento)
+
+    assert sucesso, mensagem
+    assert [
+        (
+            p.numero_parcela,
+            p.valor_principal,
+            p.valor_total_previsto,
+            p.saldo_devedor,
+            p.status,
+            p.pago,
+            p.valor_pago,
+            p.observacoes,
+        )
+        for p in _parcelas(financiamento.id)
+    ] == [
+        (
+            1,
+            Decimal("100.00"),
+            Decimal("110.00"),
+            Decimal("300.00"),
+            STATUS_PAGO,
+            True,
+            Decimal("110.00"),
+            None,
+        ),
+        (
+            2,
+            Decimal("99.99"),
+            Decimal("109.99"),
+            Decimal("200.00"),
+            STATUS_ATRASADO,
+            False,
+            None,
+            "segunda",
+        ),
+        (
+            3,
+            Decimal("100.01"),
+            Decimal("115.50"),
+            Decimal("100.01"),
+            STATUS_PENDENTE,
+            False,
+            None,
+            None,
+        ),
+    ]
+    assert financiamento.saldo_devedor_atual == Decimal("200.00")
+
+
+def _rejeitado(financiamento, *linhas):
+    """Importa um arquivo inválido por cima de uma importação válida."""
+    assert _importar_valido(financiamento)[0]
+    antes = [(p.id, p.valor_principal) for p in _parcelas(financiamento.id)]
+
+    sucesso, mensagem = importar_e_processar_csv(financiamento, _arquivo(*linhas))
+
+    assert not sucesso
+    assert mensagem.startswith("A importação foi cancelada")
+    db.session.expire_all()
+    assert [(p.id, p.valor_principal) for p in _parcelas(financiamento.id)] == antes
+    return mensagem
+
+
+def test_datas_invalidas_listadas_por_linha(financiamento):
+    mensagem = _rejeitado(
+        financiamento,
+        _linha(1, "2026-02-30"),
+        _linha(2, "31/01/2027"),
+        _linha(3, _iso(90), data_pagamento="ontem", valor_pago="1"),
+    )
+    assert "Linha 2: data_vencimento ('2026-02-30')" in mensagem
+    assert "Linha 3: data_vencimento ('31/01/2027')" in mensagem
+    assert "Linha 4: data_pagamento ('ontem')" in mensagem
+
+
+def test_virgula_decimal_rejeitada(financiamento):
+    mensagem = _rejeitado(
+        financiamento,
+        _linha(1, _iso(30), principal="100,00"),
+        _linha(2, _iso(60), juros="1.234,56"),
+        _linha(3, _iso(90)),
+    )
+    assert "Linha 2: valor_principal ('100,00')" in mensagem
+    assert "Linha 3: valor_juros ('1.234,56')" in mensagem
+
+
+def test_numero_de_parcela_duplicado(financiamento):
+    mensagem = _rejeitado(
+        financiamento,
+        _linha(1, _iso(30)),
+        _linha(2, _iso(60)),
+        _linha(2, _iso(90)),
+    )
+    assert "Linha 3: numero_parcela ('2')" in mensagem
+    assert "Linha 4: numero_parcela ('2')" in mensagem
+
+
+def test_arquivo_parcial_rejeitado(financiamento):
+    mensagem = _rejeitado(
+        financiamento,
+        _linha(1, _iso(30), principal="150.00"),
+        _linha(2, _iso(60), principal="150.00"),
+    )
+    assert "contém 2 parcelas, mas o financiamento espera 3" in mensagem
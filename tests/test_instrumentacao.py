@@ -0,0 +1,119 @@
+# tests/test_instrumentacao.py
+
+import pytest
+from sqlalchemy import event, text
+
+from app import create_app, db
+from app.instrumentacao import impressao_digital
+from app.registro import parar_registro
+from app.services.dados_sinteticos_service import gerar_usuario_sintetico
+from tests.auxiliares import autenticar, configuracao_teste, encerrar_app
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app(
+        config_overrides=configuracao_teste(tmp_path, SQL_LIMITE_REPETICOES=5)
+    )
+
+    @app.route("/teste/consultas/<int:quantidade>")
+    def consultas_em_laco(quantidade):
+        # Uma consulta por item, com o id como literal: o padrão de um N+1
+        for id_ in range(quantidade):
+            db.session.execute(text(f"SELECT id FROM usuario WHERE id = {id_}"))
+        return "ok"
+
+    with app.app_context():
+        db.create_all(bind_key=None)
+    yield app
+    encerrar_app(app)
+
+
+class _Contador:
+    """Contagem independente dos comandos enviados ao banco."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.total = 0
+
+    def _contar(self, *args):
+        self.total += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "after_cursor_execute", self._contar)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "after_cursor_execute", self._contar)
+
+
+def _linha(app, endpoint):
+    (linha,) = [
+        linha
+        for linha in app.extensions["estatisticas_sql"].resumo()
+        if linha["endpoint"] == endpoint
+    ]
+    return linha
+
+
+def test_impressao_digital_agrupa_literais_e_listas():
+    assert (
+        impressao_digital("SELECT id FROM usuario\n   WHERE id = 7 AND login = 'a''b'")
+        == impressao_digital("SELECT id FROM usuario WHERE id = 12 AND login = 'x'")
+        == "SELECT id FROM usuario WHERE id = ? AND login = ?"
+    )
+    assert (
+        impressao_digital("SELECT * FROM conta WHERE id IN (?, ?, ?)")
+        == impressao_digital("SELECT * FROM conta WHERE id IN (%(id_1)s, %(id_2)s)")
+        == "SELECT * FROM conta WHERE id IN (?, ...)"
+    )
+    assert impressao_digital("SELECT 1 FROM conta") != impressao_digital(
+        "SELECT 1 FROM usuario"
+    )
+
+
+def test_consultas_por_requisicao_iguais_a_contagem_independente(app):
+    with app.app_context():
+        usuario, _ = gerar_usuario_sintetico(
+            semente=14, anos=1, movimentos_por_mes=2, compras_crediario=5
+        )
+        usuario_id = usuario.id
+    cliente = autenticar(app.test_client(), usuario_id)
+
+    for caminho, endpoint in (
+        ("/dashboard", "main.dashboard"),
+        ("/movimentacoes/dados", "conta_movimento.dados_movimentacoes"),
+    ):
+        app.extensions["estatisticas_sql"].limpar()
+        with app.app_context(), _Contador(db.engine) as contador:
+            assert cliente.get(caminho).status_code == 200
+
+        linha = _linha(app, endpoint)
+        assert linha["requisicoes"] == 1
+        assert contador.total > 1
+        assert linha["consultas"] == linha["max_consultas"] == contador.total
+
+
+def test_comando_repetido_acusado_como_n_mais_um(app):
+    cliente = app.test_client()
+    assert cliente.get("/teste/consultas/3").status_code == 200
+    assert cliente.get("/teste/consultas/12").status_code == 200
+
+    linha = _linha(app, "consultas_em_laco")
+    assert linha["requisicoes"] == 2
+    assert linha["consultas"] == 15
+    # Só a requisição acima do limite de 5 repetições gera alerta
+    assert linha["alertas"] == 1
+    assert linha["repeticoes"] == [
+        {
+            "sql": "SELECT id FROM usuario WHERE id = ?",
+            "maximo": 12,
+            "ocorrencias": 1,
+        }
+    ]
+
+    parar_registro(app)
+    with open(app.config["LOG_FILE"], encoding="utf-8") as arquivo:
+        log = arquivo.read()
+    assert "comando repetido 12x (possível N+1)" in log
+    assert "comando repetido 3x" not in log
@@ -0,0 +1,170 @@
+# tests/test_obrigacoes.py
+
+from datetime import date
+
+from dateutil.relativedelta import relativedelta
+
+from app import db
+from app.models.crediario_fatura_model import CrediarioFatura
+from app.models.desp_rec_movimento_model import DespRecMovimento
+from app.models.financiamento_model import Financiamento
+from app.models.financiamento_parcela_model import FinanciamentoParcela
+from app.models.salario_movimento_model import SalarioMovimento
+from app.services.dados_sinteticos_service import gerar_usuario_sintetico
+from app.utils import NATUREZA_DESPESA, NATUREZA_RECEITA, TIPO_BENEFICIO
+
+
+def _obrigacoes_por_fonte(user_id, inicio, fim, apenas_em_aberto=False):
+    """Cálculo antigo: uma consulta ORM por fonte, filtrada em Python."""
+    from app.services import obrigacao_service
+
+    linhas = set()
+    for item in DespRecMovimento.query.filter(
+        DespRecMovimento.usuario_id == user_id,
+        DespRecMovimento.data_vencimento.between(inicio, fim),
+    ):
+        linhas.add(
+            (
+                obrigacao_service.FONTE_DESP_REC,
+                item.id,
+                item.data_vencimento,
+                item.despesa_receita.natureza,
+                item.status,
+                item.valor_previsto,
+                item.valor_realizado,
+            )
+        )
+    for parcela in FinanciamentoParcela.query.join(Financiamento).filter(
+        Financiamento.usuario_id == user_id,
+        FinanciamentoParcela.data_vencimento.between(inicio, fim),
+    ):
+        linhas.add(
+            (
+                obrigacao_service.FONTE_FINANCIAMENTO,
+                parcela.id,
+                parcela.data_vencimento,
+                NATUREZA_DESPESA,
+                parcela.status,
+                parcela.valor_total_previsto,
+                parcela.valor_pago,
+            )
+        )
+    for fatura in CrediarioFatura.query.filter(
+        CrediarioFatura.usuario_id == user_id,
+        CrediarioFatura.data_vencimento_fatura.between(inicio, fim),
+    ):
+        linhas.add(
+            (
+                obrigacao_service.FONTE_CREDIARIO,
+                fatura.id,
+                fatura.data_vencimento_fatura,
+                NATUREZA_DESPESA,
+                fatura.status,
+                fatura.valor_total_fatura,
+                fatura.valor_pago_fatura,
+            )
+        )
+    for folha in SalarioMovimento.query.filter(
+        SalarioMovimento.usuario_id == user_id,
+        SalarioMovimento.data_recebimento.between(inicio, fim),
+    ):
+        liquido = sum(
+            (
+                item.valor if item.salario_item.tipo == "Provento" else -item.valor
+                for item in folha.itens
+                if item.salario_item.tipo in ("Provento", "Desconto", "Imposto")
+            ),
+            0,
+        )
+        if not apenas_em_aberto or (
+            folha.movimento_bancario_salario_id is None and liquido > 0
+        ):
+            linhas.add(
+                (
+                    obrigacao_service.FONTE_SALARIO,
+                    folha.id,
+                    folha.data_recebimento,
+                    NATUREZA_RECEITA,
+                    folha.status,
+                    liquido,
+                    None,
+                )
+            )
+        for item in folha.itens:
+            if item.salario_item.tipo != TIPO_BENEFICIO:
+                continue
+            if apenas_em_aberto and item.movimento_bancario_id is not None:
+                continue
+            linhas.add(
+                (
+                    obrigacao_service.FONTE_BENEFICIO,
+                    item.id,
+                    folha.data_recebimento,
+                    NATUREZA_RECEITA,
+                    folha.status,
+                    item.valor,
+                    None,
+                )
+            )
+    return linhas
+
+
+def _obrigacoes_unificadas(user_id, inicio, fim, **filtros):
+    from app.services import obrigacao_service
+
+    return {
+        (
+            linha["fonte"],
+            linha["id"],
+            linha["data"],
+            linha["natureza"],
+            linha["status"],
+            linha["valor_previsto"],
+            linha["valor_pago"],
+        )
+        for linha in obrigacao_service.get_obrigacoes(
+            user_id, data_inicio=inicio, data_fim=fim, **filtros
+        )
+    }
+
+
+def test_union_igual_as_consultas_por_fonte(app):
+    # Import tardio: o módulo monta consultas ao ser importado e precisa dos
+    # modelos já registrados pelo create_app
+    from app.services import obrigacao_service
+
+    with app.app_context():
+        hoje = date.today()
+        usuario, _ = gerar_usuario_sintetico(
+            semente=4, anos=1, movimentos_por_mes=1, compras_crediario=10
+        )
+        inicio = hoje.replace(day=1) - relativedelta(months=3)
+        fim = hoje.replace(day=1) + relativedelta(months=3)
+
+        esperado = _obrigacoes_por_fonte(usuario.id, inicio, fim)
+        assert {linha[0] for linha in esperado} == set(obrigacao_service.FONTES)
+        assert _obrigacoes_unificadas(usuario.id, inicio, fim) == esperado
+
+        assert _obrigacoes_unificadas(
+            usuario.id, inicio, fim, apenas_em_aberto=True
+        ) == _obrigacoes_por_fonte(usuario.id, inicio, fim, apenas_em_aberto=True)
+
+        assert _obrigacoes_unificadas(
+            usuario.id, inicio, fim, natureza=NATUREZA_RECEITA
+        ) == {linha for linha in esperado if linha[3] == NATUREZA_RECEITA}
+
+
+def test_contagem_igual_ao_numero_de_linhas(app):
+    # Import tardio: o módulo monta consultas ao ser importado e precisa dos
+    # modelos já registrados pelo create_app
+    from app.services import obrigacao_service
+
+    with app.app_context():
+        usuario, _ = gerar_usuario_sintetico(
+            semente=4, anos=1, movimentos_por_mes=1, compras_crediario=10
+        )
+        filtros = {"natureza": NATUREZA_DESPESA, "apenas_em_aberto": True}
+        contagem = db.session.scalar(
+            db.select(obrigacao_service.contar_obrigacoes_sql(usuario.id, **filtros))
+        )
+        assert contagem == len(obrigacao_service.get_obrigacoes(usuario.id, **filtros))
@@ -0,0 +1,107 @@
+# tests/test_periodo.py
+
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import extract, func, update
+
+from app import db
+from app.models.conta_movimento_model import ContaMovimento
+from app.periodo import (
+    ano_mes,
+    limites_ano,
+    limites_mes,
+    limites_meses_referencia,
+    mes_referencia,
+    no_ano,
+    no_mes,
+    vencimento_no_mes,
+)
+from app.services.dados_sinteticos_service import gerar_usuario_sintetico
+
+MESES = [(ano, mes) for ano in range(1999, 2032) for mes in range(1, 13)]
+
+
+def test_limites_iguais_a_aritmetica_de_datas():
+    for ano, mes in MESES:
+        inicio = date(ano, mes, 1)
+        # Cálculo antigo: primeiro dia do mês seguinte menos um dia
+        fim = inicio + relativedelta(months=1) - timedelta(days=1)
+        assert limites_mes(ano, mes) == (inicio, fim)
+        assert limites_meses_referencia(
+            [mes_referencia(inicio), "1998-07", "2040-02"]
+        ) == (date(1998, 7, 1), date(2040, 2, 29))
+
+        for dia in (1, 28, 29, 30, 31):
+            try:
+                esperado = date(ano, mes, dia)
+            except ValueError:
+                esperado = fim
+            assert vencimento_no_mes(ano, mes, dia) == esperado
+
+    assert limites_ano(2024) == (date(2024, 1, 1), date(2024, 12, 31))
+
+
+def test_filtros_por_intervalo_iguais_ao_extract(app):
+    with app.app_context():
+        usuario, _ = gerar_usuario_sintetico(
+            semente=16, anos=2, movimentos_por_mes=3, compras_crediario=2
+        )
+        # data_criacao (DateTime) no último segundo do dia do movimento: o
+        # fim do intervalo precisa incluir o dia inteiro
+        datas = db.session.execute(
+            db.select(ContaMovimento.id, ContaMovimento.data_movimento).where(
+                ContaMovimento.usuario_id == usuario.id
+            )
+        ).all()
+        db.session.execute(
+            update(ContaMovimento),
+            [
+                {
+                    "id": id_,
+                    "data_criacao": datetime.combine(data, time(23, 59, 59)),
+                }
+                for id_, data in datas
+            ],
+        )
+        db.session.commit()
+        movimentos = db.session.execute(
+            db.select(
+                ContaMovimento.id,
+                ContaMovimento.data_movimento,
+                ContaMovimento.data_criacao,
+            ).where(ContaMovimento.usuario_id == usuario.id)
+        ).all()
+        meses = sorted(
+            {(m.data_movimento.year, m.data_movimento.month) for m in movimentos}
+        )
+        assert len(meses) > 20
+
+        def ids(*filtros):
+            return set(
+                db.session.scalars(
+                    db.select(ContaMovimento.id).where(
+                        ContaMovimento.usuario_id == usuario.id, *filtros
+                    )
+                )
+            )
+
+        for coluna in (ContaMovimento.data_movimento, ContaMovimento.data_criacao):
+            for ano, mes in meses:
+                esperado = ids(
+                    extract("year", coluna) == ano, extract("month", coluna) == mes
+                )
+                assert esperado
+                assert ids(no_mes(coluna, ano, mes)) == esperado, (coluna, ano, mes)
+            for ano in {ano for ano, _ in meses}:
+                assert ids(no_ano(coluna, ano)) == ids(extract("year", coluna) == ano)
+
+        agrupado = db.session.execute(
+            db.select(*ano_mes(ContaMovimento.data_movimento), func.count())
+            .where(ContaMovimento.usuario_id == usuario.id)
+            .group_by("ano", "mes")
+        ).all()
+        assert {(int(a), int(m)): n for a, m, n in agrupado} == Counter(
+            (m.data_movimento.year, m.data_movimento.month) for m in movimentos
+        )
@@ -0,0 +1,93 @@
+# tests/test_planos_consulta.py
+
+import pytest
+
+from app import db
+from app.models.conta_model import Conta
+from app.services.dados_sinteticos_service import gerar_usuario_sintetico
+from app.services.plano_consulta_service import capturar_consultas, verificar_planos
+from tests.auxiliares import autenticar
+
+# Índice composto que cada tela precisa usar, como aparece no EXPLAIN QUERY
+# PLAN do SQLite ("SEARCH <tabela> USING INDEX <índice> (...)")
+INDICES_ESPERADOS = {
+    "/extratos/extrato_bancario?conta_id={conta_id}": [
+        ("conta_movimento", "ix_conta_movimento_conta_data_id"),
+    ],
+    "/alertas/contas-a-vencer": [
+        ("desp_rec_movimento", "ix_desp_rec_movimento_usuario_vencimento_status"),
+        ("crediario_fatura", "ix_crediario_fatura_usuario_vencimento"),
+        ("financiamento_parcela", "ix_financiamento_parcela_status_vencimento"),
+    ],
+    "/alertas/contas-vencidas": [
+        ("desp_rec_movimento", "ix_desp_rec_movimento_usuario_vencimento_status"),
+        ("crediario_fatura", "ix_crediario_fatura_usuario_vencimento"),
+        ("financiamento_parcela", "ix_financiamento_parcela_status_vencimento"),
+    ],
+    "/relatorios/resumo-mensal": [
+        ("desp_rec_movimento", "ix_desp_rec_movimento_usuario_vencimento_status"),
+        ("crediario_fatura", "ix_crediario_fatura_usuario_vencimento"),
+        (
+            "financiamento_parcela",
+            "ix_financiamento_parcela_financiamento_vencimento",
+        ),
+    ],
+    "/pagamentos/painel": [
+        (
+            "crediario_parcela",
+            "ix_crediario_parcela_movimento_pago_vencimento",
+        ),
+    ],
+}
+
+
+@pytest.fixture
+def usuario(app):
+    with app.app_context():
+        usuario, _ = gerar_usuario_sintetico(
+            semente=1,
+            anos=1,
+            movimentos_por_mes=5,
+            compras_crediario=10,
+            prazo_financiamento=24,
+        )
+        conta = Conta.query.filter_by(usuario_id=usuario.id).first()
+        return usuario.id, conta.id
+
+
+def _planos(app, usuario_id, rota):
+    cliente = autenticar(app.test_client(), usuario_id)
+    with app.app_context():
+        with capturar_consultas(db.engine) as consultas:
+            assert cliente.get(rota).status_code == 200
+        with db.engine.connect() as conexao:
+            return [
+                linha[-1]
+                for statement, parameters in consultas
+                for linha in conexao.exec_driver_sql(
+                    f"EXPLAIN QUERY PLAN {statement}", parameters
+                )
+            ]
+
+
+@pytest.mark.parametrize("rota", sorted(INDICES_ESPERADOS))
+def test_consultas_usam_indices_compostos(app, usuario, rota):
+    usuario_id, conta_id = usuario
+    planos = _planos(app, usuario_id, rota.format(conta_id=conta_id))
+
+    for tabela, indice in INDICES_ESPERADOS[rota]:
+        assert any(
+            detalhe.startswith(f"SEARCH {tabela} USING INDEX {indice} ")
+            or detalhe.startswith(f"SEARCH {tabela} USING COVERING INDEX {indice} ")
+            for detalhe in planos
+        ), f"{rota} não usa {indice}:\n" + "\n".join(planos)
+
+
+def test_telas_principais_sem_varredura_completa(app, usuario):
+    usuario_id, _ = usuario
+    with app.app_context():
+        problemas = verificar_planos(usuario_id)
+
+    assert problemas == [], "\n".join(
+        f"{p['rota']}: {', '.join(p['tabelas'])}\n  {p['sql']}" for p in problemas
+    )
@@ -0,0 +1,108 @@
+# tests/test_registro.py
+
+import json
+import logging
+import queue
+import threading
+
+from flask import Flask
+
+from app import db
+from app.models.usuario_model import Usuario
+from app.registro import (
+    FiltroAmostragem,
+    ManipuladorFila,
+    _arquivo_log,
+    parar_registro,
+)
+from tests.auxiliares import autenticar
+
+
+def _registro(endpoint, status=None):
+    record = logging.LogRecord(
+        "app", logging.WARNING, "registro.py", 10, "%s", ("x",), None
+    )
+    record.endpoint = endpoint
+    if status is not None:
+        record.status = status
+    return record
+
+
+def _linhas_do_log(app):
+    caminho = app.config["LOG_FILE"]
+    parar_registro(app)
+    with open(caminho, encoding="utf-8") as arquivo:
+        return [json.loads(linha) for linha in arquivo]
+
+
+def test_amostragem_separa_endpoints_e_status():
+    filtro = FiltroAmostragem(limite=2, janela=60)
+
+    assert [filtro.filter(_registro("a", 404)) for _ in range(3)] == [
+        True,
+        True,
+        False,
+    ]
+    # Mesma linha do código, outra rota ou outro status: contagem própria
+    assert filtro.filter(_registro("b", 404))
+    assert filtro.filter(_registro("a", 405))
+    assert filtro.filter(_registro("a"))
+
+
+def test_descartes_contados_sob_concorrencia():
+    handler = ManipuladorFila(queue.Queue(1))
+    threads = [
+        threading.Thread(
+            target=lambda: [handler.enqueue(_registro("a")) for _ in range(500)]
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Só o primeiro coube na fila
+    assert handler.descartados == 8 * 500 - 1
+
+
+def test_log_padrao_na_pasta_instance(tmp_path):
+    app = Flask("teste", instance_path=str(tmp_path / "instance"))
+    assert _arquivo_log(app) == str(tmp_path / "instance" / "logs" / "web_finance.log")
+    assert (tmp_path / "instance" / "logs").is_dir()
+
+
+def test_redirecionamento_antecipado_tem_duracao(app):
+    with app.app_context():
+        usuario = Usuario(
+            nome="Teste",
+            sobrenome="Registro",
+            email="registro@exemplo.com",
+            login="registro",
+            precisa_alterar_senha=True,
+        )
+        usuario.set_password("teste")
+        db.session.add(usuario)
+        db.session.commit()
+        usuario_id = usuario.id
+
+    cliente = autenticar(app.test_client(), usuario_id)
+    assert cliente.get("/dashboard").status_code == 302
+
+    acesso = [
+        linha for linha in _linhas_do_log(app) if linha.get("caminho") == "/dashboard"
+    ]
+    assert len(acesso) == 1
+    assert acesso[0]["status"] == 302
+    assert acesso[0]["duracao_ms"] is not None
+
+
+def test_erro_404_registrado_uma_vez(app):
+    assert app.test_client().get("/nao-existe").status_code == 404
+
+    linhas = [
+        linha for linha in _linhas_do_log(app) if linha.get("caminho") == "/nao-existe"
+    ]
+    assert len(linhas) == 1
+    assert linhas[0]["status"] == 404
+    assert linhas[0]["nivel"] == "WARNING"
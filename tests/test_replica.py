@@ -0,0 +1,156 @@
+# tests/test_replica.py
+
+import shutil
+import time
+from datetime import date
+
+import pytest
+from flask import session
+from sqlalchemy import event, text, update
+
+from app import create_app, db
+from app import replica
+from app.models.usuario_model import Usuario
+from app.services.dados_sinteticos_service import gerar_usuario_sintetico
+from tests.auxiliares import autenticar, configuracao_teste, encerrar_app
+
+ANO = date.today().year
+
+
+class ContadorConsultas:
+    def __init__(self, engine):
+        self.total = 0
+        event.listen(engine, "before_cursor_execute", self._contar)
+
+    def _contar(self, *args):
+        self.total += 1
+
+
+@pytest.fixture
+def app(tmp_path):
+    config = configuracao_teste(tmp_path)
+    primario = create_app(config_overrides=config)
+    with primario.app_context():
+        db.create_all(bind_key=None)
+        gerar_usuario_sintetico(
+            semente=5, anos=1, movimentos_por_mes=5, compras_crediario=10
+        )
+    encerrar_app(primario)
+
+    # Réplica em dia: cópia do arquivo do primário
+    shutil.copy(tmp_path / "web_finance.db", tmp_path / "replica.db")
+    config["SQLALCHEMY_BINDS"] = {"replica": f"sqlite:///{tmp_path / 'replica.db'}"}
+    config["REPLICA_VERIFICACAO_INTERVALO"] = 0
+    app = create_app(config_overrides=config)
+    yield app
+    encerrar_app(app)
+
+
+@pytest.fixture
+def contadores(app):
+    with app.app_context():
+        return (
+            ContadorConsultas(db.engines[None]),
+            ContadorConsultas(db.engines[replica.BIND_REPLICA]),
+        )
+
+
+def _balanco(usuario_id):
+    # Import tardio: o módulo monta consultas ao ser importado e precisa dos
+    # modelos já registrados pelo create_app
+    from app.services.relatorios_service import get_balanco_anual
+
+    return get_balanco_anual(usuario_id, ANO)
+
+
+def _usuario_id():
+    return db.session.scalars(db.select(Usuario.id)).first()
+
+
+def _divergir_primario():
+    # Alteração que só o primário enxerga
+    with db.engines[None].begin() as conexao:
+        conexao.execute(text("UPDATE resumo_mensal SET valor = valor + 1000"))
+
+
+def test_leituras_decoradas_vao_para_a_replica(app, contadores):
+    primario, replica_ = contadores
+    with app.app_context():
+        usuario_id = _usuario_id()
+        base = _balanco(usuario_id)
+        _divergir_primario()
+        primario.total = replica_.total = 0
+
+        assert _balanco(usuario_id) == base
+        assert replica_.total > 0
+        assert primario.total == 0
+
+
+@pytest.mark.parametrize("atraso", [100, None, RuntimeError("fora do ar")])
+def test_replica_atrasada_ou_fora_usa_o_primario(app, contadores, monkeypatch, atraso):
+    primario, replica_ = contadores
+    with app.app_context():
+        usuario_id = _usuario_id()
+        base = _balanco(usuario_id)
+        _divergir_primario()
+
+        def medir_atraso(engine):
+            if isinstance(atraso, Exception):
+                raise atraso
+            return atraso
+
+        monkeypatch.setattr(replica, "medir_atraso", medir_atraso)
+        primario.total = replica_.total = 0
+
+        assert _balanco(usuario_id) != base
+        assert replica_.total == 0
+
+
+def test_quem_escreveu_le_do_primario(app, contadores):
+    primario, replica_ = contadores
+    with app.app_context():
+        usuario_id = _usuario_id()
+        base = _balanco(usuario_id)
+
+    with app.test_request_context():
+        db.session.execute(
+            update(Usuario).where(Usuario.id == usuario_id).values(nome="Outro")
+        )
+        db.session.commit()
+        assert replica._CHAVE_ULTIMA_ESCRITA in session
+
+        _divergir_primario()
+        assert _balanco(usuario_id) != base
+
+        # Passado o atraso máximo, a réplica volta a ser usada
+        session[replica._CHAVE_ULTIMA_ESCRITA] = time.time() - 60
+        replica_.total = 0
+        assert _balanco(usuario_id) == base
+        assert replica_.total > 0
+
+
+def test_leitura_textual_nao_conta_como_escrita(app, contadores):
+    primario, replica_ = contadores
+    with app.test_request_context():
+        usuario_id = _usuario_id()
+        db.session.execute(text("SELECT COUNT(*) FROM usuario")).scalar()
+        db.session.connection()
+        db.session.commit()
+        assert replica._CHAVE_ULTIMA_ESCRITA not in session
+
+        replica_.total = 0
+        _balanco(usuario_id)
+        assert replica_.total > 0
+
+
+def test_pagina_de_relatorio_le_da_replica(app, contadores):
+    primario, replica_ = contadores
+    with app.app_context():
+        usuario_id = _usuario_id()
+    cliente = autenticar(app.test_client(), usuario_id)
+
+    replica_.total = 0
+    assert cliente.get("/relatorios/resumo-mensal").status_code == 200
+    assert replica_.total > 0
+    with cliente.session_transaction() as sessao:
+        assert replica._CHAVE_ULTIMA_ESCRITA not in sessao
@@ -0,0 +1,120 @@
+# tests/test_resumo_mensal.py
+
+import importlib.util
+from collections import Counter
+from decimal import Decimal
+from pathlib import Path
+
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import event
+
+from app import db
+from app.models.resumo_mensal_model import ResumoMensal
+from app.models.salario_movimento_model import SalarioMovimento
+from app.services import resumo_mensal_service
+from app.services.dados_sinteticos_service import gerar_usuario_sintetico
+from app.services.plano_consulta_service import capturar_consultas
+from app.services.resumo_mensal_service import (
+    CATEGORIA_DESPESA_FIXA,
+    CATEGORIA_RECEITA,
+    PREVISTO,
+    REALIZADO,
+)
+
+
+def _resumo(usuario_id, ano):
+    return {
+        (r.mes, r.categoria, r.tipo_valor): r.valor
+        for r in ResumoMensal.query.filter_by(usuario_id=usuario_id, ano=ano)
+    }
+
+
+def test_aplicar_deltas_cria_e_acumula_em_um_comando(app):
+    with app.app_context():
+        usuario, _ = gerar_usuario_sintetico(
+            semente=7, anos=1, movimentos_por_mes=1, compras_crediario=1
+        )
+        ano = 2001
+        deltas = {
+            (usuario.id, ano, 1, CATEGORIA_RECEITA, PREVISTO): Decimal("10.00"),
+            (usuario.id, ano, 1, CATEGORIA_DESPESA_FIXA, REALIZADO): Decimal("5.00"),
+            (usuario.id, ano, 2, CATEGORIA_RECEITA, PREVISTO): Decimal("0.00"),
+        }
+
+        comandos = Counter()
+
+        def contar(conn, cursor, statement, parameters, context, executemany):
+            comandos[statement.split()[0].upper()] += 1
+
+        event.listen(db.engine, "before_cursor_execute", contar)
+        try:
+            resumo_mensal_service.aplicar_deltas(deltas)
+            resumo_mensal_service.aplicar_deltas(
+                {(usuario.id, ano, 1, CATEGORIA_RECEITA, PREVISTO): Decimal("2.50")}
+            )
+        finally:
+            event.remove(db.engine, "before_cursor_execute", contar)
+        db.session.commit()
+
+        assert comandos == {"INSERT": 2}
+        assert _resumo(usuario.id, ano) == {
+            (1, CATEGORIA_RECEITA, PREVISTO): Decimal("12.50"),
+            (1, CATEGORIA_DESPESA_FIXA, REALIZADO): Decimal("5.00"),
+        }
+
+
+def test_contribuicoes_das_folhas_sem_consulta_por_item(app):
+    with app.app_context():
+        usuario, _ = gerar_usuario_sintetico(
+            semente=8, anos=2, movimentos_por_mes=1, compras_crediario=1
+        )
+        db.session.expire_all()
+        folhas = SalarioMovimento.query.filter_by(usuario_id=usuario.id).all()
+        assert len(folhas) > 12
+
+        with capturar_consultas(db.engine) as consultas:
+            totais = resumo_mensal_service.contribuicoes(folhas)
+        # Itens das folhas com os cadastros, qualquer que seja o volume
+        assert len(consultas) == 1
+
+        # Mesmo resultado da contribuição folha a folha
+        db.session.expire_all()
+        esperado = Counter()
+        for folha in SalarioMovimento.query.filter_by(usuario_id=usuario.id):
+            esperado.update(resumo_mensal_service.contribuicoes([folha]))
+        assert totais == esperado
+
+
+def _carregar_migracao(revisao):
+    (arquivo,) = (Path(__file__).parents[1] / "migrations" / "versions").glob(
+        f"{revisao}_*.py"
+    )
+    spec = importlib.util.spec_from_file_location(arquivo.stem, arquivo)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def test_migracao_preenche_o_resumo_dos_dados_existentes(app):
+    with app.app_context():
+        usuario, _ = gerar_usuario_sintetico(
+            semente=9, anos=1, movimentos_por_mes=2, compras_crediario=2
+        )
+        esperado = {
+            (r.ano, r.mes, r.categoria, r.tipo_valor): r.valor
+            for r in ResumoMensal.query.filter_by(usuario_id=usuario.id)
+        }
+        assert esperado
+        db.session.commit()
+        ResumoMensal.__table__.drop(db.engine)
+
+        migracao = _carregar_migracao("c8e5f31a6b24")
+        with db.engine.begin() as conexao:
+            with Operations.context(MigrationContext.configure(conexao)):
+                migracao.upgrade()
+
+        assert {
+            (r.ano, r.mes, r.categoria, r.tipo_valor): r.valor
+            for r in ResumoMensal.query.filter_by(usuario_id=usuario.id)
+        } == esperado
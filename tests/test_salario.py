@@ -0,0 +1,96 @@
+# tests/test_salario.py
+
+from decimal import Decimal
+
+from sqlalchemy import update
+
+from app import db
+from app.models.salario_movimento_model import SalarioMovimento
+from app.services.dados_sinteticos_service import gerar_usuario_sintetico
+from app.services.resumo_mensal_service import verificar_resumo
+from app.services.salario_service import verificar_totais_folhas
+from app.utils import (
+    TIPO_BENEFICIO,
+    TIPO_DESCONTO,
+    TIPO_FGTS,
+    TIPO_IMPOSTO,
+    TIPO_PROVENTO,
+)
+
+
+def _totais_pelas_verbas(folha):
+    """Cálculo antigo das propriedades do modelo, item a item."""
+
+    def somar(*tipos):
+        return sum(
+            (item.valor for item in folha.itens if item.salario_item.tipo in tipos),
+            Decimal("0.00"),
+        )
+
+    return {
+        "total_proventos": somar(TIPO_PROVENTO),
+        "salario_liquido": somar(TIPO_PROVENTO) - somar(TIPO_IMPOSTO, TIPO_DESCONTO),
+        "total_beneficios": somar(TIPO_BENEFICIO),
+        "total_fgts": somar(TIPO_FGTS),
+    }
+
+
+def _usuario():
+    usuario, _ = gerar_usuario_sintetico(
+        semente=6, anos=1, movimentos_por_mes=1, compras_crediario=1
+    )
+    return usuario.id
+
+
+def test_totais_gravados_iguais_a_soma_das_verbas(app):
+    with app.app_context():
+        usuario_id = _usuario()
+        folhas = SalarioMovimento.query.filter_by(usuario_id=usuario_id).all()
+        assert len(folhas) >= 12
+
+        for folha in folhas:
+            esperado = _totais_pelas_verbas(folha)
+            assert {coluna: getattr(folha, coluna) for coluna in esperado} == esperado
+            assert esperado["salario_liquido"] > 0
+        assert verificar_totais_folhas(usuario_id) == []
+
+
+def test_verificar_totais_encontra_e_corrige_divergencia(app):
+    with app.app_context():
+        usuario_id = _usuario()
+        folha = (
+            SalarioMovimento.query.filter_by(usuario_id=usuario_id)
+            .order_by(SalarioMovimento.id)
+            .first()
+        )
+        esperado = _totais_pelas_verbas(folha)
+        with db.engine.begin() as conexao:
+            conexao.execute(
+                update(SalarioMovimento.__table__)
+                .where(SalarioMovimento.id == folha.id)
+                .values(salario_liquido=0, total_fgts=SalarioMovimento.total_fgts + 1)
+            )
+        db.session.expire_all()
+
+        ((divergente, diferencas),) = verificar_totais_folhas(usuario_id)
+        assert divergente.id == folha.id
+        assert diferencas == {
+            "salario_liquido": (Decimal("0.00"), esperado["salario_liquido"]),
+            "total_fgts": (esperado["total_fgts"] + 1, esperado["total_fgts"]),
+        }
+        # Sem corrigir nada é gravado
+        db.session.expire_all()
+        assert db.session.get(SalarioMovimento, folha.id).salario_liquido == 0
+
+    resultado = app.test_cli_runner().invoke(
+        args=["salario", "verificar-totais", "--corrigir"]
+    )
+    assert f"Folha {folha.id} " in resultado.output
+    assert "1 folha(s) corrigida(s)." in resultado.output
+
+    with app.app_context():
+        assert verificar_totais_folhas(usuario_id) == []
+        corrigida = db.session.get(SalarioMovimento, folha.id)
+        assert corrigida.salario_liquido == esperado["salario_liquido"]
+        # A correção também acerta o resumo mensal que usa o líquido
+        assert verificar_resumo(usuario_id) == []
@@ -0,0 +1,142 @@
+# tests/test_saldo_concorrente.py
+
+import threading
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app import create_app, db
+from app.models.conta_model import Conta
+from app.models.conta_saldo_mensal_model import ContaSaldoMensal
+from app.models.usuario_model import Usuario
+from app.periodo import mes_referencia
+from app.services.conta_saldo_service import creditar_saldo, debitar_saldo
+from app.utils import TIPO_CORRENTE
+from tests.auxiliares import configuracao_teste, encerrar_app
+
+THREADS = 8
+OPERACOES_POR_THREAD = 25
+
+
+@pytest.fixture
+def app(tmp_path):
+    # Várias conexões disputando o mesmo arquivo: espera o lock de escrita
+    # em vez de falhar com "database is locked"
+    app = create_app(
+        config_overrides=configuracao_teste(
+            tmp_path, SQLALCHEMY_ENGINE_OPTIONS={"connect_args": {"timeout": 30}}
+        )
+    )
+    with app.app_context():
+        db.create_all(bind_key=None)
+    yield app
+    encerrar_app(app)
+
+
+def _conta(saldo, limite):
+    usuario = Usuario(
+        nome="Teste",
+        sobrenome="Concorrência",
+        email="concorrencia@exemplo.com",
+        login="concorrencia",
+        precisa_alterar_senha=False,
+    )
+    usuario.set_password("teste")
+    db.session.add(usuario)
+    db.session.flush()
+    conta = Conta(
+        usuario_id=usuario.id,
+        nome_banco="Banco",
+        agencia="0001",
+        conta="123",
+        tipo=TIPO_CORRENTE,
+        saldo_inicial=saldo,
+        saldo_atual=saldo,
+        limite=limite,
+    )
+    db.session.add(conta)
+    db.session.flush()
+    db.session.add(
+        ContaSaldoMensal(
+            conta_id=conta.id,
+            mes_referencia=mes_referencia(date.today()),
+            saldo_final=saldo,
+        )
+    )
+    db.session.commit()
+    return conta.id
+
+
+def _em_paralelo(app, operacao):
+    """Roda `operacao` em THREADS threads, cada uma com a sua sessão."""
+    resultados = []
+    erros = []
+    largada = threading.Barrier(THREADS)
+
+    def trabalhar():
+        try:
+            with app.app_context():
+                largada.wait()
+                for _ in range(OPERACOES_POR_THREAD):
+                    aplicado = operacao()
+                    if aplicado:
+                        db.session.commit()
+                    else:
+                        db.session.rollback()
+                    resultados.append(aplicado)
+        except Exception as e:
+            erros.append(e)
+
+    threads = [threading.Thread(target=trabalhar) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert erros == []
+    return resultados
+
+
+def _saldos(conta_id):
+    db.session.expire_all()
+    saldo_mensal = (
+        ContaSaldoMensal.query.filter_by(
+            conta_id=conta_id, mes_referencia=mes_referencia(date.today())
+        )
+        .one()
+        .saldo_final
+    )
+    return db.session.get(Conta, conta_id).saldo_atual, saldo_mensal
+
+
+def test_debitos_concorrentes_nao_ultrapassam_o_limite(app):
+    with app.app_context():
+        conta_id = _conta(Decimal("100.00"), Decimal("50.00"))
+
+    hoje = date.today()
+    resultados = _em_paralelo(
+        app, lambda: debitar_saldo(conta_id, hoje, Decimal("1.00"))
+    )
+
+    # Saldo + limite cobrem exatamente 150 dos 200 débitos de 1,00
+    assert len(resultados) == THREADS * OPERACOES_POR_THREAD
+    assert resultados.count(True) == 150
+    assert resultados.count(False) == THREADS * OPERACOES_POR_THREAD - 150
+    with app.app_context():
+        assert _saldos(conta_id) == (Decimal("-50.00"), Decimal("-50.00"))
+
+
+def test_creditos_concorrentes_nao_perdem_atualizacoes(app):
+    with app.app_context():
+        conta_id = _conta(Decimal("0.00"), None)
+
+    hoje = date.today()
+    resultados = _em_paralelo(
+        app, lambda: creditar_saldo(conta_id, hoje, Decimal("2.50"))
+    )
+
+    assert all(resultados)
+    total = Decimal("2.50") * THREADS * OPERACOES_POR_THREAD
+    with app.app_context():
+        assert _saldos(conta_id) == (total, total)
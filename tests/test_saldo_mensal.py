@@ -0,0 +1,133 @@
+# tests/test_saldo_mensal.py
+
+from datetime import date
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+
+from app import db
+from app.models.conta_model import Conta
+from app.models.conta_movimento_model import ContaMovimento
+from app.models.conta_saldo_mensal_model import ContaSaldoMensal
+from app.models.conta_transacao_model import ContaTransacao
+from app.services import conta_saldo_service
+from app.services.dados_sinteticos_service import gerar_usuario_sintetico
+from app.services.plano_consulta_service import capturar_consultas
+from app.utils import TIPO_CREDITO
+from tests.auxiliares import autenticar
+
+
+def _saldo_esperado(conta, data_inicio_mes):
+    return Decimal(str(conta.saldo_inicial)) + conta_saldo_service._somar_movimentos(
+        conta.id, None, data_inicio_mes
+    )
+
+
+def _conferir_todos_os_meses(conta, meses):
+    inicio = date.today().replace(day=1)
+    for atraso in range(meses):
+        mes = inicio - relativedelta(months=atraso)
+        assert conta_saldo_service.get_saldo_anterior(
+            conta, mes.year, mes.month
+        ) == _saldo_esperado(conta, mes), mes
+
+
+def test_extrato_nao_grava_saldo_mensal(app):
+    with app.app_context():
+        usuario, _ = gerar_usuario_sintetico(
+            semente=3, anos=1, movimentos_por_mes=5, compras_crediario=5
+        )
+        conta = Conta.query.filter_by(usuario_id=usuario.id, tipo="Corrente").first()
+        usuario_id, conta_id = usuario.id, conta.id
+
+    cliente = autenticar(app.test_client(), usuario_id)
+    resposta = cliente.get(
+        "/extratos/extrato_bancario",
+        query_string={"conta_id": conta_id, "mes_ano": date.today().strftime("%m-%Y")},
+    )
+    assert resposta.status_code == 200
+
+    with app.app_context():
+        assert ContaSaldoMensal.query.count() == 0
+
+
+def test_saldos_mensais_acompanham_movimentos(app):
+    with app.app_context():
+        usuario, _ = gerar_usuario_sintetico(
+            semente=4, anos=2, movimentos_por_mes=5, compras_crediario=5
+        )
+        conta = Conta.query.filter_by(usuario_id=usuario.id, tipo="Corrente").first()
+
+        gravados = conta_saldo_service.gerar_saldos_mensais(user_id=usuario.id)
+        assert gravados > 0
+        assert conta_saldo_service.gerar_saldos_mensais(user_id=usuario.id) == 0
+        _conferir_todos_os_meses(conta, 24)
+
+        # Movimento retroativo: o delta chega aos saldos mensais já gravados
+        credito = ContaTransacao.query.filter_by(
+            usuario_id=usuario.id, tipo=TIPO_CREDITO
+        ).first()
+        data_movimento = date.today() - relativedelta(months=6)
+        db.session.add(
+            ContaMovimento(
+                usuario_id=usuario.id,
+                conta_id=conta.id,
+                conta_transacao_id=credito.id,
+                data_movimento=data_movimento,
+                valor=Decimal("123.45"),
+                descricao="retroativo",
+            )
+        )
+        assert conta_saldo_service.creditar_saldo(
+            conta.id, data_movimento, Decimal("123.45")
+        )
+        db.session.commit()
+        _conferir_todos_os_meses(conta, 24)
+
+        # Recalcular regrava todos os meses com o mesmo resultado
+        assert (
+            conta_saldo_service.gerar_saldos_mensais(
+                user_id=usuario.id, recalcular=True
+            )
+            == gravados
+        )
+        _conferir_todos_os_meses(conta, 24)
+
+
+def test_movimento_do_mes_grava_o_saldo_do_mes_fechado(app):
+    with app.app_context():
+        usuario, _ = gerar_usuario_sintetico(
+            semente=9, anos=1, movimentos_por_mes=5, compras_crediario=5
+        )
+        conta = Conta.query.filter_by(usuario_id=usuario.id, tipo="Corrente").first()
+        # Nenhuma execução de gerar_saldos_mensais
+        ContaSaldoMensal.query.delete()
+        db.session.commit()
+
+        hoje = date.today()
+        credito = ContaTransacao.query.filter_by(
+            usuario_id=usuario.id, tipo=TIPO_CREDITO
+        ).first()
+        db.session.add(
+            ContaMovimento(
+                usuario_id=usuario.id,
+                conta_id=conta.id,
+                conta_transacao_id=credito.id,
+                data_movimento=hoje,
+                valor=Decimal("10.00"),
+                descricao="hoje",
+            )
+        )
+        assert conta_saldo_service.creditar_saldo(conta.id, hoje, Decimal("10.00"))
+        db.session.commit()
+
+        inicio_mes = hoje.replace(day=1)
+        mes_fechado = (inicio_mes - relativedelta(months=1)).strftime("%Y-%m")
+        assert [s.mes_referencia for s in ContaSaldoMensal.query] == [mes_fechado]
+
+        # O extrato do mês corrente lê o saldo anterior em uma consulta
+        db.session.refresh(conta)
+        with capturar_consultas(db.engine) as consultas:
+            saldo = conta_saldo_service.get_saldo_anterior(conta, hoje.year, hoje.month)
+        assert len(consultas) == 1
+        assert saldo == _saldo_esperado(conta, inicio_mes)
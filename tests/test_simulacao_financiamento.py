@@ -0,0 +1,233 @@
+# tests/test_simulacao_financiamento.py
+
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+import pytest
+from dateutil.relativedelta import relativedelta
+
+from app import db
+from app.models.conta_model import Conta
+from app.models.financiamento_model import Financiamento
+from app.models.usuario_model import Usuario
+from app.services.simulacao_financiamento_service import (
+    ESTRATEGIA_PARCELA,
+    ESTRATEGIA_PRAZO,
+    gerar_cronograma,
+    ler_cenarios,
+    simular_cenarios,
+    taxa_mensal,
+)
+from app.utils import TIPO_CORRENTE, TIPO_PRICE, TIPO_SAC
+from tests.auxiliares import autenticar
+
+SALDO = 120000.0
+TAXA_ANUAL = 9.5
+PRAZO = 120
+PRIMEIRA = date(2026, 1, 15)
+
+
+def _simular_mes_a_mes(tipo, extras=None, estrategia=ESTRATEGIA_PRAZO):
+    """Simulação escalar, mês a mês, de um cenário: (juros_total, meses, prestações)."""
+    extras = extras or {}
+    taxa = taxa_mensal(TAXA_ANUAL)
+
+    def price(saldo, meses):
+        return saldo * taxa / (1 - (1 + taxa) ** -meses)
+
+    saldo = SALDO
+    cota = saldo / PRAZO if tipo == TIPO_SAC else price(saldo, PRAZO)
+    juros_total, meses, prestacoes = 0.0, 0, []
+    for mes in range(1, PRAZO + 1):
+        if saldo <= 0:
+            break
+        juros = saldo * taxa
+        if tipo == TIPO_SAC:
+            amortizacao = min(cota, saldo)
+        else:
+            amortizacao = min(max(cota - juros, 0), saldo)
+        saldo -= amortizacao
+        extra = min(extras.get(mes, 0), saldo)
+        saldo -= extra
+        if saldo < 0.005:
+            saldo = 0
+        juros_total += juros
+        meses = mes
+        prestacoes.append(amortizacao + juros)
+        restantes = PRAZO - mes
+        if estrategia == ESTRATEGIA_PARCELA and extra > 0 and restantes > 0:
+            cota = saldo / restantes if tipo == TIPO_SAC else price(saldo, restantes)
+    return juros_total, meses, prestacoes
+
+
+def _cenario(amortizacoes, estrategia=ESTRATEGIA_PRAZO):
+    return {"estrategia": estrategia, "amortizacoes": amortizacoes}
+
+
+def _simular(tipo, *cenarios):
+    return simular_cenarios(
+        SALDO,
+        TAXA_ANUAL,
+        PRAZO,
+        tipo,
+        ler_cenarios(list(cenarios), PRAZO, PRIMEIRA),
+        PRIMEIRA,
+    )
+
+
+@pytest.mark.parametrize("tipo", [TIPO_SAC, TIPO_PRICE])
+def test_cronograma_em_forma_fechada_igual_ao_calculo_mes_a_mes(tipo):
+    cronograma = gerar_cronograma(SALDO, TAXA_ANUAL, PRAZO, tipo)
+    juros_total, meses, prestacoes = _simular_mes_a_mes(tipo)
+
+    assert meses == PRAZO
+    np.testing.assert_allclose(cronograma["prestacao"], prestacoes, atol=1e-6)
+    assert cronograma["juros"].sum() == pytest.approx(juros_total)
+    assert cronograma["amortizacao"].sum() == pytest.approx(SALDO)
+    assert cronograma["saldo_devedor"][-1] == pytest.approx(0, abs=1e-6)
+    if tipo == TIPO_SAC:
+        assert np.ptp(cronograma["amortizacao"]) == pytest.approx(0)
+    else:
+        assert np.ptp(cronograma["prestacao"]) == pytest.approx(0)
+
+
+@pytest.mark.parametrize("tipo", [TIPO_SAC, TIPO_PRICE])
+@pytest.mark.parametrize("estrategia", [ESTRATEGIA_PRAZO, ESTRATEGIA_PARCELA])
+def test_cenarios_iguais_a_simulacao_mes_a_mes(tipo, estrategia):
+    extras = {12: 20000.0, 36: 15000.0}
+    resultado = _simular(
+        tipo,
+        _cenario(
+            [{"mes": mes, "valor": valor} for mes, valor in extras.items()],
+            estrategia,
+        ),
+    )
+
+    juros_base, meses_base, _ = _simular_mes_a_mes(tipo)
+    juros, meses, prestacoes = _simular_mes_a_mes(tipo, extras, estrategia)
+    base = resultado["base"]
+    (cenario,) = resultado["cenarios"]
+
+    assert base["meses"] == meses_base
+    assert base["juros_total"] == round(juros_base, 2)
+    assert cenario["meses"] == meses
+    assert cenario["juros_total"] == round(juros, 2)
+    assert cenario["total_amortizado"] == 35000.0
+    assert cenario["economia_juros"] > 0
+    assert cenario["proxima_prestacao"] == round(prestacoes[12], 2)
+
+    if estrategia == ESTRATEGIA_PRAZO:
+        # Mantém a parcela e termina antes
+        assert cenario["meses_reduzidos"] > 0
+    else:
+        # Mantém o prazo e a parcela cai depois da amortização
+        assert cenario["meses_reduzidos"] == 0
+        assert cenario["proxima_prestacao"] < round(prestacoes[11], 2)
+
+
+def test_amortizacao_por_data_equivale_ao_numero_do_mes():
+    data = (PRIMEIRA + relativedelta(months=23, days=3)).isoformat()
+    por_data, por_mes = _simular(
+        TIPO_PRICE,
+        _cenario([{"data": data, "valor": 10000}]),
+        _cenario([{"mes": 24, "valor": 10000}]),
+    )["cenarios"]
+
+    assert {**por_data, "nome": None} == {**por_mes, "nome": None}
+
+
+def test_amortizacao_que_quita_o_saldo_encerra_o_cenario():
+    (cenario,) = _simular(TIPO_SAC, _cenario([{"mes": 2, "valor": SALDO}]))["cenarios"]
+    assert cenario["meses"] == 2
+    assert cenario["total_amortizado"] == pytest.approx(SALDO - 2 * SALDO / PRAZO)
+
+
+@pytest.mark.parametrize(
+    "cenarios",
+    [
+        [],
+        None,
+        [_cenario([{"mes": 1, "valor": 100}], estrategia="outra")],
+        [_cenario([{"mes": PRAZO + 1, "valor": 100}])],
+        [_cenario([{"mes": 1, "valor": 0}])],
+        [_cenario([{"data": "15/01/2026", "valor": 100}])],
+        [{"extra_mensal": -1}],
+    ],
+)
+def test_cenarios_invalidos(cenarios):
+    with pytest.raises(ValueError):
+        ler_cenarios(cenarios, PRAZO, PRIMEIRA)
+
+
+def _financiamento():
+    usuario = Usuario(
+        nome="Teste",
+        sobrenome="Simulacao",
+        email="simulacao@teste.com",
+        login="simulacao",
+        precisa_alterar_senha=False,
+    )
+    usuario.set_password("teste")
+    db.session.add(usuario)
+    db.session.flush()
+    conta = Conta(
+        usuario_id=usuario.id,
+        nome_banco="Banco",
+        agencia="0001",
+        conta="123",
+        tipo=TIPO_CORRENTE,
+        saldo_inicial=Decimal("0.00"),
+        saldo_atual=Decimal("0.00"),
+    )
+    db.session.add(conta)
+    db.session.flush()
+    financiamento = Financiamento(
+        usuario_id=usuario.id,
+        conta_id=conta.id,
+        nome_financiamento="IMOVEL",
+        valor_total_financiado=Decimal(str(SALDO)),
+        saldo_devedor_atual=Decimal(str(SALDO)),
+        taxa_juros_anual=Decimal(str(TAXA_ANUAL)),
+        data_inicio=PRIMEIRA,
+        prazo_meses=PRAZO,
+        tipo_amortizacao=TIPO_SAC,
+    )
+    db.session.add(financiamento)
+    db.session.commit()
+    return usuario.id, financiamento.id
+
+
+def test_rota_simular(app):
+    with app.app_context():
+        usuario_id, financiamento_id = _financiamento()
+    cliente = autenticar(app.test_client(), usuario_id)
+    url = f"/financiamentos/{financiamento_id}/simular"
+
+    resposta = cliente.post(
+        url,
+        json={
+            "cenarios": [_cenario([{"mes": 12, "valor": 20000}])],
+            "cronograma": True,
+        },
+    )
+    assert resposta.status_code == 200
+    dados = resposta.get_json()
+    assert dados["parametros"]["prazo_meses"] == PRAZO
+    assert dados["parametros"]["data_primeira_parcela"] == PRIMEIRA.isoformat()
+    assert dados["cenarios"][0]["meses"] < dados["base"]["meses"] == PRAZO
+    assert len(dados["cronograma"]["prestacao"]) == PRAZO
+
+    resposta = cliente.post(
+        url, json={"cenarios": [_cenario([{"mes": 0, "valor": 100}])]}
+    )
+    assert resposta.status_code == 400
+    assert "Cenário 1" in resposta.get_json()["error"]
+
+    assert cliente.post(url, json={}).status_code == 400
+    assert (
+        cliente.post(
+            f"/financiamentos/{financiamento_id + 1}/simular", json={}
+        ).status_code
+        == 404
+    )
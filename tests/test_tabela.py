@@ -0,0 +1,127 @@
+# tests/test_tabela.py
+
+from datetime import date, timedelta
+
+from sqlalchemy import update
+
+from app import db
+from app.models.conta_movimento_model import ContaMovimento
+from app.models.conta_transacao_model import ContaTransacao
+from app.services.dados_sinteticos_service import gerar_usuario_sintetico
+from tests.auxiliares import autenticar
+
+HOJE = date.today()
+PERIODO = {
+    "data_inicial": (HOJE - timedelta(days=800)).isoformat(),
+    "data_final": (HOJE + timedelta(days=400)).isoformat(),
+}
+# Ordem das colunas enviada pelo DataTables na listagem de movimentações
+COLUNAS = ["id", "conta_nome", "tipo_movimento", "data_movimento", "valor"]
+
+
+def _usuario(app):
+    with app.app_context():
+        usuario, _ = gerar_usuario_sintetico(
+            semente=12, anos=1, movimentos_por_mes=8, compras_crediario=2
+        )
+        return usuario.id
+
+
+def _ordem_esperada(app, usuario_id, coluna, direcao):
+    """Todos os ids ordenados em Python por (coluna, id)."""
+    with app.app_context():
+        linhas = db.session.execute(
+            db.select(
+                ContaMovimento.id,
+                ContaMovimento.data_movimento,
+                ContaMovimento.valor,
+                ContaTransacao.tipo,
+            )
+            .join(ContaTransacao)
+            .where(ContaMovimento.usuario_id == usuario_id)
+        ).all()
+    chave = {
+        "tipo_movimento": lambda linha: (linha.tipo, linha.id),
+        "data_movimento": lambda linha: (linha.data_movimento, linha.id),
+        "valor": lambda linha: (linha.valor, linha.id),
+    }[coluna]
+    return [linha.id for linha in sorted(linhas, key=chave, reverse=direcao == "desc")]
+
+
+def _pagina(cliente, coluna, direcao, **extras):
+    parametros = {
+        **PERIODO,
+        "length": 7,
+        "order[0][column]": COLUNAS.index(coluna),
+        "order[0][dir]": direcao,
+        **{f"columns[{i}][data]": nome for i, nome in enumerate(COLUNAS)},
+        **extras,
+    }
+    resposta = cliente.get("/movimentacoes/dados", query_string=parametros)
+    assert resposta.status_code == 200
+    return resposta.get_json()
+
+
+def test_cursor_igual_ao_offset_com_chaves_empatadas(app):
+    usuario_id = _usuario(app)
+    cliente = autenticar(app.test_client(), usuario_id)
+
+    # tipo_movimento só tem dois valores e há várias movimentações por dia:
+    # quase toda fronteira de página cai no meio de um empate
+    for coluna in ("tipo_movimento", "data_movimento", "valor"):
+        for direcao in ("asc", "desc"):
+            esperado = _ordem_esperada(app, usuario_id, coluna, direcao)
+            assert len(esperado) > 50
+
+            por_cursor, por_offset, cursor = [], [], None
+            while True:
+                extras = {"apos": cursor} if cursor else {}
+                resposta = _pagina(cliente, coluna, direcao, **extras)
+                por_cursor += [linha["id"] for linha in resposta["data"]]
+                cursor = resposta["cursor"]
+                if not cursor:
+                    break
+            for inicio in range(0, len(esperado), 7):
+                resposta = _pagina(cliente, coluna, direcao, start=inicio)
+                por_offset += [linha["id"] for linha in resposta["data"]]
+
+            assert por_cursor == esperado, (coluna, direcao)
+            assert por_offset == esperado, (coluna, direcao)
+
+
+def test_busca_trata_curingas_como_texto(app):
+    usuario_id = _usuario(app)
+    with app.app_context():
+        ids = db.session.scalars(
+            db.select(ContaMovimento.id)
+            .where(ContaMovimento.usuario_id == usuario_id)
+            .order_by(ContaMovimento.id)
+            .limit(5)
+        ).all()
+        descricoes = [
+            "Desconto 100% a vista",
+            "Desconto 100 a vista",
+            "Ref cod_7",
+            "Ref codx7",
+            "Pasta C:\\docs",
+        ]
+        for id_, descricao in zip(ids, descricoes):
+            db.session.execute(
+                update(ContaMovimento)
+                .where(ContaMovimento.id == id_)
+                .values(descricao=descricao)
+            )
+        db.session.commit()
+    cliente = autenticar(app.test_client(), usuario_id)
+
+    def buscar(termo):
+        resposta = _pagina(
+            cliente, "data_movimento", "desc", length=200, **{"search[value]": termo}
+        )
+        assert resposta["recordsFiltered"] == len(resposta["data"])
+        return [linha["id"] for linha in resposta["data"]]
+
+    assert buscar("100%") == [ids[0]]
+    assert sorted(buscar("desconto 100")) == ids[:2]
+    assert buscar("cod_7") == [ids[2]]
+    assert buscar("C:\\docs") == [ids[4]]